@@ -6,6 +6,7 @@ from tkinter import Listbox, END, BROWSE, filedialog, messagebox
 
 from ui_scale import scale
 from db.distributions_repo import get_distributions_for_period, list_period_ids_with_distributions
+from db.money import to_cents
 try:
     from payroll.context import PayrollContext
     from payroll.pay_calendar import PayCalendarService
@@ -130,6 +131,7 @@ class AnalyseTab:
         right_controls.grid(row=0, column=1, sticky=EW, padx=(10, 0))
         right_controls.columnconfigure(1, weight=2)
         right_controls.columnconfigure(2, weight=1)
+        right_controls.columnconfigure(3, weight=1)
         ttk.Label(right_controls, text="Metric:").grid(row=0, column=0, sticky=W)
         self.metric_combo = ttk.Combobox(
             right_controls,
@@ -145,6 +147,12 @@ class AnalyseTab:
             command=self._export_current_view,
         )
         self.export_btn.grid(row=0, column=2, sticky=EW)
+        self.export_bi_btn = ttk.Button(
+            right_controls,
+            text="Export BI…",
+            command=self._export_fact_tables,
+        )
+        self.export_bi_btn.grid(row=0, column=3, sticky=EW, padx=(6, 0))
         self.chart_canvas = tk.Canvas(chart_group, height=scale(420), background="#fafafa", highlightthickness=0)
         self.chart_canvas.pack(fill=BOTH, expand=True, padx=6, pady=6)
         self._chart_resize_job = None
@@ -273,9 +281,9 @@ class AnalyseTab:
             if not date:
                 continue
             inputs = dist.get("inputs", {}) if isinstance(dist.get("inputs", {}), dict) else {}
-            ventes_nettes = to_float(inputs.get("Ventes Nettes", 0.0))
-            per_day[date] = per_day.get(date, 0.0) + ventes_nettes
-        return per_day
+            ventes_cents = to_cents(to_float(inputs.get("Ventes Nettes", 0.0))) or 0
+            per_day[date] = per_day.get(date, 0) + ventes_cents
+        return {date: cents / 100 for date, cents in per_day.items()}
 
     def update_chart(self):
         """
@@ -351,10 +359,8 @@ class AnalyseTab:
         if agg_mode == "distribution":
             rows = []
             for date_iso, shift, shift_instance, inputs, employees in self._iter_distributions(self.current_distributions):
-                ventes = to_float(inputs.get("Ventes Nettes", 0.0))
-                hours = self._collect_service_hours(employees)
-                tips = self._compute_adjusted_tips(inputs)
-                rows.append((date_iso, shift, shift_instance, {"ventes_nettes": ventes, "service_hours": hours, "tips_adj": tips}))
+                units = self._distribution_units(inputs, employees)
+                rows.append((date_iso, shift, shift_instance, self._record_from_units(units)))
 
             from datetime import datetime
             def sort_key(item):
@@ -429,6 +435,24 @@ class AnalyseTab:
             return
         messagebox.showinfo("Export", f"Export terminé:\n{path}")
 
+    def _export_fact_tables(self):
+        out_dir = filedialog.askdirectory(title="Dossier de l'export BI (toutes les périodes)")
+        if not out_dir:
+            return
+        try:
+            from db.analytics_export import export_fact_tables
+
+            summary = export_fact_tables(out_dir)
+        except Exception as exc:
+            messagebox.showerror("Export BI", f"Échec de l'export:\n{exc}")
+            return
+        rows = summary["rows"]
+        messagebox.showinfo(
+            "Export BI",
+            f"Export terminé ({summary['format']}):\n{out_dir}\n\n"
+            f"Distributions: {rows['distributions']}  |  Employés: {rows['allocations']}  |  Jours: {rows['daily']}",
+        )
+
     def _metric_from_record(self, rec: dict, metric_key: str) -> float:
         ventes = float(rec.get("ventes_nettes", 0.0) or 0.0)
         hours = float(rec.get("service_hours", 0.0) or 0.0)
@@ -662,11 +686,49 @@ class AnalyseTab:
         return float(total)
 
     def _compute_adjusted_tips(self, inputs: dict) -> float:
-        """(- Dépot Net) + Cash + (Frais Admin * 0.8). Use to_float for all fields."""
-        depot_net = to_float(inputs.get("Dépot Net", 0.0))
-        cash = to_float(inputs.get("Cash", 0.0))
-        frais_admin = to_float(inputs.get("Frais Admin", 0.0))
-        return (-depot_net) + cash + (frais_admin * 0.8)
+        """(- Dépot Net) + Cash + (Frais Admin * 0.8)."""
+        return self._adjusted_tips_milli(inputs) / 1000
+
+    # Money is summed as integers: ventes in cents, adjusted tips in tenths of a
+    # cent (Frais Admin * 0.8 has one more decimal); records convert at the end.
+    def _adjusted_tips_milli(self, inputs: dict) -> int:
+        depot_net = to_cents(to_float(inputs.get("Dépot Net", 0.0))) or 0
+        cash = to_cents(to_float(inputs.get("Cash", 0.0))) or 0
+        frais_admin = to_cents(to_float(inputs.get("Frais Admin", 0.0))) or 0
+        return (cash - depot_net) * 10 + frais_admin * 8
+
+    def _distribution_units(self, inputs: dict, employees: list) -> list:
+        """[ventes cents, service hours, adjusted tips in tenths of a cent]"""
+        return [
+            to_cents(to_float(inputs.get("Ventes Nettes", 0.0))) or 0,
+            self._collect_service_hours(employees),
+            self._adjusted_tips_milli(inputs),
+        ]
+
+    def _add_units(self, out: dict, key, units: list) -> None:
+        acc = out.get(key)
+        if acc is None:
+            out[key] = list(units)
+            return
+        acc[0] += units[0]
+        acc[1] += units[1]
+        acc[2] += units[2]
+
+    def _record_from_units(self, units: list) -> dict:
+        return {
+            "ventes_nettes": units[0] / 100,
+            "service_hours": float(units[1]),
+            "tips_adj": units[2] / 1000,
+        }
+
+    def _sum_records(self, records) -> dict:
+        """Total of aggregated records, summed exactly."""
+        total = [0, 0.0, 0]
+        for rec in records:
+            total[0] += round(float(rec.get("ventes_nettes", 0.0) or 0.0) * 100)
+            total[1] += float(rec.get("service_hours", 0.0) or 0.0)
+            total[2] += round(float(rec.get("tips_adj", 0.0) or 0.0) * 1000)
+        return self._record_from_units(total)
 
     # ----------------------- Aggregations -----------------------
     def _aggregate_per_day(self, distributions: list):
@@ -682,17 +744,8 @@ class AnalyseTab:
         """
         out = {}
         for date_iso, _shift, _shift_instance, inputs, employees in self._iter_distributions(distributions):
-            ventes = to_float(inputs.get("Ventes Nettes", 0.0))
-            hours = self._collect_service_hours(employees)
-            tips = self._compute_adjusted_tips(inputs)
-            rec = out.get(date_iso)
-            if not rec:
-                rec = {"ventes_nettes": 0.0, "service_hours": 0.0, "tips_adj": 0.0}
-                out[date_iso] = rec
-            rec["ventes_nettes"] += float(ventes or 0.0)
-            rec["service_hours"] += float(hours or 0.0)
-            rec["tips_adj"] += float(tips or 0.0)
-        return out
+            self._add_units(out, date_iso, self._distribution_units(inputs, employees))
+        return {key: self._record_from_units(units) for key, units in out.items()}
 
     def _aggregate_per_day_shift(self, distributions: list):
         """
@@ -701,18 +754,8 @@ class AnalyseTab:
         """
         out = {}
         for date_iso, shift, _shift_instance, inputs, employees in self._iter_distributions(distributions):
-            ventes = to_float(inputs.get("Ventes Nettes", 0.0))
-            hours = self._collect_service_hours(employees)
-            tips = self._compute_adjusted_tips(inputs)
-            key = (date_iso, shift)
-            rec = out.get(key)
-            if not rec:
-                rec = {"ventes_nettes": 0.0, "service_hours": 0.0, "tips_adj": 0.0}
-                out[key] = rec
-            rec["ventes_nettes"] += float(ventes or 0.0)
-            rec["service_hours"] += float(hours or 0.0)
-            rec["tips_adj"] += float(tips or 0.0)
-        return out
+            self._add_units(out, (date_iso, shift), self._distribution_units(inputs, employees))
+        return {key: self._record_from_units(units) for key, units in out.items()}
 
     def _aggregate_per_weekday(self, distributions: list):
         """
@@ -733,17 +776,8 @@ class AnalyseTab:
                 weekday_name = dt.strftime("%A")
             except Exception:
                 continue
-            ventes = to_float(inputs.get("Ventes Nettes", 0.0))
-            hours = self._collect_service_hours(employees)
-            tips = self._compute_adjusted_tips(inputs)
-            rec = out.get(weekday_name)
-            if not rec:
-                rec = {"ventes_nettes": 0.0, "service_hours": 0.0, "tips_adj": 0.0}
-                out[weekday_name] = rec
-            rec["ventes_nettes"] += float(ventes or 0.0)
-            rec["service_hours"] += float(hours or 0.0)
-            rec["tips_adj"] += float(tips or 0.0)
-        return out
+            self._add_units(out, weekday_name, self._distribution_units(inputs, employees))
+        return {key: self._record_from_units(units) for key, units in out.items()}
 
     # ----------------------- Summary table -----------------------
     def _update_summary_table(self, distributions: list):
@@ -785,11 +819,7 @@ class AnalyseTab:
                 ("Saturday", "Samedi"),
                 ("Sunday", "Dimanche"),
             ]
-            total = {"ventes_nettes": 0.0, "service_hours": 0.0, "tips_adj": 0.0}
-            for rec in data.values():
-                total["ventes_nettes"] += float(rec.get("ventes_nettes", 0.0) or 0.0)
-                total["service_hours"] += float(rec.get("service_hours", 0.0) or 0.0)
-                total["tips_adj"] += float(rec.get("tips_adj", 0.0) or 0.0)
+            total = self._sum_records(data.values())
             self.summary_tree.insert("", END, values=fmt_row("Total (Période)", total))
             for eng, fr in weekdays_order:
                 rec = data.get(eng)
@@ -801,11 +831,7 @@ class AnalyseTab:
         if agg_mode == "day":
             data = self._aggregate_per_day(distributions)
             from datetime import datetime
-            total = {"ventes_nettes": 0.0, "service_hours": 0.0, "tips_adj": 0.0}
-            for rec in data.values():
-                total["ventes_nettes"] += float(rec.get("ventes_nettes", 0.0) or 0.0)
-                total["service_hours"] += float(rec.get("service_hours", 0.0) or 0.0)
-                total["tips_adj"] += float(rec.get("tips_adj", 0.0) or 0.0)
+            total = self._sum_records(data.values())
             self.summary_tree.insert("", END, values=fmt_row("Total (Période)", total))
             for date_iso in sorted(data.keys()):
                 try:
@@ -818,10 +844,8 @@ class AnalyseTab:
         if agg_mode == "distribution":
             rows = []
             for date_iso, shift, shift_instance, inputs, employees in self._iter_distributions(distributions):
-                ventes = to_float(inputs.get("Ventes Nettes", 0.0))
-                hours = self._collect_service_hours(employees)
-                tips = self._compute_adjusted_tips(inputs)
-                rows.append((date_iso, shift, shift_instance, {"ventes_nettes": ventes, "service_hours": hours, "tips_adj": tips}))
+                units = self._distribution_units(inputs, employees)
+                rows.append((date_iso, shift, shift_instance, self._record_from_units(units)))
 
             from datetime import datetime
             def sort_key(item):
@@ -834,11 +858,7 @@ class AnalyseTab:
                 return (dt.toordinal() if dt else 0, order, shift_instance or 1)
 
             rows.sort(key=sort_key)
-            total = {"ventes_nettes": 0.0, "service_hours": 0.0, "tips_adj": 0.0}
-            for _date_iso, _shift, _shift_instance, rec in rows:
-                total["ventes_nettes"] += float(rec.get("ventes_nettes", 0.0) or 0.0)
-                total["service_hours"] += float(rec.get("service_hours", 0.0) or 0.0)
-                total["tips_adj"] += float(rec.get("tips_adj", 0.0) or 0.0)
+            total = self._sum_records(rec for _date_iso, _shift, _shift_instance, rec in rows)
             self.summary_tree.insert("", END, values=fmt_row("Total (Période)", total))
             for date_iso, shift, shift_instance, rec in rows:
                 try:
@@ -852,31 +872,19 @@ class AnalyseTab:
             return
 
         data = self._aggregate_per_shift(distributions)
-        total = {"ventes_nettes": 0.0, "service_hours": 0.0, "tips_adj": 0.0}
-        for rec in data.values():
-            total["ventes_nettes"] += float(rec.get("ventes_nettes", 0.0) or 0.0)
-            total["service_hours"] += float(rec.get("service_hours", 0.0) or 0.0)
-            total["tips_adj"] += float(rec.get("tips_adj", 0.0) or 0.0)
+        total = self._sum_records(data.values())
         self.summary_tree.insert("", END, values=fmt_row("Total (Période)", total))
         for shift in ("MATIN", "SOIR"):
             self.summary_tree.insert("", END, values=fmt_row(shift, data.get(shift, {})))
 
     def _aggregate_per_shift(self, distributions: list):
         """Return dict keyed by shift ('MATIN' or 'SOIR') -> aggregated values."""
-        out = {
-            "MATIN": {"ventes_nettes": 0.0, "service_hours": 0.0, "tips_adj": 0.0},
-            "SOIR": {"ventes_nettes": 0.0, "service_hours": 0.0, "tips_adj": 0.0},
-        }
+        out = {"MATIN": [0, 0.0, 0], "SOIR": [0, 0.0, 0]}
         for _date_iso, shift, _shift_instance, inputs, employees in self._iter_distributions(distributions):
             if shift not in ("MATIN", "SOIR"):
                 continue
-            ventes = to_float(inputs.get("Ventes Nettes", 0.0))
-            hours = self._collect_service_hours(employees)
-            tips = self._compute_adjusted_tips(inputs)
-            out[shift]["ventes_nettes"] += float(ventes or 0.0)
-            out[shift]["service_hours"] += float(hours or 0.0)
-            out[shift]["tips_adj"] += float(tips or 0.0)
-        return out
+            self._add_units(out, shift, self._distribution_units(inputs, employees))
+        return {key: self._record_from_units(units) for key, units in out.items()}
 
     # ----------------------- Weekday summary popup -----------------------
     def _open_weekday_summary_popup(self):
@@ -42,6 +42,7 @@ DEFAULTS: Dict[str, Any] = {
     "auto_check_updates": True,
     "ui_scale": 0.0,
     "payroll_setup_pending": False,
+    "archive_horizon_days": 730,  # PAYED periods older than this move to yearly archive files (0 = never)
 }
 
 
@@ -244,6 +245,20 @@ def set_payroll_setup_pending(pending: bool) -> None:
     cfg["payroll_setup_pending"] = bool(pending)
     save_config(cfg)
 
+# ----------------------------
+# Period archiving horizon
+# ----------------------------
+def get_archive_horizon_days() -> int:
+    try:
+        return max(0, int(load_config().get("archive_horizon_days", 730)))
+    except Exception:
+        return 730
+
+def set_archive_horizon_days(days: int) -> None:
+    cfg = load_config()
+    cfg["archive_horizon_days"] = max(0, int(days))
+    save_config(cfg)
+
 # ----------------------------
 # Backend employee files (public API)
 # ----------------------------
@@ -0,0 +1,151 @@
+# EmployeeHistory.py
+# One employee's shifts across pay periods, over any date range.
+# - Header: date range (YYYY-MM-DD) + totals for the whole range
+# - Table: one row per shift with running totals (heures, cash, sur paye,
+#   frais admin, déclaré selon la règle du résumé PDF)
+# - Rows are loaded by pages ("Charger plus") so long histories stay fast.
+
+from datetime import date, timedelta
+from tkinter import StringVar, Toplevel, END, messagebox
+
+import ttkbootstrap as ttk
+from ttkbootstrap.constants import *
+
+from db.distributions_repo import employee_history, employee_history_totals
+from icon_helper import set_app_icon
+from tree_utils import fit_columns
+from ui_scale import scale
+
+_COLUMNS = (
+    ("date", "Date", 150, "w"),
+    ("shift", "Quart", 80, "w"),
+    ("hours", "Heures", 70, "e"),
+    ("cash", "Cash", 80, "e"),
+    ("sur_paye", "Sur Paye", 80, "e"),
+    ("frais_admin", "Frais Admin", 90, "e"),
+    ("running_hours", "Σ Heures", 80, "e"),
+    ("running_cash", "Σ Cash", 90, "e"),
+    ("running_sur_paye", "Σ Sur Paye", 90, "e"),
+    ("running_frais_admin", "Σ Frais Admin", 100, "e"),
+    ("running_declared", "Σ Déclaré", 90, "e"),
+)
+
+
+def open_employee_history(parent, employee_id: int, title: str = ""):
+    return EmployeeHistoryWindow(parent, employee_id, title)
+
+
+class EmployeeHistoryWindow(Toplevel):
+    def __init__(self, parent, employee_id: int, title: str = ""):
+        super().__init__(parent)
+        self.employee_id = employee_id
+        self.title(f"Historique — {title}" if title else "Historique employé")
+        try:
+            set_app_icon(self)
+        except Exception:
+            pass
+
+        today = date.today()
+        self.start_var = StringVar(value=(today - timedelta(days=365)).isoformat())
+        self.end_var = StringVar(value=today.isoformat())
+        self.totals_var = StringVar(value="")
+        self._cursor = None
+        self._row_count = 0
+
+        self._build_ui()
+        self.reload()
+
+    def _build_ui(self):
+        header = ttk.Frame(self, padding=(10, 10, 10, 4))
+        header.pack(fill=X)
+        ttk.Label(header, text="Du").pack(side=LEFT)
+        ttk.Entry(header, textvariable=self.start_var, width=12).pack(side=LEFT, padx=(4, 10))
+        ttk.Label(header, text="Au").pack(side=LEFT)
+        ttk.Entry(header, textvariable=self.end_var, width=12).pack(side=LEFT, padx=(4, 10))
+        ttk.Button(header, text="Afficher", bootstyle="primary", command=self.reload).pack(side=LEFT)
+
+        ttk.Label(self, textvariable=self.totals_var, padding=(10, 0)).pack(fill=X)
+
+        body = ttk.Frame(self, padding=(10, 6))
+        body.pack(fill=BOTH, expand=True)
+        self.tree = ttk.Treeview(body, columns=[c[0] for c in _COLUMNS], show="headings", height=18)
+        self._width_map = {}
+        for key, heading, width, anchor in _COLUMNS:
+            self.tree.heading(key, text=heading)
+            self._width_map[key] = scale(width)
+            self.tree.column(key, width=self._width_map[key], minwidth=scale(20), anchor=anchor, stretch=True)
+        self.tree.tag_configure("odd", background="#f7f7fa")
+        self.tree.tag_configure("even", background="#ffffff")
+        scroll = ttk.Scrollbar(body, orient=VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scroll.set)
+        self.tree.pack(side=LEFT, fill=BOTH, expand=True)
+        scroll.pack(side=RIGHT, fill=Y)
+        fit_columns(self.tree, self._width_map)
+
+        footer = ttk.Frame(self, padding=(10, 0, 10, 10))
+        footer.pack(fill=X)
+        self.more_button = ttk.Button(footer, text="Charger plus", bootstyle="secondary", command=self.load_more)
+        self.more_button.pack(side=LEFT)
+        ttk.Button(footer, text="Fermer", bootstyle="secondary", command=self.destroy).pack(side=RIGHT)
+
+    def reload(self):
+        for iid in self.tree.get_children():
+            self.tree.delete(iid)
+        self._cursor = None
+        self._row_count = 0
+        start, end = self.start_var.get().strip(), self.end_var.get().strip()
+        try:
+            totals = employee_history_totals(employee_id=self.employee_id, start_date=start, end_date=end)
+        except ValueError as e:
+            messagebox.showerror("Historique", str(e), parent=self)
+            return
+        self.totals_var.set(
+            f"Quarts: {totals['shift_count']}  |  Heures: {_fmt(totals['hours'], hours=True)}  |  "
+            f"Cash: {_fmt(totals['cash'])}  |  Sur Paye: {_fmt(totals['sur_paye'])}  |  "
+            f"Frais Admin: {_fmt(totals['frais_admin'])}  |  "
+            f"Déclaré ({totals['declared_label']}): {_fmt(totals['declared'])}"
+        )
+        self._load_page(start, end)
+
+    def load_more(self):
+        if self._cursor:
+            self._load_page(self.start_var.get().strip(), self.end_var.get().strip())
+
+    def _load_page(self, start: str, end: str):
+        try:
+            page = employee_history(
+                employee_id=self.employee_id, start_date=start, end_date=end, cursor=self._cursor
+            )
+        except ValueError as e:
+            messagebox.showerror("Historique", str(e), parent=self)
+            return
+        for row in page["rows"]:
+            shift = row["shift"] or ""
+            if row["shift_instance"] and row["shift_instance"] > 1:
+                shift = f"{shift} #{row['shift_instance']}"
+            values = (
+                f"{row['date_iso']} ({row['dist_ref'] or '—'})",
+                shift,
+                _fmt(row["hours"] or 0.0, hours=True),
+                _fmt(row["cash"]),
+                _fmt(row["sur_paye"]),
+                _fmt(row["frais_admin"]),
+                _fmt(row["running_hours"], hours=True),
+                _fmt(row["running_cash"]),
+                _fmt(row["running_sur_paye"]),
+                _fmt(row["running_frais_admin"]),
+                _fmt(row["running_declared"]),
+            )
+            tag = "even" if self._row_count % 2 == 0 else "odd"
+            self.tree.insert("", END, values=values, tags=(tag,))
+            self._row_count += 1
+        self._cursor = page["next_cursor"]
+        self.more_button.configure(state=NORMAL if self._cursor else DISABLED)
+
+
+def _fmt(value, hours: bool = False) -> str:
+    if value is None:
+        return ""
+    if hours:
+        return f"{value:.4f}".rstrip("0").rstrip(".") if abs(value) < 10 else f"{value:.2f}"
+    return f"{value:.2f}"
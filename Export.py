@@ -15,11 +15,14 @@ import sqlite3
 from AppConfig import get_pdf_dir
 import time
 from db.distributions_repo import (
+    annual_declaration_rows,
     create_distribution,
     delete_distribution,
     find_distribution_by_key,
     next_shift_instance,
 )
+from db.money import from_cents
+from payroll.summary_export import DECLARED_SOURCE_CODES
 
 # -------------------- Utility --------------------
 def get_unique_filename(base_path):
@@ -523,7 +526,7 @@ def db_export(
         )
     except sqlite3.IntegrityError as exc:
         msg = str(exc)
-        if "UNIQUE constraint failed: distributions.pay_period_id, distributions.date_local, distributions.shift, distributions.shift_instance" in msg:
+        if "UNIQUE constraint failed: distributions.period_pk, distributions.date_local, distributions.shift, distributions.shift_instance" in msg:
             next_inst = next_shift_instance(
                 pay_period_id=period_info.get("id"),
                 date_local=date,
@@ -952,6 +955,135 @@ def export_payroll_summary_csv(
 
     return out_path
 
+# ===================================================================== #
+#                     Annual tip declaration report                     #
+# ===================================================================== #
+
+_MONTHS_FR = ("janvier", "février", "mars", "avril", "mai", "juin", "juillet",
+              "août", "septembre", "octobre", "novembre", "décembre")
+
+def annual_declaration_default_dir(year: int) -> str:
+    target_dir = os.path.join(_pdf_root(), "Déclarations", str(int(year)))
+    _ensure_dir(target_dir)
+    return target_dir
+
+def export_annual_declaration_csv(year: int, out_path: str, status: str = "CONFIRMED") -> str:
+    """
+    One row per employee (and role) with the year's totals and declared amount.
+    Rows are written as the aggregate query yields them (constant memory).
+    """
+    import csv
+
+    headers = [
+        "year",
+        "employee_id",
+        "employee_name",
+        "role",
+        "shift_count",
+        "hours_total",
+        "cash_total",
+        "sur_paye_total",
+        "frais_admin_total",
+        "A_total",
+        "F_total",
+        "D_total",
+        "declared_amount",
+        "declared_source",
+    ]
+    with open(out_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, delimiter=",", lineterminator="\n")
+        writer.writerow(headers)
+        for row in annual_declaration_rows(year, status=status):
+            writer.writerow([
+                row["year"],
+                row["employee_number"],
+                row["employee_name"],
+                row["role"],
+                row["shift_count"],
+                _fmt_hours_csv(row["hours"]),
+                _fmt_money_csv(from_cents(row["cash_cents"])),
+                _fmt_money_csv(from_cents(row["sur_paye_cents"])),
+                _fmt_money_csv(from_cents(row["frais_admin_cents"])),
+                _fmt_money_csv(from_cents(row["A_cents"])),
+                _fmt_money_csv(from_cents(row["F_cents"])),
+                _fmt_money_csv(from_cents(row["D_cents"])),
+                _fmt_money_csv(from_cents(row["declared_cents"])),
+                DECLARED_SOURCE_CODES.get(row["declared_label"], "N/A"),
+            ])
+    return out_path
+
+def _draw_annual_declaration_pdf(out_path: str, row: dict):
+    """One page: monthly A/F (service) or D (bussboy) sums, yearly totals, declared amount."""
+    page_w, page_h = map(int, letter)
+    left = 50
+    right = page_w - 50
+    y = page_h - 50
+    is_bus = row["role"] == "busboy"
+
+    c = canvas.Canvas(out_path, pagesize=letter)
+    c.setLineWidth(1)
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(left, y, f"{_safe_text(row['employee_name'])} — ID: {_safe_text(row['employee_number'] or '—')}")
+    y -= 24
+    c.setFont("Helvetica", 11)
+    role_label = "Bussboy" if is_bus else "Service"
+    c.drawString(left, y, f"Déclaration des pourboires {row['year']}   |   Rôle: {role_label}")
+    y -= 30
+
+    if is_bus:
+        headers = ["Mois", "Quarts", "Heures", "D"]
+        widths = [150, 90, 90, 110]
+        keys = ("D_cents",)
+    else:
+        headers = ["Mois", "Quarts", "Heures", "A (ventes)", "F"]
+        widths = [150, 80, 80, 110, 110]
+        keys = ("A_cents", "F_cents")
+    centers = _col_centers(left, widths)
+
+    c.setFont("Helvetica-Bold", 10)
+    for cx, h in zip(centers, headers):
+        c.drawCentredString(int(cx), int(y), h)
+    y -= 18
+    c.line(left, int(y + 12), right, int(y + 12))
+    c.setFont("Helvetica", 10)
+    for month in row["months"]:
+        month_num = int(month["month"][5:7]) if month["month"] else 0
+        label = f"{_MONTHS_FR[month_num - 1]} {month['month'][:4]}" if 1 <= month_num <= 12 else "—"
+        values = [label, str(month["shift_count"]), _fmt_num(month["hours"], hours=True)]
+        values += [_fmt_num(from_cents(month[key])) for key in keys]
+        for cx, v in zip(centers, values):
+            c.drawCentredString(int(cx), int(y), v)
+        y -= 18
+
+    c.line(left, int(y + 12), right, int(y + 12))
+    c.setFont("Helvetica-Bold", 10)
+    totals = ["Total", str(row["shift_count"]), _fmt_num(row["hours"], hours=True)]
+    totals += [_fmt_num(from_cents(row[key])) for key in keys]
+    for cx, v in zip(centers, totals):
+        c.drawCentredString(int(cx), int(y), v)
+    y -= 30
+
+    c.setFont("Helvetica", 11)
+    c.drawString(left, y, f"Déclaré selon {row['declared_label']}: {_fmt_num(from_cents(row['declared_cents']))}")
+    c.save()
+
+def export_annual_declaration_pdfs(year: int, out_dir: str = "", status: str = "CONFIRMED") -> List[str]:
+    """
+    One PDF per employee (and role) under {PDF_ROOT}/Déclarations/{year}/ unless
+    'out_dir' is given. Each PDF is drawn as its aggregate row arrives.
+    """
+    target_dir = out_dir or annual_declaration_default_dir(year)
+    _ensure_dir(target_dir)
+    paths: List[str] = []
+    for row in annual_declaration_rows(year, status=status):
+        base = _safe_key({"id": row["employee_number"], "name": row["employee_name"]})
+        if row["role"] == "busboy":
+            base += " - Bussboy"
+        out_path = os.path.join(target_dir, f"{base}.pdf")
+        _draw_annual_declaration_pdf(out_path, row)
+        paths.append(out_path)
+    return sorted(paths)
+
 def make_booklet(period_label: str, pdf_paths: List[str], out_file: str) -> str:
     """
     Merge per-employee PDFs into a single booklet PDF.
@@ -1,5 +1,8 @@
 # JsonViewerTab.py — distribution review & confirmation (SQLite-backed)
 
+import logging
+import threading
+
 import ttkbootstrap as ttk
 from tkinter import messagebox
 from tkinter import StringVar, END, Listbox
@@ -11,9 +14,12 @@ from tree_utils import fit_columns
 from db.distributions_repo import (
     delete_distribution,
     get_distribution,
-    list_distributions,
-    list_period_ids_with_distributions,
-    set_distribution_status,
+    list_distributions_by_status,
+    list_distributions_page,
+    list_period_status_counts,
+    prefetch_distributions,
+    search_distributions,
+    set_distribution_status_bulk,
 )
 
 try:
@@ -24,6 +30,12 @@ except Exception:
     PayCalendarService = None
 
 
+logger = logging.getLogger("tipsplit.json_viewer")
+
+# Distributions on each side of the selection kept warm in the cache.
+PREFETCH_NEIGHBOURS = 5
+
+
 class JsonViewerTab:
     def __init__(self, master, shared_data=None):
         self.master = master
@@ -34,7 +46,11 @@ class JsonViewerTab:
         # UI state
         self.pay_period_var = StringVar()
         self.json_file_var = StringVar()
+        self.filter_var = StringVar()
+        self.unconfirmed_title_var = StringVar(value="Nouvelles distributions NON-vérifiés")
+        self.confirmed_title_var = StringVar(value="Distributions confirmées")
         self.current_dist_id = None
+        self.current_dist_version = None  # checked on delete: another terminal may have changed it
         self.current_file_source = None  # 'unconfirmed' or 'confirmed'
         self.view_mode = StringVar(value="distribution")
 
@@ -45,6 +61,8 @@ class JsonViewerTab:
         # Cached distribution lists (index aligned to listbox entries)
         self.unconfirmed_entries = []
         self.confirmed_entries = []
+        # Keyset cursors for "Charger plus" (None when the list is complete)
+        self.list_cursors = {"unconfirmed": None, "confirmed": None}
 
         self._build_ui()
         self.refresh_pay_periods()
@@ -96,6 +114,23 @@ class JsonViewerTab:
             bootstyle=INFO,
         ).pack(side=LEFT, padx=5)
 
+        ttk.Label(header_frame, text="Filtre:").pack(side=LEFT, padx=(10, 0))
+        filter_entry = ttk.Entry(header_frame, textvariable=self.filter_var, width=18)
+        filter_entry.pack(side=LEFT, padx=5)
+        filter_entry.bind("<Return>", self.on_period_select)
+        ttk.Button(
+            header_frame,
+            text="Effacer",
+            command=self.clear_filter,
+            bootstyle="secondary",
+        ).pack(side=LEFT)
+        ttk.Button(
+            header_frame,
+            text="Rechercher…",
+            command=self.open_search_dialog,
+            bootstyle="outline-info",
+        ).pack(side=LEFT, padx=5)
+
         # View toggle (right side)
         view_frame = ttk.Frame(header_frame)
         view_frame.pack(side=RIGHT)
@@ -117,10 +152,10 @@ class JsonViewerTab:
         # Unconfirmed files
         unconf_frame = ttk.Frame(list_frame)
         unconf_frame.pack(side=LEFT, fill=BOTH, expand=True)
-        ttk.Label(unconf_frame, text="Nouvelles distributions NON-vérifiés").pack(anchor=W)
+        ttk.Label(unconf_frame, textvariable=self.unconfirmed_title_var).pack(anchor=W)
         unconf_lb_frame = ttk.Frame(unconf_frame)
         unconf_lb_frame.pack(fill=X, pady=5)
-        self.unconfirmed_listbox = Listbox(unconf_lb_frame, height=6)
+        self.unconfirmed_listbox = Listbox(unconf_lb_frame, height=6, selectmode=EXTENDED)
         self.unconfirmed_listbox.pack(side=LEFT, fill=BOTH, expand=True)
         unconf_scroll = ttk.Scrollbar(unconf_lb_frame, orient=VERTICAL, command=self.unconfirmed_listbox.yview)
         unconf_scroll.pack(side=RIGHT, fill=Y)
@@ -129,6 +164,15 @@ class JsonViewerTab:
             "<<ListboxSelect>>", lambda e: self.on_file_select(e, source="unconfirmed")
         )
 
+        self.unconfirmed_more_btn = ttk.Button(
+            unconf_frame,
+            text="Charger plus",
+            bootstyle="secondary-link",
+            command=lambda: self.load_more("unconfirmed"),
+            state=DISABLED,
+        )
+        self.unconfirmed_more_btn.pack(anchor=E)
+
         self.delete_btn = ttk.Button(
             unconf_frame,
             text="Supprimer cette distribution",
@@ -137,6 +181,14 @@ class JsonViewerTab:
             state=DISABLED,
         )
         self.delete_btn.pack(fill=X, pady=(0, 5))
+        self.confirm_all_btn = ttk.Button(
+            unconf_frame,
+            text="Confirmer tout",
+            bootstyle=SUCCESS,
+            command=self.confirm_all_unconfirmed,
+            state=DISABLED,
+        )
+        self.confirm_all_btn.pack(fill=X, pady=(0, 5))
 
         # Transfer button between lists
         transfer_frame = ttk.Frame(list_frame)
@@ -163,10 +215,10 @@ class JsonViewerTab:
         # Confirmed files
         conf_frame = ttk.Frame(list_frame)
         conf_frame.pack(side=LEFT, fill=BOTH, expand=True)
-        ttk.Label(conf_frame, text="Distributions confirmées").pack(anchor=W)
+        ttk.Label(conf_frame, textvariable=self.confirmed_title_var).pack(anchor=W)
         conf_lb_frame = ttk.Frame(conf_frame)
         conf_lb_frame.pack(fill=X, pady=5)
-        self.confirmed_listbox = Listbox(conf_lb_frame, height=6)
+        self.confirmed_listbox = Listbox(conf_lb_frame, height=6, selectmode=EXTENDED)
         self.confirmed_listbox.pack(side=LEFT, fill=BOTH, expand=True)
         conf_scroll = ttk.Scrollbar(conf_lb_frame, orient=VERTICAL, command=self.confirmed_listbox.yview)
         conf_scroll.pack(side=RIGHT, fill=Y)
@@ -175,6 +227,15 @@ class JsonViewerTab:
             "<<ListboxSelect>>", lambda e: self.on_file_select(e, source="confirmed")
         )
 
+        self.confirmed_more_btn = ttk.Button(
+            conf_frame,
+            text="Charger plus",
+            bootstyle="secondary-link",
+            command=lambda: self.load_more("confirmed"),
+            state=DISABLED,
+        )
+        self.confirmed_more_btn.pack(anchor=E)
+
         ttk.Label(
             conf_frame,
             text="(Le fichier combiné n'est plus requis)",
@@ -287,10 +348,11 @@ class JsonViewerTab:
     # Pay period loading
     # -----------------------
     def refresh_pay_periods(self):
+        current_id = (self.current_period or {}).get("id")
         self.period_map = {}
-        period_ids = list_period_ids_with_distributions()
         periods = []
-        for pid in period_ids:
+        for counts in list_period_status_counts():
+            pid = counts["pay_period_id"]
             info = {"id": pid}
             if self.payroll_context:
                 try:
@@ -299,16 +361,18 @@ class JsonViewerTab:
                     info = {"id": pid}
             range_label = info.get("range_label")
             label = range_label or info.get("display_id") or pid
-            periods.append((label, info))
+            if counts["unconfirmed"]:
+                label = f"{label} — {counts['unconfirmed']} à vérifier"
+            periods.append((label, {**info, "status_counts": counts}))
 
         periods.sort(key=lambda item: item[1].get("start_at_utc", ""), reverse=True)
         self.period_menu["values"] = [label for label, _ in periods]
         for label, info in periods:
             self.period_map[label] = info
 
-        # Preserve selection if possible, otherwise select first available
-        current = (self.pay_period_var.get() or "").strip()
-        if current in self.period_map:
+        # Preserve selection (by period, labels carry counts), otherwise select first available
+        current = next((label for label, info in periods if current_id and info.get("id") == current_id), None)
+        if current:
             self.pay_period_var.set(current)
         elif self.period_map:
             self.pay_period_var.set(list(self.period_map.keys())[0])
@@ -318,6 +382,95 @@ class JsonViewerTab:
         # Trigger list refresh
         self.on_period_select()
 
+    def clear_filter(self):
+        self.filter_var.set("")
+        self.on_period_select()
+
+    def open_search_dialog(self):
+        """Search every period (employee, date, weekday, reference, audit) and jump to a result."""
+        dialog = ttk.Toplevel(self.frame)
+        dialog.title("Rechercher une distribution")
+        dialog.transient(self.frame.winfo_toplevel())
+
+        frame = ttk.Frame(dialog, padding=10)
+        frame.pack(fill=BOTH, expand=True)
+        query_row = ttk.Frame(frame)
+        query_row.pack(fill=X)
+        query_var = StringVar()
+        entry = ttk.Entry(query_row, textvariable=query_var, width=40)
+        entry.pack(side=LEFT, fill=X, expand=True)
+        status_var = StringVar(value="Ex.: « tremblay mardi », « mars soir », « DIST-2025-0001 »")
+        ttk.Label(frame, textvariable=status_var).pack(fill=X, pady=(6, 4))
+
+        columns = ("dist_ref", "date_local", "shift", "status")
+        results = ttk.Treeview(frame, columns=columns, show="headings", height=15)
+        for col, heading in zip(columns, ("Référence", "Date", "Quart", "Statut")):
+            results.heading(col, text=heading)
+            results.column(col, width=scale(130), anchor=W)
+        results.pack(fill=BOTH, expand=True)
+        rows_by_iid = {}
+
+        def run_search(_event=None):
+            results.delete(*results.get_children())
+            rows_by_iid.clear()
+            try:
+                rows = search_distributions(query_var.get())
+            except Exception as e:
+                logger.exception("Recherche de distributions échouée")
+                status_var.set(f"Recherche impossible: {e}")
+                return
+            for row in rows:
+                shift = row.get("shift", "")
+                inst = row.get("shift_instance", 1)
+                iid = results.insert(
+                    "",
+                    END,
+                    values=(
+                        row.get("dist_ref", ""),
+                        row.get("date_local", ""),
+                        f"{shift} #{inst}" if inst and int(inst) > 1 else shift,
+                        "Confirmée" if row.get("status") == "CONFIRMED" else "À vérifier",
+                    ),
+                )
+                rows_by_iid[iid] = row
+            status_var.set(f"{len(rows)} résultat(s) — double-cliquez pour ouvrir.")
+
+        def open_result(_event=None):
+            selection = results.selection()
+            if selection and selection[0] in rows_by_iid:
+                self.show_search_result(rows_by_iid[selection[0]])
+
+        ttk.Button(query_row, text="Rechercher", command=run_search, bootstyle=INFO).pack(side=LEFT, padx=(6, 0))
+        entry.bind("<Return>", run_search)
+        results.bind("<Double-1>", open_result)
+        results.bind("<Return>", open_result)
+        dialog.bind("<Escape>", lambda _event: dialog.destroy())
+        entry.focus_set()
+
+    def show_search_result(self, row):
+        """Select the result's period, filter the lists on its reference and display it."""
+        label = next(
+            (label for label, info in self.period_map.items() if info.get("id") == row.get("pay_period_id")),
+            None,
+        )
+        if not label:
+            messagebox.showerror("Erreur", "Période de la distribution introuvable.")
+            return
+        self.pay_period_var.set(label)
+        self.filter_var.set(row.get("dist_ref") or "")
+        self.on_period_select()
+        for source, listbox, entries in (
+            ("unconfirmed", self.unconfirmed_listbox, self.unconfirmed_entries),
+            ("confirmed", self.confirmed_listbox, self.confirmed_entries),
+        ):
+            for idx, entry in enumerate(entries):
+                if entry.get("id") == row.get("id"):
+                    listbox.selection_clear(0, END)
+                    listbox.selection_set(idx)
+                    listbox.see(idx)
+                    self.on_file_select(None, source)
+                    return
+
     def on_period_select(self, event=None):
         # Reset lists and current selection
         self.unconfirmed_listbox.delete(0, END)
@@ -329,8 +482,13 @@ class JsonViewerTab:
         self.delete_btn.config(state=DISABLED)
         self.transfer_btn.config(state=DISABLED)
         self.transfer_back_btn.config(state=DISABLED)
+        self.confirm_all_btn.config(state=DISABLED)
         self.unconfirmed_entries = []
         self.confirmed_entries = []
+        self.list_cursors = {"unconfirmed": None, "confirmed": None}
+        self.unconfirmed_title_var.set("Nouvelles distributions NON-vérifiés")
+        self.confirmed_title_var.set("Distributions confirmées")
+        self._update_more_buttons()
 
         label = (self.pay_period_var.get() or "").strip()
         if not label:
@@ -341,26 +499,73 @@ class JsonViewerTab:
         if not self.current_period:
             return
 
-        period_id = self.current_period.get("id")
-        unconfirmed = list_distributions(pay_period_id=period_id, status="UNCONFIRMED")
-        confirmed = list_distributions(pay_period_id=period_id, status="CONFIRMED")
+        try:
+            parts = list_distributions_by_status(
+                pay_period_id=self.current_period.get("id"),
+                search=self.filter_var.get(),
+            )
+        except ValueError as e:
+            self.file_info_var.set(f"Filtre invalide: {e}")
+            return
 
-        self.unconfirmed_entries = unconfirmed
-        self.confirmed_entries = confirmed
+        unconfirmed, confirmed = parts["UNCONFIRMED"], parts["CONFIRMED"]
+        self.unconfirmed_title_var.set(f"Nouvelles distributions NON-vérifiés ({unconfirmed['count']})")
+        self.confirm_all_btn.config(state=NORMAL if unconfirmed["count"] else DISABLED)
+        self.confirmed_title_var.set(f"Distributions confirmées ({confirmed['count']})")
+        self._append_entries("unconfirmed", unconfirmed["rows"], unconfirmed["next_cursor"])
+        self._append_entries("confirmed", confirmed["rows"], confirmed["next_cursor"])
 
-        for row in unconfirmed:
-            shift = row.get("shift", "")
-            inst = row.get("shift_instance", 1)
-            shift_label = f"{shift} #{inst}" if inst and int(inst) > 1 else shift
-            display = f"{row.get('date_local', '')} {shift_label} — {row.get('dist_ref', '')}"
-            self.unconfirmed_listbox.insert(END, display)
+        # Load the listed distributions in the background so the first clicks are instant.
+        self._prefetch_async([row.get("id") for row in unconfirmed["rows"] + confirmed["rows"]])
 
-        for row in confirmed:
+    def load_more(self, source):
+        cursor = self.list_cursors.get(source)
+        if not cursor or not self.current_period:
+            return
+        try:
+            page = list_distributions_page(
+                pay_period_id=self.current_period.get("id"),
+                status="UNCONFIRMED" if source == "unconfirmed" else "CONFIRMED",
+                cursor=cursor,
+                search=self.filter_var.get(),
+            )
+        except ValueError as e:
+            self.file_info_var.set(f"Filtre invalide: {e}")
+            return
+        self._append_entries(source, page["rows"], page["next_cursor"])
+        self._prefetch_async([row.get("id") for row in page["rows"]])
+
+    def _append_entries(self, source, rows, next_cursor):
+        if source == "unconfirmed":
+            listbox, entries = self.unconfirmed_listbox, self.unconfirmed_entries
+        else:
+            listbox, entries = self.confirmed_listbox, self.confirmed_entries
+        for row in rows:
             shift = row.get("shift", "")
             inst = row.get("shift_instance", 1)
             shift_label = f"{shift} #{inst}" if inst and int(inst) > 1 else shift
             display = f"{row.get('date_local', '')} {shift_label} — {row.get('dist_ref', '')}"
-            self.confirmed_listbox.insert(END, display)
+            listbox.insert(END, display)
+            entries.append(row)
+        self.list_cursors[source] = next_cursor
+        self._update_more_buttons()
+
+    def _update_more_buttons(self):
+        self.unconfirmed_more_btn.config(state=NORMAL if self.list_cursors["unconfirmed"] else DISABLED)
+        self.confirmed_more_btn.config(state=NORMAL if self.list_cursors["confirmed"] else DISABLED)
+
+    def _prefetch_async(self, dist_ids):
+        dist_ids = [dist_id for dist_id in dist_ids if dist_id]
+        if not dist_ids:
+            return
+
+        def worker():
+            try:
+                prefetch_distributions(dist_ids)
+            except Exception:
+                logger.debug("Préchargement des distributions échoué", exc_info=True)
+
+        threading.Thread(target=worker, daemon=True).start()
 
     # -----------------------
     # File selection & display
@@ -386,6 +591,9 @@ class JsonViewerTab:
         self.current_dist_id = dist_id
         self.current_file_source = source
         dist = get_distribution(dist_id)
+        self.current_dist_version = dist.get("version") if dist else None
+        neighbours = entries[max(0, idx - PREFETCH_NEIGHBOURS) : idx + PREFETCH_NEIGHBOURS + 1]
+        self._prefetch_async([row.get("id") for row in neighbours if row.get("id") != dist_id])
         if not dist:
             messagebox.showerror("Erreur", "Distribution introuvable.")
             return
@@ -393,6 +601,8 @@ class JsonViewerTab:
         ts_local = self._format_local_ts(ts)
         dist_ref = dist.get("dist_ref") or ""
         self.file_info_var.set(f"Distribution sélectionnée: {dist_ref} // Créée le: {ts_local}")
+        if len(selection) > 1:
+            self.file_info_var.set(f"{len(selection)} distributions sélectionnées (affichée: {dist_ref})")
 
         try:
             self.clear_treeviews()
@@ -479,9 +689,9 @@ class JsonViewerTab:
         )
         if confirm:
             try:
-                delete_distribution(self.current_dist_id)
+                delete_distribution(self.current_dist_id, expected_version=self.current_dist_version)
                 messagebox.showinfo("Supprimé", "Distribution supprimée avec succès.")
-                self.on_period_select(None)
+                self.refresh_pay_periods()
                 self.current_dist_id = None
                 self.current_file_source = None
                 self.file_info_var.set("Aucune distribution sélectionnée")
@@ -492,46 +702,83 @@ class JsonViewerTab:
             except Exception as e:
                 messagebox.showerror("Erreur", f"Échec de la suppression:\n{str(e)}")
 
+    def _selected_ids(self, source):
+        if source == "unconfirmed":
+            listbox, entries = self.unconfirmed_listbox, self.unconfirmed_entries
+        else:
+            listbox, entries = self.confirmed_listbox, self.confirmed_entries
+        return [entries[idx].get("id") for idx in listbox.curselection() if 0 <= idx < len(entries)]
+
+    def _apply_status(self, status, **target):
+        """Set ``status`` in one transaction, then reload the lists. Returns True on success."""
+        try:
+            result = set_distribution_status_bulk(status, **target)
+        except Exception as e:
+            messagebox.showerror("Erreur", f"Échec du transfert:\n{e}")
+            return False
+        self.refresh_pay_periods()
+        self.current_dist_id = None
+        self.current_file_source = None
+        self.file_info_var.set("Aucune distribution sélectionnée")
+        self.clear_treeviews()
+        self.transfer_btn.config(state=DISABLED)
+        self.transfer_back_btn.config(state=DISABLED)
+        self.delete_btn.config(state=DISABLED)
+        return result
+
     def confirm_selected_file(self):
-        """Mark the selected distribution as confirmed."""
-        if not self.current_dist_id or self.current_file_source != "unconfirmed":
+        """Mark the selected distribution(s) as confirmed."""
+        ids = self._selected_ids("unconfirmed") if self.current_file_source == "unconfirmed" else []
+        if not ids:
             messagebox.showwarning(
                 "Sélection requise",
                 "Veuillez sélectionner une distribution NON-vérifiée à confirmer.",
             )
             return
-        try:
-            set_distribution_status(self.current_dist_id, "CONFIRMED")
-            messagebox.showinfo("Confirmé", "Distribution confirmée.")
-            self.on_period_select(None)
-            self.current_dist_id = None
-            self.current_file_source = None
-            self.file_info_var.set("Aucune distribution sélectionnée")
-            self.clear_treeviews()
-            self.transfer_btn.config(state=DISABLED)
-            self.transfer_back_btn.config(state=DISABLED)
-            self.delete_btn.config(state=DISABLED)
-        except Exception as e:
-            messagebox.showerror("Erreur", f"Échec du transfert:\n{e}")
+        result = self._apply_status("CONFIRMED", ids=ids)
+        if result:
+            messagebox.showinfo(
+                "Confirmé",
+                "Distribution confirmée." if len(ids) == 1 else f"{result['updated']} distributions confirmées.",
+            )
 
     def unconfirm_selected_file(self):
-        """Mark the selected distribution as unconfirmed."""
-        if not self.current_dist_id or self.current_file_source != "confirmed":
+        """Mark the selected distribution(s) as unconfirmed."""
+        ids = self._selected_ids("confirmed") if self.current_file_source == "confirmed" else []
+        if not ids:
             messagebox.showwarning(
                 "Sélection requise",
                 "Veuillez sélectionner un fichier confirmé à retourner.",
             )
             return
-        try:
-            set_distribution_status(self.current_dist_id, "UNCONFIRMED")
-            messagebox.showinfo("Retourné", "Distribution retournée aux NON-vérifiées.")
-            self.on_period_select(None)
-            self.current_dist_id = None
-            self.current_file_source = None
-            self.file_info_var.set("Aucun fichier sélectionné")
-            self.clear_treeviews()
-            self.transfer_btn.config(state=DISABLED)
-            self.transfer_back_btn.config(state=DISABLED)
-            self.delete_btn.config(state=DISABLED)
-        except Exception as e:
-            messagebox.showerror("Erreur", f"Échec du transfert:\n{e}")
+        result = self._apply_status("UNCONFIRMED", ids=ids)
+        if result:
+            messagebox.showinfo(
+                "Retourné",
+                "Distribution retournée aux NON-vérifiées."
+                if len(ids) == 1
+                else f"{result['updated']} distributions retournées aux NON-vérifiées.",
+            )
+
+    def confirm_all_unconfirmed(self):
+        """Confirm every unconfirmed distribution of the period (or those matching the filter)."""
+        if not self.current_period:
+            return
+        if self.filter_var.get().strip():
+            if self.list_cursors["unconfirmed"]:
+                messagebox.showwarning(
+                    "Liste incomplète",
+                    "Chargez toute la liste filtrée (Charger plus) avant de tout confirmer.",
+                )
+                return
+            target = {"ids": [row.get("id") for row in self.unconfirmed_entries]}
+            question = f"Confirmer les {len(target['ids'])} distributions NON-vérifiées affichées ?"
+        else:
+            target = {"pay_period_id": self.current_period.get("id")}
+            count = (self.current_period.get("status_counts") or {}).get("unconfirmed", 0)
+            question = f"Confirmer les {count} distributions NON-vérifiées de cette période ?"
+        if not messagebox.askyesno("Confirmer tout", question):
+            return
+        result = self._apply_status("CONFIRMED", **target)
+        if result:
+            messagebox.showinfo("Confirmé", f"{result['updated']} distributions confirmées.")
@@ -10,11 +10,12 @@ from Master import MasterSheet
 from TimeSheet import TimeSheet
 from Distribution import DistributionTab
 from AnalyseTab import AnalyseTab
-from tkinter import messagebox
+from tkinter import filedialog, messagebox
 from Pay import PayTab
 from AppConfig import (
     ensure_pdf_dir_selected,
     get_user_data_dir,
+    get_archive_horizon_days,
     get_payroll_setup_pending,
     set_payroll_setup_pending,
 )
@@ -24,7 +25,13 @@ from icon_helper import set_app_icon
 from ui_scale import init_scaling, enable_high_dpi_awareness
 from access_control import AccessController, AccessError
 from ui.login_dialog import LoginDialog
-from db.db_manager import init_db, get_db_path
+from log_setup import configure_logging, shutdown_logging
+from db.audit_log import archive_audit
+from db.backup import BackupScheduler, get_backup_dir
+from db.maintenance import MaintenanceScheduler, maintenance_status, run_shutdown_maintenance
+from db.db_manager import init_db, get_db_path, pending_migrations
+from db.period_archive import archive_paid_periods
+from db.shifts_repo import ShiftJournal
 from payroll.bootstrap import ensure_default_schedule
 from payroll.context import PayrollContext
 from payroll.pay_calendar import PayCalendarService, PayCalendarError
@@ -102,6 +109,41 @@ def show_splash(root, image_path: str, duration_ms: int = 2500):
     root.after(duration_ms, lambda: splash.winfo_exists() and splash.destroy())
     return splash
 
+def show_migration_splash(root):
+    """
+    Small centered window following the schema migrations.
+    Returns ``(splash, progress)``; ``progress(message, fraction)`` redraws it.
+    Plain Tk widgets: the ttkbootstrap style belongs to the windows created later.
+    """
+    splash = tk.Toplevel(root)
+    splash.overrideredirect(True)  # not topmost: an error dialog must show over it
+    frame = tk.Frame(splash, padx=20, pady=16, relief="ridge", borderwidth=1)
+    frame.pack(fill="both", expand=True)
+    tk.Label(frame, text=f"{APP_NAME}", font=("Helvetica", 14, "bold")).pack(anchor="w")
+    message = tk.Label(frame, text="Mise à jour de la base…", anchor="w", width=60)
+    message.pack(fill="x", pady=(8, 6))
+    bar_width = 420
+    bar = tk.Canvas(frame, width=bar_width, height=14, highlightthickness=1, highlightbackground="#999999")
+    bar.pack(fill="x")
+    fill = bar.create_rectangle(0, 0, 0, 14, fill="#2780e3", width=0)
+
+    splash.update_idletasks()
+    w, h = splash.winfo_reqwidth(), splash.winfo_reqheight()
+    x = (splash.winfo_screenwidth() - w) // 2
+    y = (splash.winfo_screenheight() - h) // 2
+    splash.geometry(f"{w}x{h}+{x}+{y}")
+    splash.update()
+
+    def progress(text, fraction):
+        if not splash.winfo_exists():
+            return
+        message.configure(text=text)
+        bar.coords(fill, 0, 0, int(bar_width * fraction), 14)
+        splash.update()
+
+    return splash, progress
+
+
 def fit_to_screen(win):
     """Adjust the given window to fill the screen cross‑platform."""
     # Windows/Linux: maximize
@@ -121,24 +163,23 @@ def fit_to_screen(win):
 
 
 def _configure_logging():
-    log_dir = os.path.join(get_user_data_dir(), "logs")
-    os.makedirs(log_dir, exist_ok=True)
-    log_path = os.path.join(log_dir, "tipsplit.log")
-    if not logging.getLogger().handlers:
-        logging.basicConfig(
-            level=logging.INFO,
-            format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-            handlers=[
-                logging.FileHandler(log_path, encoding="utf-8"),
-                logging.StreamHandler(),
-            ],
-        )
+    log_path = configure_logging(os.path.join(get_user_data_dir(), "logs"))
     logging.info("Journalisation initialisée (%s)", log_path)
 
 
-def _bootstrap_database(root=None):
+def _bootstrap_database(root=None, progress=None):
     try:
-        init_db()
+        init_db(progress=progress)
+        try:
+            archive_audit()
+        except Exception:
+            logging.exception("Archivage du journal d’audit impossible")
+        try:
+            horizon = get_archive_horizon_days()
+            if horizon:
+                archive_paid_periods(older_than_days=horizon)
+        except Exception:
+            logging.exception("Archivage des périodes payées impossible")
         try:
             _, created = ensure_default_schedule()
             if created:
@@ -165,6 +206,25 @@ def _bootstrap_database(root=None):
         return False, False
 
 
+def _bootstrap_with_progress():
+    """:func:`_bootstrap_database`, behind a progress window when migrations are pending."""
+    try:
+        pending = pending_migrations()
+    except Exception:
+        pending = []  # reported by _bootstrap_database
+    if not pending:
+        return _bootstrap_database()
+    root = tk.Tk()
+    root.withdraw()
+    splash, progress = show_migration_splash(root)
+    try:
+        return _bootstrap_database(root, progress=progress)
+    finally:
+        if splash.winfo_exists():
+            splash.destroy()
+        root.destroy()
+
+
 class TipSplitApp:
     def __init__(self, root, controller: AccessController, user_role: str = "user", open_pay_settings: bool = False):
         self.root = root
@@ -205,6 +265,13 @@ class TipSplitApp:
         self.create_distribution_tab()
         
 
+        # Daily online backups; manual backups and restores run on the same thread.
+        self.backup_scheduler = BackupScheduler(on_result=self._on_backup_result, tk_widget=self.root)
+        self.backup_scheduler.start()
+        # ANALYZE, incremental vacuum and quick_check while the database is idle.
+        self.maintenance_scheduler = MaintenanceScheduler()
+        self.maintenance_scheduler.start()
+
         create_menu_bar(self.root, self)
         self._apply_payroll_setup_gate()
         if self._open_pay_settings_on_start:
@@ -368,10 +435,13 @@ class TipSplitApp:
         self.timesheet_frame = ttk.Frame(self.notebook)
         self.notebook.add(self.timesheet_frame, text="Time Sheet")
 
+        # Punches are written to the database in batches, off the UI thread.
+        self.shift_journal = ShiftJournal()
         self.timesheet_tab = TimeSheet(
             self.timesheet_frame,
             shared_data=self.shared_data,
-            reload_distribution_data=self.reload_distribution_tab
+            reload_distribution_data=self.reload_distribution_tab,
+            shift_journal=self.shift_journal,
         )
 
     def create_distribution_tab(self):
@@ -596,11 +666,76 @@ class TipSplitApp:
         if hasattr(self, "timesheet_tab"):
             self.timesheet_tab.reload()
 
+    # ----- Database backups -----
+    def backup_database_now(self):
+        self.backup_scheduler.backup_now()
+
+    def restore_database_backup(self):
+        if not self.require_manager_password("restaurer une sauvegarde"):
+            return
+        path = filedialog.askopenfilename(
+            parent=self.root,
+            title="Choisir une sauvegarde",
+            initialdir=get_backup_dir(),
+            filetypes=[("Sauvegardes TipSplit", "*.db.gz")],
+        )
+        if not path:
+            return
+        if not messagebox.askyesno(
+            "Restaurer une sauvegarde",
+            "La base actuelle sera remplacée par cette sauvegarde.\n"
+            "Une copie de l’état actuel sera conservée. Continuer ?",
+        ):
+            return
+        self.backup_scheduler.restore(path)
+
+    def _on_backup_result(self, kind, result, error):
+        if error is not None:
+            messagebox.showerror("Sauvegarde", f"L’opération a échoué:\n{error}")
+        elif kind == "backup":
+            messagebox.showinfo("Sauvegarde", f"Sauvegarde créée:\n{result['path']}")
+        else:
+            messagebox.showinfo(
+                "Restauration",
+                "Base restaurée.\nRedémarrez l’application pour recharger toutes les données.",
+            )
+
+    def show_database_diagnostics(self):
+        try:
+            status = maintenance_status()
+        except Exception as exc:
+            messagebox.showerror("Diagnostics", f"Lecture impossible:\n{exc}")
+            return
+        labels = {
+            "optimize": "Statistiques (optimize)",
+            "incremental_vacuum": "Vacuum incrémental",
+            "quick_check": "Vérification d’intégrité",
+        }
+        lines = [
+            f"Fichier: {status['path']}",
+            f"Taille: {status['file_size'] / 1_048_576:.1f} Mo "
+            f"({status['page_count']} pages de {status['page_size']} octets)",
+            f"Pages libres: {status['free_pages']} — auto_vacuum {status['auto_vacuum']}",
+            "",
+        ]
+        for task, label in labels.items():
+            run = status["last_runs"].get(task)
+            if not run:
+                lines.append(f"{label}: jamais exécuté")
+                continue
+            line = f"{label}: {run['at']} ({run['ms']} ms)"
+            if task == "incremental_vacuum":
+                line += f", {run.get('freed_pages', 0)} pages libérées"
+            elif task == "quick_check":
+                line += ", OK" if run.get("ok") else ", PROBLÈMES: " + "; ".join(run.get("problems", []))
+            lines.append(line)
+        messagebox.showinfo("Diagnostics de la base", "\n".join(lines))
+
 
 def main():
     _configure_logging()
     enable_high_dpi_awareness()
-    ok, created = _bootstrap_database()
+    ok, created = _bootstrap_with_progress()
     if not ok:
         return
     try:
@@ -634,8 +769,21 @@ def main():
 
     def on_close():
         controller.stop()
+        app = getattr(app_root, "_tipsplit_app", None)
+        if app is not None:
+            app.backup_scheduler.stop()
+            app.maintenance_scheduler.stop()
+            try:
+                app.shift_journal.close()
+            except Exception:
+                logging.exception("Pointages non enregistrés à la fermeture")
+            try:
+                run_shutdown_maintenance()
+            except Exception:
+                logging.exception("Maintenance de fermeture impossible")
         if app_root.winfo_exists():
             app_root.destroy()
+        shutdown_logging()
 
     def handle_revocation(reason: str):
         if not app_root.winfo_exists():
@@ -665,6 +813,7 @@ def main():
         app_root.mainloop()
     finally:
         controller.stop()
+        shutdown_logging()
 
 
 if __name__ == "__main__":
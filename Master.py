@@ -9,6 +9,7 @@ from MenuBar import create_menu_bar
 from ui_scale import scale
 from tree_utils import fit_columns
 from db import employees_repo
+from db.db_manager import ConflictError
 
 logger = logging.getLogger("tipsplit.master")
 
@@ -18,6 +19,8 @@ class MasterSheet:
         self.sort_directions = {}
         self.root = frame
         self.row_meta = {"service": {}, "busboy": {}}
+        # {id: version} of each roster as loaded: saving refuses if another terminal changed it.
+        self.loaded_versions = {"service": {}, "busboy": {}}
         # --------- Scrollable container ---------
         self.canvas = ttk.Canvas(self.root)
         self.canvas.pack(side=LEFT, fill=BOTH, expand=True)
@@ -359,6 +362,7 @@ class MasterSheet:
         self.row_meta[role] = {}
 
         employees = employees_repo.list_employees(role=role, active_only=True, order_by_points_desc=False)
+        self.loaded_versions[role] = {emp["id"]: emp["version"] for emp in employees}
         data_snapshot = []
         for i, emp in enumerate(employees):
             try:
@@ -405,9 +409,18 @@ class MasterSheet:
         try:
             service_rows = self._collect_role_rows(self.service_tree, "service")
             bussboy_rows = self._collect_role_rows(self.bussboy_tree, "busboy")
-            svc_summary = employees_repo.upsert_many("service", service_rows)
-            bus_summary = employees_repo.upsert_many("busboy", bussboy_rows)
-            logger.info("Sauvegarde effectuée (service=%s, bussboy=%s)", svc_summary, bus_summary)
+            # Both rosters in one transaction: a conflict on either saves neither.
+            summary = employees_repo.upsert_roles(
+                {"service": service_rows, "busboy": bussboy_rows},
+                expected_versions={
+                    "service": self.loaded_versions.get("service"),
+                    "busboy": self.loaded_versions.get("busboy"),
+                },
+            )
+            logger.info("Sauvegarde effectuée (service=%s, bussboy=%s)", summary["service"], summary["busboy"])
+        except ConflictError as exc:
+            messagebox.showwarning("Modifié sur un autre poste", str(exc))
+            return
         except ValueError as exc:
             messagebox.showerror("Erreur", str(exc))
             return
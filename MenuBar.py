@@ -208,6 +208,9 @@ def create_menu_bar(root, app):
     open_button = ttk.Menubutton(menu_bar, text="Admin")
     open_menu = ttk.Menu(open_button, tearoff=0)
     open_menu.add_command(label="Feuille d'employés", command=app.authenticate_and_show_master)
+    open_menu.add_separator()
+    open_menu.add_command(label="Sauvegarder la base maintenant", command=app.backup_database_now)
+    open_menu.add_command(label="Restaurer une sauvegarde…", command=app.restore_database_backup)
     open_button["menu"] = open_menu
     open_button.pack(side=LEFT, padx=5)
 
@@ -330,6 +333,7 @@ def create_menu_bar(root, app):
         label=f"À propos de {APP_NAME} (v{APP_VERSION})",
         command=lambda: messagebox.showinfo("À propos", f"{APP_NAME} v{APP_VERSION}")
     )
+    help_menu.add_command(label="Diagnostics de la base…", command=app.show_database_diagnostics)
     help_menu.add_separator()
     help_menu.add_command(
         label="Vérifier les mises à jour…",
@@ -7,6 +7,7 @@
 #   * For Busboys         -> columns: D
 #   * Badge shows which rule determined "Déclaré" (8% of A vs F for Service; D for Busboy)
 #   * Far-right header button: "Exporter (PDF)"
+#   * "Historique" opens the selected employee's shifts across periods (EmployeeHistory.py)
 #
 # Storage model (SQLite):
 # - Distributions and pay-period summaries are stored in the local database.
@@ -15,10 +16,12 @@
 import os
 import re
 import ttkbootstrap as ttk
-from tkinter import StringVar, END, Listbox, Text, messagebox, filedialog
+from datetime import date
+from tkinter import StringVar, END, Listbox, Text, messagebox, filedialog, simpledialog
 from ttkbootstrap.constants import *
 
 from db.distributions_repo import get_distributions_for_period, list_period_ids_with_distributions
+from db.money import from_cents, to_cents
 try:
     from payroll.context import PayrollContext
     from payroll.pay_calendar import PayCalendarService
@@ -95,6 +98,9 @@ class PayTab:
         ttk.Button(
             right_box, text="Exporter (CSV)", bootstyle="secondary", command=self.on_export_csv
         ).pack(side=RIGHT, padx=6)
+        ttk.Button(
+            right_box, text="Déclaration annuelle", bootstyle="secondary-outline", command=self.on_export_annual
+        ).pack(side=RIGHT, padx=6)
 
         # Paned layout so the employee panel is wider and resizable
         paned = ttk.Panedwindow(self.frame, orient=HORIZONTAL)
@@ -109,6 +115,9 @@ class PayTab:
         self.employee_list = Listbox(left, height=24, width=40)
         self.employee_list.pack(fill=BOTH, expand=True)
         self.employee_list.bind("<<ListboxSelect>>", self.on_employee_select)
+        ttk.Button(
+            left, text="Historique…", bootstyle="secondary-outline", command=self.on_employee_history
+        ).pack(anchor=E, pady=(6, 0))
 
         # Right (Details panel)
         right = ttk.Frame(paned)
@@ -253,13 +262,15 @@ class PayTab:
     def _index_employees_with_shifts(self, distributions: list):
         """
         employees_index[key] = {
-            "id","name","role",
+            "id","employee_db_id","name","role",
             "shifts":[{display_name,date,shift,hours,cash,sur_paye,frais_admin,A,B,D,E,F}],
             "totals": {"hours","cash","sur_paye","frais_admin","A_sum","F_sum","D_sum"}
         }
+        Money totals are accumulated in integer cents so long periods don't drift.
         """
         self.employees_index.clear()
         self.employee_keys_sorted.clear()
+        cent_totals = {}
 
         for dist in distributions:
             date = safe_str(dist.get("date_iso") or dist.get("date_local"))
@@ -285,6 +296,7 @@ class PayTab:
                 if key not in self.employees_index:
                     self.employees_index[key] = {
                         "id": emp_id if emp_id not in (None, "") else "",
+                        "employee_db_id": None,
                         "name": name,
                         "role": role,
                         "shifts": [],
@@ -299,6 +311,9 @@ class PayTab:
                         }
                     }
 
+                if self.employees_index[key]["employee_db_id"] is None:
+                    self.employees_index[key]["employee_db_id"] = emp.get("employee_db_id")
+
                 hours = to_float(emp.get("hours", 0.0))
                 cash = to_float(emp.get("cash", 0.0))
                 sur_paye = to_float(emp.get("sur_paye", 0.0))
@@ -331,14 +346,15 @@ class PayTab:
                     "A": A_val, "B": B_val, "D": D_val, "E": E_val, "F": F_val
                 })
 
-                t = self.employees_index[key]["totals"]
-                t["hours"] += hours
-                t["cash"] += cash
-                t["sur_paye"] += sur_paye
-                t["frais_admin"] += frais_admin
-                t["A_sum"] += A_val
-                t["F_sum"] += F_val
-                t["D_sum"] += D_val
+                self.employees_index[key]["totals"]["hours"] += hours
+                sums = cent_totals.setdefault(key, dict.fromkeys(_MONEY_TOTALS, 0))
+                for total_key, value in zip(_MONEY_TOTALS, (cash, sur_paye, frais_admin, A_val, F_val, D_val)):
+                    sums[total_key] += to_cents(value) or 0
+
+        for key, sums in cent_totals.items():
+            totals = self.employees_index[key]["totals"]
+            for total_key, cents in sums.items():
+                totals[total_key] = from_cents(cents)
 
         # Sort shifts within each employee
         for key in self.employees_index:
@@ -433,6 +449,19 @@ class PayTab:
             self.shift_tree.insert("", END, values=values, tags=(tag,))
             row_idx += 1
 
+    def on_employee_history(self):
+        sel = self.employee_list.curselection()
+        if not sel or sel[0] >= len(self.employee_keys_sorted):
+            messagebox.showwarning("Historique", "Sélectionnez un employé.")
+            return
+        info = self.employees_index.get(self.employee_keys_sorted[sel[0]]) or {}
+        if not info.get("employee_db_id"):
+            messagebox.showwarning("Historique", "Cet employé n'est pas lié à la liste des employés.")
+            return
+        from EmployeeHistory import open_employee_history
+
+        open_employee_history(self.frame, info["employee_db_id"], info.get("name", ""))
+
     # -----------------------
     # Export handlers (call Export.py)
     # -----------------------
@@ -549,6 +578,45 @@ class PayTab:
 
         messagebox.showinfo("Export CSV", f"Export créé:\n{path}")
 
+    def on_export_annual(self):
+        today = date.today()
+        year = simpledialog.askinteger(
+            "Déclaration annuelle",
+            "Année à déclarer:",
+            initialvalue=today.year - 1 if today.month <= 3 else today.year,
+            minvalue=2000,
+            maxvalue=today.year,
+            parent=self.frame,
+        )
+        if not year:
+            return
+        try:
+            from Export import (
+                annual_declaration_default_dir,
+                export_annual_declaration_csv,
+                export_annual_declaration_pdfs,
+            )
+            path = filedialog.asksaveasfilename(
+                defaultextension=".csv",
+                filetypes=[("Excel (CSV)", "*.csv")],
+                initialfile=f"declaration_pourboires_{year}.csv",
+                initialdir=annual_declaration_default_dir(year),
+                title="Exporter la déclaration annuelle (CSV)",
+            )
+            if not path:
+                return
+            export_annual_declaration_csv(year, path)
+            pdfs = export_annual_declaration_pdfs(year)
+        except Exception as e:
+            messagebox.showerror("Déclaration annuelle", f"Erreur d'export:\n{e}")
+            return
+
+        pdf_dir = os.path.dirname(pdfs[0]) if pdfs else "—"
+        messagebox.showinfo(
+            "Déclaration annuelle",
+            f"Export créé:\n{path}\n{len(pdfs)} PDF dans:\n{pdf_dir}",
+        )
+
     # -----------------------
     # Helpers
     # -----------------------
@@ -593,6 +661,8 @@ def _parse_date_shift_from_filename(filename: str):
         pass
     return "", ""
 
+_MONEY_TOTALS = ("cash", "sur_paye", "frais_admin", "A_sum", "F_sum", "D_sum")
+
 def safe_str(x):
     return "" if x is None else str(x)
 
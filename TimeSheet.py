@@ -1,4 +1,5 @@
-# TimeSheet.py — employees now fetched from the SQLite repository
+# TimeSheet.py — employees now fetched from the SQLite repository;
+# punches are saved per work day through db.shifts_repo.ShiftJournal
 
 import logging
 from datetime import datetime
@@ -8,11 +9,12 @@ from ttkbootstrap.constants import *
 from ttkbootstrap.widgets import DateEntry, Spinbox
 from MenuBar import create_menu_bar
 from PunchClock import PunchClockPopup
-from tkinter import END
+from tkinter import END, messagebox
 
 # Debug logging removed for production cleanliness
 
 from db import employees_repo
+from db.shifts_repo import ShiftJournal
 from ui_scale import scale
 from tree_utils import fit_columns
 
@@ -20,13 +22,16 @@ logger = logging.getLogger("tipsplit.timesheet")
 
 
 class TimeSheet:
-    def __init__(self, root, shared_data=None, reload_distribution_data=None):
+    def __init__(self, root, shared_data=None, reload_distribution_data=None, shift_journal=None):
         self.shared_data = shared_data or {}
         self.reload_distribution_data = reload_distribution_data
         self.root = root
         self.service_total_row = None
         self.bussboy_total_row = None
         self.punch_data = {}
+        self.row_employee_ids = {}        # row_id -> employees.id
+        self.unsaved_punch_rows = set()   # punched before a date (or pay period) was known
+        self.shift_journal = shift_journal or ShiftJournal()
         self.hovered_row = None
         self.sort_directions = {}
 
@@ -151,6 +156,7 @@ class TimeSheet:
         self.date_picker.entry.bind("<Key>", lambda e: "break")  # block manual typing
         self.date_picker.pack(side=LEFT, padx=(10, 0))
         self.date_picker.entry.delete(0, END)
+        self.date_picker.bind("<<DateEntrySelected>>", lambda e: self._on_date_selected())
 
     def create_confirm_button(self, parent):
         confirm_btn = ttk.Button(
@@ -167,6 +173,8 @@ class TimeSheet:
         self.service_total_row = None
         self.bussboy_total_row = None
         self.punch_data.clear()
+        self.row_employee_ids.clear()
+        self.unsaved_punch_rows.clear()
         self.temp_points_overrides.clear()
         self.original_points.clear()
         self.hovered_row = None
@@ -187,6 +195,7 @@ class TimeSheet:
                     points = 0
                 row_id = self.tree.insert("", "end", values=(number, name, points, "🕒", "", "", ""), tags=("editable",))
                 self.punch_data[row_id] = {"in": "", "out": "", "total": 0.0}
+                self.row_employee_ids[row_id] = emp.get("id")
                 try:
                     self.original_points[row_id] = int(points)
                 except Exception:
@@ -209,12 +218,14 @@ class TimeSheet:
                     points = 0
                 row_id = self.tree.insert("", "end", values=(number, name, points, "🕒", "", "", ""), tags=("editable",))
                 self.punch_data[row_id] = {"in": "", "out": "", "total": 0.0}
+                self.row_employee_ids[row_id] = emp.get("id")
                 try:
                     self.original_points[row_id] = int(points)
                 except Exception:
                     self.original_points[row_id] = 0
             self.bussboy_total_row = self.tree.insert("", "end", values=("", "Total Bussboy", "", "", "", "", "0.00"), tags=("total",))
 
+        self._restore_saved_punches()
         self.update_totals()
 
     def update_totals(self):
@@ -383,6 +394,11 @@ class TimeSheet:
         self._end_points_edit(commit=True)
 
     def on_clock_saved(self, row_id, punch_in, punch_out, total):
+        self._show_punch(row_id, punch_in, punch_out, total)
+        self.update_totals()
+        self._queue_punch(row_id)
+
+    def _show_punch(self, row_id, punch_in, punch_out, total):
         current = list(self.tree.item(row_id, "values"))
         current[4] = punch_in
         current[5] = punch_out
@@ -408,6 +424,68 @@ class TimeSheet:
             tags.remove("filled")
         self.tree.item(row_id, tags=tuple(tags))
 
+    # =========================
+    # Punch persistence
+    # =========================
+    def _selected_work_date(self):
+        try:
+            return datetime.strptime(self.date_picker.entry.get().strip(), self.date_format).date()
+        except ValueError:
+            return None
+
+    def _queue_punch(self, row_id):
+        """Hand the row's punch to the journal; kept unsaved until a date with a pay period is chosen."""
+        employee_id = self.row_employee_ids.get(row_id)
+        work_date = self._selected_work_date()
+        if not employee_id:
+            return
+        punch = self.punch_data.get(row_id, {})
+        period = self._resolve_pay_period(work_date.strftime(self.date_format)) if work_date else None
+        if not period:
+            if punch.get("in"):
+                self.unsaved_punch_rows.add(row_id)
+            else:
+                self.unsaved_punch_rows.discard(row_id)
+            return
+        try:
+            self.shift_journal.record(
+                employee_id,
+                work_date,
+                punch.get("in", ""),
+                punch.get("out", ""),
+                pay_period_id=period.get("id"),
+            )
+        except ValueError as exc:
+            logger.warning("Pointage non enregistré: %s", exc)
+            self.unsaved_punch_rows.add(row_id)
+            return
+        self.unsaved_punch_rows.discard(row_id)
+
+    def _restore_saved_punches(self):
+        """Show the punches saved for the selected date (rows still unsaved keep theirs)."""
+        work_date = self._selected_work_date()
+        if not work_date:
+            return
+        try:
+            saved = self.shift_journal.punches_for_day(work_date)
+        except Exception:
+            logger.exception("Impossible de charger les pointages du %s", work_date)
+            return
+        for row_id, employee_id in self.row_employee_ids.items():
+            if row_id in self.unsaved_punch_rows:
+                continue
+            punch = saved.get(employee_id)
+            if punch:
+                self._show_punch(row_id, punch["in"], punch["out"], punch["hours"])
+            elif self.punch_data.get(row_id, {}).get("in"):
+                self._show_punch(row_id, "", "", "")
+
+    def _on_date_selected(self):
+        # Punches entered before the date was chosen belong to that date.
+        for row_id in list(self.unsaved_punch_rows):
+            if self.tree.exists(row_id):
+                self._queue_punch(row_id)
+        self._restore_saved_punches()
         self.update_totals()
 
     def on_hover(self, event):
@@ -527,6 +605,17 @@ class TimeSheet:
         """Reset all hours, clock fields, totals, and points back to standard values."""
         self._end_points_edit(commit=False)
 
+        # Saved punches are erased too: ask first, a misclick would lose the day.
+        punched_rows = [row_id for row_id, punch in self.punch_data.items() if punch.get("in")]
+        work_date = self._selected_work_date()
+        if punched_rows and work_date and not messagebox.askyesno(
+            "Réinitialiser",
+            f"Effacer les heures du {work_date.strftime(self.date_format)} "
+            f"({len(punched_rows)} employé(s))? Elles sont aussi retirées de la base.",
+            parent=self.root,
+        ):
+            return
+
         for item in self.tree.get_children():
             tags = set(self.tree.item(item, "tags"))
             if "editable" not in tags:
@@ -554,6 +643,9 @@ class TimeSheet:
             tags.discard("points_edited")
             self.tree.item(item, tags=tuple(tags))
 
+        for row_id in punched_rows:
+            self._queue_punch(row_id)
+
         # Clear temp overrides
         self.temp_points_overrides.clear()
 
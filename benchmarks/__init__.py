@@ -0,0 +1,7 @@
+"""
+Headless performance benchmarks for TipSplit hot paths.
+
+Run with:  python -m benchmarks.run [--save-baseline] [--threshold 25]
+Every run works on a fresh synthetic database (see :mod:`db.synthetic_data`)
+and never touches the user's data or export folders.
+"""
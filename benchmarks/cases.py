@@ -0,0 +1,454 @@
+"""
+Benchmark cases.
+
+Each builder runs its (untimed) setup against the synthetic database and
+returns the callable to time. Builders receive the summary returned by
+:func:`db.synthetic_data.generate_dataset` and a scratch directory; each
+case runs on its own copy of the generated database, so a builder may
+change it without affecting the cases after it.
+UI-bound code (DistributionTab, AnalyseTab, PayTab) is driven headless by
+creating the instances without ``__init__`` so no Tk root is needed.
+"""
+
+from __future__ import annotations
+
+import os
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Tuple
+
+from AppConfig import DEFAULT_DISTRIBUTION_SETTINGS
+from db.db_manager import db_session
+
+Case = Tuple[str, Callable[[Dict, str], Callable[[], object]], int]
+
+_TREE_COLUMNS = ("number", "name", "points", "hours", "cash", "sur_paye", "frais_admin", "A", "B", "D", "E", "F")
+
+
+class _HeadlessTree:
+    """Minimal stand-in for the Treeview API used by the distribution math."""
+
+    def __init__(self, rows: List[List]):
+        self._order = [f"I{index:03d}" for index in range(len(rows))]
+        self._values = {iid: list(values) for iid, values in zip(self._order, rows)}
+
+    def get_children(self):
+        return tuple(self._order)
+
+    def item(self, iid):
+        return {"values": list(self._values[iid])}
+
+    def set(self, iid, column, value):
+        self._values[iid][_TREE_COLUMNS.index(column)] = value
+
+
+class _Field:
+    def __init__(self, value):
+        self._value = str(value)
+
+    def get(self):
+        return self._value
+
+
+def _largest_period(status: str = "CONFIRMED") -> str:
+    with db_session() as conn:
+        row = conn.execute(
+            """
+            SELECT p.id AS pay_period_id, COUNT(*) AS c
+            FROM distributions d
+            JOIN pay_periods p ON p.pk = d.period_pk
+            WHERE d.status = ?
+            GROUP BY d.period_pk
+            ORDER BY c DESC, p.start_at_utc
+            LIMIT 1
+            """,
+            (status,),
+        ).fetchone()
+    return row["pay_period_id"]
+
+
+def _latest_open_period() -> str:
+    with db_session() as conn:
+        row = conn.execute(
+            "SELECT id FROM pay_periods WHERE status = 'OPEN' ORDER BY start_at_utc DESC LIMIT 1"
+        ).fetchone()
+    return row["id"]
+
+
+def _period_distributions(status: str = "CONFIRMED") -> List[Dict]:
+    from db.distributions_repo import get_distributions_for_period
+
+    return get_distributions_for_period(pay_period_id=_largest_period(status), status=status)
+
+
+def _employees_index():
+    from Pay import PayTab
+
+    tab = PayTab.__new__(PayTab)
+    tab.employees_index = {}
+    tab.employee_keys_sorted = []
+    tab._index_employees_with_shifts(_period_distributions())
+    return tab.employees_index, tab.employee_keys_sorted
+
+
+# ---------------------------------------------------------------------------
+# Repositories
+# ---------------------------------------------------------------------------
+def bench_create_distribution(summary: Dict, scratch: str):
+    from db.distributions_repo import create_distribution, get_distribution
+
+    period_id = _latest_open_period()
+    with db_session() as conn:
+        last_id = conn.execute("SELECT MAX(id) AS id FROM distributions").fetchone()["id"]
+    sample = get_distribution(last_id)["employees"]
+    employees = [
+        {
+            "employee_id": emp["employee_number"],
+            "name": emp["employee_name"],
+            **{key: emp[key] for key in ("section", "hours", "cash", "sur_paye", "frais_admin", "A", "B", "D", "E", "F")},
+        }
+        for emp in sample
+    ]
+    date_local = date.fromisoformat(summary["end_date"]).strftime("%d-%m-%Y")
+    counter = {"n": 0}
+
+    def run():
+        counter["n"] += 1
+        create_distribution(
+            pay_period_id=period_id,
+            date_local=date_local,
+            shift="BENCH",
+            shift_instance=counter["n"],
+            inputs={"Ventes Nettes": 6500.0, "Dépot Net": -720.0, "Frais Admin": 130.0, "Cash": 240.0},
+            declaration_inputs={"Ventes Totales": 7400.0, "Clients": 120, "Tips due": 820.0, "Ventes Nourriture": 4100.0},
+            employees=employees,
+            created_by="bench",
+        )
+
+    return run
+
+
+def bench_create_distributions_bulk(summary: Dict, scratch: str):
+    from db.distributions_repo import create_distributions_bulk, get_distribution
+
+    period_id = _latest_open_period()
+    with db_session() as conn:
+        last_id = conn.execute("SELECT MAX(id) AS id FROM distributions").fetchone()["id"]
+    template = get_distribution(last_id)
+    employees = [
+        {
+            "employee_id": emp["employee_number"],
+            "name": emp["employee_name"],
+            **{key: emp[key] for key in ("section", "hours", "cash", "sur_paye", "frais_admin", "A", "B", "D", "E", "F")},
+        }
+        for emp in template["employees"]
+    ]
+    date_local = date.fromisoformat(summary["end_date"]).strftime("%d-%m-%Y")
+    counter = {"n": 0}
+
+    def run():
+        records = []
+        for _ in range(200):
+            counter["n"] += 1
+            records.append(
+                {
+                    "pay_period_id": period_id,
+                    "date_local": date_local,
+                    "shift": "BULK",
+                    "shift_instance": counter["n"],
+                    "inputs": template["inputs"],
+                    "declaration_inputs": template["declaration_inputs"],
+                    "employees": employees,
+                }
+            )
+        create_distributions_bulk(records, created_by="bench")
+
+    return run
+
+
+def bench_set_distribution_status_bulk(summary: Dict, scratch: str):
+    from db.distributions_repo import list_distributions, set_distribution_status_bulk
+
+    ids = [row["id"] for row in list_distributions(pay_period_id=_latest_open_period(), status="UNCONFIRMED")]
+
+    def run():
+        # Confirm the period's pending shifts, then put them back for the next run.
+        set_distribution_status_bulk("CONFIRMED", ids=ids, actor="bench")
+        set_distribution_status_bulk("UNCONFIRMED", ids=ids, actor="bench")
+
+    return run
+
+
+def bench_get_distributions_for_period(summary: Dict, scratch: str):
+    from db.distributions_repo import get_distributions_for_period, invalidate_distribution_cache
+
+    period_id = _largest_period()
+
+    def run():
+        invalidate_distribution_cache()
+        get_distributions_for_period(pay_period_id=period_id, status="CONFIRMED")
+
+    return run
+
+
+def bench_get_distribution_cached(summary: Dict, scratch: str):
+    from db.distributions_repo import get_distribution, list_distributions
+
+    ids = [dist["id"] for dist in list_distributions(pay_period_id=_largest_period())]
+
+    def run():
+        for dist_id in ids:
+            get_distribution(dist_id)
+
+    return run
+
+
+def bench_search_distributions(summary: Dict, scratch: str):
+    from db.distributions_repo import search_distributions
+
+    with db_session() as conn:
+        name = conn.execute("SELECT name FROM employees ORDER BY id LIMIT 1").fetchone()["name"]
+    queries = (name, "mardi soir", "mars 2025", "DIST-2025-0001", name.split()[-1] + " vendredi")
+
+    def run():
+        for query in queries:
+            search_distributions(query)
+
+    return run
+
+
+def bench_period_scoped_queries(summary: Dict, scratch: str):
+    from db.distributions_repo import list_distributions, list_period_ids_with_distributions
+
+    with db_session() as conn:
+        period_ids = [row["id"] for row in conn.execute("SELECT id FROM pay_periods ORDER BY start_at_utc")]
+
+    def run():
+        list_period_ids_with_distributions(status="CONFIRMED")
+        for period_id in period_ids:
+            list_distributions(pay_period_id=period_id, status="CONFIRMED")
+
+    return run
+
+
+def bench_employee_totals_for_period(summary: Dict, scratch: str):
+    from db.distributions_repo import employee_totals_for_period
+
+    period_id = _largest_period()
+    return lambda: employee_totals_for_period(pay_period_id=period_id)
+
+
+def bench_employee_history(summary: Dict, scratch: str):
+    from db.distributions_repo import employee_history, employee_history_totals
+
+    with db_session() as conn:
+        employee_id = conn.execute(
+            """
+            SELECT employee_id FROM distribution_employees
+            WHERE employee_id IS NOT NULL
+            GROUP BY employee_id
+            ORDER BY COUNT(*) DESC, employee_id
+            LIMIT 1
+            """
+        ).fetchone()["employee_id"]
+
+    def run():
+        employee_history_totals(employee_id=employee_id, status=None)
+        cursor = None
+        while True:
+            page = employee_history(employee_id=employee_id, status=None, cursor=cursor)
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+
+    return run
+
+
+def bench_list_employees(summary: Dict, scratch: str):
+    from db.employees_repo import list_employees
+
+    return lambda: list_employees(active_only=False)
+
+
+def bench_upsert_many(summary: Dict, scratch: str):
+    from db.employees_repo import list_employees, upsert_many
+
+    roster = [
+        {
+            "id": emp["id"],
+            "number": emp["employee_number"],
+            "name": emp["name"],
+            "points": emp["points"],
+            "email": emp["email"],
+        }
+        for emp in list_employees(role="service", active_only=False)
+    ]
+    return lambda: upsert_many("service", roster)
+
+
+# ---------------------------------------------------------------------------
+# Payroll calendar
+# ---------------------------------------------------------------------------
+def bench_ensure_periods(summary: Dict, scratch: str):
+    from payroll.pay_calendar import PayCalendarService
+
+    service = PayCalendarService()
+    start = date.fromisoformat(summary["start_date"])
+    end = date.fromisoformat(summary["end_date"])
+    return lambda: service.ensure_periods(summary["schedule_id"], start, end)
+
+
+def bench_period_for_local_date(summary: Dict, scratch: str):
+    from payroll.context import PayrollContext
+    from payroll.pay_calendar import PayCalendarService
+
+    context = PayrollContext(PayCalendarService())
+    context.get_schedule()
+    start = date.fromisoformat(summary["start_date"])
+    end = date.fromisoformat(summary["end_date"])
+    step = max(1, (end - start).days // 100)
+    days = [start + timedelta(days=offset) for offset in range(0, (end - start).days, step)]
+
+    def run():
+        for day in days:
+            context.period_for_local_date(day)
+
+    return run
+
+
+# ---------------------------------------------------------------------------
+# Distribution engine and analytics
+# ---------------------------------------------------------------------------
+def bench_distribution_math(summary: Dict, scratch: str):
+    from Distribution import DistributionTab
+
+    with db_session() as conn:
+        staff = conn.execute(
+            "SELECT employee_number, name, role, points FROM employees WHERE is_active = 1 ORDER BY id"
+        ).fetchall()
+    service = [row for row in staff if row["role"] == "service"][:40]
+    busboys = [row for row in staff if row["role"] == "busboy"][:10]
+    rows: List[List] = [["", "--- Service ---"] + [""] * 10]
+    rows += [[r["employee_number"], r["name"], r["points"], 6.5] + [""] * 8 for r in service]
+    rows.append(["", "--- Bussboy ---"] + [""] * 10)
+    rows += [[r["employee_number"], r["name"], r["points"], 5.75] + [""] * 8 for r in busboys]
+
+    tab = DistributionTab.__new__(DistributionTab)
+    tab._dist_settings = dict(DEFAULT_DISTRIBUTION_SETTINGS)
+    tab.fields = {
+        "Ventes Nettes": _Field("8450.25"),
+        "Dépot Net": _Field("-912.40"),
+        "Frais Admin": _Field("168.10"),
+        "Cash": _Field("315.00"),
+    }
+    tab.declaration_fields = {
+        "Ventes Totales": _Field("9720.80"),
+        "Clients": _Field("164"),
+        "Tips due": _Field("1040.55"),
+        "Ventes Nourriture": _Field("5230.00"),
+    }
+
+    def run():
+        tab.tree = _HeadlessTree(rows)
+        _, bussboy_amount = tab.get_bussboy_percentage_and_amount()
+        tab.distribution_net_values(bussboy_amount)
+        tab.build_distribution_weights()
+        tab.distribution_bussboys()
+        tab.distribution_service()
+        tab.update_declaration_values()
+        tab.declaration_net_values()
+
+    return run
+
+
+def bench_analyse_aggregations(summary: Dict, scratch: str):
+    from AnalyseTab import AnalyseTab
+
+    distributions = _period_distributions()
+    tab = AnalyseTab.__new__(AnalyseTab)
+
+    def run():
+        tab._aggregate_per_day(distributions)
+        tab._aggregate_per_day_shift(distributions)
+        tab._aggregate_per_weekday(distributions)
+        tab._aggregate_per_shift(distributions)
+
+    return run
+
+
+# ---------------------------------------------------------------------------
+# Exports
+# ---------------------------------------------------------------------------
+def bench_export_payroll_summary_csv(summary: Dict, scratch: str):
+    from Export import export_payroll_summary_csv
+
+    index, keys = _employees_index()
+    period_info = {"id": _largest_period(), "start_date_iso": summary["start_date"], "end_date_iso": summary["end_date"]}
+    out_path = os.path.join(scratch, "payroll_summary.csv")
+    return lambda: export_payroll_summary_csv("2025-01", period_info, index, keys, out_path)
+
+
+def bench_export_annual_declaration_csv(summary: Dict, scratch: str):
+    from Export import export_annual_declaration_csv
+
+    year = date.fromisoformat(summary["end_date"]).year - 1
+    out_path = os.path.join(scratch, "annual_declaration.csv")
+    return lambda: export_annual_declaration_csv(year, out_path)
+
+
+def bench_export_payroll_year_stream(summary: Dict, scratch: str):
+    from payroll.summary_export import export_payroll_summary_stream
+
+    year = date.fromisoformat(summary["end_date"]).year - 1
+    out_path = os.path.join(scratch, "payroll_year.csv.gz")
+    return lambda: export_payroll_summary_stream(out_path, start_date=f"{year}-01-01", end_date=f"{year}-12-31")
+
+
+def bench_export_all_employee_pdfs(summary: Dict, scratch: str):
+    from Export import export_all_employee_pdfs
+
+    index, _ = _employees_index()
+    return lambda: export_all_employee_pdfs("2025-01", index, scratch)
+
+
+def bench_locked_period_reads(summary: Dict, scratch: str):
+    # Locks the largest period of this case's own copy of the database.
+    from db.distributions_repo import (
+        employee_totals_for_period,
+        get_distributions_for_period,
+        invalidate_distribution_cache,
+    )
+    from payroll.pay_calendar import PayCalendarService
+
+    period_id = _largest_period()
+    PayCalendarService().lock_period(period_id)
+
+    def run():
+        invalidate_distribution_cache()
+        get_distributions_for_period(pay_period_id=period_id, status="CONFIRMED")
+        employee_totals_for_period(pay_period_id=period_id)
+
+    return run
+
+
+CASES: List[Case] = [
+    ("create_distribution", bench_create_distribution, 20),
+    ("create_distributions_bulk", bench_create_distributions_bulk, 5),
+    ("set_distribution_status_bulk", bench_set_distribution_status_bulk, 10),
+    ("get_distributions_for_period", bench_get_distributions_for_period, 5),
+    ("get_distribution_cached", bench_get_distribution_cached, 10),
+    ("search_distributions", bench_search_distributions, 10),
+    ("period_scoped_queries", bench_period_scoped_queries, 10),
+    ("employee_totals_for_period", bench_employee_totals_for_period, 20),
+    ("employee_history", bench_employee_history, 10),
+    ("list_employees", bench_list_employees, 20),
+    ("upsert_many", bench_upsert_many, 5),
+    ("ensure_periods", bench_ensure_periods, 5),
+    ("period_for_local_date", bench_period_for_local_date, 5),
+    ("distribution_math", bench_distribution_math, 50),
+    ("analyse_aggregations", bench_analyse_aggregations, 20),
+    ("export_payroll_summary_csv", bench_export_payroll_summary_csv, 20),
+    ("export_annual_declaration_csv", bench_export_annual_declaration_csv, 5),
+    ("export_payroll_year_stream", bench_export_payroll_year_stream, 3),
+    ("export_all_employee_pdfs", bench_export_all_employee_pdfs, 3),
+    ("locked_period_reads", bench_locked_period_reads, 5),
+]
@@ -0,0 +1,228 @@
+"""
+Run the benchmark suite, compare with a JSON baseline, fail on regressions.
+
+    python -m benchmarks.run                      # compare with benchmarks/baseline.json
+    python -m benchmarks.run --save-baseline      # record a new baseline
+    python -m benchmarks.run --only create_distribution --threshold 40
+
+Exit status is 1 when any case is slower than the baseline by more than
+``--threshold`` percent (and by more than ``--noise-floor-ms`` in absolute
+terms, so sub-millisecond jitter never fails a run).
+
+Every case runs on its own copy of the generated database, so a case sees
+the same starting state whether it runs alone (``--only``) or after the
+others. A baseline is only compared with a run on the same dataset
+(``--years``, ``--employees``, ``--seed``) and is always recorded by a
+full run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_THRESHOLD_PCT = 25.0
+DEFAULT_NOISE_FLOOR_MS = 2.0
+DATASET_KEYS = ("years", "employees", "seed")
+
+
+def _time_case(fn, repeat: int, warmup: int = 1) -> Dict:
+    for _ in range(warmup):
+        fn()
+    samples: List[float] = []
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {
+        "min_ms": round(min(samples) * 1000.0, 3),
+        "median_ms": round(statistics.median(samples) * 1000.0, 3),
+        "runs": len(samples),
+    }
+
+
+def compare(
+    results: Dict[str, Dict],
+    baseline: Dict[str, Dict],
+    *,
+    threshold_pct: float = DEFAULT_THRESHOLD_PCT,
+    noise_floor_ms: float = DEFAULT_NOISE_FLOOR_MS,
+    meta: Optional[Dict] = None,
+    baseline_meta: Optional[Dict] = None,
+) -> List[Dict]:
+    """
+    Return one row per case present in both runs, flagged when regressed.
+    When both ``meta`` blocks are given they must describe the same
+    dataset, otherwise the timings are not comparable (ValueError).
+    """
+    if meta is not None and baseline_meta is not None:
+        differences = [
+            f"{key}={baseline_meta.get(key)!r} (référence) / {meta.get(key)!r} (run)"
+            for key in DATASET_KEYS
+            if baseline_meta.get(key) != meta.get(key)
+        ]
+        if differences:
+            raise ValueError("Référence enregistrée sur un autre jeu de données: " + ", ".join(differences))
+    rows = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base or not base.get("min_ms"):
+            continue
+        delta_ms = current["min_ms"] - base["min_ms"]
+        change_pct = delta_ms / base["min_ms"] * 100.0
+        rows.append(
+            {
+                "name": name,
+                "baseline_ms": base["min_ms"],
+                "current_ms": current["min_ms"],
+                "change_pct": round(change_pct, 1),
+                "regressed": change_pct > threshold_pct and delta_ms > noise_floor_ms,
+            }
+        )
+    return rows
+
+
+def load_baseline(path: str) -> Dict:
+    """The saved report (``{"meta", "results"}``), or ``{}`` when there is none."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def _copy_database(source: str, target: str) -> None:
+    # The backup API copies a consistent image even if the source is in WAL mode.
+    src = sqlite3.connect(source)
+    dst = sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+
+def _write_json(path: str, payload: Dict) -> None:
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(payload, fh, indent=2, ensure_ascii=False, sort_keys=True)
+        fh.write("\n")
+
+
+def run_suite(*, years: float, employees: int, seed: int, only: Optional[Sequence[str]] = None) -> Dict:
+    """
+    Generate a scratch dataset, time every case on its own copy of it and
+    return the report payload.
+    """
+    scratch = tempfile.mkdtemp(prefix="tipsplit-bench-")
+    saved_env = {key: os.environ.get(key) for key in ("TIPSPLIT_DB_PATH", "HOME", "USERPROFILE")}
+    dataset_path = os.path.join(scratch, "dataset.db")
+    # Keep config, logs and PDF exports inside the scratch folder.
+    os.environ["TIPSPLIT_DB_PATH"] = dataset_path
+    os.environ["HOME"] = scratch
+    os.environ["USERPROFILE"] = scratch
+    try:
+        from db.synthetic_data import generate_dataset
+        from benchmarks.cases import CASES
+
+        summary = generate_dataset(years=years, employees=employees, seed=seed)
+        results: Dict[str, Dict] = {}
+        for name, builder, repeat in CASES:
+            if only and name not in only:
+                continue
+            case_dir = os.path.join(scratch, name)
+            os.makedirs(case_dir, exist_ok=True)
+            case_db = os.path.join(case_dir, "bench.db")
+            _copy_database(dataset_path, case_db)
+            os.environ["TIPSPLIT_DB_PATH"] = case_db
+            fn = builder(summary, case_dir)
+            results[name] = _time_case(fn, repeat)
+            print(f"{name:32s} min={results[name]['min_ms']:10.3f} ms  median={results[name]['median_ms']:10.3f} ms")
+        return {
+            "meta": {
+                "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "platform": platform.platform(),
+                "years": years,
+                "employees": employees,
+                "seed": seed,
+                "distributions": summary["distributions"],
+            },
+            "results": results,
+        }
+    finally:
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks TipSplit (sans interface).")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Écrit les résultats comme nouvelle référence.")
+    parser.add_argument("--output", help="Écrit aussi les résultats de ce run dans ce fichier JSON.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD_PCT, help="Régression tolérée (%%).")
+    parser.add_argument("--noise-floor-ms", type=float, default=DEFAULT_NOISE_FLOOR_MS)
+    parser.add_argument("--years", type=float, default=2.0)
+    parser.add_argument("--employees", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=20240101)
+    parser.add_argument("--only", nargs="*", help="Noms des cas à exécuter.")
+    args = parser.parse_args(argv)
+    if args.save_baseline and args.only:
+        parser.error("--save-baseline enregistre un run complet: retirez --only.")
+
+    logging.basicConfig(level=logging.WARNING)
+    report = run_suite(years=args.years, employees=args.employees, seed=args.seed, only=args.only)
+    if args.output:
+        _write_json(args.output, report)
+    if args.save_baseline:
+        _write_json(args.baseline, report)
+        print(f"Référence enregistrée: {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if not baseline:
+        print(f"Aucune référence trouvée ({args.baseline}); utilisez --save-baseline.")
+        return 0
+
+    try:
+        rows = compare(
+            report["results"],
+            baseline.get("results", {}),
+            threshold_pct=args.threshold,
+            noise_floor_ms=args.noise_floor_ms,
+            meta=report["meta"],
+            baseline_meta=baseline.get("meta", {}),
+        )
+    except ValueError as exc:
+        print(f"{exc}; relancez avec les mêmes paramètres ou enregistrez une nouvelle référence.")
+        return 2
+    failed = [row for row in rows if row["regressed"]]
+    for row in rows:
+        flag = "REGRESSION" if row["regressed"] else "ok"
+        print(
+            f"{row['name']:32s} {row['baseline_ms']:10.3f} -> {row['current_ms']:10.3f} ms "
+            f"({row['change_pct']:+6.1f}%) {flag}"
+        )
+    if failed:
+        print(f"{len(failed)} cas au-delà du seuil de {args.threshold:.0f}%.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
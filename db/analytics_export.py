@@ -0,0 +1,419 @@
+"""
+Bulk fact-table export for BI tools.
+
+Writes three fact tables of CONFIRMED distributions under ``out_dir``:
+
+- ``distributions``: one row per distribution, with its inputs and declaration inputs
+- ``allocations``: one row per employee line of a distribution
+- ``daily``: one row per day and shift (ventes, service hours, adjusted tips)
+
+Each run appends new part files (``<table>/part-<first>-<last>.parquet``,
+or ``.csv.gz`` when pyarrow is not installed) and records the last exported
+distribution id in ``export_state.json``, so the next run only moves new
+data. Money is exported as integer cents, like the database stores it.
+
+An unconfirmed distribution of an OPEN period holds the watermark back:
+rows created after it are exported only once it is confirmed (or
+deleted). The run's summary names it under ``blocked_by``. Unconfirmed
+rows of LOCKED/PAYED periods are passed over so a closed period cannot
+stall the export, but their ids are kept in the state file
+(``pending_ids``): the period may be unlocked and the row confirmed later,
+so every run re-checks them and exports the ones confirmed since, in a
+``part-<first>-<last>-late`` file. ``daily`` rows are additive: when a
+day gains a distribution after it was exported, a later part holds a
+second row for that day.
+
+Distributions of archived periods are read from their yearly archive
+files: a full export covers every period, and an incremental run only
+attaches the archives holding ids past the watermark (usually none).
+
+    python -m db.analytics_export --out ~/TipSplitBI
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import gzip
+import json
+import logging
+import os
+import sys
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .db_manager import db_session
+from .period_archive import attach_archives_for
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except Exception:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+logger = logging.getLogger("tipsplit.analytics_export")
+
+STATE_FILENAME = "export_state.json"
+SCHEMA_FILENAME = "schema.json"
+CHUNK_DISTRIBUTIONS = 5000
+
+# (column, type) per table; types are "int", "float", "str" and "date" (ISO day).
+TABLES: Dict[str, Tuple[Tuple[str, str], ...]] = {
+    "distributions": (
+        ("distribution_id", "int"),
+        ("dist_ref", "str"),
+        ("pay_period_id", "str"),
+        ("pay_period_display_id", "str"),
+        ("date", "date"),
+        ("shift", "str"),
+        ("shift_instance", "int"),
+        ("created_at", "str"),
+        ("confirmed_at", "str"),
+        ("ventes_nettes_cents", "int"),
+        ("depot_net_cents", "int"),
+        ("frais_admin_cents", "int"),
+        ("cash_cents", "int"),
+        ("ventes_totales_cents", "int"),
+        ("clients", "int"),
+        ("tips_due_cents", "int"),
+        ("ventes_nourriture_cents", "int"),
+    ),
+    "allocations": (
+        ("row_id", "int"),
+        ("distribution_id", "int"),
+        ("date", "date"),
+        ("shift", "str"),
+        ("employee_id", "int"),
+        ("employee_number", "str"),
+        ("employee_name", "str"),
+        ("section", "str"),
+        ("hours", "float"),
+        ("cash_cents", "int"),
+        ("sur_paye_cents", "int"),
+        ("frais_admin_cents", "int"),
+        ("A_cents", "int"),
+        ("B_cents", "int"),
+        ("D_cents", "int"),
+        ("E_cents", "int"),
+        ("F_cents", "int"),
+    ),
+    "daily": (
+        ("date", "date"),
+        ("shift", "str"),
+        ("distributions", "int"),
+        ("ventes_nettes_cents", "int"),
+        ("service_hours", "float"),
+        # (- Dépot Net) + Cash + Frais Admin * 0.8, in tenths of a cent (as AnalyseTab).
+        ("tips_adj_milli", "int"),
+        ("clients", "int"),
+    ),
+}
+
+# One branch per schema (main, then each attached archive), so every join
+# stays inside one file; ``_ORDER`` sorts the union.
+_QUERIES = {
+    "distributions": """
+        SELECT d.id AS distribution_id, d.dist_ref, p.id AS pay_period_id,
+               p.display_id AS pay_period_display_id, d.date_iso AS date, d.shift, d.shift_instance,
+               d.created_at, d.confirmed_at,
+               i.ventes_nettes_cents, i.depot_net_cents, i.frais_admin_cents, i.cash_cents,
+               di.ventes_totales_cents, di.clients, di.tips_due_cents, di.ventes_nourriture_cents
+        FROM {s}.distributions d
+        JOIN main.pay_periods p ON p.pk = d.period_pk
+        LEFT JOIN {s}.distribution_inputs i ON i.distribution_id = d.id
+        LEFT JOIN {s}.distribution_declaration_inputs di ON di.distribution_id = d.id
+        WHERE d.id {ids} AND d.status = 'CONFIRMED'
+    """,
+    "allocations": """
+        SELECT e.id AS row_id, e.distribution_id, d.date_iso AS date, d.shift, e.employee_id,
+               e.employee_number, e.employee_name, e.section, e.hours,
+               e.cash_cents, e.sur_paye_cents, e.frais_admin_cents,
+               e.A_cents, e.B_cents, e.D_cents, e.E_cents, e.F_cents
+        FROM {s}.distributions d
+        JOIN {s}.distribution_employees e ON e.distribution_id = d.id
+        WHERE d.id {ids} AND d.status = 'CONFIRMED'
+    """,
+    # A day's distributions share one period, so one file: groups never span branches.
+    "daily": """
+        SELECT d.date_iso AS date, d.shift, COUNT(*) AS distributions,
+               COALESCE(SUM(i.ventes_nettes_cents), 0) AS ventes_nettes_cents,
+               COALESCE(SUM((SELECT SUM(e.hours) FROM {s}.distribution_employees e
+                              WHERE e.distribution_id = d.id AND lower(e.section) LIKE '%service%')), 0)
+                   AS service_hours,
+               COALESCE(SUM((COALESCE(i.cash_cents, 0) - COALESCE(i.depot_net_cents, 0)) * 10
+                            + COALESCE(i.frais_admin_cents, 0) * 8), 0) AS tips_adj_milli,
+               COALESCE(SUM(di.clients), 0) AS clients
+        FROM {s}.distributions d
+        LEFT JOIN {s}.distribution_inputs i ON i.distribution_id = d.id
+        LEFT JOIN {s}.distribution_declaration_inputs di ON di.distribution_id = d.id
+        WHERE d.id {ids} AND d.status = 'CONFIRMED'
+        GROUP BY d.date_iso, d.shift
+    """,
+}
+_ORDER = {
+    "distributions": "distribution_id",
+    "allocations": "distribution_id, row_id",
+    "daily": "date, shift",
+}
+
+
+def default_format() -> str:
+    return "parquet" if pq is not None else "csv"
+
+
+def load_state(out_dir: str) -> Dict:
+    path = os.path.join(out_dir, STATE_FILENAME)
+    if not os.path.exists(path):
+        return {"last_distribution_id": 0}
+    with open(path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def _save_state(out_dir: str, state: Dict) -> None:
+    path = os.path.join(out_dir, STATE_FILENAME)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(state, fh, indent=2, ensure_ascii=False)
+        fh.write("\n")
+    os.replace(tmp_path, path)
+
+
+def _write_schema(out_dir: str, fmt: str) -> None:
+    payload = {
+        "format": fmt,
+        "money": "integer cents",
+        "tables": {name: [{"name": col, "type": kind} for col, kind in cols] for name, cols in TABLES.items()},
+    }
+    with open(os.path.join(out_dir, SCHEMA_FILENAME), "w", encoding="utf-8") as fh:
+        json.dump(payload, fh, indent=2, ensure_ascii=False)
+        fh.write("\n")
+
+
+def _arrow_schema(table: str):
+    types = {"int": pa.int64(), "float": pa.float64(), "str": pa.string(), "date": pa.date32()}
+    return pa.schema([(col, types[kind]) for col, kind in TABLES[table]])
+
+
+def _write_part(path: str, table: str, rows: List, fmt: str) -> None:
+    columns = [col for col, _ in TABLES[table]]
+    tmp_path = f"{path}.tmp"
+    if fmt == "parquet":
+        data = {col: [row[col] for row in rows] for col in columns}
+        for col, kind in TABLES[table]:
+            if kind == "date":
+                data[col] = [date.fromisoformat(v) if v else None for v in data[col]]
+        pq.write_table(pa.table(data, schema=_arrow_schema(table)), tmp_path, compression="zstd")
+    else:
+        with gzip.open(tmp_path, "wt", newline="", encoding="utf-8") as fh:
+            writer = csv.writer(fh, lineterminator="\n")
+            writer.writerow(columns)
+            for row in rows:
+                writer.writerow(["" if row[col] is None else row[col] for col in columns])
+    os.replace(tmp_path, path)
+
+
+def _fetch(conn, years: Sequence[int], ids_sql: str, params: Sequence) -> Dict[str, List]:
+    """Rows of every fact table for the ids matching ``ids_sql``, in main and the attached ``years``."""
+    schemas = ["main", *(f"archive_{year}" for year in years)]
+    fetched = {}
+    for table, sql in _QUERIES.items():
+        union = " UNION ALL ".join(sql.format(s=schema, ids=ids_sql) for schema in schemas)
+        fetched[table] = conn.execute(f"{union} ORDER BY {_ORDER[table]}", [*params] * len(schemas)).fetchall()
+    return fetched
+
+
+def _blocker(conn, after_id: int) -> Optional[Dict]:
+    """The first unconfirmed distribution past ``after_id`` that can still be confirmed (OPEN period)."""
+    row = conn.execute(
+        """
+        SELECT d.id AS distribution_id, d.date_local, d.shift, p.id AS pay_period_id
+        FROM distributions d
+        JOIN pay_periods p ON p.pk = d.period_pk
+        WHERE d.id > ? AND d.status <> 'CONFIRMED' AND p.status = 'OPEN'
+        ORDER BY d.id
+        LIMIT 1
+        """,
+        (after_id,),
+    ).fetchone()
+    return dict(row) if row else None
+
+
+def _next_chunk(conn, after_id: int, limit: int) -> Optional[Tuple[int, int]]:
+    """First/last id of the next ``limit`` distributions not blocked by an unconfirmed one."""
+    blocker = _blocker(conn, after_id)
+    upper = blocker["distribution_id"] - 1 if blocker is not None else None
+    row = conn.execute(
+        f"""
+        SELECT MIN(id) AS first_id, MAX(id) AS last_id FROM (
+            SELECT id FROM distributions
+            WHERE id > ? {"AND id <= ?" if upper is not None else ""}
+            ORDER BY id LIMIT ?
+        )
+        """,
+        (after_id, upper, limit) if upper is not None else (after_id, limit),
+    ).fetchone()
+    if row["first_id"] is None:
+        return None
+    return row["first_id"], row["last_id"]
+
+
+def _unconfirmed_ids(conn, first_id: int, last_id: int) -> List[int]:
+    # Only rows of closed periods can be left unconfirmed inside a chunk (see _blocker).
+    rows = conn.execute(
+        "SELECT id FROM distributions WHERE id BETWEEN ? AND ? AND status <> 'CONFIRMED' ORDER BY id",
+        (first_id, last_id),
+    ).fetchall()
+    return [row["id"] for row in rows]
+
+
+def _recheck_pending(conn, pending: List[int]) -> Tuple[List[int], List[int]]:
+    """Split ``pending`` ids into (confirmed since, still unconfirmed); deleted ids are dropped."""
+    if not pending:
+        return [], []
+    rows = conn.execute(
+        "SELECT id, status FROM distributions WHERE id IN (SELECT value FROM json_each(?)) ORDER BY id",
+        (json.dumps(pending),),
+    ).fetchall()
+    confirmed = [row["id"] for row in rows if row["status"] == "CONFIRMED"]
+    waiting = [row["id"] for row in rows if row["status"] != "CONFIRMED"]
+    return confirmed, waiting
+
+
+def export_fact_tables(
+    out_dir: str,
+    *,
+    fmt: Optional[str] = None,
+    full: bool = False,
+    chunk_size: int = CHUNK_DISTRIBUTIONS,
+) -> Dict:
+    """
+    Export confirmed distributions newer than the saved watermark (all of
+    them with ``full=True``). ``fmt`` is "parquet" or "csv"; by default
+    Parquet when pyarrow is available. Returns a summary of the run.
+    """
+    fmt = fmt or default_format()
+    if fmt not in ("parquet", "csv"):
+        raise ValueError(f"Format d'export inconnu: {fmt}")
+    if fmt == "parquet" and pq is None:
+        raise ValueError("pyarrow n'est pas installé; utilisez le format csv.")
+    if chunk_size < 1:
+        raise ValueError("chunk_size doit être positif.")
+
+    os.makedirs(out_dir, exist_ok=True)
+    state = {"last_distribution_id": 0} if full else load_state(out_dir)
+    if state.get("format") and state["format"] != fmt and not full:
+        raise ValueError(f"Export existant au format {state['format']}; relancez avec full=True pour changer.")
+    for table in TABLES:
+        table_dir = os.path.join(out_dir, table)
+        os.makedirs(table_dir, exist_ok=True)
+        if full:
+            for name in os.listdir(table_dir):
+                if name.startswith("part-"):
+                    os.remove(os.path.join(table_dir, name))
+    _write_schema(out_dir, fmt)
+
+    extension = ".parquet" if fmt == "parquet" else ".csv.gz"
+    last_id = int(state.get("last_distribution_id") or 0)
+    pending = [int(dist_id) for dist_id in state.get("pending_ids", [])]
+    counts = {table: 0 for table in TABLES}
+    parts = 0
+
+    def write_parts(fetched: Dict[str, List], name: str) -> None:
+        for table, rows in fetched.items():
+            if rows:
+                _write_part(os.path.join(out_dir, table, f"{name}{extension}"), table, rows, fmt)
+                counts[table] += len(rows)
+
+    def save_state() -> None:
+        # Saved after every part: an interrupted run resumes where it stopped.
+        _save_state(
+            out_dir,
+            {
+                "format": fmt,
+                "last_distribution_id": last_id,
+                "pending_ids": pending,
+                "updated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            },
+        )
+
+    with db_session() as conn:
+        years = attach_archives_for(conn, distribution_ids=pending)
+        late, pending = _recheck_pending(conn, pending)
+        fetched = _fetch(conn, years, "IN (SELECT value FROM json_each(?))", (json.dumps(late),)) if late else None
+    if fetched:
+        write_parts(fetched, f"part-{late[0]:09d}-{late[-1]:09d}-late")
+        parts += 1
+        logger.info("Export BI: %s distributions confirmées après coup", len(late))
+    save_state()
+
+    while True:
+        with db_session() as conn:
+            years = attach_archives_for(conn, after_distribution_id=last_id)
+            chunk = _next_chunk(conn, last_id, chunk_size)
+            if chunk is None:
+                break
+            first_id, chunk_last = chunk
+            fetched = _fetch(conn, years, "BETWEEN ? AND ?", chunk)
+            skipped = _unconfirmed_ids(conn, first_id, chunk_last)
+        write_parts(fetched, f"part-{first_id:09d}-{chunk_last:09d}")
+        parts += 1
+        last_id = chunk_last
+        pending += skipped
+        save_state()
+        logger.info("Export BI: distributions %s-%s (%s)", first_id, chunk_last, counts)
+
+    with db_session() as conn:
+        blocked_by = _blocker(conn, last_id)
+    summary = {
+        "format": fmt,
+        "out_dir": out_dir,
+        "parts": parts,
+        "last_distribution_id": last_id,
+        "rows": counts,
+        "late_distributions": len(late),
+        "pending_ids": pending,
+        "blocked_by": blocked_by,
+    }
+    logger.info("Export BI terminé: %s", summary)
+    if blocked_by:
+        logger.warning(
+            "Export BI arrêté à la distribution %s, non confirmée (%s %s)",
+            blocked_by["distribution_id"],
+            blocked_by["date_local"],
+            blocked_by["shift"],
+        )
+    return summary
+
+
+def main(argv: Optional[Sequence[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="Exporte les tables de faits TipSplit (Parquet ou CSV.gz).")
+    parser.add_argument("--out", required=True, help="Dossier de sortie.")
+    parser.add_argument("--format", choices=("parquet", "csv"), default=None)
+    parser.add_argument("--full", action="store_true", help="Ignore le dernier export et repart de zéro.")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_DISTRIBUTIONS)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:%(name)s:%(message)s")
+    summary = export_fact_tables(
+        os.path.expanduser(args.out), fmt=args.format, full=args.full, chunk_size=args.chunk_size
+    )
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    if summary["pending_ids"]:
+        print(
+            f"{len(summary['pending_ids'])} distribution(s) non confirmée(s) de périodes fermées, "
+            "revérifiée(s) au prochain export.",
+            file=sys.stderr,
+        )
+    blocked_by = summary["blocked_by"]
+    if blocked_by:
+        print(
+            f"Attention: export en attente de la distribution {blocked_by['distribution_id']} "
+            f"({blocked_by['date_local']} {blocked_by['shift']}), à confirmer ou supprimer.",
+            file=sys.stderr,
+        )
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Distribution audit log.
+
+Audit rows are buffered per transaction (:class:`AuditBuffer`) and written
+with one ``executemany`` just before the caller's transaction commits, so
+a row is durable exactly when the change it describes is. Each row copies
+the distribution's period, day and shift into indexed columns next to
+``action`` and ``actor``; free-form details stay in ``details_json``.
+
+Rows past retention, and the trail of deleted distributions, move to
+``distribution_audit_archive`` (see :func:`archive_audit`).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Union
+
+from .db_manager import SEARCH_TABLE, db_session, search_index_available
+
+logger = logging.getLogger("tipsplit.audit")
+
+# Rows buffered before an early flush (still inside the caller's transaction).
+AUDIT_FLUSH_SIZE = 500
+AUDIT_RETENTION_DAYS = 730
+AUDIT_ARCHIVE_BATCH_SIZE = 5000
+AUDIT_PAGE_SIZE = 200
+
+_AUDIT_COLUMNS = (
+    "id, distribution_id, action, actor, created_at, details_json, period_pk, date_iso, shift, item_count"
+)
+
+# Period, day and shift are read from the distribution by the INSERT itself.
+_INSERT_SQL = """
+    INSERT INTO distribution_audit(
+        distribution_id, action, actor, created_at, details_json, item_count, period_pk, date_iso, shift
+    )
+    SELECT d.id, ?, ?, ?, ?, ?, d.period_pk, d.date_iso, d.shift
+    FROM distributions d
+    WHERE d.id = ?
+"""
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class AuditBuffer:
+    """
+    Audit rows of one transaction. Use as a context manager inside
+    ``db_session()``: the rows are written when the block exits without
+    error, before the session commits, and dropped with the transaction
+    otherwise. A failed audit write is logged and never blocks the change.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, *, flush_size: int = AUDIT_FLUSH_SIZE):
+        self.conn = conn
+        self.flush_size = flush_size
+        self.rows: List[tuple] = []
+
+    def add(
+        self,
+        dist_id: int,
+        action: str,
+        *,
+        actor: str = "",
+        details: Optional[Dict] = None,
+        item_count: int = 1,
+    ) -> None:
+        self.rows.append(
+            (
+                action,
+                actor or "",
+                _utc_now(),
+                json.dumps(details or {}, ensure_ascii=False),
+                item_count,
+                dist_id,
+            )
+        )
+        if len(self.rows) >= self.flush_size:
+            self.flush()
+
+    def flush(self) -> int:
+        rows, self.rows = self.rows, []
+        if not rows:
+            return 0
+        try:
+            self.conn.executemany(_INSERT_SQL, rows)
+        except sqlite3.Error:
+            logger.warning("Journal d’audit non écrit (%s entrées)", len(rows), exc_info=True)
+            return 0
+        return len(rows)
+
+    def __enter__(self) -> "AuditBuffer":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is None:
+            self.flush()
+        else:
+            self.rows = []
+        return False
+
+
+def archive_audit_rows(conn: sqlite3.Connection, where: str, params: Iterable = ()) -> int:
+    """Move the audit rows matching ``where`` to the archive table; return rows moved."""
+    params = tuple(params)
+    conn.execute(
+        f"""
+        INSERT OR IGNORE INTO distribution_audit_archive({_AUDIT_COLUMNS}, archived_at)
+        SELECT {_AUDIT_COLUMNS}, ? FROM distribution_audit WHERE {where}
+        """,
+        (_utc_now(), *params),
+    )
+    return conn.execute(f"DELETE FROM distribution_audit WHERE {where}", params).rowcount
+
+
+def archive_audit(
+    *,
+    older_than_days: int = AUDIT_RETENTION_DAYS,
+    batch_size: int = AUDIT_ARCHIVE_BATCH_SIZE,
+    now: Optional[datetime] = None,
+) -> int:
+    """
+    Retention: move audit rows older than ``older_than_days`` to
+    ``distribution_audit_archive``, ``batch_size`` rows per transaction,
+    then merge the search index segments left by the deletes.
+    Returns the number of rows archived.
+    """
+    if older_than_days < 0:
+        raise ValueError("older_than_days doit être positif.")
+    if batch_size < 1:
+        raise ValueError("batch_size doit être positif.")
+    cutoff = ((now or datetime.now(timezone.utc)) - timedelta(days=older_than_days)).isoformat()
+    archived = 0
+    while True:
+        with db_session() as conn:
+            moved = archive_audit_rows(
+                conn,
+                "id IN (SELECT id FROM distribution_audit WHERE created_at < ? ORDER BY created_at LIMIT ?)",
+                (cutoff, batch_size),
+            )
+        archived += moved
+        if moved < batch_size:
+            break
+    if archived:
+        with db_session() as conn:
+            if search_index_available(conn):
+                conn.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')")
+        logger.info("Journal d’audit: %s entrées archivées (avant %s)", archived, cutoff[:10])
+    return archived
+
+
+def list_audit_entries(
+    *,
+    distribution_id: Optional[int] = None,
+    pay_period_id: Optional[str] = None,
+    action: Optional[str] = None,
+    actor: Optional[str] = None,
+    since: Union[date, datetime, str, None] = None,
+    until: Union[date, datetime, str, None] = None,
+    include_archived: bool = False,
+    limit: int = AUDIT_PAGE_SIZE,
+) -> List[Dict]:
+    """
+    Audit entries, newest first, filtered on the indexed columns.
+    ``since`` is inclusive and ``until`` exclusive (ISO timestamps or dates).
+    ``details`` is the decoded ``details_json``.
+    """
+    clauses: List[str] = []
+    params: List = []
+    if distribution_id is not None:
+        clauses.append("distribution_id = ?")
+        params.append(int(distribution_id))
+    if pay_period_id:
+        clauses.append("period_pk = (SELECT pk FROM pay_periods WHERE id = ?)")
+        params.append(pay_period_id)
+    if action:
+        clauses.append("action = ?")
+        params.append(action)
+    if actor is not None:
+        clauses.append("actor = ?")
+        params.append(actor)
+    if since:
+        clauses.append("created_at >= ?")
+        params.append(since.isoformat() if isinstance(since, (date, datetime)) else str(since))
+    if until:
+        clauses.append("created_at < ?")
+        params.append(until.isoformat() if isinstance(until, (date, datetime)) else str(until))
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    tables = ["distribution_audit"] + (["distribution_audit_archive"] if include_archived else [])
+    union = " UNION ALL ".join(
+        f"SELECT {_AUDIT_COLUMNS}, {int(table != 'distribution_audit')} AS archived FROM {table} {where}"
+        for table in tables
+    )
+    with db_session() as conn:
+        rows = conn.execute(
+            f"SELECT * FROM ({union}) ORDER BY created_at DESC, id DESC LIMIT ?",
+            [*params * len(tables), limit],
+        ).fetchall()
+    entries = []
+    for row in rows:
+        entry = dict(row)
+        try:
+            entry["details"] = json.loads(entry.pop("details_json") or "{}")
+        except ValueError:
+            entry["details"] = {}
+        entry["archived"] = bool(entry["archived"])
+        entries.append(entry)
+    return entries
@@ -0,0 +1,398 @@
+"""
+Online database backups.
+
+:func:`create_backup` copies the live database with the SQLite backup API,
+``BACKUP_PAGES_PER_STEP`` pages at a time with a short pause between steps
+so the application keeps writing while it runs. The copy is checked with
+``PRAGMA integrity_check`` and stored gzip-compressed as
+``backups/tipsplit-<UTC stamp>.db.gz`` next to the database.
+:func:`rotate_backups` keeps the newest backup of each of the last days,
+weeks and months (``BACKUP_RETENTION``) and deletes the rest.
+
+:class:`BackupScheduler` does both on a daemon thread once a day and runs
+manual backups and restores there too, so the UI never waits on them.
+:func:`restore_backup` verifies a backup, saves the current database, then
+copies the backup over it.
+
+    python -m db.backup create
+    python -m db.backup list
+    python -m db.backup verify <fichier.db.gz>
+    python -m db.backup restore <fichier.db.gz>
+
+Archive files (see db.period_archive) are not included: they are written
+once per archived period and are copied with the data folder.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import logging
+import os
+import queue
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+from .db_manager import SCHEMA_VERSION, connect, get_db_path, init_db
+from .distributions_repo import invalidate_distribution_cache
+
+logger = logging.getLogger("tipsplit.backup")
+
+BACKUP_DIRNAME = "backups"
+BACKUP_PAGES_PER_STEP = 256
+BACKUP_STEP_PAUSE = 0.005
+BACKUP_INTERVAL_HOURS = 24
+BACKUP_CHECK_SECONDS = 15 * 60
+# Newest backup kept per day, ISO week and month, for this many of each.
+BACKUP_RETENTION = {"daily": 7, "weekly": 5, "monthly": 12}
+
+_FILE_RE = re.compile(r"^tipsplit-(\d{8}-\d{6})(?:-\d+)?\.db\.gz$")
+_STAMP_FORMAT = "%Y%m%d-%H%M%S"
+
+# One backup or restore at a time, whichever thread asks.
+_backup_lock = threading.Lock()
+
+
+class BackupError(RuntimeError):
+    pass
+
+
+def get_backup_dir() -> str:
+    path = os.path.join(os.path.dirname(get_db_path()), BACKUP_DIRNAME)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def list_backups(directory: Optional[str] = None) -> List[Dict]:
+    """Backups in ``directory``, newest first: ``{"path", "created_at", "size"}``."""
+    directory = directory or get_backup_dir()
+    if not os.path.isdir(directory):
+        return []
+    backups = []
+    for name in os.listdir(directory):
+        match = _FILE_RE.match(name)
+        if not match:
+            continue
+        path = os.path.join(directory, name)
+        backups.append(
+            {
+                "path": path,
+                "created_at": datetime.strptime(match.group(1), _STAMP_FORMAT).replace(tzinfo=timezone.utc),
+                "size": os.path.getsize(path),
+            }
+        )
+    backups.sort(key=lambda item: (item["created_at"], item["path"]), reverse=True)
+    return backups
+
+
+def _check_integrity(conn: sqlite3.Connection) -> Optional[int]:
+    """Raise BackupError unless the database is intact; return its schema version."""
+    problems = [row[0] for row in conn.execute("PRAGMA integrity_check").fetchall()]
+    if problems != ["ok"]:
+        raise BackupError("Sauvegarde corrompue: " + "; ".join(problems[:5]))
+    try:
+        row = conn.execute("SELECT value FROM schema_meta WHERE key = 'schema_version'").fetchone()
+    except sqlite3.DatabaseError:
+        raise BackupError("Ce fichier n’est pas une base TipSplit.")
+    return int(row[0]) if row else None
+
+
+def _new_backup_path(directory: str, created: datetime) -> str:
+    stem = f"tipsplit-{created.astimezone(timezone.utc).strftime(_STAMP_FORMAT)}"
+    path = os.path.join(directory, f"{stem}.db.gz")
+    counter = 1
+    while os.path.exists(path):
+        counter += 1
+        path = os.path.join(directory, f"{stem}-{counter}.db.gz")
+    return path
+
+
+def create_backup(
+    *,
+    directory: Optional[str] = None,
+    pages: int = BACKUP_PAGES_PER_STEP,
+    pause: float = BACKUP_STEP_PAUSE,
+    progress: Optional[Callable[[int, int, int], None]] = None,
+    now: Optional[datetime] = None,
+) -> Dict:
+    """
+    Back up the live database without closing it. ``progress(status,
+    remaining, total)`` is the sqlite3 backup callback, called after each
+    step. Returns ``{"path", "size", "schema_version", "created_at"}``.
+    """
+    if pages < 1:
+        raise ValueError("pages doit être positif.")
+    directory = directory or get_backup_dir()
+    os.makedirs(directory, exist_ok=True)
+    created = now or datetime.now(timezone.utc)
+    with _backup_lock:
+        path = _new_backup_path(directory, created)
+        copy_path = path[: -len(".gz")] + ".part"
+        try:
+            source = connect()
+            try:
+                target = sqlite3.connect(copy_path)
+                try:
+                    source.backup(target, pages=pages, progress=progress, sleep=pause)
+                    version = _check_integrity(target)
+                finally:
+                    target.close()
+            finally:
+                source.close()
+            with open(copy_path, "rb") as raw, gzip.open(path + ".part", "wb", compresslevel=6) as packed:
+                shutil.copyfileobj(raw, packed, 1024 * 1024)
+            os.replace(path + ".part", path)
+        finally:
+            for leftover in (copy_path, path + ".part"):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+    result = {
+        "path": path,
+        "size": os.path.getsize(path),
+        "schema_version": version,
+        "created_at": created.isoformat(timespec="seconds"),
+    }
+    logger.info("Sauvegarde créée: %s (%s octets)", path, result["size"])
+    return result
+
+
+@contextmanager
+def _expanded(path: str) -> Iterator[str]:
+    """Decompress a backup to a temporary file (gzip checks its CRC on the way)."""
+    if not os.path.isfile(path):
+        raise BackupError(f"Sauvegarde introuvable: {path}")
+    handle, temp_path = tempfile.mkstemp(suffix=".db", dir=os.path.dirname(get_db_path()))
+    try:
+        try:
+            with os.fdopen(handle, "wb") as raw, gzip.open(path, "rb") as packed:
+                shutil.copyfileobj(packed, raw, 1024 * 1024)
+        except (OSError, EOFError) as exc:
+            raise BackupError(f"Sauvegarde illisible: {exc}") from exc
+        yield temp_path
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def verify_backup(path: str) -> Dict:
+    """Decompress and integrity-check a backup; raises BackupError when it is unusable."""
+    with _expanded(path) as copy_path:
+        conn = sqlite3.connect(copy_path)
+        try:
+            version = _check_integrity(conn)
+        except sqlite3.DatabaseError as exc:
+            raise BackupError(f"Sauvegarde illisible: {exc}") from exc
+        finally:
+            conn.close()
+    return {"path": path, "ok": True, "schema_version": version, "size": os.path.getsize(path)}
+
+
+def restore_backup(path: str, *, save_current: bool = True) -> Dict:
+    """
+    Replace the live database with a verified backup, through the backup
+    API in a single step (other connections see the old or the new
+    database, never a mix). The current database is backed up first unless
+    ``save_current`` is False. An older backup is migrated to the current
+    schema; a backup from a newer version of the application is refused
+    before anything is written. Returns ``{"restored", "saved", "schema_version"}``.
+    """
+    saved = None
+    with _expanded(path) as copy_path:
+        source = sqlite3.connect(copy_path)
+        try:
+            try:
+                version = _check_integrity(source)
+            except sqlite3.DatabaseError as exc:
+                raise BackupError(f"Sauvegarde illisible: {exc}") from exc
+            if version is not None and version > SCHEMA_VERSION:
+                raise BackupError(
+                    f"Sauvegarde créée par une version plus récente de TipSplit (schéma {version}, "
+                    f"cette version gère jusqu’au schéma {SCHEMA_VERSION}). Mettez l’application à jour."
+                )
+            if save_current:
+                saved = create_backup()["path"]
+            with _backup_lock:
+                target = connect()
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+        finally:
+            source.close()
+    init_db()
+    invalidate_distribution_cache()
+    logger.warning("Base restaurée depuis %s (état précédent: %s)", path, saved)
+    return {"restored": path, "saved": saved, "schema_version": version}
+
+
+def _bucket(created: datetime, tier: str):
+    if tier == "daily":
+        return created.date()
+    if tier == "weekly":
+        return tuple(created.isocalendar())[:2]
+    if tier == "monthly":
+        return (created.year, created.month)
+    raise ValueError(f"Rotation inconnue: {tier}")
+
+
+def rotate_backups(*, directory: Optional[str] = None, retention: Optional[Dict[str, int]] = None) -> List[str]:
+    """Delete the backups no retention tier keeps; return the deleted paths."""
+    retention = BACKUP_RETENTION if retention is None else retention
+    backups = list_backups(directory)
+    keep = set()
+    for tier, count in retention.items():
+        buckets: List = []
+        for backup in backups:
+            bucket = _bucket(backup["created_at"], tier)
+            if bucket in buckets:
+                continue
+            if len(buckets) >= count:
+                break
+            buckets.append(bucket)
+            keep.add(backup["path"])
+    deleted = []
+    for backup in backups:
+        if backup["path"] not in keep:
+            os.remove(backup["path"])
+            deleted.append(backup["path"])
+    if deleted:
+        logger.info("Rotation des sauvegardes: %s supprimées", len(deleted))
+    return deleted
+
+
+class BackupScheduler:
+    """
+    Background thread for backups. Every ``check_seconds`` it backs up
+    and rotates when the newest backup is older than ``interval_hours``.
+    :meth:`backup_now` and :meth:`restore` queue work on the same thread;
+    their outcome goes to ``on_result(kind, result, error)``, called through
+    ``tk_widget.after`` when a widget is given.
+    """
+
+    def __init__(
+        self,
+        *,
+        interval_hours: float = BACKUP_INTERVAL_HOURS,
+        check_seconds: float = BACKUP_CHECK_SECONDS,
+        directory: Optional[str] = None,
+        on_result: Optional[Callable[[str, Optional[Dict], Optional[Exception]], None]] = None,
+        tk_widget=None,
+    ) -> None:
+        self.interval_hours = interval_hours
+        self.check_seconds = check_seconds
+        self.directory = directory
+        self.on_result = on_result
+        self.tk_widget = tk_widget
+        self._jobs: "queue.Queue" = queue.Queue()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._runner, name="tipsplit-backup", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2) -> None:
+        self._stop_event.set()
+        self._jobs.put(None)
+        thread = self._thread
+        if thread and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout=timeout)
+        self._thread = None
+
+    def backup_now(self) -> None:
+        self._jobs.put(("backup", None))
+
+    def restore(self, path: str) -> None:
+        self._jobs.put(("restore", path))
+
+    def is_due(self, now: Optional[datetime] = None) -> bool:
+        backups = list_backups(self.directory)
+        if not backups:
+            return True
+        age = (now or datetime.now(timezone.utc)) - backups[0]["created_at"]
+        return age.total_seconds() >= self.interval_hours * 3600
+
+    def _backup(self) -> Dict:
+        result = create_backup(directory=self.directory)
+        result["rotated"] = rotate_backups(directory=self.directory)
+        return result
+
+    def _runner(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                job = self._jobs.get(timeout=self.check_seconds)
+            except queue.Empty:
+                job = ("scheduled", None)
+            if job is None or self._stop_event.is_set():
+                break
+            kind, arg = job
+            if kind == "scheduled":
+                try:
+                    if self.is_due():
+                        self._backup()
+                except Exception:
+                    logger.exception("Sauvegarde automatique impossible")
+                continue
+            result, error = None, None
+            try:
+                result = self._backup() if kind == "backup" else restore_backup(arg)
+            except Exception as exc:
+                logger.exception("Échec de l’opération de sauvegarde (%s)", kind)
+                error = exc
+            self._report(kind, result, error)
+
+    def _report(self, kind: str, result: Optional[Dict], error: Optional[Exception]) -> None:
+        callback = self.on_result
+        if callback is None:
+            return
+        widget = self.tk_widget
+        if widget is not None:
+            try:
+                widget.after(0, lambda: callback(kind, result, error))
+                return
+            except Exception:
+                pass
+        callback(kind, result, error)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="Sauvegardes de la base TipSplit.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("create", help="Sauvegarde la base (sans la fermer) puis applique la rotation.")
+    commands.add_parser("list", help="Liste les sauvegardes.")
+    verify = commands.add_parser("verify", help="Vérifie l’intégrité d’une sauvegarde.")
+    verify.add_argument("path")
+    restore = commands.add_parser("restore", help="Remplace la base par une sauvegarde.")
+    restore.add_argument("path")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:%(name)s:%(message)s")
+    if args.command == "create":
+        summary = create_backup()
+        summary["rotated"] = rotate_backups()
+    elif args.command == "list":
+        summary = {
+            "backups": [
+                {**item, "created_at": item["created_at"].isoformat(timespec="seconds")} for item in list_backups()
+            ]
+        }
+    elif args.command == "verify":
+        summary = verify_backup(os.path.expanduser(args.path))
+    else:
+        summary = restore_backup(os.path.expanduser(args.path))
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Multi-process write stress test for a shared TipSplit database.
+
+Several processes (standing in for terminals) write to one scratch file at
+the same time: each creates its own distributions and increments the points
+of one shared employee with the optimistic read/``expected_version``/retry
+loop the UI uses. Afterwards the file must hold every distribution exactly
+once, the employee must show every increment (no lost update) and
+``quick_check`` must pass. Point ``--db`` at a file on the shared drive to
+check that its locking holds up before moving the real database there.
+
+Run with:  python -m db.concurrency_stress --db /tmp/tipsplit-stress.db --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import tempfile
+import time
+from datetime import date
+from typing import Dict, List, Optional, Sequence
+
+from .db_manager import ConflictError, db_session, init_db
+
+PERIOD_START = date(2025, 1, 5)
+PERIOD_DAYS = 14
+COUNTER_NAME = "Compteur Stress"
+WORKER_TIMEOUT_SECONDS = 300
+
+
+def _prepare(db_path: str) -> Dict:
+    from payroll.pay_calendar import PayCalendarService
+
+    from .employees_repo import add_employee
+
+    if os.path.exists(db_path):
+        raise ValueError(f"Le test de charge exige un fichier neuf: {db_path} existe déjà.")
+    os.environ["TIPSPLIT_DB_PATH"] = db_path
+    init_db()
+    service = PayCalendarService()
+    schedule = service.create_schedule_version(
+        name="Stress",
+        timezone_name="America/Montreal",
+        period_length_days=PERIOD_DAYS,
+        pay_date_offset_days=4,
+        anchor_start_local=f"{PERIOD_START.isoformat()}T06:00:00",
+        effective_from=PERIOD_START,
+    )
+    service.ensure_periods(schedule["id"], PERIOD_START, PERIOD_START)
+    period_id = service.list_periods(schedule["id"])[0]["id"]
+    employee_id = add_employee(COUNTER_NAME, "service", 0)
+    return {"period_id": period_id, "employee_id": employee_id}
+
+
+def _increment_points(employee_id: int) -> int:
+    """Add one point the way a terminal would; returns the conflicts met."""
+    from .employees_repo import list_employees, update_employee
+
+    conflicts = 0
+    while True:
+        [row] = [emp for emp in list_employees(role="service") if emp["id"] == employee_id]
+        try:
+            update_employee(employee_id, points=row["points"] + 1, expected_version=row["version"])
+            return conflicts
+        except ConflictError:
+            conflicts += 1
+
+
+def _worker(db_path: str, worker: int, setup: Dict, distributions: int, increments: int, start, results) -> None:
+    os.environ["TIPSPLIT_DB_PATH"] = db_path
+    from .distributions_repo import create_distribution
+
+    report = {"worker": worker, "created": [], "conflicts": 0, "error": None}
+    start.wait()
+    started = time.perf_counter()
+    try:
+        for index in range(max(distributions, increments)):
+            if index < distributions:
+                day = date.fromordinal(PERIOD_START.toordinal() + index % PERIOD_DAYS)
+                created = create_distribution(
+                    pay_period_id=setup["period_id"],
+                    date_local=day.strftime("%d-%m-%Y"),
+                    shift="SOIR",
+                    shift_instance=worker * distributions + index + 1,
+                    inputs={},
+                    declaration_inputs={},
+                    employees=[{"employee_id": str(setup["employee_id"]), "name": COUNTER_NAME}],
+                    created_by=f"poste-{worker}",
+                )
+                report["created"].append(created["dist_ref"])
+            if index < increments:
+                report["conflicts"] += _increment_points(setup["employee_id"])
+    except Exception as exc:  # reported to the parent, which fails the run
+        report["error"] = f"{type(exc).__name__}: {exc}"
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    results.put(report)
+
+
+def _verify(setup: Dict, reports: List[Dict], workers: int, distributions: int, increments: int) -> List[str]:
+    problems = [f"poste {r['worker']}: {r['error']}" for r in reports if r["error"]]
+    if len(reports) != workers:
+        problems.append(f"{workers - len(reports)} poste(s) n’ont rien rapporté")
+    reported = [ref for r in reports for ref in r["created"]]
+    with db_session() as conn:
+        refs = [row[0] for row in conn.execute("SELECT dist_ref FROM distributions")]
+        points, version = conn.execute(
+            "SELECT points, version FROM employees WHERE id = ?", (setup["employee_id"],)
+        ).fetchone()
+        check = [row[0] for row in conn.execute("PRAGMA quick_check").fetchall()]
+    expected = workers * distributions
+    if len(refs) != expected or len(set(refs)) != expected:
+        problems.append(f"{len(refs)} distributions ({len(set(refs))} distinctes) au lieu de {expected}")
+    if set(reported) - set(refs):
+        problems.append(f"{len(set(reported) - set(refs))} distribution(s) confirmée(s) mais absente(s)")
+    if points != workers * increments or version != 1 + workers * increments:
+        problems.append(
+            f"points {points:g} / version {version} au lieu de {workers * increments} / {1 + workers * increments}"
+        )
+    if check != ["ok"]:
+        problems.append("quick_check: " + "; ".join(check[:5]))
+    return problems
+
+
+def run_stress(
+    db_path: str,
+    *,
+    workers: int = 4,
+    distributions: int = 25,
+    increments: int = 25,
+) -> Dict:
+    """
+    Run ``workers`` writer processes against the new file ``db_path`` and
+    return the summary; ``problems`` is empty when nothing was lost.
+    """
+    if workers < 1 or distributions < 0 or increments < 0:
+        raise ValueError("Paramètres du test de charge invalides.")
+    previous = os.environ.get("TIPSPLIT_DB_PATH")
+    try:
+        return _run(db_path, workers, distributions, increments)
+    finally:
+        if previous is None:
+            os.environ.pop("TIPSPLIT_DB_PATH", None)
+        else:
+            os.environ["TIPSPLIT_DB_PATH"] = previous
+
+
+def _run(db_path: str, workers: int, distributions: int, increments: int) -> Dict:
+    setup = _prepare(db_path)
+    start = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(
+            target=_worker,
+            args=(db_path, worker, setup, distributions, increments, start, results),
+            daemon=True,
+        )
+        for worker in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    started = time.perf_counter()
+    start.set()
+    reports = []
+    try:
+        for _ in processes:
+            reports.append(results.get(timeout=WORKER_TIMEOUT_SECONDS))
+    except queue.Empty:  # a worker died or hung; _verify reports it missing
+        pass
+    elapsed = time.perf_counter() - started
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+
+    writes = workers * (distributions + increments)
+    return {
+        "db_path": db_path,
+        "workers": workers,
+        "distributions": workers * distributions,
+        "increments": workers * increments,
+        "conflicts": sum(r["conflicts"] for r in reports),
+        "seconds": round(elapsed, 3),
+        "writes_per_second": round(writes / elapsed, 1) if elapsed else None,
+        "problems": _verify(setup, reports, workers, distributions, increments),
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="Test d’écritures concurrentes sur une base TipSplit.")
+    parser.add_argument("--db", help="Fichier SQLite à créer (défaut: un fichier temporaire).")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--distributions", type=int, default=25, help="Distributions créées par poste.")
+    parser.add_argument("--increments", type=int, default=25, help="Mises à jour de points par poste.")
+    args = parser.parse_args(argv)
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="tipsplit-stress-"), "tipsplit-stress.db")
+    summary = run_stress(
+        db_path, workers=args.workers, distributions=args.distributions, increments=args.increments
+    )
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    if summary["problems"]:
+        raise SystemExit(1)
+    return summary
+
+
+if __name__ == "__main__":
+    main()
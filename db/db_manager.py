@@ -2,17 +2,24 @@
 Database initialization and connection helpers for TipSplit.
 
 This module centralizes the SQLite path resolution (user data dir aware),
-schema creation, and lightweight migration/version tracking.
+schema creation, and migration/version tracking: :data:`MIGRATIONS` lists
+the upgrade steps in order, each run in its own transaction.
 """
 
 from __future__ import annotations
 
+import argparse
+import functools
+import json
 import logging
 import os
+import random
 import sqlite3
 import sys
+import tempfile
+import time
 from contextlib import contextmanager
-from typing import Iterator, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence
 
 from datetime import datetime, timezone
 
@@ -23,12 +30,46 @@ except Exception:  # pragma: no cover - platformdirs is optional
 
 from AppConfig import get_user_data_dir
 
+from .money import to_cents
+
 APP_NAME = "TipSplit"
 DB_FILENAME = "tipsplit.db"
-SCHEMA_VERSION = 3
+SCHEMA_VERSION = 15
+MIGRATION_BATCH_SIZE = 5000
+
+# Several terminals may share one database file (network drive). Connections
+# wait up to BUSY_TIMEOUT_MS for a lock (TIPSPLIT_DB_BUSY_TIMEOUT_MS overrides);
+# writes take the lock up front and retry with jittered backoff. The file
+# stays in rollback-journal mode: WAL is not safe on network filesystems.
+BUSY_TIMEOUT_MS = 5000
+WRITE_RETRY_ATTEMPTS = 5
+WRITE_RETRY_BASE_DELAY = 0.05
+WRITE_RETRY_MAX_DELAY = 2.0
+
+# Money columns stored as INTEGER cents (``<name>_cents``) since schema 6.
+MONEY_COLUMNS = {
+    "distribution_inputs": ("ventes_nettes", "depot_net", "frais_admin", "cash"),
+    "distribution_declaration_inputs": ("ventes_totales", "tips_due", "ventes_nourriture"),
+    "distribution_employees": ("cash", "sur_paye", "frais_admin", "A", "B", "D", "E", "F"),
+}
 
 logger = logging.getLogger("tipsplit.db")
 
+# progress(message, fraction): fraction of the whole upgrade done, 0.0 to 1.0.
+ProgressCallback = Callable[[str, float], None]
+
+
+class MigrationError(RuntimeError):
+    """The database cannot be brought to the current schema."""
+
+
+class ConflictError(RuntimeError):
+    """A row changed on another terminal since it was read (optimistic version check)."""
+
+
+class DatabaseBusyError(sqlite3.OperationalError):
+    """Another terminal kept the write lock past the bounded retries."""
+
 
 def get_app_data_dir() -> str:
     """
@@ -74,13 +115,17 @@ def get_db_path() -> str:
     return path
 
 
-def connect() -> sqlite3.Connection:
+def connect(path: Optional[str] = None) -> sqlite3.Connection:
     """
-    Create a connection to the TipSplit database.
+    Create a connection to the TipSplit database (or the file at ``path``).
     The caller is responsible for closing it.
     """
-    path = get_db_path()
-    conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES)
+    path = path or get_db_path()
+    conn = sqlite3.connect(
+        path,
+        timeout=get_busy_timeout_ms() / 1000,
+        detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
+    )
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA foreign_keys = ON;")
     return conn
@@ -103,25 +148,145 @@ def db_session() -> Iterator[sqlite3.Connection]:
         conn.close()
 
 
+def get_busy_timeout_ms() -> int:
+    """How long a connection waits for another terminal's lock."""
+    value = os.environ.get("TIPSPLIT_DB_BUSY_TIMEOUT_MS", "").strip()
+    try:
+        return max(0, int(value)) if value else BUSY_TIMEOUT_MS
+    except ValueError:
+        logger.warning("TIPSPLIT_DB_BUSY_TIMEOUT_MS invalide (%r); %s ms utilisés", value, BUSY_TIMEOUT_MS)
+        return BUSY_TIMEOUT_MS
+
+
+def is_busy_error(exc: BaseException) -> bool:
+    if not isinstance(exc, sqlite3.OperationalError):
+        return False
+    code = getattr(exc, "sqlite_errorcode", None)
+    if code is not None:
+        return code & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    message = str(exc).lower()
+    return "locked" in message or "busy" in message
+
+
+def _backoff(attempt: int) -> None:
+    # "Full jitter": terminals that collided do not retry in lockstep.
+    time.sleep(random.uniform(0, min(WRITE_RETRY_MAX_DELAY, WRITE_RETRY_BASE_DELAY * 2 ** attempt)))
+
+
+_BUSY_MESSAGE = "La base est utilisée par un autre poste. Réessayez dans un instant."
+
+
+@contextmanager
+def write_session() -> Iterator[sqlite3.Connection]:
+    """
+    :func:`db_session` that takes the write lock at ``BEGIN IMMEDIATE``, so
+    a transaction never fails half-way on a lock held by another terminal.
+    Taking the lock is retried with jittered backoff.
+    """
+    with db_session() as conn:
+        for attempt in range(WRITE_RETRY_ATTEMPTS):
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                break
+            except sqlite3.OperationalError as exc:
+                if not is_busy_error(exc):
+                    raise
+                if attempt == WRITE_RETRY_ATTEMPTS - 1:
+                    raise DatabaseBusyError(_BUSY_MESSAGE) from exc
+                logger.warning("Base verrouillée par un autre poste; nouvel essai (%s)", attempt + 1)
+                _backoff(attempt)
+        yield conn
+
+
+def retry_on_busy(func: Callable) -> Callable:
+    """
+    Re-run a whole write operation when it still fails on a lock (e.g.
+    at COMMIT, which waits for readers) after the busy timeout. The
+    operation's transaction has been rolled back, so running it again is
+    safe; its arguments must be re-iterable.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(WRITE_RETRY_ATTEMPTS):
+            try:
+                return func(*args, **kwargs)
+            except sqlite3.OperationalError as exc:
+                if isinstance(exc, DatabaseBusyError) or not is_busy_error(exc):
+                    raise
+                if attempt == WRITE_RETRY_ATTEMPTS - 1:
+                    raise DatabaseBusyError(_BUSY_MESSAGE) from exc
+                logger.warning("%s: base verrouillée; nouvel essai (%s)", func.__name__, attempt + 1)
+                _backoff(attempt)
+
+    return wrapper
+
+
+def check_row_version(
+    conn: sqlite3.Connection, table: str, row_id: int, expected_version: Optional[int], what: str
+) -> None:
+    """
+    Raise :class:`ConflictError` when row ``row_id`` of ``table`` no longer
+    has ``expected_version`` (the version the caller read). Call it inside a
+    :func:`write_session`, before writing. ``None`` skips the check.
+    """
+    if expected_version is None:
+        return
+    row = conn.execute(f"SELECT version FROM {table} WHERE id = ?", (row_id,)).fetchone()
+    if row is None:
+        raise ConflictError(f"{what} n’existe plus: supprimé(e) sur un autre poste.")
+    if row["version"] != int(expected_version):
+        raise ConflictError(
+            f"{what} a été modifié(e) sur un autre poste depuis son ouverture. Rechargez puis recommencez."
+        )
+
+
+def database_change_counter(path: Optional[str] = None) -> Optional[int]:
+    """
+    The file change counter of the database header, bumped by every commit
+    (rollback-journal mode) from any terminal. None when it cannot be read.
+    """
+    try:
+        with open(path or get_db_path(), "rb") as handle:
+            handle.seek(24)
+            data = handle.read(4)
+    except OSError:
+        return None
+    return int.from_bytes(data, "big") if len(data) == 4 else None
+
+
 def _utc_now() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
-def init_db() -> None:
+def init_db(progress: Optional[ProgressCallback] = None) -> None:
     """
     Ensure the database file exists, schema is applied, and schema version recorded.
-    Safe to call multiple times.
+    Safe to call multiple times. ``progress`` follows the migrations, if any.
     """
     path = get_db_path()
     logger.info("Initializing TipSplit database at %s", path)
     with db_session() as conn:
-        apply_migrations(conn)
+        apply_migrations(conn, progress=progress)
 
 
-def apply_migrations(conn: sqlite3.Connection) -> None:
+def apply_migrations(
+    conn: sqlite3.Connection,
+    *,
+    progress: Optional[ProgressCallback] = None,
+    batch_size: int = MIGRATION_BATCH_SIZE,
+) -> List[Dict]:
     """
     Initialize or migrate the schema to the latest version.
+
+    The pending :data:`MIGRATIONS` run in order, each in its own transaction
+    that also records the version it reaches, so an interrupted upgrade
+    resumes at the step that failed. Large tables are copied or updated in
+    rowid batches of ``batch_size``. Returns the timing of each step run.
     """
+    if conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0] == 0:
+        # Only takes effect without VACUUM before the first table is created.
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL;")
     conn.execute(
         """
         CREATE TABLE IF NOT EXISTS schema_meta(
@@ -131,51 +296,56 @@ def apply_migrations(conn: sqlite3.Connection) -> None:
         """
     )
 
-    row = conn.execute("SELECT value FROM schema_meta WHERE key = 'schema_version'").fetchone()
-    current_version = int(row["value"]) if row else None
+    current_version = _read_schema_version(conn)
 
     if current_version is None:
         if _is_fresh_database(conn):
             logger.info("Initializing schema version %s", SCHEMA_VERSION)
             _create_schema(conn)
-            conn.execute(
-                "INSERT OR REPLACE INTO schema_meta(key, value) VALUES ('schema_version', ?)",
-                (str(SCHEMA_VERSION),),
-            )
-            return
+            _set_schema_version(conn, SCHEMA_VERSION)
+            return []
 
         legacy_version = _detect_legacy_version(conn)
-        if legacy_version == 2 and SCHEMA_VERSION == 3:
-            logger.info("Detected legacy schema (no metadata). Migrating 2 -> 3")
-            _migrate_2_to_3(conn)
-        else:
+        if legacy_version != 2:
             logger.info("Detected existing schema without metadata; ensuring schema is complete.")
+            _create_schema(conn)
+            _set_schema_version(conn, SCHEMA_VERSION)
+            return []
+        logger.info("Detected legacy schema (no metadata).")
+        current_version = 2
 
-        _create_schema(conn)
-        conn.execute(
-            "INSERT OR REPLACE INTO schema_meta(key, value) VALUES ('schema_version', ?)",
-            (str(SCHEMA_VERSION),),
+    if current_version > SCHEMA_VERSION:
+        raise MigrationError(
+            f"La base est au schéma {current_version}, plus récent que celui de cette version "
+            f"de TipSplit ({SCHEMA_VERSION}). Mettez l’application à jour."
         )
-        return
+    if current_version < MIGRATIONS[0].version - 1:
+        logger.warning("Unsupported schema version %s; completing schema %s", current_version, SCHEMA_VERSION)
+        _create_schema(conn)
+        _set_schema_version(conn, SCHEMA_VERSION)
+        return []
 
-    if current_version == SCHEMA_VERSION:
+    steps = [migration for migration in MIGRATIONS if migration.version > current_version]
+    if not steps:
         logger.info("Schema version %s already applied", current_version)
-        return
+        return []
+    return [
+        _run_migration(conn, migration, MigrationRun(migration, index, len(steps), batch_size, progress))
+        for index, migration in enumerate(steps)
+    ]
 
-    if current_version == 2 and SCHEMA_VERSION == 3:
-        logger.info("Migrating schema 2 -> 3")
-        _migrate_2_to_3(conn)
-        conn.execute(
-            "INSERT OR REPLACE INTO schema_meta(key, value) VALUES ('schema_version', ?)",
-            (str(SCHEMA_VERSION),),
-        )
-        return
 
-    logger.warning("Unsupported schema version %s; reinitializing schema %s", current_version, SCHEMA_VERSION)
-    _create_schema(conn)
+def _read_schema_version(conn: sqlite3.Connection) -> Optional[int]:
+    if not _table_exists(conn, "schema_meta"):
+        return None
+    row = conn.execute("SELECT value FROM schema_meta WHERE key = 'schema_version'").fetchone()
+    return int(row["value"]) if row else None
+
+
+def _set_schema_version(conn: sqlite3.Connection, version: int) -> None:
     conn.execute(
         "INSERT OR REPLACE INTO schema_meta(key, value) VALUES ('schema_version', ?)",
-        (str(SCHEMA_VERSION),),
+        (str(version),),
     )
 
 
@@ -195,6 +365,7 @@ def _create_schema(conn: sqlite3.Connection) -> None:
             is_active INTEGER NOT NULL DEFAULT 1 CHECK(is_active IN (0,1)),
             created_at TEXT NOT NULL,
             updated_at TEXT NOT NULL,
+            version INTEGER NOT NULL DEFAULT 1,
             UNIQUE(role, name COLLATE NOCASE)
         );
         """
@@ -205,10 +376,135 @@ def _create_schema(conn: sqlite3.Connection) -> None:
         ON employees(role, is_active);
         """
     )
+    _create_employee_lookup_indexes(conn)
+    _create_period_tables(conn)
+    _create_period_indexes(conn)
+
     conn.execute(
         """
-        CREATE TABLE pay_schedules (
-            id TEXT PRIMARY KEY,
+        CREATE TABLE IF NOT EXISTS distribution_inputs (
+            distribution_id INTEGER PRIMARY KEY,
+            ventes_nettes_cents INTEGER,
+            depot_net_cents INTEGER,
+            frais_admin_cents INTEGER,
+            cash_cents INTEGER,
+            FOREIGN KEY(distribution_id) REFERENCES distributions(id) ON DELETE CASCADE
+        );
+        """
+    )
+
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS distribution_declaration_inputs (
+            distribution_id INTEGER PRIMARY KEY,
+            ventes_totales_cents INTEGER,
+            clients INTEGER,
+            tips_due_cents INTEGER,
+            ventes_nourriture_cents INTEGER,
+            FOREIGN KEY(distribution_id) REFERENCES distributions(id) ON DELETE CASCADE
+        );
+        """
+    )
+
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS distribution_employees (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            distribution_id INTEGER NOT NULL,
+            employee_number TEXT,
+            employee_name TEXT NOT NULL,
+            section TEXT,
+            hours REAL,
+            cash_cents INTEGER,
+            sur_paye_cents INTEGER,
+            frais_admin_cents INTEGER,
+            A_cents INTEGER,
+            B_cents INTEGER,
+            D_cents INTEGER,
+            E_cents INTEGER,
+            F_cents INTEGER,
+            employee_id INTEGER REFERENCES employees(id) ON DELETE SET NULL,
+            FOREIGN KEY(distribution_id) REFERENCES distributions(id) ON DELETE CASCADE
+        );
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_distribution_employees_dist
+        ON distribution_employees(distribution_id);
+        """
+    )
+
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS distribution_audit (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            distribution_id INTEGER NOT NULL,
+            action TEXT NOT NULL,
+            actor TEXT,
+            created_at TEXT NOT NULL,
+            details_json TEXT,
+            FOREIGN KEY(distribution_id) REFERENCES distributions(id) ON DELETE CASCADE
+        );
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_distribution_employees_number
+        ON distribution_employees(employee_number, distribution_id);
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_distribution_audit_dist
+        ON distribution_audit(distribution_id);
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_distribution_employees_employee
+        ON distribution_employees(employee_id, distribution_id);
+        """
+    )
+    _create_audit_columns(conn)
+    _create_lines_view(conn)
+    _create_snapshot_table(conn)
+    _create_archive_tables(conn)
+    _create_version_columns(conn)
+    _create_shift_punch_columns(conn)
+    _create_search_index(conn)
+
+
+def _create_employee_lookup_indexes(conn: sqlite3.Connection) -> None:
+    """Lookups used to link distribution rows to employees (number, then name)."""
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_employees_number
+        ON employees(employee_number);
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_employees_name_nocase
+        ON employees(name COLLATE NOCASE);
+        """
+    )
+
+
+def _create_period_tables(conn: sqlite3.Connection, suffix: str = "") -> None:
+    """
+    Create the schedule/period tables and the tables that reference them.
+
+    Schedules and periods use INTEGER ``pk`` keys internally; their UUID ``id``
+    stays the public, unique identifier used by the application. ``suffix``
+    creates staging copies (foreign keys still target the final table names)
+    for the 4 -> 5 rebuild.
+    """
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS pay_schedules{suffix} (
+            pk INTEGER PRIMARY KEY AUTOINCREMENT,
+            id TEXT NOT NULL UNIQUE,
             group_key TEXT NOT NULL DEFAULT 'default',
             name TEXT NOT NULL,
             timezone TEXT NOT NULL DEFAULT 'America/Montreal',
@@ -223,17 +519,11 @@ def _create_schema(conn: sqlite3.Connection) -> None:
         """
     )
     conn.execute(
-        """
-        CREATE INDEX IF NOT EXISTS idx_pay_schedules_group
-        ON pay_schedules(group_key, effective_from);
-        """
-    )
-
-    conn.execute(
-        """
-        CREATE TABLE pay_periods (
-            id TEXT PRIMARY KEY,
-            schedule_id TEXT NOT NULL,
+        f"""
+        CREATE TABLE IF NOT EXISTS pay_periods{suffix} (
+            pk INTEGER PRIMARY KEY AUTOINCREMENT,
+            id TEXT NOT NULL UNIQUE,
+            schedule_pk INTEGER NOT NULL,
             start_at_utc TEXT NOT NULL,
             end_at_utc TEXT NOT NULL,
             pay_date_local TEXT NOT NULL,
@@ -245,71 +535,52 @@ def _create_schema(conn: sqlite3.Connection) -> None:
             payed_at_utc TEXT,
             created_at TEXT NOT NULL,
             updated_at TEXT NOT NULL,
-            FOREIGN KEY(schedule_id) REFERENCES pay_schedules(id) ON DELETE CASCADE,
-            UNIQUE(schedule_id, start_at_utc),
-            UNIQUE(schedule_id, display_id),
+            FOREIGN KEY(schedule_pk) REFERENCES pay_schedules(pk) ON DELETE CASCADE,
+            UNIQUE(schedule_pk, start_at_utc),
+            UNIQUE(schedule_pk, display_id),
             CHECK(end_at_utc > start_at_utc)
         );
         """
     )
     conn.execute(
-        """
-        CREATE INDEX IF NOT EXISTS idx_pay_periods_sched_start
-        ON pay_periods(schedule_id, start_at_utc);
-        """
-    )
-    conn.execute(
-        """
-        CREATE INDEX IF NOT EXISTS idx_pay_periods_sched_end
-        ON pay_periods(schedule_id, end_at_utc);
-        """
-    )
-
-    conn.execute(
-        """
-        CREATE TABLE pay_period_overrides (
+        f"""
+        CREATE TABLE IF NOT EXISTS pay_period_overrides{suffix} (
             id TEXT PRIMARY KEY,
-            period_id TEXT NOT NULL,
+            period_pk INTEGER NOT NULL,
             admin_actor TEXT,
             field_name TEXT NOT NULL,
             old_value TEXT,
             new_value TEXT,
             reason TEXT NOT NULL,
             created_at TEXT NOT NULL,
-            FOREIGN KEY(period_id) REFERENCES pay_periods(id) ON DELETE CASCADE
+            FOREIGN KEY(period_pk) REFERENCES pay_periods(pk) ON DELETE CASCADE
         );
         """
     )
-
     conn.execute(
-        """
-        CREATE TABLE shifts (
+        f"""
+        CREATE TABLE IF NOT EXISTS shifts{suffix} (
             id TEXT PRIMARY KEY,
             employee_id INTEGER,
-            period_id TEXT NOT NULL,
+            period_pk INTEGER NOT NULL,
+            work_date TEXT,
             shift_start_at_utc TEXT NOT NULL,
             shift_end_at_utc TEXT,
             created_at TEXT NOT NULL,
             updated_at TEXT NOT NULL,
             FOREIGN KEY(employee_id) REFERENCES employees(id),
-            FOREIGN KEY(period_id) REFERENCES pay_periods(id)
+            FOREIGN KEY(period_pk) REFERENCES pay_periods(pk)
         );
         """
     )
     conn.execute(
-        """
-        CREATE INDEX IF NOT EXISTS idx_shifts_period
-        ON shifts(period_id);
-        """
-    )
-
-    conn.execute(
-        """
-        CREATE TABLE distributions (
+        f"""
+        CREATE TABLE IF NOT EXISTS distributions{suffix} (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             dist_ref TEXT UNIQUE,
-            pay_period_id TEXT NOT NULL,
+            period_pk INTEGER NOT NULL,
             date_local TEXT NOT NULL,
+            date_iso TEXT,
             shift TEXT NOT NULL,
             shift_instance INTEGER NOT NULL DEFAULT 1,
             status TEXT NOT NULL CHECK(status IN ('UNCONFIRMED','CONFIRMED')) DEFAULT 'UNCONFIRMED',
@@ -317,15 +588,49 @@ def _create_schema(conn: sqlite3.Connection) -> None:
             confirmed_at TEXT,
             created_by TEXT,
             confirmed_by TEXT,
-            FOREIGN KEY(pay_period_id) REFERENCES pay_periods(id) ON DELETE CASCADE,
-            UNIQUE(pay_period_id, date_local, shift, shift_instance)
+            version INTEGER NOT NULL DEFAULT 1,
+            FOREIGN KEY(period_pk) REFERENCES pay_periods(pk) ON DELETE CASCADE,
+            UNIQUE(period_pk, date_local, shift, shift_instance)
         );
         """
     )
+
+
+def _create_period_indexes(conn: sqlite3.Connection) -> None:
     conn.execute(
         """
-        CREATE INDEX IF NOT EXISTS idx_distributions_period_status
-        ON distributions(pay_period_id, status);
+        CREATE INDEX IF NOT EXISTS idx_pay_schedules_group
+        ON pay_schedules(group_key, effective_from);
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_pay_periods_sched_start
+        ON pay_periods(schedule_pk, start_at_utc);
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_pay_periods_sched_end
+        ON pay_periods(schedule_pk, end_at_utc);
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_pay_period_overrides_period
+        ON pay_period_overrides(period_pk);
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_shifts_period
+        ON shifts(period_pk);
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_distributions_period_status_created
+        ON distributions(period_pk, status, created_at);
         """
     )
     conn.execute(
@@ -337,79 +642,221 @@ def _create_schema(conn: sqlite3.Connection) -> None:
     conn.execute(
         """
         CREATE INDEX IF NOT EXISTS idx_distributions_day_shift
-        ON distributions(pay_period_id, date_local, shift, shift_instance);
+        ON distributions(period_pk, date_local, shift, shift_instance);
         """
     )
+    _create_date_iso_index(conn)
+
 
+def _create_date_iso_index(conn: sqlite3.Connection) -> None:
+    """Sortable day (YYYY-MM-DD) for date-range queries across periods."""
     conn.execute(
         """
-        CREATE TABLE IF NOT EXISTS distribution_inputs (
-            distribution_id INTEGER PRIMARY KEY,
-            ventes_nettes REAL,
-            depot_net REAL,
-            frais_admin REAL,
-            cash REAL,
-            FOREIGN KEY(distribution_id) REFERENCES distributions(id) ON DELETE CASCADE
-        );
+        CREATE INDEX IF NOT EXISTS idx_distributions_date_iso
+        ON distributions(date_iso, shift, shift_instance);
         """
     )
 
+
+def _create_v4_indexes(conn: sqlite3.Connection) -> None:
+    """
+    Covering indexes for the period-scoped and per-employee lookups, plus
+    the foreign-key children scanned by cascading deletes (schema 4 layout,
+    only used by the 3 -> 4 migration).
+    """
+    # (pay_period_id, status, created_at) supersedes (pay_period_id, status).
+    conn.execute("DROP INDEX IF EXISTS idx_distributions_period_status;")
     conn.execute(
         """
-        CREATE TABLE IF NOT EXISTS distribution_declaration_inputs (
-            distribution_id INTEGER PRIMARY KEY,
-            ventes_totales REAL,
-            clients INTEGER,
-            tips_due REAL,
-            ventes_nourriture REAL,
-            FOREIGN KEY(distribution_id) REFERENCES distributions(id) ON DELETE CASCADE
-        );
+        CREATE INDEX IF NOT EXISTS idx_distributions_period_status_created
+        ON distributions(pay_period_id, status, created_at);
         """
     )
-
     conn.execute(
         """
-        CREATE TABLE IF NOT EXISTS distribution_employees (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            distribution_id INTEGER NOT NULL,
-            employee_number TEXT,
-            employee_name TEXT NOT NULL,
-            section TEXT,
-            hours REAL,
-            cash REAL,
-            sur_paye REAL,
-            frais_admin REAL,
-            A REAL,
-            B REAL,
-            D REAL,
-            E REAL,
-            F REAL,
-            FOREIGN KEY(distribution_id) REFERENCES distributions(id) ON DELETE CASCADE
-        );
+        CREATE INDEX IF NOT EXISTS idx_distribution_employees_number
+        ON distribution_employees(employee_number, distribution_id);
         """
     )
     conn.execute(
         """
-        CREATE INDEX IF NOT EXISTS idx_distribution_employees_dist
-        ON distribution_employees(distribution_id);
+        CREATE INDEX IF NOT EXISTS idx_distribution_audit_dist
+        ON distribution_audit(distribution_id);
         """
     )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_pay_period_overrides_period
+        ON pay_period_overrides(period_id);
+        """
+    )
+
+
+# Structured audit columns (schema 10), copied from the distribution at write time.
+AUDIT_COLUMNS = (
+    ("period_pk", "INTEGER"),
+    ("date_iso", "TEXT"),
+    ("shift", "TEXT"),
+    ("item_count", "INTEGER NOT NULL DEFAULT 1"),
+)
+
 
+def _create_audit_columns(conn: sqlite3.Connection) -> None:
+    """
+    Add the structured audit columns and their indexes, and the archive
+    table that receives rows past retention (or of deleted distributions).
+    """
+    for column, decl in AUDIT_COLUMNS:
+        if not _column_exists(conn, "distribution_audit", column):
+            conn.execute(f"ALTER TABLE distribution_audit ADD COLUMN {column} {decl};")
+    for name, columns in (
+        ("action", "action, created_at"),
+        ("actor", "actor, created_at"),
+        ("created", "created_at"),
+        ("period", "period_pk, created_at"),
+    ):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_distribution_audit_{name} ON distribution_audit({columns});")
     conn.execute(
         """
-        CREATE TABLE IF NOT EXISTS distribution_audit (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
+        CREATE TABLE IF NOT EXISTS distribution_audit_archive (
+            id INTEGER PRIMARY KEY,
             distribution_id INTEGER NOT NULL,
             action TEXT NOT NULL,
             actor TEXT,
             created_at TEXT NOT NULL,
             details_json TEXT,
-            FOREIGN KEY(distribution_id) REFERENCES distributions(id) ON DELETE CASCADE
+            period_pk INTEGER,
+            date_iso TEXT,
+            shift TEXT,
+            item_count INTEGER NOT NULL DEFAULT 1,
+            archived_at TEXT NOT NULL
+        );
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_distribution_audit_archive_dist
+        ON distribution_audit_archive(distribution_id);
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_distribution_audit_archive_created
+        ON distribution_audit_archive(created_at);
+        """
+    )
+
+
+def _create_snapshot_table(conn: sqlite3.Connection) -> None:
+    """Frozen results of LOCKED/PAYED periods: zlib-compressed JSON and its SHA-256."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS period_snapshots (
+            period_pk INTEGER PRIMARY KEY,
+            created_at TEXT NOT NULL,
+            distribution_count INTEGER NOT NULL,
+            payload BLOB NOT NULL,
+            checksum TEXT NOT NULL,
+            FOREIGN KEY(period_pk) REFERENCES pay_periods(pk) ON DELETE CASCADE
         );
         """
     )
 
 
+# One row per employee line with its distribution's columns. Readers that
+# join the two tables go through this view: it is flattened into their
+# query, and db.period_archive swaps in a TEMP view that also covers the
+# attached archive files.
+DISTRIBUTION_LINES_SELECT = """
+    SELECT {s}distribution_employees.id AS line_id,
+           {s}distribution_employees.distribution_id,
+           {s}distributions.period_pk,
+           {s}distributions.dist_ref,
+           {s}distributions.date_local,
+           {s}distributions.date_iso,
+           {s}distributions.shift,
+           {s}distributions.shift_instance,
+           {s}distributions.status,
+           {s}distribution_employees.employee_id,
+           {s}distribution_employees.employee_number,
+           {s}distribution_employees.employee_name,
+           {s}distribution_employees.section,
+           {s}distribution_employees.hours,
+           {money}
+    FROM {s}distributions
+    JOIN {s}distribution_employees ON {s}distribution_employees.distribution_id = {s}distributions.id
+"""
+
+
+def distribution_lines_select(schema: str = "") -> str:
+    """Body of the distribution_lines view over ``schema`` (unqualified when empty)."""
+    prefix = f"{schema}." if schema else ""
+    money = ",\n           ".join(
+        f"{prefix}distribution_employees.{column}_cents" for column in MONEY_COLUMNS["distribution_employees"]
+    )
+    return DISTRIBUTION_LINES_SELECT.format(s=prefix, money=money)
+
+
+def _create_archive_tables(conn: sqlite3.Connection) -> None:
+    """Registry of the periods moved to yearly archive files (see db.period_archive)."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS archived_periods (
+            period_pk INTEGER PRIMARY KEY,
+            archive_year INTEGER NOT NULL,
+            archived_at TEXT NOT NULL,
+            distribution_count INTEGER NOT NULL,
+            confirmed_count INTEGER NOT NULL,
+            first_distribution_id INTEGER,
+            last_distribution_id INTEGER,
+            FOREIGN KEY(period_pk) REFERENCES pay_periods(pk) ON DELETE CASCADE
+        );
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_archived_periods_year
+        ON archived_periods(archive_year);
+        """
+    )
+
+
+def _create_version_columns(conn: sqlite3.Connection) -> None:
+    """
+    ``version`` on the rows terminals edit concurrently: every update
+    increments it, and writers that pass the version they read get a
+    :class:`ConflictError` instead of overwriting another terminal's change.
+    """
+    for table in ("employees", "distributions"):
+        if not _column_exists(conn, table, "version"):
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 1;")
+
+
+def _create_shift_punch_columns(conn: sqlite3.Connection) -> None:
+    """
+    Time Sheet punches live in ``shifts``, one row per employee and work
+    day (``work_date``, ISO), so saving a day's punch again replaces it.
+    """
+    if not _column_exists(conn, "shifts", "work_date"):
+        conn.execute("ALTER TABLE shifts ADD COLUMN work_date TEXT;")
+    conn.execute(
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_shifts_employee_day
+        ON shifts(employee_id, work_date);
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_shifts_work_date
+        ON shifts(work_date, employee_id);
+        """
+    )
+
+
+def _create_lines_view(conn: sqlite3.Connection) -> None:
+    conn.execute(f"CREATE VIEW IF NOT EXISTS distribution_lines AS {distribution_lines_select()}")
+
+
 def _is_fresh_database(conn: sqlite3.Connection) -> bool:
     """Return True if no application tables exist yet."""
     row = conn.execute(
@@ -449,9 +896,8 @@ def _column_exists(conn: sqlite3.Connection, table_name: str, column_name: str)
     return any(row["name"] == column_name for row in rows)
 
 
-def _migrate_2_to_3(conn: sqlite3.Connection) -> None:
+def _migrate_2_to_3(conn: sqlite3.Connection, run: "MigrationRun") -> None:
     """Add shift_instance to distributions and update uniqueness constraint."""
-    conn.execute("PRAGMA foreign_keys = OFF;")
     conn.execute(
         """
         CREATE TABLE IF NOT EXISTS distributions_new (
@@ -471,7 +917,9 @@ def _migrate_2_to_3(conn: sqlite3.Connection) -> None:
         );
         """
     )
-    conn.execute(
+    run.in_batches(
+        conn,
+        "distributions",
         """
         INSERT INTO distributions_new(
             id, dist_ref, pay_period_id, date_local, shift, shift_instance,
@@ -480,8 +928,9 @@ def _migrate_2_to_3(conn: sqlite3.Connection) -> None:
         SELECT
             id, dist_ref, pay_period_id, date_local, shift, 1,
             status, created_at, confirmed_at, created_by, confirmed_by
-        FROM distributions;
-        """
+        FROM distributions
+        WHERE rowid > ? AND rowid <= ?
+        """,
     )
     conn.execute("DROP TABLE distributions;")
     conn.execute("ALTER TABLE distributions_new RENAME TO distributions;")
@@ -503,7 +952,6 @@ def _migrate_2_to_3(conn: sqlite3.Connection) -> None:
         ON distributions(pay_period_id, date_local, shift, shift_instance);
         """
     )
-    conn.execute("PRAGMA foreign_keys = ON;")
 
     conn.execute(
         """
@@ -572,3 +1020,580 @@ def _migrate_2_to_3(conn: sqlite3.Connection) -> None:
         );
         """
     )
+
+
+def _migrate_3_to_4(conn: sqlite3.Connection, run: "MigrationRun") -> None:
+    """Add the covering indexes introduced in schema 4."""
+    _create_v4_indexes(conn)
+
+
+# Copy statements for the 4 -> 5 rebuild. Each reads one rowid window of the
+# old table and maps UUID references to the new integer keys by joining the
+# already-copied parent.
+_V5_COPIES = (
+    (
+        "pay_schedules",
+        """
+        INSERT INTO pay_schedules_v5(
+            id, group_key, name, timezone, period_length_days, pay_date_offset_days,
+            anchor_start_local, effective_from, effective_to, created_at, updated_at
+        )
+        SELECT id, group_key, name, timezone, period_length_days, pay_date_offset_days,
+               anchor_start_local, effective_from, effective_to, created_at, updated_at
+        FROM pay_schedules
+        WHERE rowid > ? AND rowid <= ?
+        ORDER BY rowid
+        """,
+    ),
+    (
+        "pay_periods",
+        """
+        INSERT INTO pay_periods_v5(
+            id, schedule_pk, start_at_utc, end_at_utc, pay_date_local, label_year,
+            sequence_in_year, display_id, status, locked_at_utc, payed_at_utc,
+            created_at, updated_at
+        )
+        SELECT p.id, s.pk, p.start_at_utc, p.end_at_utc, p.pay_date_local, p.label_year,
+               p.sequence_in_year, p.display_id, p.status, p.locked_at_utc, p.payed_at_utc,
+               p.created_at, p.updated_at
+        FROM pay_periods p
+        JOIN pay_schedules_v5 s ON s.id = p.schedule_id
+        WHERE p.rowid > ? AND p.rowid <= ?
+        ORDER BY p.rowid
+        """,
+    ),
+    (
+        "pay_period_overrides",
+        """
+        INSERT INTO pay_period_overrides_v5(
+            id, period_pk, admin_actor, field_name, old_value, new_value, reason, created_at
+        )
+        SELECT o.id, p.pk, o.admin_actor, o.field_name, o.old_value, o.new_value, o.reason, o.created_at
+        FROM pay_period_overrides o
+        JOIN pay_periods_v5 p ON p.id = o.period_id
+        WHERE o.rowid > ? AND o.rowid <= ?
+        """,
+    ),
+    (
+        "shifts",
+        """
+        INSERT INTO shifts_v5(
+            id, employee_id, period_pk, shift_start_at_utc, shift_end_at_utc, created_at, updated_at
+        )
+        SELECT sh.id, sh.employee_id, p.pk, sh.shift_start_at_utc, sh.shift_end_at_utc,
+               sh.created_at, sh.updated_at
+        FROM shifts sh
+        JOIN pay_periods_v5 p ON p.id = sh.period_id
+        WHERE sh.rowid > ? AND sh.rowid <= ?
+        """,
+    ),
+    (
+        "distributions",
+        """
+        INSERT INTO distributions_v5(
+            id, dist_ref, period_pk, date_local, shift, shift_instance,
+            status, created_at, confirmed_at, created_by, confirmed_by
+        )
+        SELECT d.id, d.dist_ref, p.pk, d.date_local, d.shift, d.shift_instance,
+               d.status, d.created_at, d.confirmed_at, d.created_by, d.confirmed_by
+        FROM distributions d
+        JOIN pay_periods_v5 p ON p.id = d.pay_period_id
+        WHERE d.rowid > ? AND d.rowid <= ?
+        """,
+    ),
+)
+
+
+def _migrate_4_to_5(conn: sqlite3.Connection, run: "MigrationRun") -> None:
+    """
+    Give pay_schedules and pay_periods INTEGER primary keys.
+
+    The UUIDs stay in ``id`` (unique) as the public identifiers; every
+    reference (periods -> schedule, distributions/shifts/overrides -> period)
+    becomes an integer ``*_pk`` column. Tables are rebuilt by copying the
+    rows in rowid batches; rows whose parent is missing abort the step.
+    """
+    _create_period_tables(conn, suffix="_v5")
+    for table, insert_sql in _V5_COPIES:
+        expected = conn.execute(f"SELECT COUNT(*) AS c FROM {table}").fetchone()["c"]
+        copied = run.in_batches(conn, table, insert_sql)
+        if copied != expected:
+            raise sqlite3.IntegrityError(
+                f"Migration 4 -> 5: {expected - copied} ligne(s) orpheline(s) dans {table}"
+            )
+    # Keep AUTOINCREMENT from handing out ids of deleted distributions again.
+    conn.execute(
+        """
+        UPDATE sqlite_sequence
+        SET seq = MAX(seq, COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'distributions'), 0))
+        WHERE name = 'distributions_v5'
+        """
+    )
+    for table in ("distributions", "shifts", "pay_period_overrides", "pay_periods", "pay_schedules"):
+        conn.execute(f"DROP TABLE {table};")
+    for table in ("pay_schedules", "pay_periods", "pay_period_overrides", "shifts", "distributions"):
+        conn.execute(f"ALTER TABLE {table}_v5 RENAME TO {table};")
+    _create_period_indexes(conn)
+    problems = conn.execute("PRAGMA foreign_key_check;").fetchall()
+    if problems:
+        raise sqlite3.IntegrityError(
+            f"Migration 4 -> 5: {len(problems)} violation(s) de clé étrangère"
+        )
+
+
+def _migrate_5_to_6(conn: sqlite3.Connection, run: "MigrationRun") -> None:
+    """
+    Store money as INTEGER cents. Each REAL column gets a ``<name>_cents``
+    column filled with the rounded value; the REAL column is then dropped
+    (SQLite 3.35+; older libraries keep it, unused).
+    """
+    can_drop = sqlite3.sqlite_version_info >= (3, 35, 0)
+    # Same rounding as new writes (Decimal, half away from zero); ROUND(x * 100)
+    # would misround binary values such as 1.005.
+    conn.create_function("tipsplit_to_cents", 1, to_cents, deterministic=True)
+    for table, columns in MONEY_COLUMNS.items():
+        for column in columns:
+            cents = f"{column}_cents"
+            if not _column_exists(conn, table, cents):
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {cents} INTEGER;")
+            if not _column_exists(conn, table, column):
+                continue
+            run.in_batches(
+                conn,
+                table,
+                f"UPDATE {table} SET {cents} = tipsplit_to_cents({column}) "
+                f"WHERE {column} IS NOT NULL AND rowid > ? AND rowid <= ?",
+            )
+            if can_drop:
+                conn.execute(f"ALTER TABLE {table} DROP COLUMN {column};")
+    if not can_drop:
+        logger.warning("SQLite %s: anciennes colonnes REAL conservées", sqlite3.sqlite_version)
+
+
+def _migrate_6_to_7(conn: sqlite3.Connection, run: "MigrationRun") -> None:
+    """Link distribution_employees rows to employees.id and backfill history."""
+    if not _column_exists(conn, "distribution_employees", "employee_id"):
+        conn.execute(
+            "ALTER TABLE distribution_employees ADD COLUMN employee_id INTEGER "
+            "REFERENCES employees(id) ON DELETE SET NULL;"
+        )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_distribution_employees_employee
+        ON distribution_employees(employee_id, distribution_id);
+        """
+    )
+    _create_employee_lookup_indexes(conn)
+
+    from .distributions_repo import backfill_employee_links
+
+    backfill_employee_links(batch_size=run.batch_size, conn=conn)
+
+
+def _migrate_7_to_8(conn: sqlite3.Connection, run: "MigrationRun") -> None:
+    """Add distributions.date_iso (sortable day) and fill it from date_local."""
+    from .distributions_repo import _to_date_iso
+
+    if not _column_exists(conn, "distributions", "date_iso"):
+        conn.execute("ALTER TABLE distributions ADD COLUMN date_iso TEXT;")
+    conn.create_function("tipsplit_date_iso", 1, lambda value: _to_date_iso(value or "") or None, deterministic=True)
+    run.in_batches(
+        conn,
+        "distributions",
+        "UPDATE distributions SET date_iso = tipsplit_date_iso(date_local) "
+        "WHERE date_iso IS NULL AND rowid > ? AND rowid <= ?",
+    )
+    _create_date_iso_index(conn)
+
+
+def _migrate_8_to_9(conn: sqlite3.Connection, run: "MigrationRun") -> None:
+    """Full-text search index over distributions (skipped without FTS5)."""
+    _create_search_index(conn)
+
+
+def _migrate_9_to_10(conn: sqlite3.Connection, run: "MigrationRun") -> None:
+    """Structured, indexed audit columns (filled from the distributions) and the audit archive."""
+    _create_audit_columns(conn)
+    run.in_batches(
+        conn,
+        "distribution_audit",
+        """
+        UPDATE distribution_audit
+           SET (period_pk, date_iso, shift) = (
+                SELECT d.period_pk, d.date_iso, d.shift FROM distributions d
+                 WHERE d.id = distribution_audit.distribution_id)
+         WHERE period_pk IS NULL AND rowid > ? AND rowid <= ?
+        """,
+    )
+    run.in_batches(
+        conn,
+        "distribution_audit",
+        """
+        UPDATE distribution_audit
+           SET item_count = CAST(json_extract(details_json, '$.count') AS INTEGER)
+         WHERE action = 'bulk_created' AND json_valid(details_json)
+           AND json_extract(details_json, '$.count') IS NOT NULL
+           AND rowid > ? AND rowid <= ?
+        """,
+    )
+
+
+def _migrate_10_to_11(conn: sqlite3.Connection, run: "MigrationRun") -> None:
+    """Period snapshots, written for the periods that are already LOCKED or PAYED."""
+    from .distributions_repo import write_period_snapshot
+
+    _create_snapshot_table(conn)
+    _create_lines_view(conn)
+    periods = conn.execute("SELECT id FROM pay_periods WHERE status IN ('LOCKED', 'PAYED')").fetchall()
+    for index, row in enumerate(periods, start=1):
+        write_period_snapshot(conn, row["id"])
+        run.report(index, len(periods))
+
+
+def _migrate_11_to_12(conn: sqlite3.Connection, run: "MigrationRun") -> None:
+    """Registry of the periods moved to yearly archive files."""
+    _create_archive_tables(conn)
+
+
+def _migrate_12_to_13(conn: sqlite3.Connection, run: "MigrationRun") -> None:
+    """
+    Switch to ``auto_vacuum = INCREMENTAL`` so free pages can be returned
+    in small steps (see db.maintenance). An existing file only changes
+    mode through a VACUUM, which cannot run inside a transaction.
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return
+    started = time.perf_counter()
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+    conn.execute("VACUUM;")
+    logger.info("auto_vacuum INCREMENTAL activé (VACUUM en %.0f ms)", (time.perf_counter() - started) * 1000)
+
+
+def _migrate_13_to_14(conn: sqlite3.Connection, run: "MigrationRun") -> None:
+    """Optimistic version columns on employees and distributions."""
+    _create_version_columns(conn)
+
+
+def _migrate_14_to_15(conn: sqlite3.Connection, run: "MigrationRun") -> None:
+    """Work day column and per-day unique index for the Time Sheet punches."""
+    _create_shift_punch_columns(conn)
+
+
+class Migration(NamedTuple):
+    """
+    One upgrade step, from ``version - 1`` to ``version``. ``apply`` runs
+    inside a transaction, with foreign key enforcement switched off around
+    it when ``foreign_keys_off`` (table rebuilds). Steps that cannot run in
+    a transaction (VACUUM) set ``transactional=False``.
+    """
+
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Connection, "MigrationRun"], None]
+    foreign_keys_off: bool = False
+    transactional: bool = True
+
+
+MIGRATIONS = (
+    Migration(3, "Instances de quart des distributions", _migrate_2_to_3, foreign_keys_off=True),
+    Migration(4, "Index couvrants", _migrate_3_to_4),
+    Migration(5, "Clés entières des horaires et périodes", _migrate_4_to_5, foreign_keys_off=True),
+    Migration(6, "Montants en cents", _migrate_5_to_6),
+    Migration(7, "Liens employés de l’historique", _migrate_6_to_7),
+    Migration(8, "Dates triables des distributions", _migrate_7_to_8),
+    Migration(9, "Index de recherche", _migrate_8_to_9),
+    Migration(10, "Colonnes d’audit", _migrate_9_to_10),
+    Migration(11, "Instantanés des périodes fermées", _migrate_10_to_11),
+    Migration(12, "Registre des archives", _migrate_11_to_12),
+    Migration(13, "Vacuum incrémental", _migrate_12_to_13, transactional=False),
+    Migration(14, "Versions des employés et distributions", _migrate_13_to_14),
+    Migration(15, "Pointages de la feuille de temps", _migrate_14_to_15),
+)
+
+
+class MigrationRun:
+    """Batching and progress reporting for the step being run."""
+
+    def __init__(
+        self,
+        migration: Migration,
+        index: int,
+        count: int,
+        batch_size: int,
+        progress: Optional[ProgressCallback],
+    ) -> None:
+        self.migration = migration
+        self.index = index
+        self.count = count
+        self.batch_size = batch_size
+        self.progress = progress
+        self.message = f"Mise à jour de la base ({index + 1}/{count}): {migration.description}"
+        self._fraction = index / count
+
+    def report(self, done: int, total: int, detail: str = "") -> None:
+        """
+        Advance the step to ``done / total``. Steps that batch several tables
+        restart at 0 for each one: the fraction never goes back, ``detail``
+        (table and rows) shows the movement.
+        """
+        if self.progress is None:
+            return
+        step = min(done / total, 1.0) if total else 1.0
+        self._fraction = max(self._fraction, (self.index + step) / self.count)
+        self.progress(f"{self.message} — {detail}" if detail else self.message, self._fraction)
+
+    def in_batches(self, conn: sqlite3.Connection, table: str, sql: str) -> int:
+        """Run ``sql`` (``rowid > ? AND rowid <= ?``) over consecutive rowid windows of ``table``."""
+        max_rowid = conn.execute(f"SELECT COALESCE(MAX(rowid), 0) AS m FROM {table}").fetchone()["m"]
+        changed = 0
+        low = 0
+        while low < max_rowid:
+            high = low + self.batch_size
+            changed += conn.execute(sql, (low, high)).rowcount
+            low = high
+            logger.debug("Migration -> %s: %s %s/%s", self.migration.version, table, min(low, max_rowid), max_rowid)
+            self.report(min(low, max_rowid), max_rowid, f"{table} {min(low, max_rowid)}/{max_rowid}")
+        return changed
+
+
+def _run_migration(conn: sqlite3.Connection, migration: Migration, run: MigrationRun) -> Dict:
+    label = f"{migration.version - 1} -> {migration.version}"
+    logger.info("Migrating schema %s (%s)", label, migration.description)
+    run.report(0, 1)
+    started = time.perf_counter()
+    if conn.in_transaction:
+        conn.commit()
+    if not migration.transactional:
+        migration.apply(conn, run)
+        _set_schema_version(conn, migration.version)
+        conn.commit()
+    else:
+        # PRAGMA foreign_keys is ignored inside a transaction: switch it before BEGIN.
+        if migration.foreign_keys_off:
+            conn.execute("PRAGMA foreign_keys = OFF;")
+        try:
+            conn.execute("BEGIN")
+            migration.apply(conn, run)
+            _set_schema_version(conn, migration.version)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            if migration.foreign_keys_off:
+                conn.execute("PRAGMA foreign_keys = ON;")
+    seconds = time.perf_counter() - started
+    run.report(1, 1)
+    logger.info("Schema %s migrated in %.2f s", label, seconds)
+    return {"version": migration.version, "description": migration.description, "seconds": round(seconds, 3)}
+
+
+def pending_migrations() -> List[Migration]:
+    """Steps :func:`init_db` would run on the current database."""
+    with db_session() as conn:
+        version = _read_schema_version(conn)
+        if version is None:
+            return list(MIGRATIONS) if _detect_legacy_version(conn) == 2 else []
+    return [migration for migration in MIGRATIONS if migration.version > version]
+
+
+def dry_run_migrations(path: Optional[str] = None, *, progress: Optional[ProgressCallback] = None) -> Dict:
+    """
+    Run the pending migrations on a copy of the database (``path``, the
+    current one by default) to measure them; the file itself is untouched.
+    The copy is made next to it, so it needs as much free space as the file.
+    Returns ``{"from_version", "to_version", "size", "copy_seconds", "seconds", "steps"}``.
+    """
+    source_path = path or get_db_path()
+    if not os.path.exists(source_path):
+        raise FileNotFoundError(source_path)
+    with tempfile.TemporaryDirectory(prefix="tipsplit-migration-", dir=os.path.dirname(source_path)) as tmpdir:
+        copy_path = os.path.join(tmpdir, os.path.basename(source_path))
+        started = time.perf_counter()
+        source = sqlite3.connect(source_path)
+        target = sqlite3.connect(copy_path)
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+        copy_seconds = time.perf_counter() - started
+        conn = connect(copy_path)
+        try:
+            from_version = _read_schema_version(conn)
+            steps = apply_migrations(conn, progress=progress)
+            conn.commit()
+            to_version = _read_schema_version(conn)
+        finally:
+            conn.close()
+    return {
+        "from_version": from_version,
+        "to_version": to_version,
+        "size": os.path.getsize(source_path),
+        "copy_seconds": round(copy_seconds, 3),
+        "seconds": round(sum(step["seconds"] for step in steps), 3),
+        "steps": steps,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Full-text search (FTS5). Each index row belongs to one distribution:
+# - the distribution itself (ref, dates, weekday/month names, shift),
+# - its employee lines (numbers and names) as a single row,
+# - each audit entry (action, actor, details_json).
+# ``rowid = id * 4 + kind`` (distribution id, or audit id for audit rows)
+# so every write touches known index rows; searches combine rows per
+# distribution. Distribution and audit rows are kept in sync by triggers.
+# Employee lines are inserted in batches, so their row is written once per
+# distribution by :func:`index_distribution_employees`; triggers only
+# handle updates and deletes.
+# ---------------------------------------------------------------------------
+SEARCH_TABLE = "distribution_search"
+SEARCH_KIND_DISTRIBUTION = 0
+SEARCH_KIND_EMPLOYEES = 1
+SEARCH_KIND_AUDIT = 2
+
+_WEEKDAYS_FR = ("dimanche", "lundi", "mardi", "mercredi", "jeudi", "vendredi", "samedi")
+_MONTHS_FR = (
+    "janvier", "février", "mars", "avril", "mai", "juin",
+    "juillet", "août", "septembre", "octobre", "novembre", "décembre",
+)
+
+
+def _search_header_sql(d: str) -> str:
+    weekdays = " ".join(f"WHEN '{index}' THEN '{name}'" for index, name in enumerate(_WEEKDAYS_FR))
+    months = " ".join(f"WHEN '{index:02d}' THEN '{name}'" for index, name in enumerate(_MONTHS_FR, start=1))
+    return (
+        f"COALESCE({d}.dist_ref, '') || ' ' || {d}.date_local || ' ' || COALESCE({d}.date_iso, '') || ' ' || "
+        f"COALESCE(CASE strftime('%w', {d}.date_iso) {weekdays} END, '') || ' ' || "
+        f"COALESCE(CASE strftime('%m', {d}.date_iso) {months} END, '') || ' ' || "
+        f"{d}.shift || ' ' || {d}.shift_instance"
+    )
+
+
+def _search_audit_sql(a: str) -> str:
+    return f"{a}.action || ' ' || COALESCE({a}.actor, '') || ' ' || COALESCE({a}.details_json, '')"
+
+
+def _search_employees_select(where: str) -> str:
+    return f"""
+        SELECT distribution_id * 4 + {SEARCH_KIND_EMPLOYEES},
+               group_concat(COALESCE(employee_number, '') || ' ' || employee_name, ' '),
+               distribution_id
+        FROM distribution_employees
+        WHERE {where}
+        GROUP BY distribution_id
+    """
+
+
+def search_index_available(conn: sqlite3.Connection) -> bool:
+    return _table_exists(conn, SEARCH_TABLE)
+
+
+def index_distribution_employees(conn: sqlite3.Connection, where: str, params: Iterable = ()) -> None:
+    """(Re)index the employee lines of the distribution_employees rows matching ``where``."""
+    if search_index_available(conn):
+        conn.execute(
+            f"INSERT OR REPLACE INTO {SEARCH_TABLE}(rowid, body, distribution_id) {_search_employees_select(where)}",
+            tuple(params),
+        )
+
+
+def _create_search_index(conn: sqlite3.Connection) -> bool:
+    """
+    Create the FTS5 table, its triggers, and index existing rows.
+    Returns False (and leaves the schema unchanged) when SQLite was built
+    without FTS5; searches then fall back to LIKE queries.
+    """
+    if search_index_available(conn):
+        return True
+    try:
+        conn.execute(
+            f"""
+            CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5(
+                body,
+                distribution_id UNINDEXED,
+                tokenize = 'unicode61 remove_diacritics 2'
+            );
+            """
+        )
+    except sqlite3.OperationalError as exc:
+        logger.warning("Recherche plein texte indisponible (FTS5): %s", exc)
+        return False
+
+    sources = (
+        ("distribution", "distributions", SEARCH_KIND_DISTRIBUTION, "id", _search_header_sql,
+         "dist_ref, date_local, date_iso, shift, shift_instance"),
+        ("audit", "distribution_audit", SEARCH_KIND_AUDIT, "distribution_id", _search_audit_sql,
+         "action, actor, details_json"),
+    )
+    for name, table, kind, dist_column, body_sql, columns in sources:
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_search_{name}_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO {SEARCH_TABLE}(rowid, body, distribution_id)
+                VALUES (NEW.id * 4 + {kind}, {body_sql("NEW")}, NEW.{dist_column});
+            END;
+            """
+        )
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_search_{name}_update AFTER UPDATE OF {columns} ON {table} BEGIN
+                UPDATE {SEARCH_TABLE} SET body = {body_sql("NEW")} WHERE rowid = NEW.id * 4 + {kind};
+            END;
+            """
+        )
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_search_{name}_delete AFTER DELETE ON {table} BEGIN
+                DELETE FROM {SEARCH_TABLE} WHERE rowid = OLD.id * 4 + {kind};
+            END;
+            """
+        )
+        conn.execute(
+            f"""
+            INSERT INTO {SEARCH_TABLE}(rowid, body, distribution_id)
+            SELECT src.id * 4 + {kind}, {body_sql("src")}, src.{dist_column}
+            FROM {table} src
+            """
+        )
+
+    for event, row in (("update", "NEW"), ("delete", "OLD")):
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_search_employees_{event}
+            AFTER {"UPDATE OF employee_number, employee_name" if event == "update" else "DELETE"}
+            ON distribution_employees BEGIN
+                DELETE FROM {SEARCH_TABLE} WHERE rowid = {row}.distribution_id * 4 + {SEARCH_KIND_EMPLOYEES};
+                INSERT INTO {SEARCH_TABLE}(rowid, body, distribution_id)
+                {_search_employees_select(f"distribution_id = {row}.distribution_id")};
+            END;
+            """
+        )
+    index_distribution_employees(conn, "1")
+    return True
+
+
+def main(argv: Optional[Sequence[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="Migrations de la base TipSplit.")
+    parser.add_argument("--db", help="Fichier de base (par défaut celui de l’application).")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Mesure les migrations sur une copie sans modifier la base."
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:%(name)s:%(message)s")
+    if args.db:
+        os.environ["TIPSPLIT_DB_PATH"] = os.path.abspath(os.path.expanduser(args.db))
+    if args.dry_run:
+        summary = dry_run_migrations()
+    else:
+        pending = pending_migrations()
+        init_db()
+        summary = {"applied": [migration.version for migration in pending], "version": SCHEMA_VERSION}
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -6,16 +6,85 @@ This replaces JSON exports as the source of truth.
 
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
 import re
-from datetime import datetime, timezone
-from typing import Dict, Iterable, List, Optional
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from itertools import groupby
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
-from .db_manager import db_session
+from .audit_log import AuditBuffer, archive_audit_rows
+from .period_archive import archive_years, attach_archives_for, each_archive
+from .db_manager import (
+    SEARCH_TABLE,
+    check_row_version,
+    database_change_counter,
+    db_session,
+    get_db_path,
+    index_distribution_employees,
+    retry_on_busy,
+    search_index_available,
+    write_session,
+)
+from .money import cents_to_decimal, from_cents, to_cents
 
 logger = logging.getLogger("tipsplit.distributions")
 
+# Distributions reference their period by INTEGER pk; callers pass the period UUID.
+_PERIOD_PK = "(SELECT pk FROM pay_periods WHERE id = ?)"
+
+# Per-employee money fields, stored as ``<field>_cents`` INTEGER columns.
+EMPLOYEE_MONEY_FIELDS = ("cash", "sur_paye", "frais_admin", "A", "B", "D", "E", "F")
+
+EMPLOYEE_LINK_BATCH_SIZE = 5000
+HISTORY_PAGE_SIZE = 200
+DISTRIBUTION_PAGE_SIZE = 100
+SEARCH_RESULT_LIMIT = 50
+STREAM_FETCH_SIZE = 500
+BULK_BATCH_SIZE = 500
+DISTRIBUTION_CACHE_SIZE = 256
+SNAPSHOT_CACHE_SIZE = 8
+# Ids per IN (...) list, well under SQLite's bound-parameter limit.
+LOAD_CHUNK_SIZE = 500
+
+# Running totals carried across employee_history pages.
+_HISTORY_TOTALS = ("cash", "sur_paye", "frais_admin", "A", "D", "F")
+
+# Resolve distribution_employees.employee_id: by employee number first, then by
+# case-insensitive name. Ties prefer the employee whose role matches the row's
+# section, then active employees, then the oldest id. The unary ``+`` keeps
+# the planner on the caller's range/distribution filter instead of
+# re-reading every unlinked row through the employee_id index.
+_LINK_EMPLOYEES_SQL = """
+    UPDATE distribution_employees
+       SET employee_id = COALESCE(
+            (SELECT id FROM (
+                SELECT e.id, e.is_active,
+                       e.role = (CASE WHEN lower(distribution_employees.section) LIKE 'bus%'
+                                      THEN 'busboy' ELSE 'service' END) AS same_role
+                  FROM employees e
+                 WHERE distribution_employees.employee_number <> ''
+                   AND e.employee_number = distribution_employees.employee_number)
+              ORDER BY same_role DESC, is_active DESC, id
+              LIMIT 1),
+            (SELECT id FROM (
+                SELECT e.id, e.is_active,
+                       e.role = (CASE WHEN lower(distribution_employees.section) LIKE 'bus%'
+                                      THEN 'busboy' ELSE 'service' END) AS same_role
+                  FROM employees e
+                 WHERE e.name = trim(distribution_employees.employee_name) COLLATE NOCASE)
+              ORDER BY same_role DESC, is_active DESC, id
+              LIMIT 1)
+       )
+     WHERE +employee_id IS NULL AND {where}
+"""
+
 
 def _utc_now() -> str:
     return datetime.now(timezone.utc).isoformat(timespec="seconds")
@@ -61,6 +130,174 @@ def _to_date_iso(date_str: str) -> str:
         return ""
 
 
+def _period_pk_for_insert(conn, pay_period_id: str) -> int:
+    period = conn.execute(
+        "SELECT pk, status FROM pay_periods WHERE id = ?",
+        (pay_period_id,),
+    ).fetchone()
+    if not period:
+        raise ValueError("Période de paie introuvable.")
+    status = period["status"]
+    if status == "LOCKED":
+        raise ValueError("La période est verrouillée. Déverrouillez-la avant d’ajouter une distribution.")
+    if status == "PAYED":
+        raise ValueError("La période est payée. Vous devez la rétablir à verrouillée pour ajouter une distribution.")
+    return int(period["pk"])
+
+
+def _check_distribution_args(date_local, shift, shift_instance) -> None:
+    if not date_local:
+        raise ValueError("date_local manquante.")
+    if not shift:
+        raise ValueError("shift manquant.")
+    if not isinstance(shift_instance, int) or shift_instance < 1:
+        raise ValueError("shift_instance invalide.")
+
+
+def _prepare_distribution(
+    period_pk: int,
+    *,
+    date_local: str,
+    shift: str,
+    shift_instance: int,
+    inputs: Dict,
+    declaration_inputs: Dict,
+    employees: Iterable[Dict],
+    created_by: str,
+    status: str = "UNCONFIRMED",
+    confirmed_at: Optional[str] = None,
+    confirmed_by: Optional[str] = None,
+) -> Dict:
+    """Column values of one distribution and its child rows (ids are assigned at insert)."""
+    inputs = inputs or {}
+    declaration_inputs = declaration_inputs or {}
+    employee_rows = []
+    for emp in employees or ():
+        if not isinstance(emp, dict):
+            continue
+        employee_rows.append(
+            (
+                str(emp.get("employee_id") or "") if emp.get("employee_id") not in (None, "") else "",
+                str(emp.get("name") or "").strip(),
+                str(emp.get("section") or "").strip(),
+                _num_or_none(emp.get("hours")),
+                *(to_cents(emp.get(field)) for field in EMPLOYEE_MONEY_FIELDS),
+            )
+        )
+    return {
+        "period_pk": period_pk,
+        "date_local": date_local,
+        "date_iso": _to_date_iso(date_local),
+        "shift": shift.upper(),
+        "shift_instance": shift_instance,
+        "created_by": created_by or "",
+        "status": status,
+        "confirmed_at": confirmed_at,
+        "confirmed_by": confirmed_by,
+        "inputs": (
+            to_cents(inputs.get("Ventes Nettes")),
+            to_cents(inputs.get("Dépot Net")),
+            to_cents(inputs.get("Frais Admin")),
+            to_cents(inputs.get("Cash")),
+        ),
+        "declaration": (
+            to_cents(declaration_inputs.get("Ventes Totales")),
+            _int_or_none(declaration_inputs.get("Clients")),
+            to_cents(declaration_inputs.get("Tips due")),
+            to_cents(declaration_inputs.get("Ventes Nourriture")),
+        ),
+        "employees": employee_rows,
+    }
+
+
+def _next_distribution_id(conn) -> int:
+    # AUTOINCREMENT semantics: never hand out the id of a deleted distribution again.
+    row = conn.execute(
+        """
+        SELECT MAX(
+            COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'distributions'), 0),
+            COALESCE((SELECT MAX(id) FROM distributions), 0)
+        ) + 1 AS next_id
+        """
+    ).fetchone()
+    return int(row["next_id"])
+
+
+def _insert_distributions(conn, prepared: List[Dict], now: str) -> List[Tuple[int, str]]:
+    """
+    Insert prepared distributions and their child rows. Ids are assigned
+    up front so ``dist_ref`` is written by the same INSERT; the caller
+    must hold the write lock (``BEGIN IMMEDIATE``).
+    """
+    first_id = _next_distribution_id(conn)
+    ids = []
+    dist_rows = []
+    for offset, rec in enumerate(prepared):
+        dist_id = first_id + offset
+        year = rec["date_iso"][:4] if rec["date_iso"] else "0000"
+        dist_ref = f"DIST-{year}-{dist_id:06d}"
+        ids.append((dist_id, dist_ref))
+        dist_rows.append(
+            (
+                dist_id,
+                dist_ref,
+                rec["period_pk"],
+                rec["date_local"],
+                rec["date_iso"] or None,
+                rec["shift"],
+                rec["shift_instance"],
+                rec["status"],
+                now,
+                rec["created_by"],
+                rec["confirmed_at"],
+                rec["confirmed_by"],
+            )
+        )
+    conn.executemany(
+        """
+        INSERT INTO distributions(
+            id, dist_ref, period_pk, date_local, date_iso, shift, shift_instance, status,
+            created_at, created_by, confirmed_at, confirmed_by
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        dist_rows,
+    )
+    conn.executemany(
+        """
+        INSERT INTO distribution_inputs(
+            distribution_id, ventes_nettes_cents, depot_net_cents, frais_admin_cents, cash_cents
+        )
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        [(dist_id, *rec["inputs"]) for (dist_id, _), rec in zip(ids, prepared)],
+    )
+    conn.executemany(
+        """
+        INSERT INTO distribution_declaration_inputs(
+            distribution_id, ventes_totales_cents, clients, tips_due_cents, ventes_nourriture_cents
+        )
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        [(dist_id, *rec["declaration"]) for (dist_id, _), rec in zip(ids, prepared)],
+    )
+    conn.executemany(
+        """
+        INSERT INTO distribution_employees(
+            distribution_id, employee_number, employee_name, section,
+            hours, cash_cents, sur_paye_cents, frais_admin_cents,
+            A_cents, B_cents, D_cents, E_cents, F_cents
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        [(dist_id, *row) for (dist_id, _), rec in zip(ids, prepared) for row in rec["employees"]],
+    )
+    if ids:
+        _link_employees(conn, "distribution_id BETWEEN ? AND ?", (ids[0][0], ids[-1][0]))
+        index_distribution_employees(conn, "distribution_id BETWEEN ? AND ?", (ids[0][0], ids[-1][0]))
+    return ids
+
+
 def create_distribution(
     *,
     pay_period_id: str,
@@ -74,132 +311,201 @@ def create_distribution(
 ) -> Dict:
     if not pay_period_id:
         raise ValueError("pay_period_id manquant.")
-    if not date_local:
-        raise ValueError("date_local manquante.")
-    if not shift:
-        raise ValueError("shift manquant.")
-    if not isinstance(shift_instance, int) or shift_instance < 1:
-        raise ValueError("shift_instance invalide.")
+    _check_distribution_args(date_local, shift, shift_instance)
+    # Materialized before the retry wrapper: a retry must see the same rows.
+    return _create_distribution(
+        pay_period_id=pay_period_id,
+        date_local=date_local,
+        shift=shift,
+        shift_instance=shift_instance,
+        inputs=inputs,
+        declaration_inputs=declaration_inputs,
+        employees=list(employees or []),
+        created_by=created_by,
+    )
 
-    with db_session() as conn:
-        period = conn.execute(
-            "SELECT status FROM pay_periods WHERE id = ?",
-            (pay_period_id,),
-        ).fetchone()
-        if not period:
-            raise ValueError("Période de paie introuvable.")
-        status = period["status"]
-        if status == "LOCKED":
-            raise ValueError("La période est verrouillée. Déverrouillez-la avant d’ajouter une distribution.")
-        if status == "PAYED":
-            raise ValueError("La période est payée. Vous devez la rétablir à verrouillée pour ajouter une distribution.")
-        now = _utc_now()
-        cur = conn.execute(
-            """
-            INSERT INTO distributions(
-                pay_period_id, date_local, shift, shift_instance, status,
-                created_at, created_by
-            )
-            VALUES (?, ?, ?, ?, 'UNCONFIRMED', ?, ?)
-            """,
-            (pay_period_id, date_local, shift.upper(), shift_instance, now, created_by or ""),
-        )
-        dist_id = int(cur.lastrowid)
 
-        date_iso = _to_date_iso(date_local)
-        year = date_iso[:4] if date_iso else "0000"
-        dist_ref = f"DIST-{year}-{dist_id:06d}"
-        conn.execute(
-            "UPDATE distributions SET dist_ref = ? WHERE id = ?",
-            (dist_ref, dist_id),
+@retry_on_busy
+def _create_distribution(
+    *,
+    pay_period_id: str,
+    date_local: str,
+    shift: str,
+    shift_instance: int,
+    inputs: Dict,
+    declaration_inputs: Dict,
+    employees: List[Dict],
+    created_by: str,
+) -> Dict:
+    """The transaction of :func:`create_distribution` (arguments already lists, so it can be retried)."""
+    with write_session() as conn:
+        period_pk = _period_pk_for_insert(conn, pay_period_id)
+        now = _utc_now()
+        prepared = _prepare_distribution(
+            period_pk,
+            date_local=date_local,
+            shift=shift,
+            shift_instance=shift_instance,
+            inputs=inputs,
+            declaration_inputs=declaration_inputs,
+            employees=employees,
+            created_by=created_by,
         )
+        [(dist_id, dist_ref)] = _insert_distributions(conn, [prepared], now)
 
-        conn.execute(
-            """
-            INSERT INTO distribution_inputs(
-                distribution_id, ventes_nettes, depot_net, frais_admin, cash
-            )
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (
+        with AuditBuffer(conn) as audit:
+            audit.add(
                 dist_id,
-                _num_or_none(inputs.get("Ventes Nettes")),
-                _num_or_none(inputs.get("Dépot Net")),
-                _num_or_none(inputs.get("Frais Admin")),
-                _num_or_none(inputs.get("Cash")),
-            ),
-        )
+                "created",
+                actor=created_by,
+                details={"date_local": date_local, "shift": shift.upper(), "shift_instance": shift_instance},
+            )
 
-        conn.execute(
-            """
-            INSERT INTO distribution_declaration_inputs(
-                distribution_id, ventes_totales, clients, tips_due, ventes_nourriture
+    logger.info("Distribution créée %s (%s %s)", dist_ref, date_local, shift)
+    return {"id": dist_id, "dist_ref": dist_ref, "created_at": now}
+
+
+def create_distributions_bulk(
+    records: Iterable[Dict],
+    *,
+    created_by: str = "",
+    status: str = "UNCONFIRMED",
+    confirmed_by: str = "",
+    batch_size: int = BULK_BATCH_SIZE,
+) -> Dict:
+    """
+    Import many distributions in one transaction. Each record takes the
+    keyword arguments of :func:`create_distribution`. ``status`` applies to
+    every record; CONFIRMED ones are stamped as confirmed now by
+    ``confirmed_by``, like :func:`set_distribution_status` would.
+
+    Period status is checked once per period and each batch is written
+    with ``executemany``. A record that fails validation or hits a
+    constraint (e.g. a duplicate date/shift/instance) is rolled back to
+    its own savepoint and reported; the other records are kept. One
+    ``bulk_created`` audit row is written per batch.
+
+    Returns ``{"created": [{"index", "id", "dist_ref"}], "errors": [{"index", "error"}]}``.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size doit être positif.")
+    status = (status or "").upper()
+    if status not in ("UNCONFIRMED", "CONFIRMED"):
+        raise ValueError("Statut invalide.")
+    created: List[Dict] = []
+    errors: List[Dict] = []
+    periods: Dict[str, Union[int, str]] = {}
+
+    # Records may be a one-shot iterator: only taking the lock is retried.
+    with write_session() as conn, AuditBuffer(conn) as audit:
+        now = _utc_now()
+        confirmation = {"status": status}
+        if status == "CONFIRMED":
+            confirmation.update(confirmed_at=now, confirmed_by=confirmed_by or created_by or "")
+
+        def prepare(record: Dict) -> Dict:
+            pay_period_id = record.get("pay_period_id")
+            if not pay_period_id:
+                raise ValueError("pay_period_id manquant.")
+            date_local = record.get("date_local")
+            shift = record.get("shift")
+            shift_instance = record.get("shift_instance", 1)
+            _check_distribution_args(date_local, shift, shift_instance)
+            if pay_period_id not in periods:
+                try:
+                    periods[pay_period_id] = _period_pk_for_insert(conn, pay_period_id)
+                except ValueError as exc:
+                    periods[pay_period_id] = str(exc)
+            period_pk = periods[pay_period_id]
+            if isinstance(period_pk, str):
+                raise ValueError(period_pk)
+            return _prepare_distribution(
+                period_pk,
+                date_local=date_local,
+                shift=shift,
+                shift_instance=shift_instance,
+                inputs=record.get("inputs"),
+                declaration_inputs=record.get("declaration_inputs"),
+                employees=record.get("employees"),
+                created_by=record.get("created_by", created_by),
+                **confirmation,
             )
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (
-                dist_id,
-                _num_or_none(declaration_inputs.get("Ventes Totales")),
-                _int_or_none(declaration_inputs.get("Clients")),
-                _num_or_none(declaration_inputs.get("Tips due")),
-                _num_or_none(declaration_inputs.get("Ventes Nourriture")),
-            ),
-        )
 
-        for emp in employees:
-            if not isinstance(emp, dict):
-                continue
-            conn.execute(
-                """
-                INSERT INTO distribution_employees(
-                    distribution_id, employee_number, employee_name, section,
-                    hours, cash, sur_paye, frais_admin,
-                    A, B, D, E, F
+        def write_batch(batch: List[Tuple[int, Dict]]) -> None:
+            conn.execute("SAVEPOINT bulk_batch")
+            try:
+                ids = _insert_distributions(conn, [rec for _, rec in batch], now)
+                done = [(index, *pair) for (index, _), pair in zip(batch, ids)]
+            except sqlite3.IntegrityError:
+                # Retry record by record to isolate the offending rows.
+                conn.execute("ROLLBACK TO bulk_batch")
+                done = []
+                for index, rec in batch:
+                    conn.execute("SAVEPOINT bulk_record")
+                    try:
+                        [pair] = _insert_distributions(conn, [rec], now)
+                    except sqlite3.IntegrityError as exc:
+                        conn.execute("ROLLBACK TO bulk_record")
+                        errors.append({"index": index, "error": str(exc)})
+                    else:
+                        done.append((index, *pair))
+                    conn.execute("RELEASE bulk_record")
+            if done:
+                audit.add(
+                    done[0][1],
+                    "bulk_created",
+                    actor=created_by,
+                    details={
+                        "count": len(done),
+                        "first_id": done[0][1],
+                        "last_id": done[-1][1],
+                        "status": status,
+                    },
+                    item_count=len(done),
                 )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    dist_id,
-                    str(emp.get("employee_id") or "") if emp.get("employee_id") not in (None, "") else "",
-                    str(emp.get("name") or "").strip(),
-                    str(emp.get("section") or "").strip(),
-                    _num_or_none(emp.get("hours")),
-                    _num_or_none(emp.get("cash")),
-                    _num_or_none(emp.get("sur_paye")),
-                    _num_or_none(emp.get("frais_admin")),
-                    _num_or_none(emp.get("A")),
-                    _num_or_none(emp.get("B")),
-                    _num_or_none(emp.get("D")),
-                    _num_or_none(emp.get("E")),
-                    _num_or_none(emp.get("F")),
-                ),
-            )
+            conn.execute("RELEASE bulk_batch")
+            created.extend({"index": index, "id": dist_id, "dist_ref": dist_ref} for index, dist_id, dist_ref in done)
 
-        _log_action(
-            conn,
-            dist_id,
-            action="created",
-            actor=created_by,
-            details={"date_local": date_local, "shift": shift.upper(), "shift_instance": shift_instance},
-        )
+        batch: List[Tuple[int, Dict]] = []
+        for index, record in enumerate(records):
+            try:
+                batch.append((index, prepare(record)))
+            except ValueError as exc:
+                errors.append({"index": index, "error": str(exc)})
+                continue
+            if len(batch) >= batch_size:
+                write_batch(batch)
+                batch = []
+        if batch:
+            write_batch(batch)
 
-    logger.info("Distribution créée %s (%s %s)", dist_ref, date_local, shift)
-    return {"id": dist_id, "dist_ref": dist_ref, "created_at": now}
+    errors.sort(key=lambda item: item["index"])
+    logger.info("Import de distributions: %s créées, %s erreurs", len(created), len(errors))
+    return {"created": created, "errors": errors}
 
 
 def list_period_ids_with_distributions(status: Optional[str] = None) -> List[str]:
+    # Probe each period through idx_distributions_period_status_created instead of
+    # running DISTINCT over every distribution row.
     params: List = []
     clause = ""
+    archived = "a.distribution_count > 0"
     if status:
-        clause = "WHERE status = ?"
+        clause = "AND d.status = ?"
         params.append(status.upper())
+        archived = "a.confirmed_count > 0" if status.upper() == "CONFIRMED" else "a.distribution_count > a.confirmed_count"
     with db_session() as conn:
         rows = conn.execute(
             f"""
-            SELECT DISTINCT pay_period_id
-            FROM distributions
-            {clause}
-            ORDER BY pay_period_id
+            SELECT p.id AS pay_period_id
+            FROM pay_periods p
+            WHERE EXISTS (
+                SELECT 1 FROM distributions d
+                WHERE d.period_pk = p.pk
+                {clause}
+            )
+            OR EXISTS (SELECT 1 FROM archived_periods a WHERE a.period_pk = p.pk AND {archived})
+            ORDER BY p.id
             """,
             params,
         ).fetchall()
@@ -214,9 +520,11 @@ def list_period_ids_with_distributions_for_periods(period_ids: Iterable[str]) ->
     with db_session() as conn:
         rows = conn.execute(
             f"""
-            SELECT DISTINCT pay_period_id
-            FROM distributions
-            WHERE pay_period_id IN ({placeholders})
+            SELECT p.id AS pay_period_id
+            FROM pay_periods p
+            WHERE p.id IN ({placeholders})
+              AND (EXISTS (SELECT 1 FROM distributions d WHERE d.period_pk = p.pk)
+                   OR EXISTS (SELECT 1 FROM archived_periods a WHERE a.period_pk = p.pk AND a.distribution_count > 0))
             """,
             ids,
         ).fetchall()
@@ -236,11 +544,12 @@ def list_distributions(
         clause = "AND status = ?"
         params.append(status.upper())
     with db_session() as conn:
+        attach_archives_for(conn, period_ids=[pay_period_id])
         rows = conn.execute(
             f"""
             SELECT id, dist_ref, date_local, shift, shift_instance, status, created_at, confirmed_at
             FROM distributions
-            WHERE pay_period_id = ?
+            WHERE period_pk = {_PERIOD_PK}
             {clause}
             ORDER BY created_at DESC, id DESC
             """,
@@ -249,75 +558,480 @@ def list_distributions(
     return [dict(row) for row in rows]
 
 
-def get_distribution(dist_id: int) -> Optional[Dict]:
-    if not dist_id:
-        return None
+def list_period_status_counts() -> List[Dict]:
+    """
+    Periods that have distributions, with their UNCONFIRMED / CONFIRMED
+    counts (each count probes idx_distributions_period_status_created).
+    Archived periods report the counts recorded when they were archived.
+    """
     with db_session() as conn:
-        row = conn.execute(
+        rows = conn.execute(
             """
-            SELECT id, dist_ref, pay_period_id, date_local, shift, shift_instance,
-                   status, created_at, confirmed_at, created_by, confirmed_by
-            FROM distributions
-            WHERE id = ?
-            """,
-            (dist_id,),
-        ).fetchone()
-        if not row:
-            return None
-        inputs_row = conn.execute(
+            SELECT pay_period_id, unconfirmed, confirmed FROM (
+                SELECT p.id AS pay_period_id,
+                       (SELECT COUNT(*) FROM distributions d
+                         WHERE d.period_pk = p.pk AND d.status = 'UNCONFIRMED')
+                       + COALESCE(a.distribution_count - a.confirmed_count, 0) AS unconfirmed,
+                       (SELECT COUNT(*) FROM distributions d
+                         WHERE d.period_pk = p.pk AND d.status = 'CONFIRMED')
+                       + COALESCE(a.confirmed_count, 0) AS confirmed
+                FROM pay_periods p
+                LEFT JOIN archived_periods a ON a.period_pk = p.pk
+            )
+            WHERE unconfirmed + confirmed > 0
+            ORDER BY pay_period_id
             """
-            SELECT ventes_nettes, depot_net, frais_admin, cash
-            FROM distribution_inputs
-            WHERE distribution_id = ?
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def _prefix_range(column: str, prefix: str) -> Tuple[str, List]:
+    # Index-friendly equivalent of ``column LIKE 'prefix%'`` (case-sensitive).
+    return f"({column} >= ? AND {column} < ?)", [prefix, prefix + "\uffff"]
+
+
+def _distribution_search(search: str) -> Tuple[str, List]:
+    """
+    SQL filter for the review lists. Each word narrows the result:
+    a date (``JJ-MM-AAAA``, ``AAAA-MM-JJ`` or ``AAAA-MM``), a year, a
+    distribution reference (``DIST-...``) or its number, or a shift prefix.
+    """
+    clauses: List[str] = []
+    params: List = []
+    for word in (search or "").split():
+        token = word.strip().upper()
+        if re.match(r"^\d{2}-\d{2}-\d{4}$", token) or re.match(r"^\d{4}-\d{2}-\d{2}$", token):
+            date_iso = _to_date_iso(token)
+            if not date_iso:
+                raise ValueError(f"Date invalide: {word}")
+            clauses.append("date_iso = ?")
+            params.append(date_iso)
+        elif re.match(r"^\d{4}-\d{2}$", token):
+            clause, values = _prefix_range("date_iso", token + "-")
+            clauses.append(clause)
+            params += values
+        elif token.startswith("DIST"):
+            clause, values = _prefix_range("dist_ref", token)
+            clauses.append(clause)
+            params += values
+        elif token.isdigit():
+            # dist_ref numbers are distribution ids; four digits may also be a year.
+            if len(token) == 4:
+                clauses.append("(id = ? OR (date_iso >= ? AND date_iso < ?))")
+                params += [int(token), f"{token}-", f"{token}-\uffff"]
+            else:
+                clauses.append("id = ?")
+                params.append(int(token))
+        else:
+            clause, values = _prefix_range("shift", token)
+            clauses.append(clause)
+            params += values
+    return " AND ".join(clauses), params
+
+
+def list_distributions_by_status(
+    *,
+    pay_period_id: str,
+    search: str = "",
+    limit: int = DISTRIBUTION_PAGE_SIZE,
+) -> Dict[str, Dict]:
+    """
+    First page of both status partitions of a period, in one query.
+
+    Returns ``{"UNCONFIRMED": {...}, "CONFIRMED": {...}}`` where each part
+    holds ``rows`` (newest first, like :func:`list_distributions`), the
+    ``count`` of matching rows and a ``next_cursor`` for
+    :func:`list_distributions_page` (None when everything is loaded).
+    """
+    result = {status: {"rows": [], "count": 0, "next_cursor": None} for status in ("UNCONFIRMED", "CONFIRMED")}
+    if not pay_period_id:
+        return result
+    where, params = _distribution_search(search)
+    with db_session() as conn:
+        attach_archives_for(conn, period_ids=[pay_period_id])
+        rows = conn.execute(
+            f"""
+            SELECT id, dist_ref, date_local, shift, shift_instance, status, created_at, confirmed_at,
+                   status_count
+            FROM (
+                SELECT id, dist_ref, date_local, shift, shift_instance, status, created_at, confirmed_at,
+                       ROW_NUMBER() OVER (PARTITION BY status ORDER BY created_at DESC, id DESC) AS position,
+                       COUNT(*) OVER (PARTITION BY status) AS status_count
+                FROM distributions
+                WHERE period_pk = {_PERIOD_PK}
+                {"AND " + where if where else ""}
+            )
+            WHERE position <= ?
+            ORDER BY status, created_at DESC, id DESC
             """,
-            (dist_id,),
-        ).fetchone()
-        decl_row = conn.execute(
-            """
-            SELECT ventes_totales, clients, tips_due, ventes_nourriture
-            FROM distribution_declaration_inputs
-            WHERE distribution_id = ?
+            [pay_period_id, *params, limit],
+        ).fetchall()
+    for row in rows:
+        part = result[row["status"]]
+        data = dict(row)
+        part["count"] = data.pop("status_count")
+        part["rows"].append(data)
+    for part in result.values():
+        if part["count"] > len(part["rows"]):
+            last = part["rows"][-1]
+            part["next_cursor"] = [last["created_at"], last["id"]]
+    return result
+
+
+def list_distributions_page(
+    *,
+    pay_period_id: str,
+    status: str,
+    cursor: Sequence,
+    search: str = "",
+    limit: int = DISTRIBUTION_PAGE_SIZE,
+) -> Dict:
+    """Next page of one status partition after ``cursor`` (keyset on created_at, id)."""
+    status = (status or "").upper()
+    if status not in ("UNCONFIRMED", "CONFIRMED"):
+        raise ValueError("Statut invalide.")
+    created_at, last_id = cursor
+    where, params = _distribution_search(search)
+    with db_session() as conn:
+        attach_archives_for(conn, period_ids=[pay_period_id])
+        rows = conn.execute(
+            f"""
+            SELECT id, dist_ref, date_local, shift, shift_instance, status, created_at, confirmed_at
+            FROM distributions
+            WHERE period_pk = {_PERIOD_PK} AND status = ?
+              AND (created_at, id) < (?, ?)
+              {"AND " + where if where else ""}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
             """,
-            (dist_id,),
-        ).fetchone()
-        employees = conn.execute(
+            [pay_period_id, status, created_at, last_id, *params, limit + 1],
+        ).fetchall()
+    page = [dict(row) for row in rows[:limit]]
+    next_cursor = [page[-1]["created_at"], page[-1]["id"]] if len(rows) > limit else None
+    return {"rows": page, "next_cursor": next_cursor}
+
+
+def _search_terms(query: str) -> List[str]:
+    # One FTS5 prefix phrase per word: ``12-03-2025`` -> ``"12 03 2025"*``.
+    terms = []
+    for word in (query or "").split():
+        tokens = re.findall(r"\w+", word)
+        if tokens:
+            terms.append('"' + " ".join(tokens) + '"*')
+    return terms
+
+
+_SEARCH_COLUMNS = (
+    "d.id, d.dist_ref, p.id AS pay_period_id, d.date_local, d.date_iso, d.shift, d.shift_instance, d.status"
+)
+
+
+def _like_search(conn, terms: List[str], limit: int, schema: str = "main") -> List[sqlite3.Row]:
+    """LIKE search of ``terms`` over the distribution tables of ``schema``, newest first."""
+    clauses = []
+    params: List = []
+    for term in terms:
+        pattern = "%" + term.strip('"*').replace(" ", "%") + "%"
+        clauses.append(
+            f"""
+            (d.dist_ref LIKE ? OR d.date_local LIKE ? OR d.date_iso LIKE ? OR d.shift LIKE ?
+             OR EXISTS (SELECT 1 FROM {schema}.distribution_employees de
+                        WHERE de.distribution_id = d.id
+                          AND (de.employee_name LIKE ? OR de.employee_number LIKE ?))
+             OR EXISTS (SELECT 1 FROM {schema}.distribution_audit a
+                        WHERE a.distribution_id = d.id
+                          AND (a.action LIKE ? OR a.actor LIKE ? OR a.details_json LIKE ?)))
             """
-            SELECT employee_number, employee_name, section,
-                   hours, cash, sur_paye, frais_admin, A, B, D, E, F
-            FROM distribution_employees
-            WHERE distribution_id = ?
-            ORDER BY id ASC
+        )
+        params += [pattern] * 9
+    return conn.execute(
+        f"""
+        SELECT {_SEARCH_COLUMNS}, 0 AS score
+        FROM {schema}.distributions d
+        JOIN main.pay_periods p ON p.pk = d.period_pk
+        WHERE {" AND ".join(clauses)}
+        ORDER BY d.date_iso DESC, d.id DESC
+        LIMIT ?
+        """,
+        [*params, limit],
+    ).fetchall()
+
+
+def search_distributions(query: str, *, limit: int = SEARCH_RESULT_LIMIT) -> List[Dict]:
+    """
+    Distributions matching every word of ``query`` in their reference,
+    dates (including French weekday and month names), shift, employee
+    numbers and names, or audit log (action, actor, details). Matching is
+    by prefix and ignores case and accents; a word may match any of those
+    sources. Results are ranked by relevance (``score``, lower is better).
+
+    Without the FTS5 index (SQLite built without it) the same sources,
+    minus weekday/month names, are searched with LIKE and ordered by date.
+    Archived periods are not in the index: when the main file has fewer
+    than ``limit`` matches, the yearly archives are searched the same way
+    with LIKE, newest year first, and their matches follow.
+    """
+    terms = _search_terms(query)
+    if not terms:
+        return []
+    with db_session() as conn:
+        if search_index_available(conn):
+            hits = " UNION ALL ".join(
+                f"SELECT distribution_id, {index} AS term, rank "
+                f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH ?"
+                for index in range(len(terms))
+            )
+            rows = conn.execute(
+                f"""
+                WITH hits AS ({hits}),
+                best AS (
+                    SELECT distribution_id, term, MIN(rank) AS rank FROM hits GROUP BY distribution_id, term
+                ),
+                matched AS (
+                    SELECT distribution_id, SUM(rank) AS score FROM best
+                    GROUP BY distribution_id
+                    HAVING COUNT(*) = ?
+                )
+                SELECT {_SEARCH_COLUMNS}, m.score
+                FROM matched m
+                JOIN distributions d ON d.id = m.distribution_id
+                JOIN pay_periods p ON p.pk = d.period_pk
+                ORDER BY m.score, d.date_iso DESC, d.id DESC
+                LIMIT ?
+                """,
+                [*terms, len(terms), limit],
+            ).fetchall()
+        else:
+            rows = _like_search(conn, terms, limit)
+        if len(rows) < limit:
+            for schema in each_archive(conn, archive_years(conn)):
+                rows += _like_search(conn, terms, limit - len(rows), schema)
+                if len(rows) >= limit:
+                    break
+    return [dict(row) for row in rows]
+
+
+def _load_distributions(conn, dist_ids: List[int]) -> Dict[int, Dict]:
+    """Fully loaded distributions by id: four queries per chunk of ids."""
+    loaded: Dict[int, Dict] = {}
+    for start in range(0, len(dist_ids), LOAD_CHUNK_SIZE):
+        chunk = dist_ids[start : start + LOAD_CHUNK_SIZE]
+        marks = ", ".join("?" * len(chunk))
+        rows = conn.execute(
+            f"""
+            SELECT d.id, d.dist_ref, p.id AS pay_period_id, d.date_local, d.shift, d.shift_instance,
+                   d.status, d.created_at, d.confirmed_at, d.created_by, d.confirmed_by, d.version
+            FROM distributions d
+            JOIN pay_periods p ON p.pk = d.period_pk
+            WHERE d.id IN ({marks})
             """,
-            (dist_id,),
+            chunk,
         ).fetchall()
-
-    inputs = {}
-    if inputs_row:
-        inputs = {
-            "Ventes Nettes": inputs_row["ventes_nettes"],
-            "Dépot Net": inputs_row["depot_net"],
-            "Frais Admin": inputs_row["frais_admin"],
-            "Cash": inputs_row["cash"],
+        if not rows:
+            continue
+        inputs_rows = {
+            r["distribution_id"]: r
+            for r in conn.execute(
+                f"""
+                SELECT distribution_id, ventes_nettes_cents, depot_net_cents, frais_admin_cents, cash_cents
+                FROM distribution_inputs
+                WHERE distribution_id IN ({marks})
+                """,
+                chunk,
+            )
+        }
+        decl_rows = {
+            r["distribution_id"]: r
+            for r in conn.execute(
+                f"""
+                SELECT distribution_id, ventes_totales_cents, clients, tips_due_cents, ventes_nourriture_cents
+                FROM distribution_declaration_inputs
+                WHERE distribution_id IN ({marks})
+                """,
+                chunk,
+            )
         }
-    decl_inputs = {}
-    if decl_row:
-        decl_inputs = {
-            "Ventes Totales": decl_row["ventes_totales"],
-            "Clients": decl_row["clients"],
-            "Tips due": decl_row["tips_due"],
-            "Ventes Nourriture": decl_row["ventes_nourriture"],
+        employees = {
+            dist_id: [_employee_amounts(emp) for emp in group]
+            for dist_id, group in groupby(
+                conn.execute(
+                    f"""
+                    SELECT distribution_id, employee_number, employee_name, section, employee_id, hours,
+                           cash_cents, sur_paye_cents, frais_admin_cents,
+                           A_cents, B_cents, D_cents, E_cents, F_cents
+                    FROM distribution_employees
+                    WHERE distribution_id IN ({marks})
+                    ORDER BY distribution_id, id
+                    """,
+                    chunk,
+                ),
+                key=lambda r: r["distribution_id"],
+            )
         }
 
-    base = dict(row)
-    base["date_iso"] = _to_date_iso(base.get("date_local") or "")
+        for row in rows:
+            dist_id = row["id"]
+            inputs = {}
+            inputs_row = inputs_rows.get(dist_id)
+            if inputs_row:
+                inputs = {
+                    "Ventes Nettes": from_cents(inputs_row["ventes_nettes_cents"]),
+                    "Dépot Net": from_cents(inputs_row["depot_net_cents"]),
+                    "Frais Admin": from_cents(inputs_row["frais_admin_cents"]),
+                    "Cash": from_cents(inputs_row["cash_cents"]),
+                }
+            decl_inputs = {}
+            decl_row = decl_rows.get(dist_id)
+            if decl_row:
+                decl_inputs = {
+                    "Ventes Totales": from_cents(decl_row["ventes_totales_cents"]),
+                    "Clients": decl_row["clients"],
+                    "Tips due": from_cents(decl_row["tips_due_cents"]),
+                    "Ventes Nourriture": from_cents(decl_row["ventes_nourriture_cents"]),
+                }
+            base = dict(row)
+            base["date_iso"] = _to_date_iso(base.get("date_local") or "")
+            loaded[dist_id] = {
+                **base,
+                "inputs": inputs,
+                "declaration_inputs": decl_inputs,
+                "employees": employees.get(dist_id, []),
+            }
+    return loaded
+
+
+# ---------------------------------------------------------------------------
+# Read-through LRU cache of fully loaded distributions.
+# Keyed by (database path, id). Writes made through this module invalidate
+# their entries; callers always receive a copy.
+# ---------------------------------------------------------------------------
+_cache: "OrderedDict[Tuple[str, int], Dict]" = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_generation = 0
+# Database file change counter when each file's entries were read.
+_cache_counters: Dict[str, Optional[int]] = {}
+
+
+def _cache_sync(db_path: str) -> None:
+    """Drop the entries of ``db_path`` if anything (e.g. another terminal) committed since they were read."""
+    global _cache_generation
+    counter = database_change_counter(db_path)
+    with _cache_lock:
+        if counter is not None and _cache_counters.get(db_path) == counter:
+            return
+        _cache_counters[db_path] = counter
+        _cache_generation += 1
+        for key in [key for key in _cache if key[0] == db_path]:
+            del _cache[key]
+
+
+def _cache_get_many(db_path: str, dist_ids: Iterable[int]) -> Dict[int, Dict]:
+    found = {}
+    with _cache_lock:
+        for dist_id in dist_ids:
+            key = (db_path, dist_id)
+            if key in _cache:
+                _cache.move_to_end(key)
+                found[dist_id] = _cache[key]
+    return found
+
+
+def _cache_put_many(db_path: str, loaded: Dict[int, Dict], generation: int) -> None:
+    with _cache_lock:
+        # Skip if an invalidation happened while these rows were being read.
+        if generation != _cache_generation:
+            return
+        for dist_id, dist in loaded.items():
+            _cache[(db_path, dist_id)] = dist
+            _cache.move_to_end((db_path, dist_id))
+        while len(_cache) > DISTRIBUTION_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def invalidate_distribution_cache(dist_id: Optional[int] = None) -> None:
+    """Drop one distribution (or all of them) from the cache."""
+    global _cache_generation
+    with _cache_lock:
+        _cache_generation += 1
+        if dist_id is None:
+            _cache.clear()
+        else:
+            for key in [key for key in _cache if key[1] == dist_id]:
+                del _cache[key]
+
+
+def _fetch_distributions(dist_ids: List[int]) -> Dict[int, Dict]:
+    db_path = get_db_path()
+    _cache_sync(db_path)
+    found = _cache_get_many(db_path, dist_ids)
+    missing = [dist_id for dist_id in dict.fromkeys(dist_ids) if dist_id not in found]
+    if missing:
+        generation = _cache_generation
+        with db_session() as conn:
+            loaded = _load_distributions(conn, missing)
+            # Ids not in the main file may belong to an archived period.
+            unknown = [dist_id for dist_id in missing if dist_id not in loaded]
+            if unknown and attach_archives_for(conn, distribution_ids=unknown):
+                loaded.update(_load_distributions(conn, unknown))
+        _cache_put_many(db_path, loaded, generation)
+        found.update(loaded)
+    return found
+
+
+def _copy_distribution(dist: Dict) -> Dict:
+    # Leaf values are immutable (str, int, float, None): copying the containers is enough.
     return {
-        **base,
-        "inputs": inputs,
-        "declaration_inputs": decl_inputs,
-        "employees": [dict(emp) for emp in employees],
+        **dist,
+        "inputs": dict(dist["inputs"]),
+        "declaration_inputs": dict(dist["declaration_inputs"]),
+        "employees": [dict(emp) for emp in dist["employees"]],
     }
 
 
+def get_distribution(dist_id: int) -> Optional[Dict]:
+    if not dist_id:
+        return None
+    dist = _fetch_distributions([dist_id]).get(dist_id)
+    return _copy_distribution(dist) if dist else None
+
+
+def get_distributions(dist_ids: Iterable[int]) -> List[Dict]:
+    """Several distributions in the given order (unknown ids are skipped)."""
+    dist_ids = [dist_id for dist_id in dist_ids if dist_id]
+    found = _fetch_distributions(dist_ids)
+    return [_copy_distribution(found[dist_id]) for dist_id in dist_ids if dist_id in found]
+
+
+def prefetch_distributions(dist_ids: Iterable[int]) -> int:
+    """Warm the cache with the given ids; returns how many were read from the database."""
+    dist_ids = [dist_id for dist_id in dist_ids if dist_id]
+    db_path = get_db_path()
+    _cache_sync(db_path)
+    cached = _cache_get_many(db_path, dist_ids)
+    missing = [dist_id for dist_id in dist_ids if dist_id not in cached]
+    if missing:
+        _fetch_distributions(missing)
+    return len(missing)
+
+
+def _employee_amounts(row) -> Dict:
+    """
+    distribution_employees row -> dict with amounts in currency units. The
+    roster link is ``employee_db_id``: on input, ``employee_id`` is the
+    employee number.
+    """
+    data = {
+        "employee_number": row["employee_number"],
+        "employee_name": row["employee_name"],
+        "section": row["section"],
+        "employee_db_id": row["employee_id"],
+        "hours": row["hours"],
+    }
+    for column in EMPLOYEE_MONEY_FIELDS:
+        data[column] = from_cents(row[f"{column}_cents"])
+    return data
+
+
 def find_distribution_by_key(
     *,
     pay_period_id: str,
@@ -329,10 +1043,10 @@ def find_distribution_by_key(
         return None
     with db_session() as conn:
         row = conn.execute(
-            """
+            f"""
             SELECT id, dist_ref, date_local, shift, shift_instance, status, created_at, confirmed_at
             FROM distributions
-            WHERE pay_period_id = ? AND date_local = ? AND shift = ? AND shift_instance = ?
+            WHERE period_pk = {_PERIOD_PK} AND date_local = ? AND shift = ? AND shift_instance = ?
             """,
             (pay_period_id, date_local, shift.upper(), shift_instance),
         ).fetchone()
@@ -349,10 +1063,10 @@ def list_distributions_by_date_shift(
         return []
     with db_session() as conn:
         rows = conn.execute(
-            """
+            f"""
             SELECT id, dist_ref, date_local, shift, shift_instance, status, created_at, confirmed_at
             FROM distributions
-            WHERE pay_period_id = ? AND date_local = ? AND shift = ?
+            WHERE period_pk = {_PERIOD_PK} AND date_local = ? AND shift = ?
             ORDER BY shift_instance ASC, created_at ASC, id ASC
             """,
             (pay_period_id, date_local, shift.upper()),
@@ -370,10 +1084,10 @@ def next_shift_instance(
         return 1
     with db_session() as conn:
         row = conn.execute(
-            """
+            f"""
             SELECT MAX(shift_instance) AS max_inst
             FROM distributions
-            WHERE pay_period_id = ? AND date_local = ? AND shift = ?
+            WHERE period_pk = {_PERIOD_PK} AND date_local = ? AND shift = ?
             """,
             (pay_period_id, date_local, shift.upper()),
         ).fetchone()
@@ -386,29 +1100,610 @@ def get_distributions_for_period(
     pay_period_id: str,
     status: Optional[str] = None,
 ) -> List[Dict]:
+    if (status or "").upper() == "CONFIRMED":
+        snapshot = get_period_snapshot(pay_period_id)
+        if snapshot:
+            return snapshot["distributions"]
     dists = list_distributions(pay_period_id=pay_period_id, status=status)
+    return get_distributions([dist["id"] for dist in dists])
+
+
+def employee_totals_for_period(
+    *,
+    pay_period_id: str,
+    status: Optional[str] = "CONFIRMED",
+) -> List[Dict]:
+    """
+    Per-employee totals for a period, summed by SQLite over INTEGER cents.
+
+    Rows carry the exact ``<field>_cents`` sums and the same amounts in
+    currency units under ``<field>``, plus ``hours`` and ``shift_count``.
+    Employees are keyed like PayTab: by number, or by name when unnumbered.
+    """
+    if not pay_period_id:
+        return []
+    if (status or "").upper() == "CONFIRMED":
+        snapshot = get_period_snapshot(pay_period_id)
+        if snapshot:
+            return snapshot["employee_totals"]
+    with db_session() as conn:
+        attach_archives_for(conn, period_ids=[pay_period_id])
+        return _employee_totals(conn, pay_period_id, status)
+
+
+def _employee_totals(conn, pay_period_id: str, status: Optional[str]) -> List[Dict]:
+    params: List = [pay_period_id]
+    clause = ""
+    if status:
+        clause = "AND l.status = ?"
+        params.append(status.upper())
+    sums = ",\n               ".join(
+        f"COALESCE(SUM(l.{column}_cents), 0) AS {column}_cents" for column in EMPLOYEE_MONEY_FIELDS
+    )
+    rows = conn.execute(
+        f"""
+        SELECT CASE WHEN COALESCE(l.employee_number, '') = ''
+                    THEN 'name::' || l.employee_name
+                    ELSE l.employee_number END AS employee_key,
+               MAX(l.employee_number) AS employee_number,
+               MAX(l.employee_name) AS employee_name,
+               MAX(l.section) AS section,
+               COUNT(*) AS shift_count,
+               COALESCE(SUM(l.hours), 0) AS hours,
+               {sums}
+        FROM distribution_lines l
+        WHERE l.period_pk = {_PERIOD_PK}
+        {clause}
+        GROUP BY employee_key
+        ORDER BY employee_key
+        """,
+        params,
+    ).fetchall()
     results = []
-    for dist in dists:
-        full = get_distribution(dist["id"])
-        if not full:
-            continue
-        results.append(full)
+    for row in rows:
+        data = dict(row)
+        for column in EMPLOYEE_MONEY_FIELDS:
+            data[column] = from_cents(data[f"{column}_cents"])
+        results.append(data)
     return results
 
 
-def set_distribution_status(dist_id: int, status: str, actor: str = "") -> None:
+def declared_amount_cents(role: str, *, a_cents: int, f_cents: int, d_cents: int) -> Tuple[int, str]:
+    """
+    Declared tips in cents, with the source label (same rule as the PDF résumé):
+    - Service: max(F, 8% of A)
+    - Bussboy: D
+    """
+    role_lower = (role or "").lower()
+    if "service" in role_lower:
+        a_floor = to_cents(cents_to_decimal(a_cents or 0) * Decimal("0.08"))
+        if (f_cents or 0) >= a_floor:
+            return f_cents or 0, "F"
+        return a_floor, "8% des ventes"
+    if "bussboy" in role_lower or "busboy" in role_lower:
+        return d_cents or 0, "D"
+    return 0, "—"
+
+
+
+# ---------------------------------------------------------------------------
+# Period snapshots. Locking a period freezes its CONFIRMED results (the
+# distributions, per-employee totals and declared amounts) into one
+# compressed row; reads of LOCKED/PAYED periods decode it instead of
+# re-aggregating the raw rows, which cannot change until the period is
+# unlocked (see _refuse_closed_periods).
+# ---------------------------------------------------------------------------
+SNAPSHOT_FORMAT = 1
+
+# Decoded snapshots keyed by checksum: content-addressed, so never stale.
+_snapshot_cache: "OrderedDict[str, Dict]" = OrderedDict()
+
+
+def _snapshot_payload(conn, pay_period_id: str) -> Dict:
+    ids = [
+        row["id"]
+        for row in conn.execute(
+            f"""
+            SELECT id FROM distributions
+            WHERE period_pk = {_PERIOD_PK} AND status = 'CONFIRMED'
+            ORDER BY created_at DESC, id DESC
+            """,
+            (pay_period_id,),
+        )
+    ]
+    loaded = _load_distributions(conn, ids)
+    totals = _employee_totals(conn, pay_period_id, "CONFIRMED")
+    declared = {}
+    for row in totals:
+        cents, label = declared_amount_cents(
+            row["section"], a_cents=row["A_cents"], f_cents=row["F_cents"], d_cents=row["D_cents"]
+        )
+        declared[row["employee_key"]] = {"declared_cents": cents, "declared_source": label}
+    return {
+        "format": SNAPSHOT_FORMAT,
+        "pay_period_id": pay_period_id,
+        "distributions": [loaded[dist_id] for dist_id in ids if dist_id in loaded],
+        "employee_totals": totals,
+        "declared": declared,
+    }
+
+
+def write_period_snapshot(conn, pay_period_id: str) -> Dict:
+    """
+    Freeze the period's CONFIRMED results (called by ``lock_period`` in its
+    transaction). Returns ``{"distribution_count", "checksum", "size"}``.
+    """
+    payload = _snapshot_payload(conn, pay_period_id)
+    data = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    checksum = hashlib.sha256(data).hexdigest()
+    blob = zlib.compress(data, 6)
+    conn.execute(
+        f"""
+        INSERT OR REPLACE INTO period_snapshots(period_pk, created_at, distribution_count, payload, checksum)
+        VALUES ({_PERIOD_PK}, ?, ?, ?, ?)
+        """,
+        (pay_period_id, _utc_now(), len(payload["distributions"]), blob, checksum),
+    )
+    logger.info(
+        "Instantané de période %s: %s distributions, %s octets", pay_period_id, len(payload["distributions"]), len(blob)
+    )
+    return {"distribution_count": len(payload["distributions"]), "checksum": checksum, "size": len(blob)}
+
+
+def drop_period_snapshot(conn, pay_period_id: str) -> None:
+    """Forget the frozen results (called by ``unlock_period``)."""
+    conn.execute(f"DELETE FROM period_snapshots WHERE period_pk = {_PERIOD_PK}", (pay_period_id,))
+
+
+def get_period_snapshot(pay_period_id: str) -> Optional[Dict]:
+    """
+    Decoded snapshot of a LOCKED or PAYED period, or None (period open,
+    no snapshot, or checksum mismatch: callers then read the live rows).
+    """
+    if not pay_period_id:
+        return None
+    with db_session() as conn:
+        row = conn.execute(
+            """
+            SELECT s.period_pk, s.checksum
+            FROM period_snapshots s
+            JOIN pay_periods p ON p.pk = s.period_pk
+            WHERE p.id = ? AND p.status IN ('LOCKED', 'PAYED')
+            """,
+            (pay_period_id,),
+        ).fetchone()
+        if not row:
+            return None
+        with _cache_lock:
+            snapshot = _snapshot_cache.get(row["checksum"])
+        if snapshot is None:
+            payload = conn.execute(
+                "SELECT payload FROM period_snapshots WHERE period_pk = ?", (row["period_pk"],)
+            ).fetchone()["payload"]
+            try:
+                data = zlib.decompress(payload)
+            except zlib.error:
+                data = b""
+            if hashlib.sha256(data).hexdigest() != row["checksum"]:
+                logger.warning("Instantané corrompu pour la période %s; lecture des données détaillées", pay_period_id)
+                return None
+            snapshot = json.loads(data)
+            if snapshot.get("format") != SNAPSHOT_FORMAT:
+                return None
+            with _cache_lock:
+                _snapshot_cache[row["checksum"]] = snapshot
+                while len(_snapshot_cache) > SNAPSHOT_CACHE_SIZE:
+                    _snapshot_cache.popitem(last=False)
+    return {
+        **snapshot,
+        "distributions": [_copy_distribution(dist) for dist in snapshot["distributions"]],
+        "employee_totals": [dict(row) for row in snapshot["employee_totals"]],
+        "declared": {key: dict(value) for key, value in snapshot["declared"].items()},
+    }
+
+
+def _date_bound(value: Union[date, str, None]) -> Optional[str]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, date):
+        return value.isoformat()
+    bound = _to_date_iso(str(value))
+    if not bound:
+        raise ValueError(f"Date invalide: {value}")
+    return bound
+
+
+def _employee_row(conn, employee_id: int):
+    row = conn.execute(
+        "SELECT id, name, role, employee_number, is_active FROM employees WHERE id = ?",
+        (employee_id,),
+    ).fetchone()
+    if not row:
+        raise ValueError("Employé introuvable.")
+    return dict(row)
+
+
+def _history_filter(employee_id, start_date, end_date, status) -> Tuple[str, List]:
+    clauses = ["l.employee_id = ?", "l.date_iso IS NOT NULL"]
+    params: List = [int(employee_id)]
+    start = _date_bound(start_date)
+    end = _date_bound(end_date)
+    if start:
+        clauses.append("l.date_iso >= ?")
+        params.append(start)
+    if end:
+        clauses.append("l.date_iso <= ?")
+        params.append(end)
+    if status:
+        clauses.append("l.status = ?")
+        params.append(status.upper())
+    return " AND ".join(clauses), params
+
+
+def employee_history(
+    *,
+    employee_id: int,
+    start_date: Union[date, str, None] = None,
+    end_date: Union[date, str, None] = None,
+    status: Optional[str] = "CONFIRMED",
+    limit: int = HISTORY_PAGE_SIZE,
+    cursor: Optional[Dict] = None,
+) -> Dict:
+    """
+    One employee's shifts over a date range (inclusive, ISO days), oldest first.
+
+    Returns ``{"employee", "rows", "next_cursor"}``. Each row carries the
+    shift amounts plus ``running_*`` totals (hours, cash, sur_paye,
+    frais_admin, declared) since ``start_date``. Pass ``next_cursor`` back
+    to get the following page; it is None on the last page. Pages are
+    keyset-paginated on (date_iso, shift, shift_instance, distribution, row)
+    so each one is an index seek on distribution_employees.employee_id.
+    """
+    if not employee_id:
+        raise ValueError("employee_id manquant.")
+    if limit < 1:
+        raise ValueError("limit doit être positif.")
+    where, params = _history_filter(employee_id, start_date, end_date, status)
+    if cursor:
+        where += " AND (l.date_iso, l.shift, l.shift_instance, l.distribution_id, l.line_id) > (?, ?, ?, ?, ?)"
+        params.extend(cursor["key"])
+    money = ", ".join(f"l.{column}_cents" for column in EMPLOYEE_MONEY_FIELDS)
+    with db_session() as conn:
+        employee = _employee_row(conn, employee_id)
+        attach_archives_for(conn, start=_date_bound(start_date), end=_date_bound(end_date))
+        rows = conn.execute(
+            f"""
+            SELECT l.line_id AS row_id, l.distribution_id, l.dist_ref, l.date_iso, l.date_local,
+                   l.shift, l.shift_instance, l.status, l.employee_number, l.employee_name,
+                   l.section, l.employee_id, l.hours, {money}
+            FROM distribution_lines l
+            WHERE {where}
+            ORDER BY l.date_iso, l.shift, l.shift_instance, l.distribution_id, l.line_id
+            LIMIT ?
+            """,
+            (*params, limit + 1),
+        ).fetchall()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    carried = dict(cursor["totals"]) if cursor else {"hours": 0.0, **dict.fromkeys(_HISTORY_TOTALS, 0)}
+    results = []
+    for row in rows:
+        item = _employee_amounts(row)
+        for key in ("row_id", "distribution_id", "dist_ref", "date_iso", "date_local", "shift", "shift_instance", "status"):
+            item[key] = row[key]
+        carried["hours"] += row["hours"] or 0.0
+        for column in _HISTORY_TOTALS:
+            carried[column] += row[f"{column}_cents"] or 0
+        declared, label = declared_amount_cents(
+            employee["role"], a_cents=carried["A"], f_cents=carried["F"], d_cents=carried["D"]
+        )
+        item["running_hours"] = carried["hours"]
+        for column in ("cash", "sur_paye", "frais_admin"):
+            item[f"running_{column}"] = from_cents(carried[column])
+        item["running_declared"] = from_cents(declared)
+        item["declared_label"] = label
+        results.append(item)
+
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = {
+            "key": [last["date_iso"], last["shift"], last["shift_instance"], last["distribution_id"], last["row_id"]],
+            "totals": carried,
+        }
+    return {"employee": employee, "rows": results, "next_cursor": next_cursor}
+
+
+def employee_history_totals(
+    *,
+    employee_id: int,
+    start_date: Union[date, str, None] = None,
+    end_date: Union[date, str, None] = None,
+    status: Optional[str] = "CONFIRMED",
+) -> Dict:
+    """Totals over the whole range of :func:`employee_history`, in one aggregate."""
+    if not employee_id:
+        raise ValueError("employee_id manquant.")
+    where, params = _history_filter(employee_id, start_date, end_date, status)
+    sums = ", ".join(f"COALESCE(SUM(l.{column}_cents), 0) AS {column}_cents" for column in _HISTORY_TOTALS)
+    with db_session() as conn:
+        employee = _employee_row(conn, employee_id)
+        attach_archives_for(conn, start=_date_bound(start_date), end=_date_bound(end_date))
+        row = conn.execute(
+            f"""
+            SELECT COUNT(*) AS shift_count, COALESCE(SUM(l.hours), 0) AS hours,
+                   MIN(l.date_iso) AS first_date, MAX(l.date_iso) AS last_date, {sums}
+            FROM distribution_lines l
+            WHERE {where}
+            """,
+            params,
+        ).fetchone()
+    totals = dict(row)
+    for column in _HISTORY_TOTALS:
+        totals[column] = from_cents(totals[f"{column}_cents"])
+    declared, label = declared_amount_cents(
+        employee["role"], a_cents=totals["A_cents"], f_cents=totals["F_cents"], d_cents=totals["D_cents"]
+    )
+    totals["declared_cents"] = declared
+    totals["declared"] = from_cents(declared)
+    totals["declared_label"] = label
+    return totals
+
+
+def annual_declaration_rows(year: int, *, status: Optional[str] = "CONFIRMED") -> Iterator[Dict]:
+    """
+    Yearly per-employee totals and declared tips, from one aggregate query.
+
+    Yields one dict per employee and role (an employee who worked both
+    sections gets a service row and a busboy row), ordered by role then
+    name, with the year's ``<field>_cents`` sums, ``hours``,
+    ``shift_count``, ``declared_cents``/``declared_label`` (rule of
+    :func:`declared_amount_cents` applied to the yearly sums) and a
+    ``months`` breakdown. Rows are read from the cursor as they are
+    yielded, so memory stays flat whatever the roster size.
+    """
+    year = int(year)
+    params: List = [f"{year:04d}-01-01", f"{year:04d}-12-31"]
+    clause = ""
+    if status:
+        clause = "AND l.status = ?"
+        params.append(status.upper())
+    sums = ",\n                   ".join(
+        f"COALESCE(SUM(l.{column}_cents), 0) AS {column}_cents" for column in _HISTORY_TOTALS
+    )
+    with db_session() as conn:
+        attach_archives_for(conn, start=params[0], end=params[1])
+        cursor = conn.execute(
+            f"""
+            WITH monthly AS (
+                SELECT CASE WHEN l.employee_id IS NOT NULL THEN 'id:' || l.employee_id
+                            WHEN COALESCE(l.employee_number, '') <> '' THEN l.employee_number
+                            ELSE 'name::' || l.employee_name END AS employee_key,
+                       CASE WHEN lower(l.section) LIKE 'bus%' THEN 'busboy' ELSE 'service' END AS section_role,
+                       substr(l.date_iso, 1, 7) AS month,
+                       MAX(l.employee_id) AS employee_db_id,
+                       MAX(COALESCE(e.employee_number, l.employee_number)) AS month_number,
+                       MAX(COALESCE(e.name, l.employee_name)) AS month_name,
+                       COUNT(*) AS shift_count,
+                       COALESCE(SUM(l.hours), 0) AS hours,
+                       {sums}
+                FROM distribution_lines l
+                LEFT JOIN employees e ON e.id = l.employee_id
+                WHERE l.date_iso BETWEEN ? AND ?
+                {clause}
+                GROUP BY employee_key, section_role, month
+            )
+            SELECT *,
+                   -- One name per employee (the latest month's), so a rename
+                   -- mid-year does not split the employee's months apart.
+                   FIRST_VALUE(month_name) OVER latest AS current_name,
+                   FIRST_VALUE(month_number) OVER latest AS current_number
+            FROM monthly
+            WINDOW latest AS (PARTITION BY employee_key, section_role ORDER BY month DESC)
+            ORDER BY section_role DESC, lower(current_name), employee_key, month
+            """,
+            params,
+        )
+        # Aliases differ from employees.role/name: GROUP BY would bind to the column.
+        for _, months in groupby(cursor, key=lambda row: (row["employee_key"], row["section_role"])):
+            months = [dict(row) for row in months]
+            first = months[0]
+            totals = {
+                "year": year,
+                "employee_key": first["employee_key"],
+                "employee_db_id": first["employee_db_id"],
+                "employee_number": first["current_number"] or "",
+                "employee_name": first["current_name"],
+                "role": first["section_role"],
+                "shift_count": sum(m["shift_count"] for m in months),
+                "hours": sum(m["hours"] for m in months),
+            }
+            for column in _HISTORY_TOTALS:
+                totals[f"{column}_cents"] = sum(m[f"{column}_cents"] for m in months)
+            declared, label = declared_amount_cents(
+                totals["role"], a_cents=totals["A_cents"], f_cents=totals["F_cents"], d_cents=totals["D_cents"]
+            )
+            totals["declared_cents"] = declared
+            totals["declared_label"] = label
+            totals["months"] = [
+                {key: m[key] for key in ("month", "shift_count", "hours", *(f"{c}_cents" for c in _HISTORY_TOTALS))}
+                for m in months
+            ]
+            yield totals
+
+
+def iter_payroll_summary(
+    *,
+    period_ids: Optional[Iterable[str]] = None,
+    start_date: Union[date, str, None] = None,
+    end_date: Union[date, str, None] = None,
+    status: Optional[str] = "CONFIRMED",
+    fetch_size: int = STREAM_FETCH_SIZE,
+) -> Iterator[Dict]:
+    """
+    Per-period, per-employee totals across many periods, streamed.
+
+    Select periods with ``period_ids`` and/or restrict distributions to a
+    day range (``start_date``/``end_date``, inclusive). Rows come ordered
+    by period start then employee key, keyed like
+    :func:`employee_totals_for_period`, with the period's ``pay_period_id``,
+    ``display_id``, ``start_at_utc``, ``end_at_utc``, ``schedule_id`` and
+    ``timezone``. They are fetched ``fetch_size`` at a time from one open
+    cursor.
+    """
+    clauses: List[str] = []
+    params: List = []
+    ids = None
+    if period_ids is not None:
+        ids = [pid for pid in period_ids if pid]
+        if not ids:
+            return iter(())
+        placeholders = ", ".join("?" for _ in ids)
+        clauses.append(f"l.period_pk IN (SELECT pk FROM pay_periods WHERE id IN ({placeholders}))")
+        params.extend(ids)
+    start = _date_bound(start_date)
+    end = _date_bound(end_date)
+    if start:
+        clauses.append("l.date_iso >= ?")
+        params.append(start)
+    if end:
+        clauses.append("l.date_iso <= ?")
+        params.append(end)
+    if not clauses:
+        raise ValueError("Indiquez des périodes ou un intervalle de dates.")
+    if status:
+        clauses.append("l.status = ?")
+        params.append(status.upper())
+    sums = ",\n                   ".join(
+        f"COALESCE(SUM(l.{column}_cents), 0) AS {column}_cents" for column in EMPLOYEE_MONEY_FIELDS
+    )
+    archives = {"period_ids": ids, "start": start, "end": end}
+    return _stream_payroll_summary(" AND ".join(clauses), params, sums, fetch_size, archives)
+
+
+def _stream_payroll_summary(
+    where: str, params: List, sums: str, fetch_size: int, archives: Dict
+) -> Iterator[Dict]:
+    with db_session() as conn:
+        attach_archives_for(conn, **archives)
+        cursor = conn.execute(
+            f"""
+            SELECT p.id AS pay_period_id, p.display_id, p.start_at_utc, p.end_at_utc,
+                   s.id AS schedule_id, s.timezone,
+                   CASE WHEN COALESCE(l.employee_number, '') = ''
+                        THEN 'name::' || l.employee_name
+                        ELSE l.employee_number END AS employee_key,
+                   MAX(l.employee_number) AS employee_number,
+                   MAX(l.employee_name) AS employee_name,
+                   MAX(l.section) AS section,
+                   COUNT(*) AS shift_count,
+                   COALESCE(SUM(l.hours), 0) AS hours,
+                   {sums}
+            FROM distribution_lines l
+            JOIN pay_periods p ON p.pk = l.period_pk
+            JOIN pay_schedules s ON s.pk = p.schedule_pk
+            WHERE {where}
+            GROUP BY p.pk, employee_key
+            ORDER BY p.start_at_utc, p.pk, employee_key
+            """,
+            params,
+        )
+        while True:
+            batch = cursor.fetchmany(fetch_size)
+            if not batch:
+                break
+            for row in batch:
+                yield dict(row)
+
+
+def _link_employees(conn, where: str, params: Iterable) -> int:
+    return conn.execute(_LINK_EMPLOYEES_SQL.format(where=where), tuple(params)).rowcount
+
+
+def backfill_employee_links(*, batch_size: int = EMPLOYEE_LINK_BATCH_SIZE, conn=None) -> Dict[str, int]:
+    """
+    Link historical distribution_employees rows to employees.id, in id
+    batches. Safe to re-run (only unlinked rows are touched), e.g. after a
+    roster import. With ``conn`` the caller's transaction is used;
+    otherwise each batch commits on its own.
+    """
+    def run(target) -> Dict[str, int]:
+        max_id = target.execute("SELECT COALESCE(MAX(id), 0) AS m FROM distribution_employees").fetchone()["m"]
+        linked = 0
+        low = 0
+        while low < max_id:
+            high = low + batch_size
+            linked += _link_employees(target, "id > ? AND id <= ?", (low, high))
+            low = high
+        unresolved = target.execute(
+            "SELECT COUNT(*) AS c FROM distribution_employees WHERE employee_id IS NULL"
+        ).fetchone()["c"]
+        return {"linked": linked, "unresolved": unresolved}
+
+    if conn is not None:
+        result = run(conn)
+    else:
+        result = {"linked": 0, "unresolved": 0}
+        with db_session() as session:
+            max_id = session.execute("SELECT COALESCE(MAX(id), 0) AS m FROM distribution_employees").fetchone()["m"]
+        low = 0
+        while low < max_id:
+            with db_session() as session:
+                result["linked"] += _link_employees(session, "id > ? AND id <= ?", (low, low + batch_size))
+            low += batch_size
+        with db_session() as session:
+            result["unresolved"] = session.execute(
+                "SELECT COUNT(*) AS c FROM distribution_employees WHERE employee_id IS NULL"
+            ).fetchone()["c"]
+    invalidate_distribution_cache()
+    logger.info("Liens employés: %s lignes liées, %s sans correspondance", result["linked"], result["unresolved"])
+    return result
+
+
+def _refuse_closed_periods(conn, targets: str, params: Sequence) -> None:
+    """
+    Raise ValueError when a distribution selected by ``targets`` (a query
+    returning ``period_pk``) belongs to a LOCKED or PAYED period, whose
+    results are frozen in a snapshot.
+    """
+    blocked = conn.execute(
+        f"""
+        SELECT status FROM pay_periods
+        WHERE pk IN (SELECT period_pk FROM ({targets})) AND status IN ('LOCKED', 'PAYED')
+        ORDER BY status
+        LIMIT 1
+        """,
+        params,
+    ).fetchone()
+    if blocked and blocked["status"] == "LOCKED":
+        raise ValueError("La période est verrouillée. Déverrouillez-la avant de modifier les distributions.")
+    if blocked:
+        raise ValueError("La période est payée. Vous devez la rétablir à verrouillée pour modifier les distributions.")
+
+
+@retry_on_busy
+def set_distribution_status(
+    dist_id: int, status: str, actor: str = "", expected_version: Optional[int] = None
+) -> None:
+    """
+    ``expected_version`` (the ``version`` read with the distribution) turns
+    a change made meanwhile on another terminal into a ConflictError.
+    """
     if not dist_id:
         raise ValueError("Identifiant de distribution manquant.")
     status = (status or "").upper()
     if status not in ("UNCONFIRMED", "CONFIRMED"):
         raise ValueError("Statut invalide.")
     now = _utc_now()
-    with db_session() as conn:
+    with write_session() as conn:
+        check_row_version(conn, "distributions", dist_id, expected_version, f"La distribution {dist_id}")
+        _refuse_closed_periods(conn, "SELECT period_pk FROM distributions WHERE id = ?", (dist_id,))
         if status == "CONFIRMED":
             conn.execute(
                 """
                 UPDATE distributions
-                   SET status = ?, confirmed_at = ?, confirmed_by = ?
+                   SET status = ?, confirmed_at = ?, confirmed_by = ?, version = version + 1
                  WHERE id = ?
                 """,
                 (status, now, actor or "", dist_id),
@@ -417,37 +1712,92 @@ def set_distribution_status(dist_id: int, status: str, actor: str = "") -> None:
             conn.execute(
                 """
                 UPDATE distributions
-                   SET status = ?, confirmed_at = NULL, confirmed_by = NULL
+                   SET status = ?, confirmed_at = NULL, confirmed_by = NULL, version = version + 1
                  WHERE id = ?
                 """,
                 (status, dist_id),
             )
-        _log_action(conn, dist_id, action=f"status:{status}", actor=actor)
+        with AuditBuffer(conn) as audit:
+            audit.add(dist_id, f"status:{status}", actor=actor)
+    invalidate_distribution_cache(dist_id)
+
+
+def set_distribution_status_bulk(
+    status: str,
+    *,
+    ids: Optional[Iterable[int]] = None,
+    pay_period_id: Optional[str] = None,
+    actor: str = "",
+) -> Dict:
+    """
+    Set ``status`` on the given distribution ``ids`` or on every
+    distribution of ``pay_period_id``, in one transaction: one UPDATE and
+    one batched audit insert. Distributions already in ``status`` are left
+    alone. Refused (ValueError, nothing changed) when a distribution to
+    change belongs to a LOCKED or PAYED period.
+
+    Returns ``{"updated": <count>, "ids": [...]}``.
+    """
+    status = (status or "").upper()
+    if status not in ("UNCONFIRMED", "CONFIRMED"):
+        raise ValueError("Statut invalide.")
+    if (ids is None) == (pay_period_id is None):
+        raise ValueError("Indiquez les distributions ou la période, pas les deux.")
+    if ids is not None:
+        ids = [int(dist_id) for dist_id in ids]
+    return _set_status_bulk(status, ids, pay_period_id, actor)
+
+
+@retry_on_busy
+def _set_status_bulk(status: str, ids: Optional[List[int]], pay_period_id: Optional[str], actor: str) -> Dict:
+    """The transaction of :func:`set_distribution_status_bulk` (``ids`` already a list, so it can be retried)."""
+    with write_session() as conn:
+        if pay_period_id is not None:
+            period = conn.execute("SELECT pk FROM pay_periods WHERE id = ?", (pay_period_id,)).fetchone()
+            if not period:
+                raise ValueError("Période de paie introuvable.")
+            targets = "SELECT id, period_pk FROM distributions WHERE period_pk = ? AND status <> ?"
+            params: List = [period["pk"], status]
+        else:
+            targets = (
+                "SELECT id, period_pk FROM distributions "
+                "WHERE id IN (SELECT value FROM json_each(?)) AND status <> ?"
+            )
+            params = [json.dumps(ids), status]
 
+        _refuse_closed_periods(conn, targets, params)
+        changed = [row["id"] for row in conn.execute(f"SELECT id FROM ({targets}) ORDER BY id", params)]
+        if changed:
+            if status == "CONFIRMED":
+                assignments, values = "status = ?, confirmed_at = ?, confirmed_by = ?", [status, _utc_now(), actor or ""]
+            else:
+                assignments, values = "status = ?, confirmed_at = NULL, confirmed_by = NULL", [status]
+            conn.execute(
+                f"UPDATE distributions SET {assignments}, version = version + 1 "
+                "WHERE id IN (SELECT value FROM json_each(?))",
+                [*values, json.dumps(changed)],
+            )
+            with AuditBuffer(conn) as audit:
+                for dist_id in changed:
+                    audit.add(dist_id, f"status:{status}", actor=actor, details={"bulk": len(changed)})
 
-def delete_distribution(dist_id: int, actor: str = "") -> None:
+    for dist_id in changed:
+        invalidate_distribution_cache(dist_id)
+    logger.info("Statut %s appliqué à %s distribution(s)", status, len(changed))
+    return {"updated": len(changed), "ids": changed}
+
+
+@retry_on_busy
+def delete_distribution(dist_id: int, actor: str = "", expected_version: Optional[int] = None) -> None:
     if not dist_id:
         raise ValueError("Identifiant de distribution manquant.")
-    with db_session() as conn:
-        _log_action(conn, dist_id, action="deleted", actor=actor)
+    with write_session() as conn:
+        check_row_version(conn, "distributions", dist_id, expected_version, f"La distribution {dist_id}")
+        _refuse_closed_periods(conn, "SELECT period_pk FROM distributions WHERE id = ?", (dist_id,))
+        with AuditBuffer(conn) as audit:
+            audit.add(dist_id, "deleted", actor=actor)
+        # The audit rows would cascade with the distribution: keep its trail in the archive.
+        archive_audit_rows(conn, "distribution_id = ?", (dist_id,))
         conn.execute("DELETE FROM distributions WHERE id = ?", (dist_id,))
+    invalidate_distribution_cache(dist_id)
 
-
-def _log_action(conn, dist_id: int, *, action: str, actor: str = "", details: Optional[Dict] = None) -> None:
-    try:
-        conn.execute(
-            """
-            INSERT INTO distribution_audit(distribution_id, action, actor, created_at, details_json)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (
-                dist_id,
-                action,
-                actor or "",
-                _utc_now(),
-                json.dumps(details or {}, ensure_ascii=False),
-            ),
-        )
-    except Exception:
-        # Never block the app if logging fails
-        pass
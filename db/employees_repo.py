@@ -3,6 +3,11 @@ Repository layer for employee CRUD operations.
 
 UI modules should only communicate through this module to avoid
 sprinkling SQL queries throughout the codebase.
+
+Rows carry a ``version`` that every update increments. Writers may pass
+the versions they read (``expected_version`` / ``expected_versions``): a
+change made meanwhile on another terminal then raises ConflictError
+instead of being overwritten.
 """
 
 from __future__ import annotations
@@ -12,7 +17,7 @@ import sqlite3
 from datetime import datetime, timezone
 from typing import Dict, Iterable, List, Optional, Tuple
 
-from .db_manager import db_session
+from .db_manager import ConflictError, check_row_version, db_session, retry_on_busy, write_session
 
 logger = logging.getLogger("tipsplit.employees")
 
@@ -61,7 +66,7 @@ def list_employees(
 
     order = "points DESC, name COLLATE NOCASE ASC" if order_by_points_desc else "name COLLATE NOCASE ASC"
     query = f"""
-        SELECT id, name, role, points, employee_number, email, is_active, created_at, updated_at
+        SELECT id, name, role, points, employee_number, email, is_active, created_at, updated_at, version
         FROM employees
         {role_clause}
         ORDER BY {order};
@@ -71,13 +76,14 @@ def list_employees(
     return [dict(row) for row in rows]
 
 
+@retry_on_busy
 def add_employee(name: str, role: str, points: float, employee_number: str = "", email: str = "") -> int:
     normalized_name = _normalize_name(name)
     normalized_role = _normalize_role(role)
     normalized_points = _normalize_points(points)
     now = _utc_now()
     try:
-        with db_session() as conn:
+        with write_session() as conn:
             cur = conn.execute(
                 """
                 INSERT INTO employees(name, role, points, employee_number, email, is_active, created_at, updated_at)
@@ -93,6 +99,7 @@ def add_employee(name: str, role: str, points: float, employee_number: str = "",
     return int(employee_id)
 
 
+@retry_on_busy
 def update_employee(
     employee_id: int,
     name: Optional[str] = None,
@@ -101,6 +108,7 @@ def update_employee(
     is_active: Optional[bool] = None,
     employee_number: Optional[str] = None,
     email: Optional[str] = None,
+    expected_version: Optional[int] = None,
 ) -> None:
     if not employee_id:
         raise ValueError("Identifiant d’employé manquant.")
@@ -130,10 +138,12 @@ def update_employee(
         return
 
     updates.append("updated_at = ?")
+    updates.append("version = version + 1")
     params.append(_utc_now())
     params.append(employee_id)
 
-    with db_session() as conn:
+    with write_session() as conn:
+        check_row_version(conn, "employees", employee_id, expected_version, f"L’employé #{employee_id}")
         cur = conn.execute(
             f"UPDATE employees SET {', '.join(updates)} WHERE id = ?",
             params,
@@ -152,120 +162,202 @@ def delete_employee(employee_id: int) -> None:
 
 def _fetch_existing_by_role(conn: sqlite3.Connection, role: str) -> Dict[int, Dict]:
     rows = conn.execute(
-        "SELECT id, name, employee_number, email, is_active FROM employees WHERE role = ?;",
+        "SELECT id, name, points, employee_number, email, is_active, version FROM employees WHERE role = ?;",
         (role,),
     ).fetchall()
     return {row["id"]: dict(row) for row in rows}
 
 
-def upsert_many(role: str, employees_list: Iterable[Dict]) -> Tuple[int, int, int]:
+def _check_roster_versions(existing: Dict[int, Dict], expected_versions: Dict[int, int]) -> None:
+    """Refuse to save a roster that changed since it was loaded (``{id: version}`` as read)."""
+    changed = [
+        existing[emp_id]["name"] if emp_id in existing else f"#{emp_id}"
+        for emp_id, version in expected_versions.items()
+        if emp_id not in existing or existing[emp_id]["version"] != version
+    ]
+    added = [
+        data["name"] for emp_id, data in existing.items() if data["is_active"] and emp_id not in expected_versions
+    ]
+    if changed or added:
+        names = ", ".join((changed + added)[:5]) + ("…" if len(changed) + len(added) > 5 else "")
+        raise ConflictError(
+            f"La liste a été modifiée sur un autre poste depuis son ouverture ({names}). "
+            "Rechargez-la puis refaites vos changements."
+        )
+
+
+@retry_on_busy
+def _write_rosters(
+    rosters: Dict[str, List[Dict]],
+    expected_versions: Dict[str, Optional[Dict[int, int]]],
+) -> Dict[str, Tuple[int, int, int]]:
+    """
+    The transaction of :func:`upsert_many` and :func:`upsert_roles` (rows
+    already normalized, so it can be retried). Every role's versions are
+    checked before anything is written.
+    """
+    now = _utc_now()
+    with write_session() as conn:
+        existing = {role: _fetch_existing_by_role(conn, role) for role in rosters}
+        for role in rosters:
+            if expected_versions.get(role) is not None:
+                _check_roster_versions(existing[role], expected_versions[role])
+        return {role: _apply_roster(conn, role, rows, existing[role], now) for role, rows in rosters.items()}
+
+
+def _apply_roster(
+    conn: sqlite3.Connection,
+    normalized_role: str,
+    normalized_rows: List[Dict],
+    existing: Dict[int, Dict],
+    now: str,
+) -> Tuple[int, int, int]:
+    inserted = updated = 0
+    name_index = {
+        (data.get("name") or "").strip().lower(): emp_id
+        for emp_id, data in existing.items()
+    }
+    seen_ids = set()
+
+    for row in normalized_rows:
+        emp_id = row["id"]
+        name_key = row["name"].lower()
+
+        target_id = emp_id if emp_id and emp_id in existing else None
+        if target_id is None:
+            match_id = name_index.get(name_key)
+            if match_id and match_id not in seen_ids:
+                target_id = match_id
+
+        if target_id:
+            current = existing.get(target_id)
+            if current and current["is_active"] and all(
+                current[key] == row[key] for key in ("name", "points", "employee_number", "email")
+            ):
+                seen_ids.add(target_id)
+                name_index[name_key] = target_id
+                continue
+            try:
+                conn.execute(
+                    """
+                    UPDATE employees
+                    SET name = ?, role = ?, points = ?, employee_number = ?, email = ?, is_active = 1,
+                        updated_at = ?, version = version + 1
+                    WHERE id = ?;
+                    """,
+                    (
+                        row["name"],
+                        normalized_role,
+                        row["points"],
+                        row["employee_number"],
+                        row["email"],
+                        now,
+                        target_id,
+                    ),
+                )
+            except sqlite3.IntegrityError as exc:
+                raise ValueError(
+                    f"Impossible de renommer '{row['name']}'. Un employé avec ce nom existe déjà."
+                ) from exc
+            updated += 1
+            seen_ids.add(target_id)
+            name_index[name_key] = target_id
+        else:
+            try:
+                cur = conn.execute(
+                    """
+                    INSERT INTO employees(name, role, points, employee_number, email, is_active, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, 1, ?, ?);
+                    """,
+                    (
+                        row["name"],
+                        normalized_role,
+                        row["points"],
+                        row["employee_number"],
+                        row["email"],
+                        now,
+                        now,
+                    ),
+                )
+            except sqlite3.IntegrityError as exc:
+                raise ValueError(
+                    f"Impossible d’ajouter '{row['name']}'. Un employé avec ce nom existe déjà."
+                ) from exc
+            inserted += 1
+            new_id = cur.lastrowid
+            seen_ids.add(int(new_id))
+            name_index[name_key] = int(new_id)
+
+    existing_active_ids = {eid for eid, data in existing.items() if data["is_active"]}
+    to_deactivate = existing_active_ids - seen_ids
+    deactivated = 0
+    if to_deactivate:
+        placeholders = ",".join("?" for _ in to_deactivate)
+        conn.execute(
+            f"UPDATE employees SET is_active = 0, updated_at = ?, version = version + 1 WHERE id IN ({placeholders})",
+            (now, *to_deactivate),
+        )
+        deactivated = len(to_deactivate)
+
+    return inserted, updated, deactivated
+
+
+def _normalize_roster(employees_list: Iterable[Dict]) -> List[Dict]:
+    return [
+        {
+            "id": raw.get("id"),
+            "employee_number": str(raw.get("number", "") or "").strip(),
+            "name": _normalize_name(raw.get("name", "")),
+            "points": _normalize_points(raw.get("points", 0)),
+            "email": str(raw.get("email", "") or "").strip(),
+        }
+        for raw in employees_list
+    ]
+
+
+def upsert_many(
+    role: str,
+    employees_list: Iterable[Dict],
+    *,
+    expected_versions: Optional[Dict[int, int]] = None,
+) -> Tuple[int, int, int]:
     """
     Bulk replace the roster for a single role with the provided rows.
     employees_list items must contain: id (optional), number, name, points, email
+    ``expected_versions`` (``{id: version}`` of the roster as loaded) makes
+    the save fail with ConflictError if another terminal changed it since.
+    Unchanged rows are not rewritten.
     Returns a tuple of (#inserted, #updated, #deactivated).
     """
     normalized_role = _normalize_role(role)
-    now = _utc_now()
+    return upsert_roles(
+        {normalized_role: employees_list}, expected_versions={normalized_role: expected_versions}
+    )[normalized_role]
 
-    normalized_rows = []
-    for raw in employees_list:
-        normalized_rows.append(
-            {
-                "id": raw.get("id"),
-                "employee_number": str(raw.get("number", "") or "").strip(),
-                "name": _normalize_name(raw.get("name", "")),
-                "points": _normalize_points(raw.get("points", 0)),
-                "email": str(raw.get("email", "") or "").strip(),
-            }
-        )
-
-    inserted = updated = 0
 
-    with db_session() as conn:
-        existing = _fetch_existing_by_role(conn, normalized_role)
-        name_index = {
-            (data.get("name") or "").strip().lower(): emp_id
-            for emp_id, data in existing.items()
-        }
-        seen_ids = set()
-
-        for row in normalized_rows:
-            emp_id = row["id"]
-            name_key = row["name"].lower()
-
-            target_id = emp_id if emp_id and emp_id in existing else None
-            if target_id is None:
-                match_id = name_index.get(name_key)
-                if match_id and match_id not in seen_ids:
-                    target_id = match_id
-
-            if target_id:
-                try:
-                    conn.execute(
-                        """
-                        UPDATE employees
-                        SET name = ?, role = ?, points = ?, employee_number = ?, email = ?, is_active = 1, updated_at = ?
-                        WHERE id = ?;
-                        """,
-                        (
-                            row["name"],
-                            normalized_role,
-                            row["points"],
-                            row["employee_number"],
-                            row["email"],
-                            now,
-                            target_id,
-                        ),
-                    )
-                except sqlite3.IntegrityError as exc:
-                    raise ValueError(
-                        f"Impossible de renommer '{row['name']}'. Un employé avec ce nom existe déjà."
-                    ) from exc
-                updated += 1
-                seen_ids.add(target_id)
-                name_index[name_key] = target_id
-            else:
-                try:
-                    cur = conn.execute(
-                        """
-                        INSERT INTO employees(name, role, points, employee_number, email, is_active, created_at, updated_at)
-                        VALUES (?, ?, ?, ?, ?, 1, ?, ?);
-                        """,
-                        (
-                            row["name"],
-                            normalized_role,
-                            row["points"],
-                            row["employee_number"],
-                            row["email"],
-                            now,
-                            now,
-                        ),
-                    )
-                except sqlite3.IntegrityError as exc:
-                    raise ValueError(
-                        f"Impossible d’ajouter '{row['name']}'. Un employé avec ce nom existe déjà."
-                    ) from exc
-                inserted += 1
-                new_id = cur.lastrowid
-                seen_ids.add(int(new_id))
-                name_index[name_key] = int(new_id)
-
-        existing_active_ids = {eid for eid, data in existing.items() if data["is_active"]}
-        to_deactivate = existing_active_ids - seen_ids
-        deactivated = 0
-        if to_deactivate:
-            placeholders = ",".join("?" for _ in to_deactivate)
-            conn.execute(
-                f"UPDATE employees SET is_active = 0, updated_at = ? WHERE id IN ({placeholders})",
-                (now, *to_deactivate),
-            )
-            deactivated = len(to_deactivate)
-
-    logger.info(
-        "Roster enregistré (%s) - ajoutés: %s, mis à jour: %s, désactivés: %s",
-        normalized_role,
-        inserted,
-        updated,
-        deactivated,
-    )
-    return inserted, updated, deactivated
+def upsert_roles(
+    rosters: Dict[str, Iterable[Dict]],
+    *,
+    expected_versions: Optional[Dict[str, Optional[Dict[int, int]]]] = None,
+) -> Dict[str, Tuple[int, int, int]]:
+    """
+    :func:`upsert_many` for several roles in one transaction: either every
+    roster is saved or none is. ``expected_versions`` maps each role to its
+    ``{id: version}`` as loaded; a change on another terminal to any of
+    them raises ConflictError before anything is written.
+    Returns ``{role: (#inserted, #updated, #deactivated)}``.
+    """
+    normalized = {_normalize_role(role): _normalize_roster(rows) for role, rows in rosters.items()}
+    versions = {_normalize_role(role): value for role, value in (expected_versions or {}).items()}
+
+    summary = _write_rosters(normalized, versions)
+
+    for role, (inserted, updated, deactivated) in summary.items():
+        logger.info(
+            "Roster enregistré (%s) - ajoutés: %s, mis à jour: %s, désactivés: %s",
+            role,
+            inserted,
+            updated,
+            deactivated,
+        )
+    return summary
@@ -0,0 +1,209 @@
+"""
+Routine database maintenance.
+
+- ``PRAGMA optimize`` refreshes the planner statistics (ANALYZE) of the
+  tables whose content changed enough, bounded by ``analysis_limit``;
+- ``PRAGMA incremental_vacuum`` returns the free pages left by deletes and
+  archiving (the database uses ``auto_vacuum = INCREMENTAL`` since schema 13);
+- ``PRAGMA quick_check`` looks for corruption, once a day.
+
+:func:`run_maintenance` runs them and records each result and timing in
+``schema_meta`` (``maintenance_<task>`` keys, JSON); :func:`maintenance_status`
+reads them back with the file's page counts for the diagnostics dialog.
+:class:`MaintenanceScheduler` runs the tasks on a daemon thread when the
+database has not been written for a while, and :func:`run_shutdown_maintenance`
+does the cheap part when the application closes.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from .db_manager import db_session, get_db_path
+
+logger = logging.getLogger("tipsplit.maintenance")
+
+ANALYSIS_LIMIT = 1000
+INCREMENTAL_VACUUM_PAGES = 2000
+SHUTDOWN_VACUUM_PAGES = 500
+OPTIMIZE_INTERVAL_HOURS = 6
+QUICK_CHECK_INTERVAL_HOURS = 24
+MAINTENANCE_IDLE_SECONDS = 120
+MAINTENANCE_CHECK_SECONDS = 5 * 60
+
+TASKS = ("optimize", "incremental_vacuum", "quick_check")
+AUTO_VACUUM_MODES = {0: "NONE", 1: "FULL", 2: "INCREMENTAL"}
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _record(conn: sqlite3.Connection, task: str, started: float, **details) -> Dict:
+    entry = {
+        "at": _utc_now().isoformat(timespec="seconds"),
+        "ms": round((time.perf_counter() - started) * 1000, 1),
+        **details,
+    }
+    conn.execute(
+        "INSERT OR REPLACE INTO schema_meta(key, value) VALUES (?, ?)",
+        (f"maintenance_{task}", json.dumps(entry, ensure_ascii=False)),
+    )
+    return entry
+
+
+def _last_runs(conn: sqlite3.Connection) -> Dict[str, Dict]:
+    runs = {}
+    for row in conn.execute("SELECT key, value FROM schema_meta WHERE key LIKE 'maintenance_%'"):
+        try:
+            runs[row["key"][len("maintenance_"):]] = json.loads(row["value"])
+        except ValueError:
+            continue
+    return runs
+
+
+def _is_due(runs: Dict[str, Dict], task: str, hours: float, now: datetime) -> bool:
+    last = runs.get(task, {}).get("at")
+    if not last:
+        return True
+    return now - datetime.fromisoformat(last) >= timedelta(hours=hours)
+
+
+def run_maintenance(
+    *,
+    optimize: bool = True,
+    vacuum_pages: int = INCREMENTAL_VACUUM_PAGES,
+    quick_check: bool = False,
+) -> Dict[str, Dict]:
+    """
+    Run the requested tasks, each in its own short transaction, and return
+    what was recorded per task. ``vacuum_pages=0`` skips the vacuum.
+    A failed quick_check is logged as an error and recorded, not raised.
+    """
+    results: Dict[str, Dict] = {}
+    if optimize:
+        with db_session() as conn:
+            started = time.perf_counter()
+            conn.execute(f"PRAGMA analysis_limit = {int(ANALYSIS_LIMIT)}")
+            conn.execute("PRAGMA optimize")
+            results["optimize"] = _record(conn, "optimize", started)
+    if vacuum_pages:
+        with db_session() as conn:
+            started = time.perf_counter()
+            mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+            before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if AUTO_VACUUM_MODES.get(mode) == "INCREMENTAL" and before:
+                # Frees one page per step: executescript steps it to completion.
+                conn.executescript(f"PRAGMA incremental_vacuum({int(vacuum_pages)});")
+            after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            results["incremental_vacuum"] = _record(
+                conn, "incremental_vacuum", started, freed_pages=before - after, free_pages=after
+            )
+    if quick_check:
+        with db_session() as conn:
+            started = time.perf_counter()
+            problems = [row[0] for row in conn.execute("PRAGMA quick_check").fetchall()]
+            ok = problems == ["ok"]
+            if not ok:
+                logger.error("quick_check a signalé des problèmes: %s", "; ".join(problems[:10]))
+            results["quick_check"] = _record(conn, "quick_check", started, ok=ok, problems=problems[:10] if not ok else [])
+    if results:
+        logger.info(
+            "Maintenance: %s", ", ".join(f"{task} {entry['ms']} ms" for task, entry in results.items())
+        )
+    return results
+
+
+def run_due_maintenance(now: Optional[datetime] = None) -> Dict[str, Dict]:
+    """Run the tasks whose interval elapsed (quick_check daily, the others every few hours)."""
+    now = now or _utc_now()
+    with db_session() as conn:
+        runs = _last_runs(conn)
+    optimize = _is_due(runs, "optimize", OPTIMIZE_INTERVAL_HOURS, now)
+    quick_check = _is_due(runs, "quick_check", QUICK_CHECK_INTERVAL_HOURS, now)
+    if not (optimize or quick_check):
+        return {}
+    return run_maintenance(
+        optimize=optimize, vacuum_pages=INCREMENTAL_VACUUM_PAGES if optimize else 0, quick_check=quick_check
+    )
+
+
+def run_shutdown_maintenance() -> Dict[str, Dict]:
+    """The cheap tasks, for when the application closes: optimize and a short vacuum."""
+    return run_maintenance(vacuum_pages=SHUTDOWN_VACUUM_PAGES)
+
+
+def maintenance_status() -> Dict:
+    """Last run of each task plus the file's size, page counts and auto_vacuum mode."""
+    with db_session() as conn:
+        runs = _last_runs(conn)
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    path = get_db_path()
+    return {
+        "path": path,
+        "file_size": os.path.getsize(path) if os.path.exists(path) else 0,
+        "page_size": page_size,
+        "page_count": page_count,
+        "free_pages": free_pages,
+        "auto_vacuum": AUTO_VACUUM_MODES.get(mode, str(mode)),
+        "last_runs": {task: runs.get(task) for task in TASKS},
+    }
+
+
+def database_idle_seconds() -> float:
+    """Seconds since the database file was last written (each commit touches it)."""
+    try:
+        return time.time() - os.path.getmtime(get_db_path())
+    except OSError:
+        return 0.0
+
+
+class MaintenanceScheduler:
+    """
+    Daemon thread: every ``check_seconds``, once the database has been
+    idle for ``idle_seconds``, run the maintenance tasks that are due.
+    """
+
+    def __init__(
+        self,
+        *,
+        check_seconds: float = MAINTENANCE_CHECK_SECONDS,
+        idle_seconds: float = MAINTENANCE_IDLE_SECONDS,
+    ) -> None:
+        self.check_seconds = check_seconds
+        self.idle_seconds = idle_seconds
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._runner, name="tipsplit-maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2) -> None:
+        self._stop_event.set()
+        thread = self._thread
+        if thread and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout=timeout)
+        self._thread = None
+
+    def _runner(self) -> None:
+        while not self._stop_event.wait(self.check_seconds):
+            if database_idle_seconds() < self.idle_seconds:
+                continue
+            try:
+                run_due_maintenance()
+            except Exception:
+                logger.exception("Maintenance de la base impossible")
@@ -0,0 +1,76 @@
+"""
+Fixed-point money helpers.
+
+Amounts are stored as INTEGER cents so sums are exact (SQLite integer
+``SUM()``) and never drift the way long REAL additions do. Conversions
+go through ``Decimal`` and round half away from zero, like the 2-decimal
+display used everywhere in the app.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Optional
+
+_CENT = Decimal("0.01")
+# Whitespace (including the French thousands spaces), apostrophes used as
+# thousands separators and currency symbols; anything else must be a number.
+_STRIP_RE = re.compile(r"[\s'’$€£¥¢]+")
+_NUMBER_RE = re.compile(r"[+-]?(?:\d+(?:\.\d*)?|\.\d+)")
+
+
+def to_cents(value) -> Optional[int]:
+    """
+    Convert a user or stored amount to integer cents.
+    Accepts numbers and strings such as ``'12,50'``, ``'$12.50'`` or
+    ``'1 234,50 $'``. A comma is the decimal mark unless a period follows
+    it (``'1,234.50'``). Returns None for empty values and for anything
+    that is not a plain decimal amount (``'abc12'``, ``'1e3'``).
+    """
+    if value in ("", None) or isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value * 100
+    if isinstance(value, float) and math.isfinite(value):
+        # Fast path for amounts already on a cent (what the database returns).
+        scaled = value * 100
+        nearest = round(scaled)
+        if abs(scaled - nearest) < 1e-6:
+            return int(nearest)
+    try:
+        if isinstance(value, float):
+            # repr() is the shortest string that round-trips: 0.1 -> "0.1".
+            amount = Decimal(repr(value))
+        elif isinstance(value, Decimal):
+            amount = value
+        else:
+            text = _STRIP_RE.sub("", str(value))
+            if "," in text and "." in text:
+                # The last mark is the decimal one, the other groups thousands.
+                grouping = "," if text.rfind(".") > text.rfind(",") else "."
+                text = text.replace(grouping, "")
+            text = text.replace(",", ".")
+            if not _NUMBER_RE.fullmatch(text):
+                return None
+            amount = Decimal(text)
+        if not amount.is_finite():
+            return None
+        return int(amount.quantize(_CENT, rounding=ROUND_HALF_UP).scaleb(2))
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def from_cents(cents: Optional[int]) -> Optional[float]:
+    """Cents -> float for display and legacy callers (exact to the cent)."""
+    if cents is None:
+        return None
+    return int(cents) / 100
+
+
+def cents_to_decimal(cents: Optional[int]) -> Optional[Decimal]:
+    """Cents -> exact ``Decimal`` amount."""
+    if cents is None:
+        return None
+    return Decimal(int(cents)).scaleb(-2)
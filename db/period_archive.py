@@ -0,0 +1,318 @@
+"""
+Yearly archive files for old PAYED periods.
+
+:func:`archive_paid_periods` moves the distributions of PAYED periods past
+the retention horizon (with their inputs, employee lines and audit rows)
+into ``tipsplit-archive-<year>.db`` next to the main database, one
+transaction per period. The period itself, its overrides and its snapshot
+stay in the main file, and ``archived_periods`` records where the rows went.
+
+Readers call :func:`attach_archives_for` with the periods, day range or
+distribution ids they need: the matching files are ATTACHed and TEMP views
+named like the archived tables (plus ``distribution_lines``) shadow the
+main tables for that connection only, so the repository SQL runs
+unchanged. Nothing is attached when no archived period matches.
+Readers that scan every archive (search) use :func:`each_archive`, which
+attaches one file at a time instead.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .db_manager import SEARCH_TABLE, db_session, distribution_lines_select, get_db_path, search_index_available
+
+logger = logging.getLogger("tipsplit.archive")
+
+ARCHIVE_HORIZON_DAYS = 730
+ARCHIVE_FILE_TEMPLATE = "tipsplit-archive-{year}.db"
+
+# Copied to the archive file, parents first.
+ARCHIVED_TABLES = (
+    "pay_periods",
+    "distributions",
+    "distribution_inputs",
+    "distribution_declaration_inputs",
+    "distribution_employees",
+    "distribution_audit",
+    "distribution_audit_archive",
+)
+# Shadowed by TEMP views while archives are attached. Each view is a
+# UNION ALL: filters on it are pushed into every branch, but a join of two
+# such views is not, so readers that join lines to their distribution use
+# ``distribution_lines``.
+VIEW_TABLES = (
+    "distributions",
+    "distribution_inputs",
+    "distribution_declaration_inputs",
+    "distribution_employees",
+)
+
+_ARCHIVE_INDEXES = (
+    ("idx_archive_distributions_period", "distributions(period_pk, status, created_at)"),
+    ("idx_archive_distributions_date", "distributions(date_iso)"),
+    ("idx_archive_employees_dist", "distribution_employees(distribution_id)"),
+    ("idx_archive_employees_employee", "distribution_employees(employee_id, distribution_id)"),
+    ("idx_archive_audit_dist", "distribution_audit(distribution_id)"),
+)
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def get_archive_path(year: int) -> str:
+    """Archive file of ``year``, in the main database's folder."""
+    return os.path.join(os.path.dirname(get_db_path()), ARCHIVE_FILE_TEMPLATE.format(year=int(year)))
+
+
+def _columns(conn: sqlite3.Connection, schema: str, table: str) -> List[sqlite3.Row]:
+    return conn.execute(f"PRAGMA {schema}.table_info({table})").fetchall()
+
+
+def _ensure_archive_schema(conn: sqlite3.Connection, schema: str) -> None:
+    """
+    Create the archive tables in ``schema`` from the main tables' columns,
+    adding the columns a newer main schema gained. Archive rows are a
+    frozen copy: no foreign keys, only the lookup indexes readers need.
+    """
+    for table in ARCHIVED_TABLES:
+        columns = _columns(conn, "main", table)
+        existing = {row["name"] for row in _columns(conn, schema, table)}
+        if not existing:
+            definitions = ", ".join(
+                f"{row['name']} {row['type']}{' PRIMARY KEY' if row['pk'] else ''}" for row in columns
+            )
+            conn.execute(f"CREATE TABLE {schema}.{table} ({definitions})")
+            continue
+        for row in columns:
+            if row["name"] not in existing:
+                conn.execute(f"ALTER TABLE {schema}.{table} ADD COLUMN {row['name']} {row['type']}")
+    for name, target in _ARCHIVE_INDEXES:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {schema}.{name} ON {target}")
+
+
+def _copy_rows(conn: sqlite3.Connection, schema: str, table: str, where: str, params: Iterable) -> int:
+    names = ", ".join(row["name"] for row in _columns(conn, "main", table))
+    return conn.execute(
+        f"INSERT OR REPLACE INTO {schema}.{table}({names}) SELECT {names} FROM main.{table} WHERE {where}",
+        tuple(params),
+    ).rowcount
+
+
+def _archive_period(period_pk: int, year: int) -> Optional[Dict]:
+    """Move one period's rows to the ``year`` archive, in one transaction over both files."""
+    with db_session() as conn:
+        conn.execute("ATTACH DATABASE ? AS archive", (get_archive_path(year),))
+        _ensure_archive_schema(conn, "archive")
+        period = conn.execute(
+            """
+            SELECT pk FROM pay_periods
+            WHERE pk = ? AND status = 'PAYED'
+              AND NOT EXISTS (SELECT 1 FROM archived_periods WHERE period_pk = pay_periods.pk)
+            """,
+            (period_pk,),
+        ).fetchone()
+        if not period:
+            return None
+        stats = conn.execute(
+            """
+            SELECT COUNT(*) AS distribution_count,
+                   COALESCE(SUM(status = 'CONFIRMED'), 0) AS confirmed_count,
+                   MIN(id) AS first_distribution_id,
+                   MAX(id) AS last_distribution_id
+            FROM main.distributions
+            WHERE period_pk = ?
+            """,
+            (period_pk,),
+        ).fetchone()
+        in_period = "distribution_id IN (SELECT id FROM main.distributions WHERE period_pk = ?)"
+        _copy_rows(conn, "archive", "pay_periods", "pk = ?", (period_pk,))
+        _copy_rows(conn, "archive", "distributions", "period_pk = ?", (period_pk,))
+        for table in ("distribution_inputs", "distribution_declaration_inputs", "distribution_employees", "distribution_audit"):
+            _copy_rows(conn, "archive", table, in_period, (period_pk,))
+        _copy_rows(conn, "archive", "distribution_audit_archive", "period_pk = ?", (period_pk,))
+        conn.execute("DELETE FROM main.distribution_audit_archive WHERE period_pk = ?", (period_pk,))
+        # Children and audit rows follow through ON DELETE CASCADE, search rows through the triggers.
+        conn.execute("DELETE FROM main.distributions WHERE period_pk = ?", (period_pk,))
+        conn.execute(
+            """
+            INSERT INTO archived_periods(
+                period_pk, archive_year, archived_at, distribution_count, confirmed_count,
+                first_distribution_id, last_distribution_id
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (period_pk, year, _utc_now(), *stats),
+        )
+    return dict(stats)
+
+
+def archive_paid_periods(
+    *,
+    older_than_days: int = ARCHIVE_HORIZON_DAYS,
+    now: Optional[datetime] = None,
+) -> Dict:
+    """
+    Move the PAYED periods that ended more than ``older_than_days`` ago to
+    their yearly archive file (the period's ``label_year``), oldest first.
+    Returns ``{"periods", "distributions", "years"}``.
+    """
+    if older_than_days < 0:
+        raise ValueError("older_than_days doit être positif.")
+    cutoff = ((now or datetime.now(timezone.utc)) - timedelta(days=older_than_days)).isoformat()
+    with db_session() as conn:
+        periods = conn.execute(
+            """
+            SELECT p.pk, p.label_year
+            FROM pay_periods p
+            WHERE p.status = 'PAYED' AND p.end_at_utc < ?
+              AND NOT EXISTS (SELECT 1 FROM archived_periods a WHERE a.period_pk = p.pk)
+            ORDER BY p.start_at_utc
+            """,
+            (cutoff,),
+        ).fetchall()
+    result = {"periods": 0, "distributions": 0, "years": []}
+    for period in periods:
+        stats = _archive_period(period["pk"], period["label_year"])
+        if stats is None:
+            continue
+        result["periods"] += 1
+        result["distributions"] += stats["distribution_count"]
+        if period["label_year"] not in result["years"]:
+            result["years"].append(period["label_year"])
+    if result["distributions"]:
+        with db_session() as conn:
+            if search_index_available(conn):
+                conn.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')")
+    if result["periods"]:
+        logger.info(
+            "Archivage: %s périodes, %s distributions (années %s)",
+            result["periods"],
+            result["distributions"],
+            ", ".join(str(year) for year in result["years"]),
+        )
+    return result
+
+
+def archive_years(
+    conn: sqlite3.Connection,
+    *,
+    period_ids: Optional[Iterable[str]] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    distribution_ids: Optional[Iterable[int]] = None,
+    after_distribution_id: Optional[int] = None,
+) -> List[int]:
+    """
+    Years whose archive holds rows for the given periods, ISO day range
+    (inclusive, either end open), distribution ids or ids past
+    ``after_distribution_id``. Filters combine; without any, every year.
+    """
+    clauses: List[str] = []
+    params: List = []
+    if period_ids is not None:
+        ids = [pid for pid in period_ids if pid]
+        if not ids:
+            return []
+        clauses.append(f"p.id IN ({', '.join('?' for _ in ids)})")
+        params.extend(ids)
+    # Periods are bounded in UTC; widen by a day to cover local dates.
+    if start:
+        clauses.append("date(p.end_at_utc, '+1 day') >= ?")
+        params.append(start)
+    if end:
+        clauses.append("date(p.start_at_utc, '-1 day') <= ?")
+        params.append(end)
+    if distribution_ids is not None:
+        ids = [int(dist_id) for dist_id in distribution_ids if dist_id]
+        if not ids:
+            return []
+        clauses.append(
+            f"""EXISTS (SELECT 1 FROM json_each(?) j
+                        WHERE j.value BETWEEN a.first_distribution_id AND a.last_distribution_id)"""
+        )
+        params.append("[" + ",".join(str(dist_id) for dist_id in ids) + "]")
+    if after_distribution_id is not None:
+        clauses.append("a.last_distribution_id > ?")
+        params.append(int(after_distribution_id))
+    rows = conn.execute(
+        f"""
+        SELECT DISTINCT a.archive_year
+        FROM archived_periods a
+        JOIN pay_periods p ON p.pk = a.period_pk
+        WHERE a.distribution_count > 0
+        {"AND " + " AND ".join(clauses) if clauses else ""}
+        ORDER BY a.archive_year
+        """,
+        params,
+    ).fetchall()
+    return [row["archive_year"] for row in rows]
+
+
+def attach_archives(conn: sqlite3.Connection, years: Iterable[int]) -> List[int]:
+    """
+    ATTACH the archive files of ``years`` to ``conn`` and shadow
+    :data:`VIEW_TABLES` and ``distribution_lines`` with TEMP views over the
+    main tables and every attached archive. Read-only use: writes through
+    the views fail. Returns the years attached (missing files are skipped).
+    """
+    years = sorted(set(int(year) for year in years))
+    attached: List[int] = []
+    limit = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+    if len(years) > limit:
+        raise ValueError(
+            f"Intervalle trop long: {len(years)} archives annuelles à ouvrir (maximum {limit}). "
+            "Réduisez les dates demandées."
+        )
+    for year in years:
+        path = get_archive_path(year)
+        if not os.path.exists(path):
+            logger.warning("Archive %s introuvable (%s)", year, path)
+            continue
+        conn.execute("ATTACH DATABASE ? AS ?", (path, f"archive_{year}"))
+        attached.append(year)
+    if not attached:
+        return []
+    for table in VIEW_TABLES:
+        names = [row["name"] for row in _columns(conn, "main", table)]
+        branches = [f"SELECT {', '.join(names)} FROM main.{table}"]
+        for year in attached:
+            schema = f"archive_{year}"
+            present = {row["name"] for row in _columns(conn, schema, table)}
+            select = ", ".join(name if name in present else f"NULL AS {name}" for name in names)
+            branches.append(f"SELECT {select} FROM {schema}.{table}")
+        conn.execute(f"CREATE TEMP VIEW {table} AS {' UNION ALL '.join(branches)}")
+    branches = [distribution_lines_select("main")] + [distribution_lines_select(f"archive_{year}") for year in attached]
+    conn.execute(f"CREATE TEMP VIEW distribution_lines AS {' UNION ALL '.join(branches)}")
+    return attached
+
+
+def attach_archives_for(conn: sqlite3.Connection, **filters) -> List[int]:
+    """:func:`attach_archives` for the years matching :func:`archive_years` ``filters``."""
+    years = archive_years(conn, **filters)
+    return attach_archives(conn, years) if years else []
+
+
+def each_archive(conn: sqlite3.Connection, years: Iterable[int]) -> Iterator[str]:
+    """
+    ATTACH the archive files of ``years`` to ``conn`` one at a time, newest
+    first, and yield each schema name; the file is detached before the next
+    one. No views and no attach limit: for readers that query every archive
+    table by name.
+    """
+    for year in sorted(set(int(year) for year in years), reverse=True):
+        path = get_archive_path(year)
+        if not os.path.exists(path):
+            logger.warning("Archive %s introuvable (%s)", year, path)
+            continue
+        schema = f"archive_{year}"
+        conn.execute("ATTACH DATABASE ? AS ?", (path, schema))
+        try:
+            yield schema
+        finally:
+            conn.execute(f"DETACH DATABASE {schema}")
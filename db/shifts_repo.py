@@ -0,0 +1,352 @@
+"""
+Time Sheet punches, persisted in ``shifts``.
+
+One row per employee and work day (``work_date``, ISO): the punch-in and
+punch-out entered on the Time Sheet, stored as UTC instants in the
+timezone of the period's schedule. Hours are therefore plain SQL over
+``shifts`` (:func:`hours_by_employee`), for a period or any date range,
+without reading distributions.
+
+The Time Sheet does not write on every click: :class:`ShiftJournal`
+queues punches (the latest per employee and day wins) and a daemon thread
+writes them in one transaction every ``SHIFT_FLUSH_SECONDS``, or sooner
+when ``SHIFT_FLUSH_SIZE`` are waiting. :meth:`ShiftJournal.close` writes
+what is left when the application closes.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import sqlite3
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from payroll.time_utils import ensure_local, from_utc_iso, get_timezone, to_local, to_utc_iso
+
+from .db_manager import db_session, retry_on_busy, write_session
+
+logger = logging.getLogger("tipsplit.shifts")
+
+SHIFT_FLUSH_SECONDS = 2.0
+SHIFT_FLUSH_SIZE = 50
+
+_PUNCH_RE = re.compile(r"^([01]\d|2[0-3]):([0-5]\d)$")
+
+# Hours of a punch, from its UTC instants (julianday() reads the +00:00 suffix).
+_HOURS_SQL = "(julianday(sh.shift_end_at_utc) - julianday(sh.shift_start_at_utc)) * 24"
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _normalize_work_date(work_date) -> str:
+    if isinstance(work_date, datetime):
+        work_date = work_date.date()
+    if isinstance(work_date, date):
+        return work_date.isoformat()
+    try:
+        return date.fromisoformat(str(work_date or "").strip()).isoformat()
+    except ValueError:
+        raise ValueError("Date de travail invalide (AAAA-MM-JJ).")
+
+
+def _normalize_punch(value) -> Optional[Tuple[int, int]]:
+    text = str(value or "").strip()
+    if not text:
+        return None
+    match = _PUNCH_RE.match(text)
+    if not match:
+        raise ValueError(f"Heure de pointage invalide: {text!r} (HH:MM).")
+    return int(match.group(1)), int(match.group(2))
+
+
+def _punch_bounds(work_date: str, punch_in: Tuple[int, int], punch_out: Tuple[int, int], tz_name: str):
+    """UTC ISO start/end of a punch; an end at or before the start is on the next day."""
+    tzinfo = get_timezone(tz_name)
+    day = date.fromisoformat(work_date)
+    start = datetime.combine(day, time(*punch_in))
+    end = datetime.combine(day, time(*punch_out))
+    if end <= start:
+        end += timedelta(days=1)
+    return to_utc_iso(ensure_local(start, tzinfo)), to_utc_iso(ensure_local(end, tzinfo))
+
+
+def _normalize_entry(entry: Dict) -> Dict:
+    employee_id = entry.get("employee_id")
+    if not employee_id:
+        raise ValueError("Identifiant d’employé manquant.")
+    punch_in = _normalize_punch(entry.get("punch_in"))
+    punch_out = _normalize_punch(entry.get("punch_out"))
+    if (punch_in is None) != (punch_out is None):
+        raise ValueError("Un pointage exige une heure d’entrée et une heure de sortie.")
+    if punch_in is not None and not entry.get("pay_period_id"):
+        raise ValueError("pay_period_id manquant.")
+    return {
+        "employee_id": int(employee_id),
+        "work_date": _normalize_work_date(entry.get("work_date")),
+        "pay_period_id": entry.get("pay_period_id"),
+        "punch_in": punch_in,
+        "punch_out": punch_out,
+    }
+
+
+def _period_lookup(conn: sqlite3.Connection, pay_period_ids: Iterable[str]) -> Dict[str, Tuple[int, str]]:
+    ids = sorted(set(pay_period_ids))
+    if not ids:
+        return {}
+    rows = conn.execute(
+        f"""
+        SELECT p.id, p.pk, s.timezone
+        FROM pay_periods p
+        JOIN pay_schedules s ON s.pk = p.schedule_pk
+        WHERE p.id IN ({",".join("?" for _ in ids)})
+        """,
+        ids,
+    ).fetchall()
+    found = {row["id"]: (int(row["pk"]), row["timezone"]) for row in rows}
+    if len(found) != len(ids):
+        raise ValueError("Période de paie introuvable.")
+    return found
+
+
+@retry_on_busy
+def _write_punches(entries: List[Dict]) -> int:
+    now = _utc_now()
+    with write_session() as conn:
+        periods = _period_lookup(conn, (e["pay_period_id"] for e in entries if e["punch_in"] is not None))
+        upserts = []
+        deletes = []
+        for entry in entries:
+            if entry["punch_in"] is None:
+                deletes.append((entry["employee_id"], entry["work_date"]))
+                continue
+            period_pk, tz_name = periods[entry["pay_period_id"]]
+            start_utc, end_utc = _punch_bounds(entry["work_date"], entry["punch_in"], entry["punch_out"], tz_name)
+            upserts.append(
+                (uuid.uuid4().hex, entry["employee_id"], period_pk, entry["work_date"], start_utc, end_utc, now, now)
+            )
+        if deletes:
+            conn.executemany("DELETE FROM shifts WHERE employee_id = ? AND work_date = ?", deletes)
+        if upserts:
+            conn.executemany(
+                """
+                INSERT INTO shifts(
+                    id, employee_id, period_pk, work_date, shift_start_at_utc, shift_end_at_utc, created_at, updated_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(employee_id, work_date) DO UPDATE SET
+                    period_pk = excluded.period_pk,
+                    shift_start_at_utc = excluded.shift_start_at_utc,
+                    shift_end_at_utc = excluded.shift_end_at_utc,
+                    updated_at = excluded.updated_at
+                """,
+                upserts,
+            )
+    return len(entries)
+
+
+def save_punches(entries: Iterable[Dict]) -> int:
+    """
+    Write punches in one transaction. Each entry has ``employee_id``,
+    ``work_date`` (ISO), ``pay_period_id`` and ``punch_in``/``punch_out``
+    (``"HH:MM"``, local time); empty times delete that day's punch.
+    Entries are applied in order. Returns the number of entries written.
+    """
+    normalized = [_normalize_entry(entry) for entry in entries]
+    if not normalized:
+        return 0
+    return _write_punches(normalized)
+
+
+def list_punches(work_date) -> Dict[int, Dict]:
+    """The punches of one work day, ``{employee_id: {"in", "out", "hours"}}`` in local time."""
+    day = _normalize_work_date(work_date)
+    with db_session() as conn:
+        rows = conn.execute(
+            f"""
+            SELECT sh.employee_id, sh.shift_start_at_utc, sh.shift_end_at_utc, s.timezone,
+                   ROUND({_HOURS_SQL}, 2) AS hours
+            FROM shifts sh
+            JOIN pay_periods p ON p.pk = sh.period_pk
+            JOIN pay_schedules s ON s.pk = p.schedule_pk
+            WHERE sh.work_date = ? AND sh.shift_end_at_utc IS NOT NULL
+            """,
+            (day,),
+        ).fetchall()
+    punches = {}
+    for row in rows:
+        tzinfo = get_timezone(row["timezone"])
+        punches[row["employee_id"]] = {
+            "in": to_local(from_utc_iso(row["shift_start_at_utc"]), tzinfo).strftime("%H:%M"),
+            "out": to_local(from_utc_iso(row["shift_end_at_utc"]), tzinfo).strftime("%H:%M"),
+            "hours": float(row["hours"]),
+        }
+    return punches
+
+
+def hours_by_employee(
+    *,
+    pay_period_id: Optional[str] = None,
+    start_date=None,
+    end_date=None,
+    by_week: bool = False,
+) -> List[Dict]:
+    """
+    Punched hours per employee, summed in SQL over a pay period and/or an
+    inclusive range of work days. ``by_week`` adds a row per employee and
+    week (``week_start``, the Sunday, as pay periods start on Sundays).
+    """
+    clauses = ["sh.shift_end_at_utc IS NOT NULL"]
+    params: List = []
+    if pay_period_id:
+        clauses.append("sh.period_pk = (SELECT pk FROM pay_periods WHERE id = ?)")
+        params.append(pay_period_id)
+    if start_date:
+        clauses.append("sh.work_date >= ?")
+        params.append(_normalize_work_date(start_date))
+    if end_date:
+        clauses.append("sh.work_date <= ?")
+        params.append(_normalize_work_date(end_date))
+    week = "date(sh.work_date, '-' || strftime('%w', sh.work_date) || ' days')"
+    week_select = f", {week} AS week_start" if by_week else ""
+    week_group = ", week_start" if by_week else ""
+    with db_session() as conn:
+        rows = conn.execute(
+            f"""
+            SELECT sh.employee_id, e.name, e.role, e.employee_number{week_select},
+                   COUNT(*) AS shifts, ROUND(SUM({_HOURS_SQL}), 2) AS hours
+            FROM shifts sh
+            LEFT JOIN employees e ON e.id = sh.employee_id
+            WHERE {" AND ".join(clauses)}
+            GROUP BY sh.employee_id{week_group}
+            ORDER BY e.role, e.name COLLATE NOCASE{week_group}
+            """,
+            params,
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+
+class ShiftJournal:
+    """
+    Write-behind queue for the Time Sheet's punches (see module docstring).
+    Punches waiting to be written are merged into :meth:`punches_for_day`,
+    so the screen never shows an older state than the one entered.
+    """
+
+    def __init__(self, *, flush_seconds: float = SHIFT_FLUSH_SECONDS, flush_size: int = SHIFT_FLUSH_SIZE) -> None:
+        self.flush_seconds = flush_seconds
+        self.flush_size = flush_size
+        self._pending: "OrderedDict[Tuple[int, str], Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, employee_id: int, work_date, punch_in: str, punch_out: str, *, pay_period_id: Optional[str]) -> None:
+        """Queue one punch (empty times clear the day); validated now, written later."""
+        entry = _normalize_entry(
+            {
+                "employee_id": employee_id,
+                "work_date": work_date,
+                "pay_period_id": pay_period_id,
+                "punch_in": punch_in,
+                "punch_out": punch_out,
+            }
+        )
+        key = (entry["employee_id"], entry["work_date"])
+        with self._lock:
+            self._pending.pop(key, None)
+            self._pending[key] = entry
+            pending = len(self._pending)
+        self.start()
+        if pending >= self.flush_size:
+            self._wake.set()
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def punches_for_day(self, work_date) -> Dict[int, Dict]:
+        """:func:`list_punches` with the punches still queued for that day applied on top."""
+        day = _normalize_work_date(work_date)
+        punches = list_punches(day)
+        with self._lock:
+            queued = [entry for (_, entry_day), entry in self._pending.items() if entry_day == day]
+        for entry in queued:
+            if entry["punch_in"] is None:
+                punches.pop(entry["employee_id"], None)
+                continue
+            start = datetime(2000, 1, 1, *entry["punch_in"])
+            end = datetime(2000, 1, 1, *entry["punch_out"])
+            if end <= start:
+                end += timedelta(days=1)
+            punches[entry["employee_id"]] = {
+                "in": "%02d:%02d" % entry["punch_in"],
+                "out": "%02d:%02d" % entry["punch_out"],
+                "hours": round((end - start).total_seconds() / 3600, 2),
+            }
+        return punches
+
+    def flush(self) -> int:
+        """
+        Write the queued punches now. On failure they are queued again
+        (unless re-entered meanwhile) and the error is raised; a punch that
+        can no longer be written (its period was removed) is logged and
+        dropped so it does not hold back the others.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, OrderedDict()
+            if not batch:
+                return 0
+            try:
+                return _write_punches(list(batch.values()))
+            except ValueError:
+                written = 0
+                for entry in batch.values():
+                    try:
+                        written += _write_punches([entry])
+                    except ValueError as exc:
+                        logger.error("Pointage abandonné (employé %s, %s): %s", entry["employee_id"], entry["work_date"], exc)
+                return written
+            except Exception:
+                with self._lock:
+                    for key, entry in batch.items():
+                        self._pending.setdefault(key, entry)
+                raise
+
+    def start(self) -> None:
+        if (self._thread and self._thread.is_alive()) or self._stop_event.is_set():
+            return
+        self._thread = threading.Thread(target=self._runner, name="tipsplit-shift-journal", daemon=True)
+        self._thread.start()
+
+    def close(self, timeout: float = 5) -> None:
+        """Stop the thread and write what is still queued."""
+        self._stop_event.set()
+        self._wake.set()
+        thread = self._thread
+        if thread and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout=timeout)
+        self._thread = None
+        self.flush()
+
+    def _runner(self) -> None:
+        while not self._stop_event.is_set():
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            if self._stop_event.is_set():
+                return
+            try:
+                written = self.flush()
+            except Exception:
+                logger.exception("Écriture des pointages impossible; nouvel essai au prochain cycle")
+                continue
+            if written:
+                logger.debug("%s pointage(s) enregistré(s)", written)
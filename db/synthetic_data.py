@@ -0,0 +1,388 @@
+"""
+Deterministic synthetic dataset for benchmarks and scale tests.
+
+Fills the database pointed to by ``TIPSPLIT_DB_PATH`` with a realistic
+roster, a pay schedule covering several years of periods, daily MATIN/SOIR
+distributions (with extra shift instances), their inputs, per-employee rows
+and audit entries. The same seed always produces the same rows; only the
+schedule/period UUIDs (minted by :class:`PayCalendarService`) differ.
+
+Run with:  python -m db.synthetic_data --db /tmp/tipsplit-bench.db --years 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import random
+import tempfile
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .db_manager import db_session, get_db_path, index_distribution_employees, init_db
+from .money import to_cents
+
+logger = logging.getLogger("tipsplit.synthetic")
+
+SHIFTS = ("MATIN", "SOIR")
+TIMEZONE = "America/Montreal"
+
+_FIRST_NAMES = (
+    "Alexandre", "Amélie", "Antoine", "Audrey", "Benoît", "Camille", "Catherine", "Charles",
+    "Chloé", "David", "Élise", "Émile", "Émilie", "Félix", "Gabriel", "Geneviève",
+    "Hugo", "Isabelle", "Jacob", "Jade", "Julien", "Justine", "Laurence", "Léa",
+    "Louis", "Marc-André", "Marie", "Mathieu", "Maxime", "Mélanie", "Nathan", "Noémie",
+    "Olivier", "Philippe", "Raphaël", "Rosalie", "Samuel", "Sarah", "Simon", "Sophie",
+    "Thomas", "Valérie", "Vincent", "William", "Zoé",
+)
+_LAST_NAMES = (
+    "Bélanger", "Bergeron", "Bouchard", "Boucher", "Caron", "Côté", "Cloutier", "Desjardins",
+    "Dubé", "Dufour", "Fortin", "Gagné", "Gagnon", "Gauthier", "Girard", "Lapointe",
+    "Leblanc", "Lavoie", "Lefebvre", "Martin", "Morin", "Ouellet", "Paquette", "Pelletier",
+    "Poirier", "Roy", "Simard", "Thibault", "Tremblay", "Villeneuve",
+)
+
+
+def _iso(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).isoformat(timespec="seconds")
+
+
+def _money(value: float) -> float:
+    return round(value, 2)
+
+
+def _last_sunday(day: date) -> date:
+    return day - timedelta(days=(day.weekday() + 1) % 7)
+
+
+def _ensure_empty() -> None:
+    with db_session() as conn:
+        for table in ("employees", "distributions", "pay_schedules"):
+            row = conn.execute(f"SELECT COUNT(*) AS c FROM {table}").fetchone()
+            if row and row["c"]:
+                raise ValueError(
+                    f"La base {get_db_path()} contient déjà des données ({table}). "
+                    "Utilisez un fichier vide pour le jeu synthétique."
+                )
+
+
+def _generate_roster(rng: random.Random, count: int, busboy_ratio: float, created_at: str) -> List[Tuple]:
+    combos = [f"{first} {last}" for first in _FIRST_NAMES for last in _LAST_NAMES]
+    if count > len(combos):
+        raise ValueError(f"Au plus {len(combos)} employés synthétiques sont disponibles.")
+    names = rng.sample(combos, count)
+    busboys = max(1, int(round(count * busboy_ratio))) if count > 1 else 0
+    rows = []
+    for index, name in enumerate(names):
+        role = "busboy" if index < busboys else "service"
+        number = str(index + 1) if role == "service" else f"B{index + 1:03d}"
+        points = float(rng.randint(1, 3)) if role == "busboy" else float(rng.randint(3, 10))
+        slug = name.lower().replace(" ", ".")
+        is_active = 0 if rng.random() < 0.08 else 1
+        rows.append((name, role, points, number, f"{slug}@example.test", is_active, created_at, created_at))
+    return rows
+
+
+def _create_schedule(start_day: date, end_day: date):
+    # Imported lazily: payroll depends on the db package.
+    from payroll.pay_calendar import PayCalendarService
+
+    service = PayCalendarService()
+    anchor = _last_sunday(start_day)
+    schedule = service.create_schedule_version(
+        name="Horaire synthétique",
+        timezone_name=TIMEZONE,
+        period_length_days=14,
+        pay_date_offset_days=4,
+        anchor_start_local=datetime.combine(anchor, time(hour=6)).isoformat(timespec="seconds"),
+        effective_from=anchor,
+    )
+    service.ensure_periods(schedule["id"], start_day, end_day)
+    return schedule
+
+
+def _period_lookup(schedule_id: str) -> List[Tuple[date, date, int]]:
+    from payroll.time_utils import from_utc_iso, to_local
+
+    with db_session() as conn:
+        rows = conn.execute(
+            """
+            SELECT p.pk, p.start_at_utc, p.end_at_utc
+            FROM pay_periods p
+            JOIN pay_schedules s ON s.pk = p.schedule_pk
+            WHERE s.id = ?
+            ORDER BY p.start_at_utc
+            """,
+            (schedule_id,),
+        ).fetchall()
+    return [
+        (
+            to_local(from_utc_iso(row["start_at_utc"]), TIMEZONE).date(),
+            to_local(from_utc_iso(row["end_at_utc"]), TIMEZONE).date(),
+            row["pk"],
+        )
+        for row in rows
+    ]
+
+
+def _split(total: float, weights: Sequence[float]) -> List[float]:
+    weight_sum = sum(weights) or 1.0
+    return [_money(total * w / weight_sum) for w in weights]
+
+
+def _distribution_rows(rng: random.Random, service_staff: Sequence[Tuple], busboy_staff: Sequence[Tuple], shift: str):
+    """Return (inputs, declaration_inputs, employee rows) for one shift."""
+    evening = shift == "SOIR"
+    ventes = _money(rng.uniform(4500, 11000) if evening else rng.uniform(1800, 5200))
+    cash = _money(rng.uniform(80, 450))
+    frais_admin = _money(ventes * rng.uniform(0.015, 0.03))
+    depot = _money(-(ventes * rng.uniform(0.09, 0.14)))
+    pool = -depot + cash + frais_admin * 0.8
+    inputs = (ventes, depot, frais_admin, cash)
+    declaration = (
+        _money(ventes * rng.uniform(1.05, 1.18)),
+        rng.randint(40, 220) if evening else rng.randint(20, 110),
+        _money(ventes * rng.uniform(0.1, 0.15)),
+        _money(ventes * rng.uniform(0.55, 0.7)),
+    )
+
+    working_service = rng.sample(service_staff, min(len(service_staff), rng.randint(5, 12)))
+    working_busboys = rng.sample(busboy_staff, min(len(busboy_staff), rng.randint(1, 4)))
+    service_hours = [round(rng.uniform(4, 9) * 4) / 4 for _ in working_service]
+    busboy_hours = [round(rng.uniform(4, 8) * 4) / 4 for _ in working_busboys]
+
+    service_pool = pool * 0.85
+    weights = [emp[2] * hours for emp, hours in zip(working_service, service_hours)]
+    shares = _split(service_pool, weights)
+    cash_shares = _split(cash, weights)
+    admin_shares = _split(frais_admin, weights)
+    sales_shares = _split(ventes, weights)
+
+    employees = []
+    for emp, hours, share, cash_share, admin_share, sales in zip(
+        working_service, service_hours, shares, cash_shares, admin_shares, sales_shares
+    ):
+        declared_tips = _money(sales * rng.uniform(0.05, 0.13))
+        employees.append(
+            (
+                emp[1], emp[0], "Service", hours, cash_share, _money(share - cash_share), admin_share,
+                sales, _money(sales * 0.03), None, _money(share * 0.1), declared_tips,
+            )
+        )
+
+    busboy_shares = _split(pool - service_pool, busboy_hours)
+    for emp, hours, share in zip(working_busboys, busboy_hours, busboy_shares):
+        employees.append(
+            (emp[1], emp[0], "Bussboy", hours, 0.0, share, 0.0, None, None, share, None, None)
+        )
+    return inputs, declaration, employees
+
+
+def generate_dataset(
+    *,
+    years: float = 2.0,
+    employees: int = 300,
+    busboy_ratio: float = 0.25,
+    extra_instance_ratio: float = 0.05,
+    confirmed_ratio: float = 0.85,
+    seed: int = 20240101,
+    end_date: Optional[date] = None,
+) -> Dict:
+    """
+    Populate the current database with synthetic data and return a summary.
+
+    Distributions cover every day from ``end_date - years`` up to ``end_date``
+    for each shift in :data:`SHIFTS`; ``extra_instance_ratio`` of them get a
+    second instance. Distributions in the two most recent periods stay
+    UNCONFIRMED, older ones are CONFIRMED with probability ``confirmed_ratio``.
+    """
+    if years <= 0:
+        raise ValueError("Le nombre d’années doit être positif.")
+    if employees < 2:
+        raise ValueError("Au moins deux employés sont requis.")
+
+    rng = random.Random(seed)
+    end_day = end_date or date(2025, 12, 31)
+    start_day = end_day - timedelta(days=int(round(365 * years)) - 1)
+    base_ts = datetime.combine(start_day, time(hour=6), tzinfo=timezone.utc)
+
+    init_db()
+    _ensure_empty()
+
+    roster = _generate_roster(rng, employees, busboy_ratio, _iso(base_ts))
+    with db_session() as conn:
+        conn.executemany(
+            """
+            INSERT INTO employees(name, role, points, employee_number, email, is_active, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            roster,
+        )
+        employee_ids = {
+            row["employee_number"]: row["id"] for row in conn.execute("SELECT id, employee_number FROM employees")
+        }
+    service_staff = [(r[0], r[3], r[2]) for r in roster if r[1] == "service" and r[5]]
+    busboy_staff = [(r[0], r[3], r[2]) for r in roster if r[1] == "busboy" and r[5]]
+
+    schedule = _create_schedule(start_day, end_day)
+    periods = _period_lookup(schedule["id"])
+    recent_period_pks = {pk for _, period_end, pk in periods if period_end >= end_day - timedelta(days=28)}
+
+    counts = {"distributions": 0, "confirmed": 0, "employee_rows": 0, "audit_rows": 0}
+    period_index = 0
+    with db_session() as conn:
+        day = start_day
+        while day <= end_day:
+            while period_index < len(periods) - 1 and day >= periods[period_index][1]:
+                period_index += 1
+            period_pk = periods[period_index][2]
+            date_local = day.strftime("%d-%m-%Y")
+            for shift_offset, shift in enumerate(SHIFTS):
+                instances = 2 if rng.random() < extra_instance_ratio else 1
+                for instance in range(1, instances + 1):
+                    created = datetime.combine(day, time(hour=15 + 8 * shift_offset, minute=instance), tzinfo=timezone.utc)
+                    confirmed = period_pk not in recent_period_pks and rng.random() < confirmed_ratio
+                    cur = conn.execute(
+                        """
+                        INSERT INTO distributions(
+                            period_pk, date_local, date_iso, shift, shift_instance, status,
+                            created_at, confirmed_at, created_by, confirmed_by
+                        )
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'synthetic', ?)
+                        """,
+                        (
+                            period_pk,
+                            date_local,
+                            day.isoformat(),
+                            shift,
+                            instance,
+                            "CONFIRMED" if confirmed else "UNCONFIRMED",
+                            _iso(created),
+                            _iso(created + timedelta(days=1)) if confirmed else None,
+                            "gestion" if confirmed else None,
+                        ),
+                    )
+                    dist_id = int(cur.lastrowid)
+                    conn.execute(
+                        "UPDATE distributions SET dist_ref = ? WHERE id = ?",
+                        (f"DIST-{day.year}-{dist_id:06d}", dist_id),
+                    )
+                    inputs, declaration, emp_rows = _distribution_rows(rng, service_staff, busboy_staff, shift)
+                    conn.execute(
+                        """
+                        INSERT INTO distribution_inputs(
+                            distribution_id, ventes_nettes_cents, depot_net_cents, frais_admin_cents, cash_cents
+                        )
+                        VALUES (?, ?, ?, ?, ?)
+                        """,
+                        (dist_id, *(to_cents(value) for value in inputs)),
+                    )
+                    conn.execute(
+                        """
+                        INSERT INTO distribution_declaration_inputs(
+                            distribution_id, ventes_totales_cents, clients, tips_due_cents, ventes_nourriture_cents
+                        )
+                        VALUES (?, ?, ?, ?, ?)
+                        """,
+                        (
+                            dist_id,
+                            to_cents(declaration[0]),
+                            declaration[1],
+                            to_cents(declaration[2]),
+                            to_cents(declaration[3]),
+                        ),
+                    )
+                    conn.executemany(
+                        """
+                        INSERT INTO distribution_employees(
+                            distribution_id, employee_number, employee_name, section, employee_id,
+                            hours, cash_cents, sur_paye_cents, frais_admin_cents,
+                            A_cents, B_cents, D_cents, E_cents, F_cents
+                        )
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        """,
+                        [
+                            (dist_id, *row[:3], employee_ids.get(row[0]), row[3], *(to_cents(value) for value in row[4:]))
+                            for row in emp_rows
+                        ],
+                    )
+                    audit = [
+                        (
+                            dist_id,
+                            "created",
+                            "synthetic",
+                            _iso(created),
+                            json.dumps(
+                                {"date_local": date_local, "shift": shift, "shift_instance": instance},
+                                ensure_ascii=False,
+                            ),
+                        )
+                    ]
+                    if confirmed:
+                        audit.append((dist_id, "status:CONFIRMED", "gestion", _iso(created + timedelta(days=1)), "{}"))
+                    conn.executemany(
+                        """
+                        INSERT INTO distribution_audit(
+                            distribution_id, action, actor, created_at, details_json, period_pk, date_iso, shift
+                        )
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                        """,
+                        [(*row, period_pk, day.isoformat(), shift) for row in audit],
+                    )
+                    counts["distributions"] += 1
+                    counts["confirmed"] += int(confirmed)
+                    counts["employee_rows"] += len(emp_rows)
+                    counts["audit_rows"] += len(audit)
+            day += timedelta(days=1)
+        index_distribution_employees(conn, "1")
+
+    summary = {
+        "db_path": get_db_path(),
+        "seed": seed,
+        "start_date": start_day.isoformat(),
+        "end_date": end_day.isoformat(),
+        "schedule_id": schedule["id"],
+        "periods": len(periods),
+        "employees": len(roster),
+        **counts,
+    }
+    logger.info("Jeu synthétique généré: %s", summary)
+    return summary
+
+
+def main(argv: Optional[Sequence[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="Génère un jeu de données TipSplit synthétique.")
+    parser.add_argument("--db", help="Fichier SQLite à créer (défaut: TIPSPLIT_DB_PATH ou un fichier temporaire).")
+    parser.add_argument("--years", type=float, default=2.0)
+    parser.add_argument("--employees", type=int, default=300)
+    parser.add_argument("--busboy-ratio", type=float, default=0.25)
+    parser.add_argument("--extra-instance-ratio", type=float, default=0.05)
+    parser.add_argument("--confirmed-ratio", type=float, default=0.85)
+    parser.add_argument("--seed", type=int, default=20240101)
+    parser.add_argument("--end-date", type=date.fromisoformat, default=None, help="AAAA-MM-JJ")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        os.environ["TIPSPLIT_DB_PATH"] = args.db
+    elif not os.environ.get("TIPSPLIT_DB_PATH", "").strip():
+        tmp_dir = tempfile.mkdtemp(prefix="tipsplit-synthetic-")
+        os.environ["TIPSPLIT_DB_PATH"] = os.path.join(tmp_dir, "tipsplit-synthetic.db")
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:%(name)s:%(message)s")
+    summary = generate_dataset(
+        years=args.years,
+        employees=args.employees,
+        busboy_ratio=args.busboy_ratio,
+        extra_instance_ratio=args.extra_instance_ratio,
+        confirmed_ratio=args.confirmed_ratio,
+        seed=args.seed,
+        end_date=args.end_date,
+    )
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Non-blocking logging for the desktop app.
+
+Every logger call made on the UI thread only enqueues the record; a
+``QueueListener`` thread formats it and writes to a rotating
+``tipsplit.log`` (human readable), a ``tipsplit.jsonl`` file (one JSON
+object per line, for machine analysis) and the console.
+
+Call :func:`configure_logging` once at startup and :func:`shutdown_logging`
+when the application closes so the queue is drained to disk.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+from datetime import datetime, timezone
+from typing import Optional
+
+LOG_FILENAME = "tipsplit.log"
+JSON_LOG_FILENAME = "tipsplit.jsonl"
+MAX_BYTES = 2 * 1024 * 1024
+BACKUP_COUNT = 5
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Render a record as a single JSON object (no embedded newlines)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "line": record.lineno,
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class _StructuredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Keep the message and traceback as separate fields on the queued record
+    (the stock handler folds the traceback into ``msg``), so each listener
+    formatter can render them its own way.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _rotating(path: str, formatter: logging.Formatter) -> logging.Handler:
+    handler = logging.handlers.RotatingFileHandler(
+        path, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT, encoding="utf-8"
+    )
+    handler.setFormatter(formatter)
+    return handler
+
+
+def configure_logging(log_dir: str, *, level: int = logging.INFO, console: bool = True) -> str:
+    """
+    Route the root logger through a queue drained by a background listener.
+    Returns the path of the text log. Calling it again is a no-op while the
+    listener is running.
+    """
+    global _listener, _queue_handler
+    os.makedirs(log_dir, exist_ok=True)
+    log_path = os.path.join(log_dir, LOG_FILENAME)
+    if _listener is not None:
+        return log_path
+
+    handlers = [
+        _rotating(log_path, logging.Formatter(TEXT_FORMAT)),
+        _rotating(os.path.join(log_dir, JSON_LOG_FILENAME), JsonLinesFormatter()),
+    ]
+    if console:
+        stream = logging.StreamHandler()
+        stream.setFormatter(logging.Formatter(TEXT_FORMAT))
+        handlers.append(stream)
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    _queue_handler = _StructuredQueueHandler(log_queue)
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(_queue_handler)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return log_path
+
+
+def shutdown_logging() -> None:
+    """Drain pending records to disk and stop the background listener."""
+    global _listener, _queue_handler
+    listener, handler = _listener, _queue_handler
+    _listener = None
+    _queue_handler = None
+    if handler is not None:
+        logging.getLogger().removeHandler(handler)
+    if listener is None:
+        return
+    try:
+        listener.stop()
+    finally:
+        for h in listener.handlers:
+            try:
+                h.flush()
+                h.close()
+            except Exception:
+                pass
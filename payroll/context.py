@@ -94,27 +94,32 @@ class PayrollContext:
     # Internal helpers
     # ------------------------------------------------------------------
     def _format_period(self, schedule: Dict, row: Dict) -> Dict:
-        tzinfo = get_timezone(schedule["timezone"])
-        start_local = to_local(from_utc_iso(row["start_at_utc"]), tzinfo)
-        end_local = to_local(from_utc_iso(row["end_at_utc"]), tzinfo)
-        # Pay periods are inclusive from Sunday to Saturday.
-        # Stored end_local is the next period's Sunday at 06:00, so display date is end_local - 1 day.
-        display_end_date = end_local.date() - timedelta(days=1)
-        start_date_iso = start_local.date().isoformat()
-        end_date_iso = display_end_date.isoformat()
-        start_label = start_local.strftime("%d/%m/%Y")
-        end_label = display_end_date.strftime("%d/%m/%Y")
-        folder_slug = f"{row['display_id']}_{start_date_iso}_{end_date_iso}"
-        return {
-            **row,
-            "schedule_id": row.get("schedule_id") or schedule["id"],
-            "timezone": schedule["timezone"],
-            "start_local_iso": start_local.isoformat(timespec="seconds"),
-            "end_local_iso": end_local.isoformat(timespec="seconds"),
-            "start_date_iso": start_date_iso,
-            "end_date_iso": end_date_iso,
-            "start_label": start_label,
-            "end_label": end_label,
-            "range_label": f"{start_label} au {end_label}",
-            "folder_slug": folder_slug,
-        }
+        return format_period(schedule, row)
+
+
+def format_period(schedule: Dict, row: Dict) -> Dict:
+    """Add local dates and labels (range_label, folder_slug, ...) to a period row."""
+    tzinfo = get_timezone(schedule["timezone"])
+    start_local = to_local(from_utc_iso(row["start_at_utc"]), tzinfo)
+    end_local = to_local(from_utc_iso(row["end_at_utc"]), tzinfo)
+    # Pay periods are inclusive from Sunday to Saturday.
+    # Stored end_local is the next period's Sunday at 06:00, so display date is end_local - 1 day.
+    display_end_date = end_local.date() - timedelta(days=1)
+    start_date_iso = start_local.date().isoformat()
+    end_date_iso = display_end_date.isoformat()
+    start_label = start_local.strftime("%d/%m/%Y")
+    end_label = display_end_date.strftime("%d/%m/%Y")
+    folder_slug = f"{row['display_id']}_{start_date_iso}_{end_date_iso}"
+    return {
+        **row,
+        "schedule_id": row.get("schedule_id") or schedule["id"],
+        "timezone": schedule["timezone"],
+        "start_local_iso": start_local.isoformat(timespec="seconds"),
+        "end_local_iso": end_local.isoformat(timespec="seconds"),
+        "start_date_iso": start_date_iso,
+        "end_date_iso": end_date_iso,
+        "start_label": start_label,
+        "end_label": end_label,
+        "range_label": f"{start_label} au {end_label}",
+        "folder_slug": folder_slug,
+    }
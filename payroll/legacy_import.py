@@ -0,0 +1,360 @@
+"""
+Import legacy JSON distribution files into SQLite.
+
+Before the SQLite repository, each confirmed distribution was written as a
+JSON file under the backend dir (``AppConfig.get_backend_dir()``). This
+importer walks that tree, parses the files in a process pool, resolves
+each date to its pay period through :class:`PayrollContext` and writes the
+distributions with :func:`create_distributions_bulk` (one transaction per
+chunk of files). The legacy files only ever held confirmed distributions,
+so they are stored CONFIRMED, confirmed by the import actor.
+
+A file holds one distribution or a list of them. Accepted keys:
+
+- date: ``date_local`` / ``date`` (``DD-MM-YYYY`` or ``YYYY-MM-DD``)
+- ``shift``, optional ``shift_instance`` (default 1)
+- inputs: ``inputs`` / ``fields``
+- declaration: ``declaration_inputs`` / ``declaration`` / ``declaration_fields``
+- employees: ``employees`` / ``entries``, with ``employee_id`` (or
+  ``employee_number``), ``name`` (or ``employee_name``), ``section``,
+  ``hours`` and the money columns; ``--- Section ---`` rows are skipped.
+
+Distributions already stored for the same (period, date, shift, instance)
+are skipped as duplicates, so a re-run is harmless. A checkpoint file
+records finished files (path, size, mtime, status) and lets an interrupted
+import resume where it stopped; files that failed are tried again.
+
+    python -m payroll.legacy_import --dir "<backend dir>"
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from db.db_manager import db_session
+from db.distributions_repo import create_distributions_bulk
+from payroll.context import PayrollContext
+from payroll.pay_calendar import PayCalendarService
+
+logger = logging.getLogger("tipsplit.legacy_import")
+
+CHECKPOINT_FILENAME = ".tipsplit_import_checkpoint.json"
+CHUNK_FILES = 500
+DEFAULT_CREATED_BY = "import-json"
+
+_EMPLOYEE_FIELDS = ("section", "hours", "cash", "sur_paye", "frais_admin", "A", "B", "D", "E", "F")
+
+
+def discover_files(root: str) -> List[str]:
+    """Every ``*.json`` under ``root`` (hidden files and folders excluded), sorted."""
+    found = []
+    for folder, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in files:
+            if name.lower().endswith(".json") and not name.startswith("."):
+                found.append(os.path.join(folder, name))
+    return sorted(found)
+
+
+def _parse_date(value) -> Optional[date]:
+    text = str(value or "").strip()[:10]
+    for fmt in ("%d-%m-%Y", "%Y-%m-%d", "%d/%m/%Y"):
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _first(payload: Dict, *keys, default=None):
+    for key in keys:
+        if payload.get(key) not in (None, ""):
+            return payload[key]
+    return default
+
+
+def _legacy_record(payload: Dict) -> Dict:
+    if not isinstance(payload, dict):
+        raise ValueError("Distribution invalide (objet attendu).")
+    meta = payload.get("meta") if isinstance(payload.get("meta"), dict) else {}
+    merged = {**meta, **payload}
+    day = _parse_date(_first(merged, "date_local", "date"))
+    if day is None:
+        raise ValueError("Date manquante ou invalide.")
+    shift = str(_first(merged, "shift", default="")).strip().upper()
+    if not shift:
+        raise ValueError("Quart manquant.")
+    try:
+        shift_instance = int(_first(merged, "shift_instance", default=1))
+    except (TypeError, ValueError):
+        raise ValueError("shift_instance invalide.")
+
+    employees = []
+    for emp in _first(merged, "employees", "entries", default=[]) or []:
+        if not isinstance(emp, dict):
+            continue
+        name = str(_first(emp, "name", "employee_name", default="")).strip()
+        if not name or name.startswith("---"):
+            continue
+        employees.append(
+            {
+                "employee_id": _first(emp, "employee_id", "employee_number", "number", default=""),
+                "name": name,
+                **{field: emp.get(field) for field in _EMPLOYEE_FIELDS},
+            }
+        )
+    return {
+        "date_iso": day.isoformat(),
+        "date_local": day.strftime("%d-%m-%Y"),
+        "shift": shift,
+        "shift_instance": shift_instance,
+        "inputs": dict(_first(merged, "inputs", "fields", default={}) or {}),
+        "declaration_inputs": dict(
+            _first(merged, "declaration_inputs", "declaration", "declaration_fields", default={}) or {}
+        ),
+        "employees": employees,
+        "created_by": str(_first(merged, "created_by", default="")),
+    }
+
+
+def parse_legacy_file(path: str) -> Dict:
+    """
+    Parse one legacy file (runs in the worker processes).
+    Returns ``{"path", "records"}`` or ``{"path", "error"}``.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            payload = json.load(fh)
+        items = payload if isinstance(payload, list) else [payload]
+        return {"path": path, "records": [_legacy_record(item) for item in items]}
+    except (OSError, ValueError) as exc:
+        return {"path": path, "error": str(exc)}
+
+
+def _file_stamp(path: str) -> Dict:
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+
+def load_checkpoint(path: str) -> Dict[str, Dict]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as fh:
+        return json.load(fh).get("files", {})
+
+
+def _save_checkpoint(path: str, files: Dict[str, Dict]) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump({"files": files}, fh, indent=1, ensure_ascii=False)
+        fh.write("\n")
+    os.replace(tmp_path, path)
+
+
+def _existing_keys(date_min: str, date_max: str) -> set:
+    with db_session() as conn:
+        rows = conn.execute(
+            """
+            SELECT p.id AS pay_period_id, d.date_iso, d.shift, d.shift_instance
+            FROM distributions d
+            JOIN pay_periods p ON p.pk = d.period_pk
+            WHERE d.date_iso BETWEEN ? AND ?
+            """,
+            (date_min, date_max),
+        ).fetchall()
+    return {(r["pay_period_id"], r["date_iso"], r["shift"], r["shift_instance"]) for r in rows}
+
+
+def _chunks(items: Sequence[str], size: int) -> Iterator[Sequence[str]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def import_legacy_dir(
+    root: str,
+    *,
+    checkpoint_path: Optional[str] = None,
+    workers: Optional[int] = None,
+    chunk_files: int = CHUNK_FILES,
+    restart: bool = False,
+    created_by: str = DEFAULT_CREATED_BY,
+    context: Optional[PayrollContext] = None,
+    progress: Optional[Callable[[Dict], None]] = None,
+) -> Dict:
+    """
+    Import every legacy JSON file under ``root``. ``workers`` sizes the
+    parsing pool (``0`` or ``1`` parses in-process). ``progress`` receives
+    the running stats after each chunk. Returns the final stats.
+    """
+    if not root or not os.path.isdir(root):
+        raise ValueError(f"Dossier introuvable: {root}")
+    if chunk_files < 1:
+        raise ValueError("chunk_files doit être positif.")
+    checkpoint_path = checkpoint_path or os.path.join(root, CHECKPOINT_FILENAME)
+    done = {} if restart else load_checkpoint(checkpoint_path)
+    context = context or PayrollContext(PayCalendarService())
+
+    paths = discover_files(root)
+    pending = []
+    for path in paths:
+        rel = os.path.relpath(path, root)
+        entry = done.get(rel, {})
+        if entry.get("stamp") != _file_stamp(path) or entry.get("status") != "ok":
+            pending.append(path)
+
+    stats = {
+        "files": len(paths),
+        "skipped_files": len(paths) - len(pending),
+        "processed_files": 0,
+        "distributions": 0,
+        "imported": 0,
+        "duplicates": 0,
+        "errors": [],
+        "elapsed_s": 0.0,
+    }
+    periods: Dict[str, str] = {}
+    seen: set = set()
+    started = time.perf_counter()
+
+    def resolve_period(date_iso: str) -> str:
+        if date_iso not in periods:
+            periods[date_iso] = context.period_for_local_date(date.fromisoformat(date_iso))["id"]
+        return periods[date_iso]
+
+    def parsed_chunks(executor) -> Iterator[List[Dict]]:
+        for chunk in _chunks(pending, chunk_files):
+            if executor is None:
+                yield [parse_legacy_file(path) for path in chunk]
+            else:
+                yield list(executor.map(parse_legacy_file, chunk, chunksize=max(1, len(chunk) // (4 * workers))))
+
+    def import_chunk(results: List[Dict]) -> None:
+        records: List[Dict] = []
+        origins: List[Tuple[str, int]] = []
+        file_status: Dict[str, str] = {}
+        for result in results:
+            path = result["path"]
+            file_status[path] = "ok"
+            if "error" in result:
+                stats["errors"].append({"path": path, "error": result["error"]})
+                file_status[path] = "error"
+                continue
+            for position, rec in enumerate(result["records"]):
+                stats["distributions"] += 1
+                try:
+                    period_id = resolve_period(rec["date_iso"])
+                except Exception as exc:
+                    stats["errors"].append({"path": path, "error": f"Période introuvable ({rec['date_iso']}): {exc}"})
+                    file_status[path] = "error"
+                    continue
+                records.append({**rec, "pay_period_id": period_id, "created_by": rec["created_by"] or created_by})
+                origins.append((path, position))
+
+        if records:
+            existing = _existing_keys(min(r["date_iso"] for r in records), max(r["date_iso"] for r in records))
+            fresh, fresh_origins = [], []
+            for rec, origin in zip(records, origins):
+                key = (rec["pay_period_id"], rec["date_iso"], rec["shift"], rec["shift_instance"])
+                if key in existing or key in seen:
+                    stats["duplicates"] += 1
+                    continue
+                seen.add(key)
+                fresh.append(rec)
+                fresh_origins.append(origin)
+            if fresh:
+                result = create_distributions_bulk(
+                    fresh, created_by=created_by, status="CONFIRMED", confirmed_by=created_by
+                )
+                stats["imported"] += len(result["created"])
+                for error in result["errors"]:
+                    path = fresh_origins[error["index"]][0]
+                    stats["errors"].append({"path": path, "error": error["error"]})
+                    file_status[path] = "error"
+
+        for path, status in file_status.items():
+            done[os.path.relpath(path, root)] = {"stamp": _file_stamp(path), "status": status}
+        _save_checkpoint(checkpoint_path, done)
+        stats["processed_files"] += len(results)
+        stats["elapsed_s"] = round(time.perf_counter() - started, 3)
+        if progress:
+            progress(dict(stats))
+
+    if workers is None:
+        workers = min(4, os.cpu_count() or 1)
+    if workers > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for results in parsed_chunks(executor):
+                import_chunk(results)
+    else:
+        workers = 1
+        for results in parsed_chunks(None):
+            import_chunk(results)
+
+    stats["elapsed_s"] = round(time.perf_counter() - started, 3)
+    stats["files_per_s"] = round(stats["processed_files"] / stats["elapsed_s"], 1) if stats["elapsed_s"] else 0.0
+    stats["distributions_per_s"] = round(stats["imported"] / stats["elapsed_s"], 1) if stats["elapsed_s"] else 0.0
+    logger.info(
+        "Import JSON: %s fichiers (%s déjà importés), %s distributions importées, %s doublons, %s erreurs en %.1fs",
+        stats["files"],
+        stats["skipped_files"],
+        stats["imported"],
+        stats["duplicates"],
+        len(stats["errors"]),
+        stats["elapsed_s"],
+    )
+    return stats
+
+
+def _print_progress(stats: Dict) -> None:
+    elapsed = stats["elapsed_s"] or 0.0
+    rate = stats["processed_files"] / elapsed if elapsed else 0.0
+    print(
+        f"{stats['processed_files']}/{stats['files'] - stats['skipped_files']} fichiers  "
+        f"{stats['imported']} importées  {stats['duplicates']} doublons  "
+        f"{len(stats['errors'])} erreurs  ({rate:.0f} fichiers/s)",
+        flush=True,
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="Importe les anciens fichiers JSON de distribution dans SQLite.")
+    parser.add_argument("--dir", help="Dossier des JSON (défaut: dossier backend de la configuration).")
+    parser.add_argument("--checkpoint", help="Fichier de reprise (défaut: dans le dossier importé).")
+    parser.add_argument("--workers", type=int, default=None, help="Processus d'analyse (1 = sans pool).")
+    parser.add_argument("--chunk-files", type=int, default=CHUNK_FILES, help="Fichiers par transaction.")
+    parser.add_argument("--restart", action="store_true", help="Ignore le fichier de reprise.")
+    args = parser.parse_args(argv)
+
+    root = args.dir
+    if not root:
+        from AppConfig import get_backend_dir
+
+        root = get_backend_dir()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:%(name)s:%(message)s")
+    stats = import_legacy_dir(
+        root,
+        checkpoint_path=args.checkpoint,
+        workers=args.workers,
+        chunk_files=args.chunk_files,
+        restart=args.restart,
+        progress=_print_progress,
+    )
+    print(
+        f"Terminé: {stats['imported']} distributions importées depuis {stats['processed_files']} fichiers "
+        f"({stats['skipped_files']} déjà traités), {stats['duplicates']} doublons, {len(stats['errors'])} erreurs "
+        f"en {stats['elapsed_s']:.1f}s ({stats['files_per_s']} fichiers/s, {stats['distributions_per_s']} distributions/s)"
+    )
+    for error in stats["errors"][:20]:
+        print(f"  {error['path']}: {error['error']}")
+    return stats
+
+
+if __name__ == "__main__":
+    main()
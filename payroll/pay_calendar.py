@@ -9,7 +9,7 @@ from datetime import date, datetime, timedelta, timezone
 from typing import Dict, Iterable, List, Optional, Sequence
 from uuid import uuid4
 
-from db.db_manager import db_session
+from db.db_manager import db_session, write_session
 from payroll.time_utils import (
     date_in_local,
     ensure_local,
@@ -25,6 +25,21 @@ def _utc_now() -> str:
 
 logger = logging.getLogger("tipsplit.pay_calendar")
 
+# Schedules and periods are keyed by INTEGER ``pk`` internally; callers only
+# ever see the UUID ``id`` (and ``schedule_id`` for periods).
+_SCHEDULE_COLUMNS = """
+    id, group_key, name, timezone, period_length_days, pay_date_offset_days,
+    anchor_start_local, effective_from, effective_to, created_at, updated_at
+"""
+_PERIOD_SELECT = """
+    SELECT p.id, s.id AS schedule_id, p.start_at_utc, p.end_at_utc, p.pay_date_local,
+           p.label_year, p.sequence_in_year, p.display_id, p.status,
+           p.locked_at_utc, p.payed_at_utc, p.created_at, p.updated_at
+    FROM pay_periods p
+    JOIN pay_schedules s ON s.pk = p.schedule_pk
+"""
+_SCHEDULE_PK = "(SELECT pk FROM pay_schedules WHERE id = ?)"
+
 class PayCalendarError(RuntimeError):
     pass
 
@@ -45,8 +60,8 @@ class PayCalendarService:
         group = self._resolve_group(group_key)
         with db_session() as conn:
             rows = conn.execute(
-                """
-                SELECT * FROM pay_schedules
+                f"""
+                SELECT {_SCHEDULE_COLUMNS} FROM pay_schedules
                 WHERE group_key = ?
                 ORDER BY effective_from DESC
                 """,
@@ -59,7 +74,7 @@ class PayCalendarService:
             raise PayCalendarError("Identifiant d’horaire invalide")
         with db_session() as conn:
             row = conn.execute(
-                "SELECT * FROM pay_schedules WHERE id = ?",
+                f"SELECT {_SCHEDULE_COLUMNS} FROM pay_schedules WHERE id = ?",
                 (schedule_id,),
             ).fetchone()
             if not row:
@@ -77,8 +92,8 @@ class PayCalendarService:
         target_iso = target_date.isoformat()
         with db_session() as conn:
             row = conn.execute(
-                """
-                SELECT * FROM pay_schedules
+                f"""
+                SELECT {_SCHEDULE_COLUMNS} FROM pay_schedules
                 WHERE group_key = ?
                   AND effective_from <= ?
                   AND (effective_to IS NULL OR effective_to >= ?)
@@ -119,7 +134,7 @@ class PayCalendarService:
         close_date = (eff_from_date - timedelta(days=1)).isoformat()
         schedule_id = str(uuid4())
         now = _utc_now()
-        with db_session() as conn:
+        with write_session() as conn:
             conn.execute(
                 """
                 UPDATE pay_schedules
@@ -188,13 +203,13 @@ class PayCalendarService:
 
         pay_offset = int(schedule["pay_date_offset_days"])
         new_rows_by_year: Dict[int, List[Dict]] = defaultdict(list)
-        with db_session() as conn:
+        with write_session() as conn:
             for start_local in starts:
                 start_utc_iso = to_utc_iso(start_local)
                 existing = conn.execute(
-                    """
+                    f"""
                     SELECT id FROM pay_periods
-                    WHERE schedule_id = ? AND start_at_utc = ?
+                    WHERE schedule_pk = {_SCHEDULE_PK} AND start_at_utc = ?
                     """,
                     (schedule_id, start_utc_iso),
                 ).fetchone()
@@ -240,10 +255,10 @@ class PayCalendarService:
         now = _utc_now()
         period_rows = list(
             conn.execute(
-                """
+                f"""
                 SELECT id, start_at_utc, sequence_in_year, display_id, status
                 FROM pay_periods
-                WHERE schedule_id = ? AND label_year = ?
+                WHERE schedule_pk = {_SCHEDULE_PK} AND label_year = ?
                 ORDER BY start_at_utc
                 """,
                 (schedule_id, label_year),
@@ -281,13 +296,13 @@ class PayCalendarService:
             else:
                 data = item["data"]
                 conn.execute(
-                    """
+                    f"""
                     INSERT INTO pay_periods(
-                        id, schedule_id, start_at_utc, end_at_utc, pay_date_local,
+                        id, schedule_pk, start_at_utc, end_at_utc, pay_date_local,
                         label_year, sequence_in_year, display_id, status,
                         locked_at_utc, payed_at_utc, created_at, updated_at
                     )
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'OPEN', NULL, NULL, ?, ?)
+                    VALUES (?, {_SCHEDULE_PK}, ?, ?, ?, ?, ?, ?, 'OPEN', NULL, NULL, ?, ?)
                     """,
                     (
                         str(uuid4()),
@@ -315,10 +330,10 @@ class PayCalendarService:
     ) -> List[Dict]:
         with db_session() as conn:
             rows = conn.execute(
-                """
-                SELECT * FROM pay_periods
-                WHERE schedule_id = ?
-                ORDER BY start_at_utc DESC
+                f"""
+                {_PERIOD_SELECT}
+                WHERE s.id = ?
+                ORDER BY p.start_at_utc DESC
                 LIMIT ? OFFSET ?
                 """,
                 (schedule_id, limit, offset),
@@ -336,11 +351,11 @@ class PayCalendarService:
         schedule = self.get_schedule(schedule_id)
         with db_session() as conn:
             row = conn.execute(
-                """
-                SELECT * FROM pay_periods
-                 WHERE schedule_id = ?
-                   AND start_at_utc <= ?
-                   AND end_at_utc > ?
+                f"""
+                {_PERIOD_SELECT}
+                 WHERE s.id = ?
+                   AND p.start_at_utc <= ?
+                   AND p.end_at_utc > ?
                 LIMIT 1
                 """,
                 (schedule_id, ts_iso, ts_iso),
@@ -356,11 +371,11 @@ class PayCalendarService:
         )
         with db_session() as conn:
             row = conn.execute(
-                """
-                SELECT * FROM pay_periods
-                 WHERE schedule_id = ?
-                   AND start_at_utc <= ?
-                   AND end_at_utc > ?
+                f"""
+                {_PERIOD_SELECT}
+                 WHERE s.id = ?
+                   AND p.start_at_utc <= ?
+                   AND p.end_at_utc > ?
                 LIMIT 1
                 """,
                 (schedule_id, ts_iso, ts_iso),
@@ -392,13 +407,19 @@ class PayCalendarService:
         clear_locked: bool = False,
         clear_payed: bool = False,
     ) -> Dict:
-        with db_session() as conn:
+        with write_session() as conn:
             row = conn.execute(
-                "SELECT * FROM pay_periods WHERE id = ?",
+                f"{_PERIOD_SELECT} WHERE p.id = ?",
                 (period_id,),
             ).fetchone()
             if not row:
                 raise PayCalendarError("Période introuvable")
+            archived = conn.execute(
+                "SELECT archive_year FROM archived_periods WHERE period_pk = (SELECT pk FROM pay_periods WHERE id = ?)",
+                (period_id,),
+            ).fetchone()
+            if archived:
+                raise PayCalendarError(f"Période archivée ({archived['archive_year']}): elle ne peut plus être modifiée.")
             if row["status"] != expected_status:
                 if expected_status == "LOCKED" and row["status"] == "OPEN":
                     raise PayCalendarError("Vérouillez d'abord la période.")
@@ -423,12 +444,20 @@ class PayCalendarService:
                 f"UPDATE pay_periods SET {', '.join(updates)} WHERE id = ?",
                 params,
             )
+            if set_locked or clear_locked:
+                from db.distributions_repo import drop_period_snapshot, write_period_snapshot
+
+                # The period's confirmed results are frozen for as long as it stays locked.
+                if set_locked:
+                    write_period_snapshot(conn, period_id)
+                else:
+                    drop_period_snapshot(conn, period_id)
         return self.get_period(period_id)
 
     def get_period(self, period_id: str) -> Dict:
         with db_session() as conn:
             row = conn.execute(
-                "SELECT * FROM pay_periods WHERE id = ?",
+                f"{_PERIOD_SELECT} WHERE p.id = ?",
                 (period_id,),
             ).fetchone()
             if not row:
@@ -455,9 +484,9 @@ class PayCalendarService:
         if not reason_text:
             raise PayCalendarError("Une raison est requise pour la modification admin.")
         now = _utc_now()
-        with db_session() as conn:
+        with write_session() as conn:
             row = conn.execute(
-                "SELECT * FROM pay_periods WHERE id = ?",
+                f"{_PERIOD_SELECT} WHERE p.id = ?",
                 (period_id,),
             ).fetchone()
             if not row:
@@ -474,10 +503,10 @@ class PayCalendarService:
                 conn.execute(
                     """
                     INSERT INTO pay_period_overrides(
-                        id, period_id, admin_actor, field_name,
+                        id, period_pk, admin_actor, field_name,
                         old_value, new_value, reason, created_at
                     )
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    VALUES (?, (SELECT pk FROM pay_periods WHERE id = ?), ?, ?, ?, ?, ?, ?)
                     """,
                     (
                         str(uuid4()),
@@ -0,0 +1,152 @@
+"""
+Streaming payroll summary CSV over many periods (quarters, years).
+
+Same columns as the Pay tab's single-period export, one row per period
+and employee, written as rows arrive from the database so memory stays
+flat. Paths ending in ``.gz`` (or ``compress=True``) are gzip-compressed.
+
+    python -m payroll.summary_export --start 2025-01-01 --end 2025-03-31 --out T1-2025.csv.gz
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import gzip
+import io
+import logging
+from datetime import date
+from typing import Dict, Iterable, Optional, Sequence, Union
+
+from db.distributions_repo import declared_amount_cents, iter_payroll_summary
+from db.money import cents_to_decimal
+from payroll.context import format_period
+
+logger = logging.getLogger("tipsplit.summary_export")
+
+PAYROLL_CSV_HEADERS = (
+    "pay_period_id",
+    "pay_period_label",
+    "period_start_iso",
+    "period_end_iso",
+    "employee_id",
+    "employee_name",
+    "role",
+    "shift_count",
+    "hours_total",
+    "cash_total",
+    "sur_paye_total",
+    "frais_admin_total",
+    "A_total",
+    "F_total",
+    "D_total",
+    "declared_amount",
+    "declared_source",
+)
+
+# declared_amount_cents() labels -> declared_source codes of the payroll CSV.
+DECLARED_SOURCE_CODES = {"F": "F", "8% des ventes": "A_8pct", "D": "D"}
+
+
+def format_cents_csv(cents: Optional[int]) -> str:
+    return str(cents_to_decimal(cents or 0))
+
+
+def format_hours_csv(value) -> str:
+    text = f"{float(value or 0.0):.4f}".rstrip("0").rstrip(".")
+    return text or "0"
+
+
+def _open_text(out_path: str, compress: Optional[bool]):
+    if compress is None:
+        compress = out_path.lower().endswith(".gz")
+    if compress:
+        return io.TextIOWrapper(gzip.open(out_path, "wb"), encoding="utf-8", newline="")
+    return open(out_path, "w", newline="", encoding="utf-8")
+
+
+def export_payroll_summary_stream(
+    out_path: str,
+    *,
+    period_ids: Optional[Iterable[str]] = None,
+    start_date: Union[date, str, None] = None,
+    end_date: Union[date, str, None] = None,
+    status: Optional[str] = "CONFIRMED",
+    compress: Optional[bool] = None,
+) -> Dict:
+    """
+    Write the payroll summary for the selected periods and/or day range.
+    Returns ``{"path", "rows", "periods"}``.
+    """
+    stream = iter_payroll_summary(period_ids=period_ids, start_date=start_date, end_date=end_date, status=status)
+    rows = 0
+    periods = 0
+    current_period = None
+    period = {}
+    with _open_text(out_path, compress) as fh:
+        writer = csv.writer(fh, delimiter=",", lineterminator="\n")
+        writer.writerow(PAYROLL_CSV_HEADERS)
+        for row in stream:
+            if row["pay_period_id"] != current_period:
+                current_period = row["pay_period_id"]
+                period = format_period(
+                    {"id": row["schedule_id"], "timezone": row["timezone"]},
+                    {key: row[key] for key in ("display_id", "start_at_utc", "end_at_utc", "schedule_id")},
+                )
+                periods += 1
+            declared, label = declared_amount_cents(
+                row["section"], a_cents=row["A_cents"], f_cents=row["F_cents"], d_cents=row["D_cents"]
+            )
+            writer.writerow(
+                [
+                    row["pay_period_id"],
+                    period["range_label"],
+                    period["start_date_iso"],
+                    period["end_date_iso"],
+                    row["employee_number"] or "",
+                    row["employee_name"],
+                    row["section"] or "",
+                    row["shift_count"],
+                    format_hours_csv(row["hours"]),
+                    format_cents_csv(row["cash_cents"]),
+                    format_cents_csv(row["sur_paye_cents"]),
+                    format_cents_csv(row["frais_admin_cents"]),
+                    format_cents_csv(row["A_cents"]),
+                    format_cents_csv(row["F_cents"]),
+                    format_cents_csv(row["D_cents"]),
+                    format_cents_csv(declared),
+                    DECLARED_SOURCE_CODES.get(label, "N/A"),
+                ]
+            )
+            rows += 1
+    logger.info("Export paie %s: %s lignes, %s périodes", out_path, rows, periods)
+    return {"path": out_path, "rows": rows, "periods": periods}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="Exporte le sommaire de paie de plusieurs périodes (CSV).")
+    parser.add_argument("--out", required=True, help="Fichier CSV (.csv.gz pour compresser).")
+    parser.add_argument("--start", type=date.fromisoformat, help="Premier jour inclus (AAAA-MM-JJ).")
+    parser.add_argument("--end", type=date.fromisoformat, help="Dernier jour inclus (AAAA-MM-JJ).")
+    parser.add_argument("--period", action="append", dest="period_ids", help="Identifiant de période (répétable).")
+    parser.add_argument("--all-statuses", action="store_true", help="Inclut les distributions non confirmées.")
+    parser.add_argument("--gzip", action="store_true", default=None, help="Force la compression gzip.")
+    args = parser.parse_args(argv)
+    if not (args.start or args.end or args.period_ids):
+        parser.error("indiquez --start/--end ou --period")
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:%(name)s:%(message)s")
+    result = export_payroll_summary_stream(
+        args.out,
+        period_ids=args.period_ids,
+        start_date=args.start,
+        end_date=args.end,
+        status=None if args.all_statuses else "CONFIRMED",
+        compress=args.gzip,
+    )
+    print(f"{result['rows']} lignes ({result['periods']} périodes) -> {result['path']}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import csv
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from db import analytics_export
+from db.analytics_export import export_fact_tables, load_state
+from db.db_manager import db_session
+from db.distributions_repo import create_distribution, get_distribution, set_distribution_status
+from db.synthetic_data import generate_dataset
+from payroll.pay_calendar import PayCalendarService
+
+
+class AnalyticsExportTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["TIPSPLIT_DB_PATH"] = os.path.join(self.tmpdir.name, "bi.db")
+        generate_dataset(years=0.25, employees=30, seed=3, end_date=date(2025, 3, 31))
+        self.out_dir = os.path.join(self.tmpdir.name, "bi")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        os.environ.pop("TIPSPLIT_DB_PATH", None)
+
+    def _rows(self, table):
+        rows = []
+        folder = os.path.join(self.out_dir, table)
+        for name in sorted(os.listdir(folder)):
+            with gzip.open(os.path.join(folder, name), "rt", newline="", encoding="utf-8") as fh:
+                rows += list(csv.DictReader(fh))
+        return rows
+
+    def _first_unconfirmed(self):
+        with db_session() as conn:
+            return conn.execute("SELECT MIN(id) AS id FROM distributions WHERE status <> 'CONFIRMED'").fetchone()["id"]
+
+    def test_export_matches_database_and_stops_at_unconfirmed(self):
+        with db_session() as conn:
+            conn.execute("UPDATE distributions SET status = 'CONFIRMED', confirmed_at = created_at WHERE id <> 150")
+        summary = export_fact_tables(self.out_dir, fmt="csv", chunk_size=40)
+        blocker = self._first_unconfirmed()
+        self.assertEqual(blocker, 150)
+        self.assertEqual(summary["last_distribution_id"], blocker - 1)
+        self.assertEqual(summary["blocked_by"]["distribution_id"], blocker)
+        self.assertGreater(summary["parts"], 1)
+
+        with db_session() as conn:
+            expected = conn.execute(
+                """
+                SELECT COUNT(*) AS c, SUM(i.ventes_nettes_cents) AS ventes
+                FROM distributions d JOIN distribution_inputs i ON i.distribution_id = d.id
+                WHERE d.id < ? AND d.status = 'CONFIRMED'
+                """,
+                (blocker,),
+            ).fetchone()
+            allocations = conn.execute(
+                "SELECT COUNT(*) AS c FROM distribution_employees WHERE distribution_id < ? AND distribution_id IN"
+                " (SELECT id FROM distributions WHERE status = 'CONFIRMED')",
+                (blocker,),
+            ).fetchone()["c"]
+        distributions = self._rows("distributions")
+        daily = self._rows("daily")
+        self.assertEqual(len(distributions), expected["c"])
+        self.assertEqual(len(self._rows("allocations")), allocations)
+        self.assertEqual(sum(int(r["ventes_nettes_cents"]) for r in distributions), expected["ventes"])
+        self.assertEqual(sum(int(r["ventes_nettes_cents"]) for r in daily), expected["ventes"])
+        self.assertEqual(sum(int(r["distributions"]) for r in daily), expected["c"])
+
+        with open(os.path.join(self.out_dir, "schema.json"), encoding="utf-8") as fh:
+            schema = json.load(fh)
+        self.assertEqual(schema["format"], "csv")
+        self.assertEqual(list(distributions[0]), [c["name"] for c in schema["tables"]["distributions"]])
+
+    def test_unconfirmed_row_of_locked_period_does_not_stall(self):
+        with db_session() as conn:
+            conn.execute("UPDATE distributions SET status = 'CONFIRMED', confirmed_at = created_at")
+            conn.execute("UPDATE distributions SET status = 'UNCONFIRMED', confirmed_at = NULL WHERE id = 1")
+            last_id, total = conn.execute("SELECT MAX(id), COUNT(*) FROM distributions").fetchone()
+        PayCalendarService().lock_period(get_distribution(1)["pay_period_id"])
+
+        summary = export_fact_tables(self.out_dir, fmt="csv")
+
+        self.assertIsNone(summary["blocked_by"])
+        self.assertEqual(summary["last_distribution_id"], last_id)
+        self.assertEqual(summary["pending_ids"], [1])
+        self.assertEqual(len(self._rows("distributions")), total - 1)
+
+        # The period is reopened and the row confirmed: the next run still exports it.
+        service = PayCalendarService()
+        service.unlock_period(get_distribution(1)["pay_period_id"])
+        set_distribution_status(1, "CONFIRMED")
+        again = export_fact_tables(self.out_dir, fmt="csv")
+        self.assertEqual((again["late_distributions"], again["pending_ids"]), (1, []))
+        self.assertEqual(again["rows"]["distributions"], 1)
+        rows = self._rows("distributions")
+        self.assertEqual(sorted(int(r["distribution_id"]) for r in rows), list(range(1, last_id + 1)))
+        self.assertEqual(export_fact_tables(self.out_dir, fmt="csv")["parts"], 0)
+
+    def test_incremental_run_only_moves_new_rows(self):
+        export_fact_tables(self.out_dir, fmt="csv")
+        before = len(self._rows("distributions"))
+        self.assertEqual(export_fact_tables(self.out_dir, fmt="csv")["parts"], 0)
+
+        with db_session() as conn:
+            conn.execute("UPDATE distributions SET status = 'CONFIRMED', confirmed_at = created_at")
+        template = get_distribution(1)
+        created = create_distribution(
+            pay_period_id=template["pay_period_id"],
+            date_local=template["date_local"],
+            shift="EXTRA",
+            inputs=template["inputs"],
+            declaration_inputs=template["declaration_inputs"],
+            employees=[{**e, "employee_id": e["employee_number"], "name": e["employee_name"]} for e in template["employees"]],
+        )
+        set_distribution_status(created["id"], "CONFIRMED")
+
+        summary = export_fact_tables(self.out_dir, fmt="csv")
+        self.assertEqual(summary["last_distribution_id"], created["id"])
+        self.assertEqual(load_state(self.out_dir)["last_distribution_id"], created["id"])
+        rows = self._rows("distributions")
+        self.assertEqual(len({r["distribution_id"] for r in rows}), len(rows))
+        with db_session() as conn:
+            total = conn.execute("SELECT COUNT(*) AS c FROM distributions").fetchone()["c"]
+        self.assertEqual(len(rows), total)
+        self.assertGreater(len(rows), before)
+
+        full = export_fact_tables(self.out_dir, fmt="csv", full=True)
+        self.assertEqual(full["rows"]["distributions"], total)
+        self.assertEqual(len(self._rows("distributions")), total)
+
+    def test_parquet_requires_pyarrow(self):
+        if analytics_export.pq is not None:
+            self.skipTest("pyarrow installé")
+        self.assertEqual(analytics_export.default_format(), "csv")
+        with self.assertRaises(ValueError):
+            export_fact_tables(self.out_dir, fmt="parquet")
+
+
+if __name__ == "__main__":
+    unittest.main()
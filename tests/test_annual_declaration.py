@@ -0,0 +1,122 @@
+import csv
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from db import employees_repo
+from db.db_manager import init_db
+from db.distributions_repo import annual_declaration_rows, create_distribution, set_distribution_status
+from payroll.context import PayrollContext
+from payroll.pay_calendar import PayCalendarService
+
+
+class AnnualDeclarationTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["TIPSPLIT_DB_PATH"] = os.path.join(self.tmpdir.name, "annual.db")
+        init_db()
+        service = PayCalendarService()
+        schedule = service.create_schedule_version(
+            name="Test",
+            timezone_name="America/Montreal",
+            period_length_days=14,
+            pay_date_offset_days=4,
+            anchor_start_local="2024-12-22T06:00:00",
+            effective_from=date(2024, 12, 22),
+        )
+        service.ensure_periods(schedule["id"], date(2024, 12, 22), date(2025, 3, 1))
+        context = PayrollContext(service)
+        self.context = context
+        employees_repo.add_employee("Alice", "service", 4, employee_number="7")
+        employees_repo.add_employee("Bob", "busboy", 1, employee_number="9")
+
+        shifts = [
+            ("28-12-2024", True, {"A": 5000, "F": 900}),
+            ("06-01-2025", True, {"A": 1000, "F": 50.05}),
+            ("20-01-2025", True, {"A": 500.5, "F": 40}),
+            ("03-02-2025", True, {"A": 200, "F": 30}),
+            ("10-02-2025", False, {"A": 9000, "F": 900}),
+        ]
+        for day, confirmed, amounts in shifts:
+            period = context.period_for_local_date(date(int(day[6:]), int(day[3:5]), int(day[:2])))
+            created = create_distribution(
+                pay_period_id=period["id"],
+                date_local=day,
+                shift="SOIR",
+                inputs={},
+                declaration_inputs={},
+                employees=[
+                    {"employee_id": "7", "name": "Alice", "section": "Service", "hours": 5, **amounts},
+                    {"employee_id": "9", "name": "Bob", "section": "Bussboy", "hours": 4, "D": 12.5},
+                    {"employee_id": "9", "name": "Bob", "section": "Service", "hours": 1, "A": 100, "F": 1},
+                ],
+            )
+            if confirmed:
+                set_distribution_status(created["id"], "CONFIRMED")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        os.environ.pop("TIPSPLIT_DB_PATH", None)
+
+    def test_year_totals_and_declared_rule(self):
+        rows = {(r["employee_number"], r["role"]): r for r in annual_declaration_rows(2025)}
+        self.assertEqual(set(rows), {("7", "service"), ("9", "service"), ("9", "busboy")})
+
+        alice = rows[("7", "service")]
+        self.assertEqual(alice["shift_count"], 3)
+        self.assertEqual(alice["A_cents"], 170050)
+        self.assertEqual(alice["F_cents"], 12005)
+        # 8% of 1700.50 = 136.04 > F 120.05
+        self.assertEqual((alice["declared_cents"], alice["declared_label"]), (13604, "8% des ventes"))
+        self.assertEqual([m["month"] for m in alice["months"]], ["2025-01", "2025-02"])
+        self.assertEqual(alice["months"][0]["A_cents"], 150050)
+
+        bob = rows[("9", "busboy")]
+        self.assertEqual((bob["declared_cents"], bob["declared_label"]), (3750, "D"))
+        self.assertEqual(rows[("9", "service")]["declared_cents"], 2400)
+
+        self.assertEqual([r["shift_count"] for r in annual_declaration_rows(2024)], [1, 1, 1])
+        unconfirmed = {(r["employee_number"], r["role"]): r for r in annual_declaration_rows(2025, status=None)}
+        self.assertEqual(unconfirmed[("7", "service")]["shift_count"], 4)
+
+    def test_employee_renamed_mid_year_stays_one_row(self):
+        # Not on the roster: keyed by number, named as typed on each distribution.
+        for day, name, amount in (("07-01-2025", "Aaron Roy", 300), ("04-02-2025", "Zack Roy", 400)):
+            period = self.context.period_for_local_date(date(2025, int(day[3:5]), int(day[:2])))
+            created = create_distribution(
+                pay_period_id=period["id"],
+                date_local=day,
+                shift="MATIN",
+                inputs={},
+                declaration_inputs={},
+                employees=[{"employee_id": "55", "name": name, "section": "Service", "hours": 6, "A": amount}],
+            )
+            set_distribution_status(created["id"], "CONFIRMED")
+
+        renamed = [r for r in annual_declaration_rows(2025) if r["employee_number"] == "55"]
+        self.assertEqual(len(renamed), 1)
+        self.assertEqual(renamed[0]["employee_name"], "Zack Roy")
+        self.assertEqual(renamed[0]["A_cents"], 70000)
+        self.assertEqual([m["month"] for m in renamed[0]["months"]], ["2025-01", "2025-02"])
+
+    def test_csv_and_pdf_exports(self):
+        from Export import export_annual_declaration_csv, export_annual_declaration_pdfs
+
+        out_path = os.path.join(self.tmpdir.name, "annual.csv")
+        export_annual_declaration_csv(2025, out_path)
+        with open(out_path, newline="", encoding="utf-8") as fh:
+            rows = list(csv.DictReader(fh))
+        self.assertEqual([(r["employee_id"], r["role"]) for r in rows], [("7", "service"), ("9", "service"), ("9", "busboy")])
+        self.assertEqual(rows[0]["A_total"], "1700.50")
+        self.assertEqual((rows[0]["declared_amount"], rows[0]["declared_source"]), ("136.04", "A_8pct"))
+        self.assertEqual((rows[2]["declared_amount"], rows[2]["declared_source"]), ("37.50", "D"))
+
+        pdf_dir = os.path.join(self.tmpdir.name, "pdf")
+        paths = export_annual_declaration_pdfs(2025, out_dir=pdf_dir)
+        self.assertEqual(len(paths), 3)
+        self.assertTrue(all(os.path.getsize(path) > 0 for path in paths))
+
+
+if __name__ == "__main__":
+    unittest.main()
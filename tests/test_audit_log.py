@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+from datetime import date, datetime, timedelta, timezone
+
+from db.audit_log import AuditBuffer, archive_audit, list_audit_entries
+from db.db_manager import db_session, init_db
+from db.distributions_repo import (
+    create_distribution,
+    create_distributions_bulk,
+    delete_distribution,
+    search_distributions,
+    set_distribution_status,
+)
+from payroll.pay_calendar import PayCalendarService
+
+
+class AuditLogTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["TIPSPLIT_DB_PATH"] = os.path.join(self.tmpdir.name, "audit.db")
+        init_db()
+        service = PayCalendarService()
+        schedule = service.create_schedule_version(
+            name="Test",
+            timezone_name="America/Montreal",
+            period_length_days=14,
+            pay_date_offset_days=4,
+            anchor_start_local="2025-01-05T06:00:00",
+            effective_from=date(2025, 1, 5),
+        )
+        service.ensure_periods(schedule["id"], date(2025, 1, 5), date(2025, 1, 18))
+        self.period_id = service.list_periods(schedule["id"])[0]["id"]
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        os.environ.pop("TIPSPLIT_DB_PATH", None)
+
+    def _record(self, day, shift="SOIR"):
+        return {
+            "pay_period_id": self.period_id,
+            "date_local": f"{day:02d}-01-2025",
+            "shift": shift,
+            "inputs": {},
+            "declaration_inputs": {},
+            "employees": [{"employee_id": "12", "name": "Alice Tremblay", "section": "Service"}],
+        }
+
+    def _audit_count(self, table="distribution_audit"):
+        with db_session() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def test_structured_columns_and_transactional_buffer(self):
+        single = create_distribution(created_by="gestion", **self._record(6))
+        bulk = create_distributions_bulk([self._record(7), self._record(8)], created_by="import")
+        set_distribution_status(single["id"], "CONFIRMED", actor="Sophie")
+
+        [confirmed] = list_audit_entries(actor="Sophie")
+        self.assertEqual(confirmed["action"], "status:CONFIRMED")
+        self.assertEqual((confirmed["date_iso"], confirmed["shift"]), ("2025-01-06", "SOIR"))
+        [bulk_row] = list_audit_entries(pay_period_id=self.period_id, action="bulk_created")
+        self.assertEqual(bulk_row["distribution_id"], bulk["created"][0]["id"])
+        self.assertEqual(bulk_row["item_count"], 2)
+        self.assertEqual(bulk_row["details"]["last_id"], bulk["created"][1]["id"])
+        self.assertEqual(
+            [entry["action"] for entry in list_audit_entries(distribution_id=single["id"])],
+            ["status:CONFIRMED", "created"],
+        )
+
+        # Buffered rows are written with the transaction, and dropped with it.
+        before = self._audit_count()
+        with self.assertRaises(RuntimeError):
+            with db_session() as conn, AuditBuffer(conn) as audit:
+                audit.add(single["id"], "note", actor="test")
+                raise RuntimeError("rollback")
+        self.assertEqual(self._audit_count(), before)
+        with db_session() as conn, AuditBuffer(conn, flush_size=2) as audit:
+            for _ in range(5):
+                audit.add(single["id"], "note", actor="test")
+            self.assertEqual(len(audit.rows), 1)
+        self.assertEqual(len(list_audit_entries(action="note")), 5)
+
+    def test_delete_and_retention_move_rows_to_archive(self):
+        first = create_distribution(created_by="gestion", **self._record(6))
+        second = create_distribution(created_by="gestion", **self._record(7))
+        set_distribution_status(second["id"], "CONFIRMED", actor="Sophie")
+
+        delete_distribution(first["id"], actor="gestion")
+        self.assertEqual(list_audit_entries(distribution_id=first["id"]), [])
+        archived = list_audit_entries(distribution_id=first["id"], include_archived=True)
+        self.assertEqual([entry["action"] for entry in archived], ["deleted", "created"])
+        self.assertTrue(all(entry["archived"] for entry in archived))
+
+        # Age the remaining rows: the creation past retention, the confirmation not.
+        now = datetime.now(timezone.utc)
+        with db_session() as conn:
+            conn.execute(
+                "UPDATE distribution_audit SET created_at = ? WHERE action = 'created'",
+                ((now - timedelta(days=800)).isoformat(),),
+            )
+        self.assertEqual(archive_audit(older_than_days=730, batch_size=1, now=now), 1)
+        self.assertEqual(archive_audit(older_than_days=730, now=now), 0)
+        self.assertEqual([entry["action"] for entry in list_audit_entries()], ["status:CONFIRMED"])
+        self.assertEqual(self._audit_count("distribution_audit_archive"), 3)
+        self.assertEqual([row["id"] for row in search_distributions("sophie")], [second["id"]])
+        with self.assertRaises(ValueError):
+            archive_audit(older_than_days=-1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+from datetime import date, datetime, timedelta, timezone
+
+from db.backup import (
+    BackupError,
+    BackupScheduler,
+    create_backup,
+    list_backups,
+    restore_backup,
+    rotate_backups,
+    verify_backup,
+)
+from db.db_manager import SCHEMA_VERSION, db_session, init_db
+from db.distributions_repo import create_distribution, get_distribution
+from payroll.pay_calendar import PayCalendarService
+
+
+class BackupTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["TIPSPLIT_DB_PATH"] = os.path.join(self.tmpdir.name, "live.db")
+        init_db()
+        service = PayCalendarService()
+        schedule = service.create_schedule_version(
+            name="Test",
+            timezone_name="America/Montreal",
+            period_length_days=14,
+            pay_date_offset_days=4,
+            anchor_start_local="2025-01-05T06:00:00",
+            effective_from=date(2025, 1, 5),
+        )
+        service.ensure_periods(schedule["id"], date(2025, 1, 5), date(2025, 1, 18))
+        self.period_id = service.list_periods(schedule["id"])[0]["id"]
+        self.backup_dir = os.path.join(self.tmpdir.name, "backups")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        os.environ.pop("TIPSPLIT_DB_PATH", None)
+
+    def _create(self, day):
+        return create_distribution(
+            pay_period_id=self.period_id,
+            date_local=f"{day:02d}-01-2025",
+            shift="SOIR",
+            inputs={},
+            declaration_inputs={},
+            employees=[{"employee_id": "12", "name": "Alice", "section": "Service", "cash": 10}],
+            created_by="gestion",
+        )["id"]
+
+    def _count(self):
+        with db_session() as conn:
+            return conn.execute("SELECT COUNT(*) FROM distributions").fetchone()[0]
+
+    def test_backup_verify_and_restore(self):
+        kept = self._create(6)
+        steps = []
+        backup = create_backup(pages=2, pause=0, progress=lambda *args: steps.append(args))
+        self.assertGreater(len(steps), 1)
+        self.assertTrue(backup["path"].endswith(".db.gz"))
+        self.assertEqual(verify_backup(backup["path"])["schema_version"], backup["schema_version"])
+        self.assertEqual([item["path"] for item in list_backups()], [backup["path"]])
+
+        added = self._create(7)
+        self.assertIsNotNone(get_distribution(added))
+        result = restore_backup(backup["path"])
+        self.assertEqual(self._count(), 1)
+        self.assertIsNone(get_distribution(added))
+        self.assertIsNotNone(get_distribution(kept))
+        # The state before the restore was saved first.
+        self.assertEqual(verify_backup(result["saved"])["path"], result["saved"])
+
+        broken = os.path.join(self.tmpdir.name, "broken.db.gz")
+        with gzip.open(broken, "wb") as handle:
+            handle.write(b"pas une base" * 100)
+        with self.assertRaises(BackupError):
+            verify_backup(broken)
+        with self.assertRaises(BackupError):
+            restore_backup(broken)
+        self.assertEqual(self._count(), 1)
+
+    def test_restore_refuses_a_backup_from_a_newer_schema(self):
+        self._create(6)
+        backup = create_backup()
+        newer = os.path.join(self.tmpdir.name, "newer.db")
+        with gzip.open(backup["path"], "rb") as src, open(newer, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        conn = sqlite3.connect(newer)
+        with conn:
+            conn.execute(
+                "UPDATE schema_meta SET value = ? WHERE key = 'schema_version'", (str(SCHEMA_VERSION + 1),)
+            )
+        conn.close()
+        with open(newer, "rb") as src, gzip.open(newer + ".gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        self._create(7)
+
+        with self.assertRaises(BackupError):
+            restore_backup(newer + ".gz")
+        self.assertEqual(self._count(), 2)
+        self.assertEqual([item["path"] for item in list_backups()], [backup["path"]])
+
+    def test_rotation_keeps_newest_per_day_week_and_month(self):
+        os.makedirs(self.backup_dir)
+        day = date(2025, 1, 1)
+        while day <= date(2025, 3, 31):
+            open(os.path.join(self.backup_dir, f"tipsplit-{day:%Y%m%d}-030000.db.gz"), "wb").close()
+            day += timedelta(days=1)
+        rotate_backups(directory=self.backup_dir, retention={"daily": 7, "weekly": 5, "monthly": 12})
+        kept = sorted(item["created_at"].date().isoformat() for item in list_backups(self.backup_dir))
+        self.assertEqual(
+            kept,
+            ["2025-01-31", "2025-02-28", "2025-03-09", "2025-03-16", "2025-03-23"]
+            + [f"2025-03-{d}" for d in range(25, 32)],
+        )
+
+    def test_scheduler_runs_work_off_the_calling_thread(self):
+        done = threading.Event()
+        results = []
+
+        def on_result(kind, result, error):
+            results.append((kind, result, error, threading.current_thread().name))
+            done.set()
+
+        scheduler = BackupScheduler(directory=self.backup_dir, check_seconds=60, on_result=on_result)
+        self.assertTrue(scheduler.is_due())
+        scheduler.start()
+        try:
+            scheduler.backup_now()
+            self.assertTrue(done.wait(10))
+        finally:
+            scheduler.stop()
+        [(kind, result, error, thread_name)] = results
+        self.assertEqual((kind, error, thread_name), ("backup", None, "tipsplit-backup"))
+        self.assertTrue(os.path.exists(result["path"]))
+        self.assertFalse(scheduler.is_due())
+        self.assertTrue(scheduler.is_due(now=datetime.now(timezone.utc) + timedelta(days=2)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+from benchmarks.run import compare
+
+
+class BenchmarkCompareTests(unittest.TestCase):
+    def test_flags_only_regressions_beyond_threshold_and_noise_floor(self):
+        baseline = {
+            "slow_path": {"min_ms": 100.0},
+            "stable_path": {"min_ms": 50.0},
+            "tiny_path": {"min_ms": 0.5},
+        }
+        results = {
+            "slow_path": {"min_ms": 140.0},
+            "stable_path": {"min_ms": 55.0},
+            "tiny_path": {"min_ms": 1.5},
+            "new_path": {"min_ms": 10.0},
+        }
+        rows = {row["name"]: row for row in compare(results, baseline, threshold_pct=25.0, noise_floor_ms=2.0)}
+        self.assertEqual(set(rows), {"slow_path", "stable_path", "tiny_path"})
+        self.assertTrue(rows["slow_path"]["regressed"])
+        self.assertEqual(rows["slow_path"]["change_pct"], 40.0)
+        self.assertFalse(rows["stable_path"]["regressed"])
+        # +200% but only one millisecond slower: below the noise floor.
+        self.assertFalse(rows["tiny_path"]["regressed"])
+
+    def test_refuses_a_baseline_from_another_dataset(self):
+        meta = {"years": 2.0, "employees": 300, "seed": 1, "recorded_at": "2026-01-01T00:00:00+00:00"}
+        results = {"case": {"min_ms": 10.0}}
+        rows = compare(results, results, meta=meta, baseline_meta={**meta, "recorded_at": "2026-02-01T00:00:00+00:00"})
+        self.assertEqual(len(rows), 1)
+        with self.assertRaises(ValueError) as raised:
+            compare(results, results, meta=meta, baseline_meta={**meta, "employees": 30})
+        self.assertIn("employees=30", str(raised.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
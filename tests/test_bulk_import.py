@@ -0,0 +1,150 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from db import employees_repo
+from db.db_manager import db_session, init_db
+from db.distributions_repo import (
+    create_distribution,
+    create_distributions_bulk,
+    delete_distribution,
+    get_distribution,
+    invalidate_distribution_cache,
+    set_distribution_status_bulk,
+)
+from payroll.pay_calendar import PayCalendarService
+
+
+class BulkImportTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["TIPSPLIT_DB_PATH"] = os.path.join(self.tmpdir.name, "bulk.db")
+        init_db()
+        self.service = PayCalendarService()
+        schedule = self.service.create_schedule_version(
+            name="Test",
+            timezone_name="America/Montreal",
+            period_length_days=14,
+            pay_date_offset_days=4,
+            anchor_start_local="2025-01-05T06:00:00",
+            effective_from=date(2025, 1, 5),
+        )
+        self.service.ensure_periods(schedule["id"], date(2025, 1, 5), date(2025, 2, 1))
+        self.open_id, self.locked_id = [p["id"] for p in self.service.list_periods(schedule["id"])][-2:]
+        self.service.lock_period(self.locked_id)
+        self.alice = employees_repo.add_employee("Alice Tremblay", "service", 4, employee_number="12")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        os.environ.pop("TIPSPLIT_DB_PATH", None)
+
+    def _record(self, day, shift="SOIR", period_id=None, **extra):
+        return {
+            "pay_period_id": period_id or self.open_id,
+            "date_local": f"{day:02d}-01-2025",
+            "shift": shift,
+            "inputs": {"Ventes Nettes": "1200.50", "Dépot Net": -80, "Frais Admin": 24.01, "Cash": 35},
+            "declaration_inputs": {"Ventes Totales": 1400, "Clients": "31", "Tips due": 150, "Ventes Nourriture": 700},
+            "employees": [
+                {"employee_id": "12", "name": "Alice Tremblay", "section": "Service", "hours": 6.5, "cash": 20, "A": 96.04},
+                {"employee_id": "", "name": "Inconnu", "section": "Bussboy", "hours": 5, "D": 18},
+            ],
+            **extra,
+        }
+
+    def _audit_actions(self):
+        with db_session() as conn:
+            return [row["action"] for row in conn.execute("SELECT action FROM distribution_audit ORDER BY id")]
+
+    def test_bulk_rows_match_single_create(self):
+        single = create_distribution(created_by="gestion", **self._record(6))
+        result = create_distributions_bulk([self._record(7), self._record(8, shift="matin")], created_by="import")
+        self.assertEqual(result["errors"], [])
+        self.assertEqual([item["index"] for item in result["created"]], [0, 1])
+        self.assertEqual([item["id"] for item in result["created"]], [single["id"] + 1, single["id"] + 2])
+        self.assertEqual(result["created"][0]["dist_ref"], f"DIST-2025-{single['id'] + 1:06d}")
+
+        expected = get_distribution(single["id"])
+        bulk = get_distribution(result["created"][0]["id"])
+        for key in ("inputs", "declaration_inputs", "employees", "status"):
+            self.assertEqual(bulk[key], expected[key], key)
+        self.assertEqual(bulk["dist_ref"], result["created"][0]["dist_ref"])
+        self.assertEqual(bulk["employees"][0]["employee_db_id"], self.alice)
+        self.assertEqual(get_distribution(result["created"][1]["id"])["shift"], "MATIN")
+
+        confirmed = create_distributions_bulk([self._record(9)], created_by="import", status="confirmed")
+        stored = get_distribution(confirmed["created"][0]["id"])
+        self.assertEqual((stored["status"], stored["confirmed_by"]), ("CONFIRMED", "import"))
+        self.assertTrue(stored["confirmed_at"])
+
+    def test_errors_are_isolated_per_record(self):
+        records = [
+            self._record(20),
+            self._record(20),  # duplicate date/shift/instance
+            self._record(21, period_id=self.locked_id),
+            self._record(21, shift=""),
+            self._record(22),
+            self._record(23, period_id="inconnue"),
+            self._record(24),
+        ]
+        result = create_distributions_bulk(records, batch_size=3)
+        self.assertEqual([item["index"] for item in result["created"]], [0, 4, 6])
+        self.assertEqual([item["index"] for item in result["errors"]], [1, 2, 3, 5])
+        self.assertIn("UNIQUE", result["errors"][0]["error"])
+        self.assertIn("verrouillée", result["errors"][1]["error"])
+        self.assertEqual(result["errors"][3]["error"], "Période de paie introuvable.")
+
+        ids = [item["id"] for item in result["created"]]
+        self.assertEqual(ids, list(range(ids[0], ids[0] + 3)))
+        with db_session() as conn:
+            counts = {
+                table: conn.execute(f"SELECT COUNT(*) AS c FROM {table}").fetchone()["c"]
+                for table in ("distributions", "distribution_inputs", "distribution_declaration_inputs")
+            }
+            employees = conn.execute("SELECT COUNT(*) AS c FROM distribution_employees").fetchone()["c"]
+        self.assertEqual(counts, dict.fromkeys(counts, 3))
+        self.assertEqual(employees, 6)
+        # Batches: [0, 1, 4] (1 rejected on retry) and [6].
+        self.assertEqual(self._audit_actions(), ["bulk_created", "bulk_created"])
+
+    def test_ids_are_not_reused_after_delete(self):
+        first = create_distributions_bulk([self._record(6), self._record(7)])["created"]
+        delete_distribution(first[-1]["id"])
+        again = create_distributions_bulk([self._record(8)])["created"]
+        self.assertEqual(again[0]["id"], first[-1]["id"] + 1)
+
+    def test_status_bulk_by_ids_and_period(self):
+        ids = [item["id"] for item in create_distributions_bulk([self._record(day) for day in range(6, 11)])["created"]]
+        self.assertEqual(get_distribution(ids[0])["status"], "UNCONFIRMED")  # cached before the update
+
+        result = set_distribution_status_bulk("confirmed", ids=ids[:2], actor="gestion")
+        self.assertEqual(result, {"updated": 2, "ids": ids[:2]})
+        self.assertEqual(get_distribution(ids[0])["status"], "CONFIRMED")
+        self.assertEqual(get_distribution(ids[0])["confirmed_by"], "gestion")
+
+        # Whole period: already confirmed rows are left alone.
+        result = set_distribution_status_bulk("CONFIRMED", pay_period_id=self.open_id, actor="gestion")
+        self.assertEqual(result["ids"], ids[2:])
+        with db_session() as conn:
+            statuses = {row["status"] for row in conn.execute("SELECT status FROM distributions")}
+            audit = conn.execute(
+                "SELECT COUNT(*) AS c FROM distribution_audit WHERE action = 'status:CONFIRMED'"
+            ).fetchone()["c"]
+        self.assertEqual(statuses, {"CONFIRMED"})
+        self.assertEqual(audit, 5)
+        self.assertEqual(set_distribution_status_bulk("CONFIRMED", ids=ids)["updated"], 0)
+
+        self.service.lock_period(self.open_id)
+        with self.assertRaisesRegex(ValueError, "verrouillée"):
+            set_distribution_status_bulk("UNCONFIRMED", pay_period_id=self.open_id)
+        invalidate_distribution_cache()
+        self.assertEqual(get_distribution(ids[-1])["status"], "CONFIRMED")
+        with self.assertRaises(ValueError):
+            set_distribution_status_bulk("CONFIRMED", ids=ids, pay_period_id=self.open_id)
+        with self.assertRaisesRegex(ValueError, "introuvable"):
+            set_distribution_status_bulk("CONFIRMED", pay_period_id="inconnue")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from datetime import date
+from unittest import mock
+
+import db.db_manager as db_manager
+import db.distributions_repo as distributions_repo
+from db.concurrency_stress import run_stress
+from db.db_manager import ConflictError, DatabaseBusyError, init_db
+from db.distributions_repo import (
+    create_distribution,
+    delete_distribution,
+    get_distribution,
+    invalidate_distribution_cache,
+    set_distribution_status,
+    set_distribution_status_bulk,
+)
+from db.employees_repo import add_employee, list_employees, update_employee, upsert_many, upsert_roles
+from payroll.pay_calendar import PayCalendarService
+
+
+class ConcurrencyTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "concurrency.db")
+        os.environ["TIPSPLIT_DB_PATH"] = self.db_path
+        init_db()
+        invalidate_distribution_cache()
+
+    def tearDown(self):
+        invalidate_distribution_cache()
+        self.tmpdir.cleanup()
+        os.environ.pop("TIPSPLIT_DB_PATH", None)
+        os.environ.pop("TIPSPLIT_DB_BUSY_TIMEOUT_MS", None)
+
+    def _distribution(self):
+        return self._distribution_with([{"employee_id": "12", "name": "Alice Tremblay", "section": "Service"}])
+
+    def _distribution_with(self, employees):
+        service = PayCalendarService()
+        schedule = service.create_schedule_version(
+            name="Test",
+            timezone_name="America/Montreal",
+            period_length_days=14,
+            pay_date_offset_days=4,
+            anchor_start_local="2025-01-05T06:00:00",
+            effective_from=date(2025, 1, 5),
+        )
+        service.ensure_periods(schedule["id"], date(2025, 1, 5), date(2025, 1, 18))
+        return create_distribution(
+            pay_period_id=service.list_periods(schedule["id"])[0]["id"],
+            date_local="06-01-2025",
+            shift="SOIR",
+            inputs={},
+            declaration_inputs={},
+            employees=employees,
+        )
+
+    def test_processes_writing_together_lose_nothing(self):
+        summary = run_stress(os.path.join(self.tmpdir.name, "stress.db"), workers=4, distributions=8, increments=8)
+
+        self.assertEqual(summary["problems"], [])
+        self.assertEqual((summary["distributions"], summary["increments"]), (32, 32))
+        self.assertEqual(os.environ["TIPSPLIT_DB_PATH"], self.db_path)
+
+    def test_stale_versions_raise_conflicts(self):
+        alice = add_employee("Alice", "service", 5)
+        [row] = list_employees(role="service")
+        update_employee(alice, points=6, expected_version=row["version"])
+        with self.assertRaises(ConflictError):
+            update_employee(alice, points=7, expected_version=row["version"])
+
+        loaded = {emp["id"]: emp["version"] for emp in list_employees(role="service")}
+        add_employee("Bruno", "service", 3)  # saved meanwhile on another terminal
+        with self.assertRaises(ConflictError):
+            upsert_many("service", [{"id": alice, "name": "Alice", "points": 8}], expected_versions=loaded)
+        current = {emp["id"]: emp["version"] for emp in list_employees(role="service")}
+        roster = [{"id": emp["id"], "name": emp["name"], "points": emp["points"]} for emp in list_employees(role="service")]
+        self.assertEqual(upsert_many("service", roster, expected_versions=current), (0, 0, 0))
+
+        created = self._distribution()
+        version = get_distribution(created["id"])["version"]
+        set_distribution_status(created["id"], "CONFIRMED", expected_version=version)
+        with self.assertRaises(ConflictError):
+            delete_distribution(created["id"], expected_version=version)
+        delete_distribution(created["id"], expected_version=version + 1)
+
+    def test_roles_are_saved_together_or_not_at_all(self):
+        alice = add_employee("Alice", "service", 5)
+        bruno = add_employee("Bruno", "busboy", 3)
+        loaded = {role: {e["id"]: e["version"] for e in list_employees(role=role)} for role in ("service", "busboy")}
+        update_employee(bruno, points=4, expected_version=loaded["busboy"][bruno])  # another terminal
+
+        rosters = {
+            "service": [{"id": alice, "name": "Alice", "points": 9}],
+            "busboy": [{"id": bruno, "name": "Bruno", "points": 2}],
+        }
+        with self.assertRaises(ConflictError):
+            upsert_roles(rosters, expected_versions=loaded)
+        self.assertEqual([e["points"] for e in list_employees(role="service")], [5])
+
+        loaded["busboy"] = {e["id"]: e["version"] for e in list_employees(role="busboy")}
+        summary = upsert_roles(rosters, expected_versions=loaded)
+        self.assertEqual(summary, {"service": (0, 1, 0), "busboy": (0, 1, 0)})
+        self.assertEqual([e["points"] for e in list_employees()], [9, 2])
+
+    def test_cache_sees_commits_from_another_connection(self):
+        created = self._distribution()
+        self.assertEqual(get_distribution(created["id"])["status"], "UNCONFIRMED")
+
+        other = sqlite3.connect(self.db_path)
+        with other:
+            other.execute("UPDATE distributions SET status = 'CONFIRMED' WHERE id = ?", (created["id"],))
+        other.close()
+
+        self.assertEqual(get_distribution(created["id"])["status"], "CONFIRMED")
+
+    def test_retried_writes_keep_one_shot_arguments(self):
+        real_session = distributions_repo.write_session
+        failures = []
+
+        def locked_once():
+            if not failures:
+                failures.append(1)
+                raise sqlite3.OperationalError("database is locked")
+            return real_session()
+
+        lines = ({"employee_id": str(n), "name": f"Employé {n}", "section": "Service"} for n in (1, 2))
+        with mock.patch.object(db_manager, "_backoff", lambda attempt: None), mock.patch.object(
+            distributions_repo, "write_session", locked_once
+        ):
+            created = self._distribution_with(lines)
+            self.assertEqual(len(get_distribution(created["id"])["employees"]), 2)
+
+            failures.clear()
+            result = set_distribution_status_bulk("CONFIRMED", ids=iter([created["id"]]))
+        self.assertEqual(result["updated"], 1)
+        self.assertEqual(get_distribution(created["id"])["status"], "CONFIRMED")
+
+    def test_write_lock_is_retried_then_reported(self):
+        os.environ["TIPSPLIT_DB_BUSY_TIMEOUT_MS"] = "10"
+        holder = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        holder.execute("BEGIN IMMEDIATE")
+        with mock.patch.object(db_manager.random, "uniform", lambda low, high: high):
+            with self.assertRaises(DatabaseBusyError):
+                add_employee("Alice", "service", 5)
+
+            release = threading.Timer(0.2, lambda: holder.execute("COMMIT"))
+            release.start()
+            add_employee("Alice", "service", 5)
+            release.join()
+        holder.close()
+
+        self.assertEqual([emp["name"] for emp in list_employees()], ["Alice"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,8 +4,72 @@ import tempfile
 import unittest
 from datetime import datetime, timezone
 
+import db.db_manager as db_manager
 from db.db_manager import init_db, db_session
 
+# Schema 3/4 layout: UUID TEXT primary keys on schedules and periods.
+_UUID_KEYED_SCHEMA = """
+CREATE TABLE schema_meta(key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE employees (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, role TEXT NOT NULL,
+    points REAL NOT NULL DEFAULT 0, employee_number TEXT, email TEXT,
+    is_active INTEGER NOT NULL DEFAULT 1, created_at TEXT NOT NULL, updated_at TEXT NOT NULL
+);
+CREATE TABLE pay_schedules (
+    id TEXT PRIMARY KEY, group_key TEXT NOT NULL DEFAULT 'default', name TEXT NOT NULL,
+    timezone TEXT NOT NULL DEFAULT 'America/Montreal', period_length_days INTEGER NOT NULL DEFAULT 14,
+    pay_date_offset_days INTEGER NOT NULL DEFAULT 4, anchor_start_local TEXT NOT NULL,
+    effective_from TEXT NOT NULL, effective_to TEXT, created_at TEXT NOT NULL, updated_at TEXT NOT NULL
+);
+CREATE TABLE pay_periods (
+    id TEXT PRIMARY KEY, schedule_id TEXT NOT NULL, start_at_utc TEXT NOT NULL, end_at_utc TEXT NOT NULL,
+    pay_date_local TEXT NOT NULL, label_year INTEGER NOT NULL, sequence_in_year INTEGER NOT NULL,
+    display_id TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'OPEN', locked_at_utc TEXT, payed_at_utc TEXT,
+    created_at TEXT NOT NULL, updated_at TEXT NOT NULL,
+    FOREIGN KEY(schedule_id) REFERENCES pay_schedules(id) ON DELETE CASCADE,
+    UNIQUE(schedule_id, start_at_utc), UNIQUE(schedule_id, display_id)
+);
+CREATE INDEX idx_pay_periods_sched_start ON pay_periods(schedule_id, start_at_utc);
+CREATE TABLE pay_period_overrides (
+    id TEXT PRIMARY KEY, period_id TEXT NOT NULL, admin_actor TEXT, field_name TEXT NOT NULL,
+    old_value TEXT, new_value TEXT, reason TEXT NOT NULL, created_at TEXT NOT NULL,
+    FOREIGN KEY(period_id) REFERENCES pay_periods(id) ON DELETE CASCADE
+);
+CREATE TABLE shifts (
+    id TEXT PRIMARY KEY, employee_id INTEGER, period_id TEXT NOT NULL, shift_start_at_utc TEXT NOT NULL,
+    shift_end_at_utc TEXT, created_at TEXT NOT NULL, updated_at TEXT NOT NULL,
+    FOREIGN KEY(employee_id) REFERENCES employees(id), FOREIGN KEY(period_id) REFERENCES pay_periods(id)
+);
+CREATE TABLE distributions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, dist_ref TEXT UNIQUE, pay_period_id TEXT NOT NULL,
+    date_local TEXT NOT NULL, shift TEXT NOT NULL, shift_instance INTEGER NOT NULL DEFAULT 1,
+    status TEXT NOT NULL DEFAULT 'UNCONFIRMED', created_at TEXT NOT NULL, confirmed_at TEXT,
+    created_by TEXT, confirmed_by TEXT,
+    FOREIGN KEY(pay_period_id) REFERENCES pay_periods(id) ON DELETE CASCADE,
+    UNIQUE(pay_period_id, date_local, shift, shift_instance)
+);
+CREATE INDEX idx_distributions_period_status ON distributions(pay_period_id, status);
+CREATE TABLE distribution_inputs (
+    distribution_id INTEGER PRIMARY KEY, ventes_nettes REAL, depot_net REAL, frais_admin REAL, cash REAL,
+    FOREIGN KEY(distribution_id) REFERENCES distributions(id) ON DELETE CASCADE
+);
+CREATE TABLE distribution_declaration_inputs (
+    distribution_id INTEGER PRIMARY KEY, ventes_totales REAL, clients INTEGER, tips_due REAL,
+    ventes_nourriture REAL, FOREIGN KEY(distribution_id) REFERENCES distributions(id) ON DELETE CASCADE
+);
+CREATE TABLE distribution_employees (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, distribution_id INTEGER NOT NULL, employee_number TEXT,
+    employee_name TEXT NOT NULL, section TEXT, hours REAL, cash REAL, sur_paye REAL, frais_admin REAL,
+    A REAL, B REAL, D REAL, E REAL, F REAL,
+    FOREIGN KEY(distribution_id) REFERENCES distributions(id) ON DELETE CASCADE
+);
+CREATE TABLE distribution_audit (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, distribution_id INTEGER NOT NULL, action TEXT NOT NULL,
+    actor TEXT, created_at TEXT NOT NULL, details_json TEXT,
+    FOREIGN KEY(distribution_id) REFERENCES distributions(id) ON DELETE CASCADE
+);
+"""
+
 
 class DbManagerSafetyTests(unittest.TestCase):
     def setUp(self):
@@ -55,5 +119,213 @@ class DbManagerSafetyTests(unittest.TestCase):
             self.assertIsNotNone(meta)
 
 
+
+class UuidKeyMigrationTests(unittest.TestCase):
+    """Schemas 3 and 4 keyed schedules/periods by UUID; schema 5 uses INTEGER keys."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "v4.db")
+        os.environ["TIPSPLIT_DB_PATH"] = self.db_path
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        os.environ.pop("TIPSPLIT_DB_PATH", None)
+
+    def _build_uuid_keyed_db(self, version):
+        now = datetime.now(timezone.utc).isoformat()
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript(_UUID_KEYED_SCHEMA)
+        if version >= 4:
+            conn.execute("CREATE INDEX idx_distribution_audit_dist ON distribution_audit(distribution_id)")
+        conn.execute("INSERT INTO schema_meta VALUES ('schema_version', ?)", (str(version),))
+        conn.execute(
+            "INSERT INTO pay_schedules(id, name, anchor_start_local, effective_from, created_at, updated_at)"
+            " VALUES ('sched-uuid', 'Horaire', '2025-01-05T06:00:00', '2025-01-05', ?, ?)",
+            (now, now),
+        )
+        for index in range(3):
+            conn.execute(
+                "INSERT INTO pay_periods(id, schedule_id, start_at_utc, end_at_utc, pay_date_local, label_year,"
+                " sequence_in_year, display_id, created_at, updated_at)"
+                " VALUES (?, 'sched-uuid', ?, ?, '2025-01-23', 2025, ?, ?, ?, ?)",
+                (f"period-{index}", f"2025-01-{5 + 14 * index:02d}", f"2025-01-{19 + 14 * index:02d}",
+                 index + 1, f"2025-{index + 1:02d}", now, now),
+            )
+        conn.execute(
+            "INSERT INTO pay_period_overrides VALUES ('ovr-1', 'period-1', 'admin', 'pay_date_local',"
+            " '2025-02-06', '2025-02-07', 'test', ?)",
+            (now,),
+        )
+        conn.execute(
+            "INSERT INTO employees(name, role, created_at, updated_at) VALUES ('ALICE', 'service', ?, ?)", (now, now)
+        )
+        for dist_id in range(1, 8):
+            conn.execute(
+                "INSERT INTO distributions(id, dist_ref, pay_period_id, date_local, shift, created_at)"
+                " VALUES (?, ?, ?, '06-01-2025', ?, ?)",
+                (dist_id, f"DIST-2025-{dist_id:06d}", f"period-{dist_id % 3}", f"S{dist_id}", now),
+            )
+            conn.execute("INSERT INTO distribution_inputs(distribution_id, cash) VALUES (?, 10.0)", (dist_id,))
+            conn.execute(
+                "INSERT INTO distribution_employees(distribution_id, employee_name, cash, F) VALUES (?, 'Alice', 1.005, 0.1)",
+                (dist_id,),
+            )
+        conn.execute(
+            "INSERT INTO distribution_audit(distribution_id, action, actor, created_at, details_json)"
+            " VALUES (4, 'bulk_created', 'import', ?, '{\"count\": 3}')",
+            (now,),
+        )
+        conn.execute("UPDATE pay_periods SET status = 'LOCKED' WHERE id = 'period-2'")
+        conn.execute("UPDATE distributions SET status = 'CONFIRMED' WHERE id = 2")
+        # A deleted distribution left the AUTOINCREMENT counter ahead of MAX(id).
+        conn.execute("UPDATE sqlite_sequence SET seq = 42 WHERE name = 'distributions'")
+        conn.commit()
+        conn.close()
+
+    def _assert_migrated(self):
+        from db.distributions_repo import get_distribution, list_distributions
+
+        with db_session() as conn:
+            version = conn.execute("SELECT value FROM schema_meta WHERE key = 'schema_version'").fetchone()["value"]
+            period_cols = {row["name"] for row in conn.execute("PRAGMA table_info(pay_periods)")}
+            employee_cols = {row["name"] for row in conn.execute("PRAGMA table_info(distribution_employees)")}
+            indexes = {row["name"] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+            self.assertEqual(conn.execute("PRAGMA foreign_key_check").fetchall(), [])
+            self.assertEqual(conn.execute("SELECT COUNT(*) AS c FROM distribution_inputs").fetchone()["c"], 7)
+            self.assertEqual(conn.execute("SELECT COUNT(*) AS c FROM pay_period_overrides").fetchone()["c"], 1)
+            seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'distributions'").fetchone()["seq"]
+        self.assertEqual(version, str(db_manager.SCHEMA_VERSION))
+        self.assertIn("schedule_pk", period_cols)
+        self.assertNotIn("schedule_id", period_cols)
+        self.assertIn("cash_cents", employee_cols)
+        self.assertNotIn("cash", employee_cols)
+        self.assertIn("idx_distributions_period_status_created", indexes)
+        self.assertIn("idx_distribution_audit_dist", indexes)
+        self.assertNotIn("idx_distributions_period_status", indexes)
+        self.assertIn("idx_shifts_employee_day", indexes)
+        self.assertEqual(seq, 42)
+
+        self.assertEqual(sorted(d["id"] for d in list_distributions(pay_period_id="period-1")), [1, 4, 7])
+        dist = get_distribution(4)
+        self.assertEqual(dist["pay_period_id"], "period-1")
+        self.assertEqual(len(dist["employees"]), 1)
+        # Schema 6: REAL money converted to cents, rounding half away from zero.
+        self.assertEqual(dist["inputs"]["Cash"], 10.0)
+        self.assertEqual(dist["employees"][0]["cash"], 1.01)
+        self.assertEqual(dist["employees"][0]["F"], 0.1)
+        # Schema 7: historical rows linked to the roster by name.
+        self.assertEqual(dist["employees"][0]["employee_db_id"], 1)
+        # Schema 8: sortable day for cross-period ranges.
+        self.assertEqual(dist["date_iso"], "2025-01-06")
+        with db_session() as conn:
+            stored = conn.execute("SELECT DISTINCT date_iso FROM distributions").fetchall()
+        self.assertEqual([row["date_iso"] for row in stored], ["2025-01-06"])
+        # Schema 9: existing rows are searchable.
+        from db.distributions_repo import search_distributions
+
+        self.assertEqual([row["id"] for row in search_distributions("alice S4")], [4])
+        # Schema 10: structured audit columns backfilled from the distribution and details.
+        from db.audit_log import list_audit_entries
+
+        [entry] = list_audit_entries(pay_period_id="period-1", action="bulk_created")
+        self.assertEqual(
+            (entry["distribution_id"], entry["date_iso"], entry["shift"], entry["item_count"]),
+            (4, "2025-01-06", "S4", 3),
+        )
+        # Schema 11: periods already locked get their snapshot.
+        from db.distributions_repo import get_period_snapshot
+
+        snapshot = get_period_snapshot("period-2")
+        self.assertEqual([d["id"] for d in snapshot["distributions"]], [2])
+        self.assertIsNone(get_period_snapshot("period-1"))
+        # Schema 13: free pages are returned incrementally.
+        with db_session() as conn:
+            self.assertEqual(conn.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+
+    def test_migration_from_v4_keeps_rows_and_ids(self):
+        self._build_uuid_keyed_db(4)
+        init_db()
+        self._assert_migrated()
+
+    def test_migration_from_v3_runs_every_step(self):
+        self._build_uuid_keyed_db(3)
+        init_db()
+        self._assert_migrated()
+
+    def test_migration_copies_in_batches(self):
+        self._build_uuid_keyed_db(4)
+        updates = []
+        with db_session() as conn:
+            steps = db_manager.apply_migrations(
+                conn, batch_size=2, progress=lambda message, fraction: updates.append(fraction)
+            )
+        self._assert_migrated()
+        self.assertEqual([step["version"] for step in steps], list(range(5, db_manager.SCHEMA_VERSION + 1)))
+        self.assertEqual(updates, sorted(updates))
+        self.assertEqual(updates[-1], 1.0)
+        # 7 distributions in windows of 2 rows: progress inside the 4 -> 5 step too.
+        self.assertGreater(len(updates), 4 * len(steps))
+
+    def test_dry_run_leaves_database_untouched(self):
+        self._build_uuid_keyed_db(4)
+        self.assertEqual(db_manager.pending_migrations()[0].version, 5)
+
+        result = db_manager.dry_run_migrations()
+
+        self.assertEqual((result["from_version"], result["to_version"]), (4, db_manager.SCHEMA_VERSION))
+        self.assertEqual(len(result["steps"]), db_manager.SCHEMA_VERSION - 4)
+        with db_session() as conn:
+            version = conn.execute("SELECT value FROM schema_meta WHERE key = 'schema_version'").fetchone()["value"]
+        self.assertEqual(version, "4")
+        self.assertEqual(os.listdir(self.tmpdir.name), ["v4.db"])
+
+    def test_failed_step_resumes_from_last_committed_version(self):
+        self._build_uuid_keyed_db(3)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("UPDATE distributions SET pay_period_id = 'missing' WHERE id = 7")
+        conn.commit()
+        conn.close()
+        with self.assertRaises(sqlite3.IntegrityError):
+            init_db()
+        with db_session() as conn:
+            version = conn.execute("SELECT value FROM schema_meta WHERE key = 'schema_version'").fetchone()["value"]
+            conn.execute("UPDATE distributions SET pay_period_id = 'period-1' WHERE id = 7")
+        # Step 3 -> 4 stays committed; the next run starts at 4 -> 5.
+        self.assertEqual(version, "4")
+        self.assertEqual([m.version for m in db_manager.pending_migrations()][0], 5)
+        init_db()
+        self._assert_migrated()
+
+    def test_unknown_versions(self):
+        init_db()
+        with db_session() as conn:
+            conn.execute("UPDATE schema_meta SET value = '1' WHERE key = 'schema_version'")
+        init_db()
+        with db_session() as conn:
+            conn.execute("UPDATE schema_meta SET value = '99' WHERE key = 'schema_version'")
+        with self.assertRaises(db_manager.MigrationError):
+            init_db()
+
+    def test_orphan_rows_abort_migration_untouched(self):
+        self._build_uuid_keyed_db(4)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            "INSERT INTO distributions(pay_period_id, date_local, shift, created_at)"
+            " VALUES ('missing', '06-01-2025', 'SOIR', 'x')"
+        )
+        conn.commit()
+        conn.close()
+        with self.assertRaises(sqlite3.IntegrityError):
+            init_db()
+        with db_session() as conn:
+            version = conn.execute("SELECT value FROM schema_meta WHERE key = 'schema_version'").fetchone()["value"]
+            cols = {row["name"] for row in conn.execute("PRAGMA table_info(distributions)")}
+            leftovers = conn.execute("SELECT COUNT(*) AS c FROM sqlite_master WHERE name LIKE '%_v5'").fetchone()["c"]
+        self.assertEqual(version, "4")
+        self.assertIn("pay_period_id", cols)
+        self.assertEqual(leftovers, 0)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+from unittest import mock
+
+import db.db_manager as db_manager
+from db.distributions_repo import (
+    delete_distribution,
+    get_distribution,
+    get_distributions,
+    get_distributions_for_period,
+    invalidate_distribution_cache,
+    list_distributions,
+    prefetch_distributions,
+    set_distribution_status,
+)
+from db.synthetic_data import generate_dataset
+
+
+class DistributionCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["TIPSPLIT_DB_PATH"] = os.path.join(self.tmpdir.name, "cache.db")
+        generate_dataset(years=0.1, employees=20, seed=5, end_date=date(2025, 2, 28))
+        invalidate_distribution_cache()
+        self.period_id = get_distribution(1)["pay_period_id"]
+        self.ids = [row["id"] for row in list_distributions(pay_period_id=self.period_id)]
+        invalidate_distribution_cache()
+
+    def tearDown(self):
+        invalidate_distribution_cache()
+        self.tmpdir.cleanup()
+        os.environ.pop("TIPSPLIT_DB_PATH", None)
+
+    def _connections(self, fn):
+        real_connect = db_manager.connect
+        opened = []
+
+        def counting_connect():
+            opened.append(1)
+            return real_connect()
+
+        with mock.patch.object(db_manager, "connect", counting_connect):
+            result = fn()
+        return len(opened), result
+
+    def test_second_read_is_served_from_cache_as_a_copy(self):
+        first = get_distribution(self.ids[0])
+        opened, second = self._connections(lambda: get_distribution(self.ids[0]))
+        self.assertEqual(opened, 0)
+        self.assertEqual(first, second)
+        second["employees"][0]["cash"] = 999999
+        second["inputs"]["Cash"] = -1
+        self.assertEqual(get_distribution(self.ids[0]), first)
+
+    def test_batch_load_matches_single_loads(self):
+        singles = [get_distribution(dist_id) for dist_id in self.ids]
+        invalidate_distribution_cache()
+        opened, batch = self._connections(lambda: get_distributions(reversed(self.ids)))
+        self.assertEqual(opened, 1)
+        self.assertEqual(batch, list(reversed(singles)))
+        self.assertEqual(get_distributions_for_period(pay_period_id=self.period_id), singles)
+
+    def test_writes_invalidate_entries(self):
+        dist_id = self.ids[0]
+        status = get_distribution(dist_id)["status"]
+        other = "UNCONFIRMED" if status == "CONFIRMED" else "CONFIRMED"
+        set_distribution_status(dist_id, other, actor="test")
+        self.assertEqual(get_distribution(dist_id)["status"], other)
+        delete_distribution(dist_id)
+        self.assertIsNone(get_distribution(dist_id))
+
+    def test_prefetch_only_reads_missing_ids(self):
+        get_distribution(self.ids[0])
+        self.assertEqual(prefetch_distributions(self.ids), len(self.ids) - 1)
+        opened, _ = self._connections(lambda: [get_distribution(dist_id) for dist_id in self.ids])
+        self.assertEqual(opened, 0)
+        self.assertEqual(prefetch_distributions(self.ids), 0)
+
+    def test_cache_is_scoped_to_the_database_file(self):
+        get_distribution(self.ids[0])
+        os.environ["TIPSPLIT_DB_PATH"] = os.path.join(self.tmpdir.name, "other.db")
+        db_manager.init_db()
+        self.assertIsNone(get_distribution(self.ids[0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
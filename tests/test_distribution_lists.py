@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from db.distributions_repo import (
+    list_distributions,
+    list_distributions_by_status,
+    list_distributions_page,
+    list_period_status_counts,
+)
+from db.synthetic_data import generate_dataset
+
+
+class DistributionListTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["TIPSPLIT_DB_PATH"] = os.path.join(cls.tmpdir.name, "lists.db")
+        generate_dataset(years=0.25, employees=20, seed=3, end_date=date(2025, 3, 31))
+        counts = list_period_status_counts()
+        cls.counts = max(counts, key=lambda row: min(row["unconfirmed"], row["confirmed"]))
+        cls.period_id = cls.counts["pay_period_id"]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+        os.environ.pop("TIPSPLIT_DB_PATH", None)
+
+    def _all_pages(self, status, search="", limit=4):
+        part = list_distributions_by_status(pay_period_id=self.period_id, search=search, limit=limit)[status]
+        rows, cursor = list(part["rows"]), part["next_cursor"]
+        while cursor:
+            page = list_distributions_page(
+                pay_period_id=self.period_id, status=status, cursor=cursor, search=search, limit=limit
+            )
+            rows += page["rows"]
+            cursor = page["next_cursor"]
+        return part["count"], rows
+
+    def test_partitions_and_pages_match_full_lists(self):
+        self.assertGreater(self.counts["unconfirmed"], 0)
+        self.assertGreater(self.counts["confirmed"], 4)
+        for status, key in (("UNCONFIRMED", "unconfirmed"), ("CONFIRMED", "confirmed")):
+            count, rows = self._all_pages(status)
+            self.assertEqual(count, self.counts[key])
+            self.assertEqual(rows, list_distributions(pay_period_id=self.period_id, status=status))
+
+    def test_search_words_narrow_the_lists(self):
+        confirmed = list_distributions(pay_period_id=self.period_id, status="CONFIRMED")
+        target = confirmed[0]
+        date_iso = "-".join(reversed(target["date_local"].split("-")))
+
+        def ids(search):
+            return [row["id"] for row in self._all_pages("CONFIRMED", search)[1]]
+
+        expected = [r["id"] for r in confirmed if r["date_local"] == target["date_local"] and r["shift"] == target["shift"]]
+        self.assertEqual(ids(f"{target['date_local']} {target['shift'][:2].lower()}"), expected)
+        self.assertEqual(ids(f"{date_iso} {target['shift']}"), expected)
+        self.assertEqual(ids(target["dist_ref"]), [target["id"]])
+        self.assertEqual(ids(str(target["id"])), [target["id"]])
+        self.assertEqual(ids(date_iso[:7]), [r["id"] for r in confirmed if r["date_local"].endswith(date_iso[5:7] + "-" + date_iso[:4])])
+        self.assertEqual(ids(date_iso[:4]), [r["id"] for r in confirmed])
+        self.assertEqual(ids("ZZZ"), [])
+        with self.assertRaises(ValueError):
+            list_distributions_by_status(pay_period_id=self.period_id, search="31-02-2025")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+from unittest import mock
+
+import db.distributions_repo as distributions_repo
+from db.db_manager import db_session, init_db
+from db.distributions_repo import (
+    create_distribution,
+    create_distributions_bulk,
+    delete_distribution,
+    search_distributions,
+    set_distribution_status,
+)
+from payroll.pay_calendar import PayCalendarService
+
+
+class DistributionSearchTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["TIPSPLIT_DB_PATH"] = os.path.join(self.tmpdir.name, "search.db")
+        init_db()
+        service = PayCalendarService()
+        schedule = service.create_schedule_version(
+            name="Test",
+            timezone_name="America/Montreal",
+            period_length_days=14,
+            pay_date_offset_days=4,
+            anchor_start_local="2025-01-05T06:00:00",
+            effective_from=date(2025, 1, 5),
+        )
+        service.ensure_periods(schedule["id"], date(2025, 1, 5), date(2025, 1, 18))
+        self.period_id = service.list_periods(schedule["id"])[0]["id"]
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        os.environ.pop("TIPSPLIT_DB_PATH", None)
+
+    def _record(self, day, employees, shift="SOIR"):
+        return {
+            "pay_period_id": self.period_id,
+            "date_local": f"{day:02d}-01-2025",
+            "shift": shift,
+            "inputs": {"Ventes Nettes": 1000},
+            "declaration_inputs": {},
+            "employees": employees,
+        }
+
+    def _seed(self):
+        # 07-01-2025 is a Tuesday, 10-01-2025 a Friday.
+        first = create_distribution(
+            created_by="gestion",
+            **self._record(7, [{"employee_id": "12", "name": "Hélène Côté", "section": "Service", "hours": 6}]),
+        )
+        bulk = create_distributions_bulk(
+            [
+                self._record(10, [{"employee_id": "31", "name": "Marc Tremblay", "section": "Bussboy", "hours": 5}]),
+                self._record(10, [{"employee_id": "12", "name": "Hélène Côté", "section": "Service"}], shift="MATIN"),
+            ],
+            created_by="import",
+        )
+        return [first["id"], *(item["id"] for item in bulk["created"])]
+
+    def _ids(self, query):
+        return sorted(row["id"] for row in search_distributions(query))
+
+    def test_index_follows_writes(self):
+        tuesday, friday_soir, friday_matin = self._seed()
+
+        self.assertEqual(self._ids("helene cote"), [tuesday, friday_matin])
+        self.assertEqual(self._ids("mardi"), [tuesday])
+        self.assertEqual(self._ids("vendredi"), [friday_soir, friday_matin])
+        self.assertEqual(self._ids("janvier tremb"), [friday_soir])
+        self.assertEqual(self._ids("mardi 12 helene"), [tuesday])
+        self.assertEqual(self._ids("10-01-2025 matin"), [friday_matin])
+        self.assertEqual(self._ids(f"DIST-2025-{tuesday:06d}"), [tuesday])
+        self.assertEqual(self._ids("31"), [friday_soir])
+        self.assertEqual(self._ids("côté tremblay"), [])
+
+        with db_session() as conn:
+            conn.execute(
+                "UPDATE distribution_employees SET employee_name = 'Marc Gagnon' WHERE distribution_id = ?",
+                (friday_soir,),
+            )
+        self.assertEqual(self._ids("gagnon"), [friday_soir])
+        self.assertEqual(self._ids("tremblay"), [])
+
+        set_distribution_status(friday_soir, "CONFIRMED", actor="Sophie")
+        self.assertEqual(self._ids("sophie"), [friday_soir])
+
+        delete_distribution(friday_matin)
+        self.assertEqual(self._ids("helene"), [tuesday])
+        with db_session() as conn:
+            orphans = conn.execute(
+                "SELECT COUNT(*) FROM distribution_search WHERE distribution_id = ?", (friday_matin,)
+            ).fetchone()[0]
+        self.assertEqual(orphans, 0)
+
+        row = search_distributions("mardi")[0]
+        self.assertEqual(row["pay_period_id"], self.period_id)
+        self.assertEqual(row["date_local"], "07-01-2025")
+        self.assertEqual(search_distributions("   "), [])
+
+    def test_like_fallback_without_index(self):
+        tuesday, friday_soir, friday_matin = self._seed()
+        with mock.patch.object(distributions_repo, "search_index_available", return_value=False):
+            self.assertEqual(self._ids("Hélène"), [tuesday, friday_matin])
+            self.assertEqual(self._ids("10-01-2025 matin"), [friday_matin])
+            self.assertEqual(self._ids("tremblay import"), [friday_soir])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from db import employees_repo
+from db.db_manager import init_db
+from db.distributions_repo import (
+    create_distribution,
+    declared_amount_cents,
+    employee_history,
+    employee_history_totals,
+    set_distribution_status,
+)
+from payroll.pay_calendar import PayCalendarService
+
+
+class EmployeeHistoryTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["TIPSPLIT_DB_PATH"] = os.path.join(self.tmpdir.name, "history.db")
+        init_db()
+        service = PayCalendarService()
+        schedule = service.create_schedule_version(
+            name="Test",
+            timezone_name="America/Montreal",
+            period_length_days=14,
+            pay_date_offset_days=4,
+            anchor_start_local="2025-01-05T06:00:00",
+            effective_from=date(2025, 1, 5),
+        )
+        service.ensure_periods(schedule["id"], date(2025, 1, 5), date(2025, 2, 15))
+        self.periods = [p["id"] for p in sorted(service.list_periods(schedule["id"]), key=lambda p: p["start_at_utc"])]
+        self.alice = employees_repo.add_employee("Alice", "service", 4, employee_number="7")
+
+        # Created out of date order, across three periods.
+        shifts = [
+            (2, "03-02-2025", "SOIR", {"hours": 5, "cash": 10.1, "A": 100, "F": 9}),
+            (0, "06-01-2025", "SOIR", {"hours": 6, "cash": 20.2, "A": 1000, "F": 50}),
+            (0, "06-01-2025", "MATIN", {"hours": 4, "cash": 0.3, "sur_paye": 1.5, "A": 200, "F": 40}),
+            (1, "20-01-2025", "SOIR", {"hours": 7.5, "cash": 5, "frais_admin": 2.25, "A": 500, "F": 60}),
+            (1, "21-01-2025", "SOIR", {"hours": 3, "cash": 1}),
+        ]
+        self.ids = []
+        for period, day, shift, amounts in shifts:
+            created = create_distribution(
+                pay_period_id=self.periods[period],
+                date_local=day,
+                shift=shift,
+                inputs={},
+                declaration_inputs={},
+                employees=[
+                    {"employee_id": "7", "name": "Alice", "section": "Service", **amounts},
+                    {"employee_id": "8", "name": "Autre", "section": "Service", "cash": 99},
+                ],
+            )
+            self.ids.append(created["id"])
+            if day != "21-01-2025":
+                set_distribution_status(created["id"], "CONFIRMED")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        os.environ.pop("TIPSPLIT_DB_PATH", None)
+
+    def _all_pages(self, **kwargs):
+        rows, cursor, pages = [], None, 0
+        while True:
+            page = employee_history(employee_id=self.alice, cursor=cursor, **kwargs)
+            rows += page["rows"]
+            pages += 1
+            cursor = page["next_cursor"]
+            if not cursor:
+                return rows, pages
+
+    def test_pages_are_ordered_with_running_totals(self):
+        rows, pages = self._all_pages(limit=2)
+        self.assertEqual(pages, 2)
+        self.assertEqual(
+            [(r["date_iso"], r["shift"]) for r in rows],
+            [("2025-01-06", "MATIN"), ("2025-01-06", "SOIR"), ("2025-01-20", "SOIR"), ("2025-02-03", "SOIR")],
+        )
+        self.assertEqual([r["running_hours"] for r in rows], [4, 10, 17.5, 22.5])
+        self.assertEqual([r["running_cash"] for r in rows], [0.3, 20.5, 25.5, 35.6])
+        self.assertEqual(rows[-1]["running_sur_paye"], 1.5)
+        self.assertEqual(rows[-1]["running_frais_admin"], 2.25)
+        # Service: max(F, 8% of A) over the running sums.
+        self.assertEqual([r["running_declared"] for r in rows], [40.0, 96.0, 150.0, 159.0])
+        self.assertEqual([r["declared_label"] for r in rows], ["F", "8% des ventes", "F", "F"])
+
+        totals = employee_history_totals(employee_id=self.alice)
+        self.assertEqual(totals["shift_count"], 4)
+        self.assertEqual(totals["cash"], rows[-1]["running_cash"])
+        self.assertEqual(totals["declared"], rows[-1]["running_declared"])
+
+    def test_date_range_and_status_filters(self):
+        rows, _ = self._all_pages(start_date="2025-01-07", end_date=date(2025, 1, 31))
+        self.assertEqual([r["date_iso"] for r in rows], ["2025-01-20"])
+        rows, _ = self._all_pages(start_date="20-01-2025", status=None)
+        self.assertEqual([r["date_iso"] for r in rows], ["2025-01-20", "2025-01-21", "2025-02-03"])
+        with self.assertRaises(ValueError):
+            employee_history(employee_id=self.alice, start_date="hier")
+        with self.assertRaises(ValueError):
+            employee_history(employee_id=9999)
+
+    def test_declared_rule_matches_resume(self):
+        self.assertEqual(declared_amount_cents("Service", a_cents=10000, f_cents=900, d_cents=0), (900, "F"))
+        self.assertEqual(declared_amount_cents("service", a_cents=10000, f_cents=700, d_cents=0), (800, "8% des ventes"))
+        self.assertEqual(declared_amount_cents("Bussboy", a_cents=0, f_cents=0, d_cents=1234), (1234, "D"))
+        self.assertEqual(declared_amount_cents("", a_cents=1, f_cents=1, d_cents=1), (0, "—"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from db import employees_repo
+from db.db_manager import db_session, init_db
+from db.distributions_repo import backfill_employee_links, create_distribution, get_distribution
+from payroll.pay_calendar import PayCalendarService
+
+
+class EmployeeLinkTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["TIPSPLIT_DB_PATH"] = os.path.join(self.tmpdir.name, "links.db")
+        init_db()
+        service = PayCalendarService()
+        schedule = service.create_schedule_version(
+            name="Test",
+            timezone_name="America/Montreal",
+            period_length_days=14,
+            pay_date_offset_days=4,
+            anchor_start_local="2025-01-05T06:00:00",
+            effective_from=date(2025, 1, 5),
+        )
+        service.ensure_periods(schedule["id"], date(2025, 1, 5), date(2025, 1, 18))
+        self.period_id = service.list_periods(schedule["id"])[0]["id"]
+        self.alice = employees_repo.add_employee("Alice Tremblay", "service", 4, employee_number="12")
+        self.alice_bus = employees_repo.add_employee("Alice Bus", "busboy", 1, employee_number="12")
+        self.bob = employees_repo.add_employee("Bob Roy", "busboy", 1)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        os.environ.pop("TIPSPLIT_DB_PATH", None)
+
+    def test_rows_are_linked_when_created(self):
+        created = create_distribution(
+            pay_period_id=self.period_id,
+            date_local="06-01-2025",
+            shift="SOIR",
+            inputs={},
+            declaration_inputs={},
+            employees=[
+                {"employee_id": "12", "name": "Alice Tremblay", "section": "Service"},
+                {"employee_id": "12", "name": "Alice Bus", "section": "Bussboy"},
+                {"employee_id": "", "name": "  bob ROY ", "section": "Bussboy"},
+                {"employee_id": "99", "name": "Inconnu", "section": "Service"},
+            ],
+        )
+        links = [emp["employee_db_id"] for emp in get_distribution(created["id"])["employees"]]
+        self.assertEqual(links, [self.alice, self.alice_bus, self.bob, None])
+
+    def test_backfill_links_rows_added_after_the_fact(self):
+        created = create_distribution(
+            pay_period_id=self.period_id,
+            date_local="06-01-2025",
+            shift="MATIN",
+            inputs={},
+            declaration_inputs={},
+            employees=[{"employee_id": "55", "name": "Chloé", "section": "Service"}],
+        )
+        self.assertIsNone(get_distribution(created["id"])["employees"][0]["employee_db_id"])
+
+        chloe = employees_repo.add_employee("Chloé", "service", 3, employee_number="55")
+        result = backfill_employee_links(batch_size=1)
+        self.assertEqual(result, {"linked": 1, "unresolved": 0})
+        self.assertEqual(get_distribution(created["id"])["employees"][0]["employee_db_id"], chloe)
+        self.assertEqual(backfill_employee_links(), {"linked": 0, "unresolved": 0})
+
+    def test_deleting_employee_keeps_history(self):
+        create_distribution(
+            pay_period_id=self.period_id,
+            date_local="07-01-2025",
+            shift="SOIR",
+            inputs={},
+            declaration_inputs={},
+            employees=[{"employee_id": "", "name": "Bob Roy", "section": "Bussboy"}],
+        )
+        employees_repo.delete_employee(self.bob)
+        with db_session() as conn:
+            self.assertEqual(conn.execute("SELECT employee_id FROM distribution_employees").fetchone()[0], self.bob)
+            conn.execute("DELETE FROM employees WHERE id = ?", (self.bob,))
+            row = conn.execute("SELECT employee_name, employee_id FROM distribution_employees").fetchone()
+        self.assertEqual((row["employee_name"], row["employee_id"]), ("Bob Roy", None))
+
+if __name__ == "__main__":
+    unittest.main()
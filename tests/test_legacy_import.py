@@ -0,0 +1,115 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from db.db_manager import db_session, init_db
+from db.distributions_repo import get_distribution
+from payroll.legacy_import import CHECKPOINT_FILENAME, import_legacy_dir, parse_legacy_file
+from payroll.pay_calendar import PayCalendarService
+
+
+def _payload(day, shift="SOIR", **extra):
+    return {
+        "date": day,
+        "shift": shift,
+        "fields": {"Ventes Nettes": "1500.25", "Dépot Net": "-90", "Frais Admin": "30", "Cash": "45"},
+        "declaration": {"Ventes Totales": "1700", "Clients": "40", "Tips due": "160", "Ventes Nourriture": "900"},
+        "entries": [
+            {"employee_id": "", "name": "--- Service ---"},
+            {"employee_id": "12", "name": "Alice Tremblay", "section": "Service", "hours": 6, "cash": "20.5", "A": "120"},
+            {"employee_id": "31", "name": "Bob Roy", "section": "Bussboy", "hours": 5, "D": "18"},
+        ],
+        **extra,
+    }
+
+
+class LegacyImportTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["TIPSPLIT_DB_PATH"] = os.path.join(self.tmpdir.name, "legacy.db")
+        init_db()
+        service = PayCalendarService()
+        schedule = service.create_schedule_version(
+            name="Test",
+            timezone_name="America/Montreal",
+            period_length_days=14,
+            pay_date_offset_days=4,
+            anchor_start_local="2025-01-05T06:00:00",
+            effective_from=date(2025, 1, 5),
+        )
+        service.ensure_periods(schedule["id"], date(2025, 1, 5), date(2025, 2, 15))
+        locked = [p for p in service.list_periods(schedule["id"]) if p["start_at_utc"] < "2025-01-10"][0]
+        service.lock_period(locked["id"])
+
+        self.root = os.path.join(self.tmpdir.name, "backend")
+        os.makedirs(os.path.join(self.root, "2025-01"))
+        self._write("2025-01/a.json", [_payload("20-01-2025"), _payload("21-01-2025", shift="midi")])
+        self._write("2025-01/b.json", _payload("2025-01-20"))  # same key as the first record of a.json
+        self._write("2025-01/c.json", _payload("07-01-2025"))  # locked period
+        self._write("2025-01/d.json", _payload("22-01-2025", shift_instance=2, created_by="gestion"))
+        with open(os.path.join(self.root, "broken.json"), "w", encoding="utf-8") as fh:
+            fh.write("{not json")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        os.environ.pop("TIPSPLIT_DB_PATH", None)
+
+    def _write(self, rel, payload):
+        with open(os.path.join(self.root, rel), "w", encoding="utf-8") as fh:
+            json.dump(payload, fh)
+
+    def _count(self):
+        with db_session() as conn:
+            return conn.execute("SELECT COUNT(*) AS c FROM distributions").fetchone()["c"]
+
+    def test_parse_maps_legacy_keys(self):
+        parsed = parse_legacy_file(os.path.join(self.root, "2025-01", "a.json"))
+        first = parsed["records"][0]
+        self.assertEqual((first["date_iso"], first["date_local"], first["shift"], first["shift_instance"]), ("2025-01-20", "20-01-2025", "SOIR", 1))
+        self.assertEqual([e["name"] for e in first["employees"]], ["Alice Tremblay", "Bob Roy"])
+        self.assertEqual(first["declaration_inputs"]["Clients"], "40")
+        self.assertIn("error", parse_legacy_file(os.path.join(self.root, "broken.json")))
+
+    def test_import_dedupes_and_resumes(self):
+        snapshots = []
+        stats = import_legacy_dir(self.root, workers=2, chunk_files=2, progress=snapshots.append)
+        self.assertEqual(stats["files"], 5)
+        self.assertEqual(stats["distributions"], 5)
+        self.assertEqual(stats["imported"], 3)
+        self.assertEqual(stats["duplicates"], 1)
+        self.assertEqual(sorted(os.path.basename(e["path"]) for e in stats["errors"]), ["broken.json", "c.json"])
+        self.assertEqual([s["processed_files"] for s in snapshots], [2, 4, 5])
+        self.assertEqual(self._count(), 3)
+
+        with db_session() as conn:
+            row = conn.execute("SELECT id, created_by FROM distributions WHERE shift_instance = 2").fetchone()
+        self.assertEqual(row["created_by"], "gestion")
+        stored = get_distribution(row["id"])
+        self.assertEqual(stored["date_local"], "22-01-2025")
+        self.assertEqual((stored["status"], stored["confirmed_by"]), ("CONFIRMED", "import-json"))
+        self.assertEqual(stored["inputs"]["Ventes Nettes"], 1500.25)
+        self.assertEqual(len(stored["employees"]), 2)
+
+        again = import_legacy_dir(self.root, workers=1)
+        self.assertEqual((again["skipped_files"], again["processed_files"], again["imported"]), (3, 2, 0))
+        self.assertEqual(len(again["errors"]), 2)
+
+        self._write("broken.json", _payload("24-01-2025"))  # failed files are retried on resume
+        fixed = import_legacy_dir(self.root, workers=1)
+        self.assertEqual((fixed["skipped_files"], fixed["processed_files"], fixed["imported"]), (3, 2, 1))
+        self.assertEqual([os.path.basename(e["path"]) for e in fixed["errors"]], ["c.json"])
+
+        self._write("2025-01/d.json", [_payload("22-01-2025", shift_instance=2), _payload("23-01-2025")])
+        changed = import_legacy_dir(self.root, workers=1)
+        self.assertEqual((changed["processed_files"], changed["imported"], changed["duplicates"]), (2, 1, 1))
+        self.assertEqual(self._count(), 5)
+
+        restarted = import_legacy_dir(self.root, workers=1, restart=True)
+        self.assertEqual((restarted["imported"], restarted["duplicates"]), (0, 6))
+        self.assertTrue(os.path.exists(os.path.join(self.root, CHECKPOINT_FILENAME)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import json
+import logging
+import logging.handlers
+import os
+import tempfile
+import unittest
+
+from log_setup import configure_logging, shutdown_logging, JSON_LOG_FILENAME
+
+
+class LogSetupTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = logging.getLogger()
+        self.saved_handlers = list(self.root.handlers)
+        self.saved_level = self.root.level
+        for handler in self.saved_handlers:
+            self.root.removeHandler(handler)
+
+    def tearDown(self):
+        shutdown_logging()
+        for handler in self.saved_handlers:
+            self.root.addHandler(handler)
+        self.root.setLevel(self.saved_level)
+        self.tmpdir.cleanup()
+
+    def test_records_are_flushed_to_text_and_json_files_on_shutdown(self):
+        log_path = configure_logging(self.tmpdir.name, console=False)
+        logger = logging.getLogger("tipsplit.test")
+        logger.info("Distribution créée id=%s", 42)
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("Échec")
+        shutdown_logging()
+
+        with open(log_path, encoding="utf-8") as fh:
+            text = fh.read()
+        self.assertIn("Distribution créée id=42", text)
+
+        with open(os.path.join(self.tmpdir.name, JSON_LOG_FILENAME), encoding="utf-8") as fh:
+            rows = [json.loads(line) for line in fh if line.strip()]
+        self.assertEqual([r["message"] for r in rows], ["Distribution créée id=42", "Échec"])
+        self.assertEqual(rows[0]["logger"], "tipsplit.test")
+        self.assertIn("ValueError: boom", rows[1]["exc"])
+
+    def test_configure_is_idempotent_while_running(self):
+        configure_logging(self.tmpdir.name, console=False)
+        configure_logging(self.tmpdir.name, console=False)
+        queue_handlers = [h for h in self.root.handlers if isinstance(h, logging.handlers.QueueHandler)]
+        self.assertEqual(len(queue_handlers), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from db.db_manager import db_session, init_db
+from db.maintenance import maintenance_status, run_due_maintenance, run_maintenance
+
+
+class MaintenanceTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "maintenance.db")
+        os.environ["TIPSPLIT_DB_PATH"] = self.db_path
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        os.environ.pop("TIPSPLIT_DB_PATH", None)
+
+    def _fill_and_empty(self):
+        with db_session() as conn:
+            conn.execute("CREATE TABLE scratch(payload TEXT)")
+            conn.executemany("INSERT INTO scratch VALUES (?)", [("x" * 2000,) for _ in range(300)])
+        with db_session() as conn:
+            conn.execute("DROP TABLE scratch")
+
+    def test_new_database_returns_free_pages_and_records_runs(self):
+        init_db()
+        self._fill_and_empty()
+        self.assertGreater(maintenance_status()["free_pages"], 100)
+
+        results = run_maintenance(quick_check=True)
+
+        self.assertTrue(results["quick_check"]["ok"])
+        self.assertGreater(results["incremental_vacuum"]["freed_pages"], 100)
+        status = maintenance_status()
+        self.assertEqual(status["auto_vacuum"], "INCREMENTAL")
+        self.assertEqual(status["free_pages"], 0)
+        self.assertEqual(status["last_runs"]["quick_check"]["problems"], [])
+        self.assertIsNotNone(status["last_runs"]["optimize"]["ms"])
+
+        # Nothing is due again right away; the quick_check only once a day.
+        self.assertEqual(run_due_maintenance(), {})
+        later = datetime.now(timezone.utc) + timedelta(hours=7)
+        self.assertEqual(sorted(run_due_maintenance(now=later)), ["incremental_vacuum", "optimize"])
+
+    def test_existing_database_switches_mode_on_migration(self):
+        init_db()
+        with db_session() as conn:
+            conn.execute("UPDATE schema_meta SET value = '12' WHERE key = 'schema_version'")
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA auto_vacuum = NONE")
+        conn.execute("VACUUM")
+        conn.close()
+        self.assertEqual(maintenance_status()["auto_vacuum"], "NONE")
+
+        init_db()
+
+        self.assertEqual(maintenance_status()["auto_vacuum"], "INCREMENTAL")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+from decimal import Decimal
+
+from db.db_manager import init_db
+from db.distributions_repo import create_distribution, employee_totals_for_period, get_distribution
+from db.money import cents_to_decimal, from_cents, to_cents
+from payroll.pay_calendar import PayCalendarService
+
+
+class MoneyConversionTests(unittest.TestCase):
+    def test_to_cents_parses_and_rounds_half_up(self):
+        self.assertEqual(to_cents(12.5), 1250)
+        self.assertEqual(to_cents(3), 300)
+        self.assertEqual(to_cents("12,34"), 1234)
+        self.assertEqual(to_cents(" $1 234.565 "), 123457)
+        self.assertEqual(to_cents(1.005), 101)
+        self.assertEqual(to_cents(-0.005), -1)
+        self.assertEqual(to_cents(Decimal("0.125")), 13)
+        self.assertEqual(to_cents("1\u00a0234,50 $"), 123450)
+        self.assertEqual(to_cents("1,234.50"), 123450)
+        self.assertEqual(to_cents("1.234,50"), 123450)
+        self.assertEqual(to_cents("-$12"), -1200)
+        for empty in (None, "", "  ", "-", "abc", float("nan")):
+            self.assertIsNone(to_cents(empty), empty)
+        for garbage in ("abc12", "12abc", "1e3", "1.2.3", "12-3", "--5", "inf"):
+            self.assertIsNone(to_cents(garbage), garbage)
+
+    def test_from_cents_round_trips(self):
+        self.assertIsNone(from_cents(None))
+        self.assertEqual(from_cents(1), 0.01)
+        self.assertEqual(cents_to_decimal(-1050), Decimal("-10.50"))
+        for cents in (-99999, -1, 0, 7, 10, 123456789):
+            self.assertEqual(to_cents(from_cents(cents)), cents)
+
+
+class CentsStorageTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["TIPSPLIT_DB_PATH"] = os.path.join(self.tmpdir.name, "money.db")
+        init_db()
+        service = PayCalendarService()
+        schedule = service.create_schedule_version(
+            name="Test",
+            timezone_name="America/Montreal",
+            period_length_days=14,
+            pay_date_offset_days=4,
+            anchor_start_local="2025-01-05T06:00:00",
+            effective_from=date(2025, 1, 5),
+        )
+        service.ensure_periods(schedule["id"], date(2025, 1, 5), date(2025, 1, 18))
+        self.period_id = service.list_periods(schedule["id"])[0]["id"]
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        os.environ.pop("TIPSPLIT_DB_PATH", None)
+
+    def _create(self, instance, employees):
+        return create_distribution(
+            pay_period_id=self.period_id,
+            date_local="06-01-2025",
+            shift="SOIR",
+            shift_instance=instance,
+            inputs={"Ventes Nettes": "1 000,10", "Dépot Net": -100.1, "Frais Admin": 20.2, "Cash": 0.3},
+            declaration_inputs={"Ventes Totales": 1100.1, "Clients": 42, "Tips due": 110.11, "Ventes Nourriture": 600},
+            employees=employees,
+        )
+
+    def test_accessors_return_stored_amounts(self):
+        created = self._create(1, [{"employee_id": "7", "name": "Alice", "section": "Service", "cash": "12,345"}])
+        dist = get_distribution(created["id"])
+        self.assertEqual(dist["inputs"]["Ventes Nettes"], 1000.1)
+        self.assertEqual(dist["inputs"]["Dépot Net"], -100.1)
+        self.assertEqual(dist["declaration_inputs"]["Clients"], 42)
+        self.assertEqual(dist["declaration_inputs"]["Ventes Nourriture"], 600.0)
+        self.assertEqual(dist["employees"][0]["cash"], 12.35)
+        self.assertIsNone(dist["employees"][0]["D"])
+
+    def test_period_totals_are_exact_integer_sums(self):
+        for instance in range(1, 31):
+            self._create(
+                instance,
+                [
+                    {"employee_id": "7", "name": "Alice", "section": "Service", "hours": 0.1, "cash": 0.1, "F": 0.07},
+                    {"employee_id": "", "name": "Bob", "section": "Bussboy", "D": 0.2},
+                ],
+            )
+        float_sum = 0.0
+        for _ in range(30):
+            float_sum += 0.1
+        self.assertNotEqual(float_sum, 3.0)
+
+        totals = {row["employee_key"]: row for row in employee_totals_for_period(pay_period_id=self.period_id, status=None)}
+        self.assertEqual(set(totals), {"7", "name::Bob"})
+        self.assertEqual(totals["7"]["cash_cents"], 300)
+        self.assertEqual(totals["7"]["cash"], 3.0)
+        self.assertEqual(totals["7"]["F_cents"], 210)
+        self.assertEqual(totals["7"]["shift_count"], 30)
+        self.assertEqual(totals["name::Bob"]["D"], 6.0)
+        self.assertEqual(employee_totals_for_period(pay_period_id=self.period_id), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -70,7 +70,11 @@ class PayCalendarServiceTests(unittest.TestCase):
         self.service.ensure_periods(schedule["id"], date(2025, 1, 1), date(2025, 1, 30))
         with db_session() as conn:
             period_id = conn.execute(
-                "SELECT id FROM pay_periods WHERE schedule_id = ? ORDER BY start_at_utc LIMIT 1",
+                """
+                SELECT p.id FROM pay_periods p
+                JOIN pay_schedules s ON s.pk = p.schedule_pk
+                WHERE s.id = ? ORDER BY p.start_at_utc LIMIT 1
+                """,
                 (schedule["id"],),
             ).fetchone()["id"]
         locked = self.service.lock_period(period_id)
@@ -85,7 +89,11 @@ class PayCalendarServiceTests(unittest.TestCase):
         self.service.ensure_periods(schedule["id"], date(2025, 1, 1), date(2025, 1, 30))
         with db_session() as conn:
             row = conn.execute(
-                "SELECT id, pay_date_local FROM pay_periods WHERE schedule_id = ? ORDER BY start_at_utc LIMIT 1",
+                """
+                SELECT p.id, p.pay_date_local FROM pay_periods p
+                JOIN pay_schedules s ON s.pk = p.schedule_pk
+                WHERE s.id = ? ORDER BY p.start_at_utc LIMIT 1
+                """,
                 (schedule["id"],),
             ).fetchone()
             period_id = row["id"]
@@ -99,7 +107,11 @@ class PayCalendarServiceTests(unittest.TestCase):
         self.assertEqual(updated["pay_date_local"], new_date)
         with db_session() as conn:
             audit = conn.execute(
-                "SELECT COUNT(*) AS c FROM pay_period_overrides WHERE period_id = ?",
+                """
+                SELECT COUNT(*) AS c FROM pay_period_overrides o
+                JOIN pay_periods p ON p.pk = o.period_pk
+                WHERE p.id = ?
+                """,
                 (period_id,),
             ).fetchone()["c"]
         self.assertEqual(audit, 1)
@@ -0,0 +1,124 @@
+import os
+import tempfile
+import unittest
+from datetime import date, datetime, timezone
+
+from db.analytics_export import export_fact_tables
+from db.db_manager import db_session, init_db
+from db.distributions_repo import (
+    annual_declaration_rows,
+    create_distribution,
+    employee_history,
+    employee_history_totals,
+    employee_totals_for_period,
+    get_distribution,
+    iter_payroll_summary,
+    list_distributions,
+    list_period_ids_with_distributions,
+    list_period_status_counts,
+    search_distributions,
+    set_distribution_status,
+)
+from db.employees_repo import add_employee
+from db.period_archive import archive_paid_periods, get_archive_path
+from payroll.pay_calendar import PayCalendarError, PayCalendarService
+
+
+class PeriodArchiveTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["TIPSPLIT_DB_PATH"] = os.path.join(self.tmpdir.name, "archive.db")
+        init_db()
+        self.service = PayCalendarService()
+        schedule = self.service.create_schedule_version(
+            name="Test",
+            timezone_name="America/Montreal",
+            period_length_days=14,
+            pay_date_offset_days=4,
+            anchor_start_local="2023-01-01T06:00:00",
+            effective_from=date(2023, 1, 1),
+        )
+        self.service.ensure_periods(schedule["id"], date(2023, 1, 1), date(2025, 1, 14))
+        periods = {p["start_at_utc"][:10]: p["id"] for p in self.service.list_periods(schedule["id"], limit=100)}
+        self.old_period = periods["2023-01-01"]
+        self.new_period = periods["2024-12-29"]
+        self.employee_id = add_employee("Alice Tremblay", "service", 5, employee_number="12")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        os.environ.pop("TIPSPLIT_DB_PATH", None)
+
+    def _create(self, period_id, date_local, cash):
+        dist = create_distribution(
+            pay_period_id=period_id,
+            date_local=date_local,
+            shift="SOIR",
+            inputs={"Ventes Nettes": 1000},
+            declaration_inputs={},
+            employees=[{"employee_id": "12", "name": "Alice Tremblay", "section": "Service", "hours": 6, "cash": cash}],
+            created_by="gestion",
+        )
+        set_distribution_status(dist["id"], "CONFIRMED", actor="gestion")
+        return dist["id"]
+
+    def test_paid_period_moves_to_year_file_and_stays_readable(self):
+        old_ids = [self._create(self.old_period, "03-01-2023", 10), self._create(self.old_period, "04-01-2023", 20)]
+        new_id = self._create(self.new_period, "06-01-2025", 40)
+        self.service.lock_period(self.old_period)
+        self.service.mark_payed(self.old_period)
+        totals_before = employee_totals_for_period(pay_period_id=self.old_period, status=None)
+
+        now = datetime(2025, 1, 20, tzinfo=timezone.utc)
+        result = archive_paid_periods(older_than_days=365, now=now)
+        self.assertEqual(result, {"periods": 1, "distributions": 2, "years": [2023]})
+        self.assertTrue(os.path.exists(get_archive_path(2023)))
+        self.assertEqual(archive_paid_periods(older_than_days=365, now=now)["periods"], 0)
+        with db_session() as conn:
+            self.assertEqual([row["id"] for row in conn.execute("SELECT id FROM distributions")], [new_id])
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM distribution_audit").fetchone()[0], 2)
+
+        # Period, id and date-range reads attach the 2023 file.
+        self.assertEqual(sorted(d["id"] for d in list_distributions(pay_period_id=self.old_period)), old_ids)
+        dist = get_distribution(old_ids[0])
+        self.assertEqual((dist["pay_period_id"], dist["employees"][0]["cash"]), (self.old_period, 10.0))
+        self.assertEqual(employee_totals_for_period(pay_period_id=self.old_period, status=None), totals_before)
+        history = employee_history(employee_id=self.employee_id, start_date="2023-01-01", end_date="2025-12-31")
+        self.assertEqual([row["distribution_id"] for row in history["rows"]], [*old_ids, new_id])
+        self.assertEqual(history["rows"][-1]["running_cash"], 70.0)
+        self.assertEqual(employee_history_totals(employee_id=self.employee_id)["cash_cents"], 7000)
+        [declared] = list(annual_declaration_rows(2023))
+        self.assertEqual(declared["cash_cents"], 3000)
+        [summary] = list(iter_payroll_summary(period_ids=[self.old_period]))
+        self.assertEqual(summary["shift_count"], 2)
+        # Without a range reaching 2023, only the main file is read.
+        recent = employee_history(employee_id=self.employee_id, start_date="2024-01-01")
+        self.assertEqual([row["distribution_id"] for row in recent["rows"]], [new_id])
+
+        self.assertIn(self.old_period, list_period_ids_with_distributions(status="CONFIRMED"))
+        self.assertNotIn(self.old_period, list_period_ids_with_distributions(status="UNCONFIRMED"))
+        counts = {row["pay_period_id"]: row for row in list_period_status_counts()}
+        self.assertEqual(counts[self.old_period]["confirmed"], 2)
+        with self.assertRaisesRegex(PayCalendarError, "archivée"):
+            self.service.revert_payed(self.old_period)
+
+    def test_export_and_search_cover_archived_periods(self):
+        old_ids = [self._create(self.old_period, "03-01-2023", 10), self._create(self.old_period, "04-01-2023", 20)]
+        new_id = self._create(self.new_period, "06-01-2025", 40)
+        out_dir = os.path.join(self.tmpdir.name, "bi")
+        self.assertEqual(export_fact_tables(out_dir, fmt="csv")["rows"]["distributions"], 3)
+        self.service.lock_period(self.old_period)
+        self.service.mark_payed(self.old_period)
+        archive_paid_periods(older_than_days=365, now=datetime(2025, 1, 20, tzinfo=timezone.utc))
+
+        # An incremental run has nothing past the watermark; a full run reads the 2023 file back.
+        self.assertEqual(export_fact_tables(out_dir, fmt="csv")["parts"], 0)
+        summary = export_fact_tables(out_dir, fmt="csv", full=True)
+        self.assertEqual(summary["rows"], {"distributions": 3, "allocations": 3, "daily": 3})
+
+        self.assertEqual([row["id"] for row in search_distributions("tremblay")], [new_id, *reversed(old_ids)])
+        self.assertEqual([row["id"] for row in search_distributions("tremblay 2023")], list(reversed(old_ids)))
+        self.assertEqual(len(search_distributions("tremblay", limit=2)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from db.db_manager import db_session, init_db
+from db.distributions_repo import (
+    create_distribution,
+    delete_distribution,
+    employee_totals_for_period,
+    get_distributions_for_period,
+    get_period_snapshot,
+    set_distribution_status,
+)
+from payroll.pay_calendar import PayCalendarService
+
+
+class PeriodSnapshotTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["TIPSPLIT_DB_PATH"] = os.path.join(self.tmpdir.name, "snapshots.db")
+        init_db()
+        self.service = PayCalendarService()
+        schedule = self.service.create_schedule_version(
+            name="Test",
+            timezone_name="America/Montreal",
+            period_length_days=14,
+            pay_date_offset_days=4,
+            anchor_start_local="2025-01-05T06:00:00",
+            effective_from=date(2025, 1, 5),
+        )
+        self.service.ensure_periods(schedule["id"], date(2025, 1, 5), date(2025, 1, 18))
+        self.period_id = self.service.list_periods(schedule["id"])[0]["id"]
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        os.environ.pop("TIPSPLIT_DB_PATH", None)
+
+    def _create(self, day, *, confirm=True):
+        dist = create_distribution(
+            pay_period_id=self.period_id,
+            date_local=f"{day:02d}-01-2025",
+            shift="SOIR",
+            inputs={"Ventes Nettes": 1000, "Cash": 55.5},
+            declaration_inputs={},
+            employees=[
+                {"employee_id": "12", "name": "Alice", "section": "Service", "hours": 6, "cash": 30.25, "A": 400, "F": 20},
+                {"employee_id": "31", "name": "Marc", "section": "Bussboy", "hours": 5, "cash": 25.25, "D": 12.5},
+            ],
+            created_by="gestion",
+        )
+        if confirm:
+            set_distribution_status(dist["id"], "CONFIRMED", actor="gestion")
+        return dist["id"]
+
+    def _live(self):
+        with db_session() as conn:
+            conn.execute("DELETE FROM period_snapshots")
+        return (
+            get_distributions_for_period(pay_period_id=self.period_id, status="CONFIRMED"),
+            employee_totals_for_period(pay_period_id=self.period_id),
+        )
+
+    def test_lock_freezes_confirmed_results(self):
+        self._create(6)
+        self._create(7)
+        draft = self._create(8, confirm=False)
+        self.assertIsNone(get_period_snapshot(self.period_id))
+
+        self.service.lock_period(self.period_id)
+        snapshot = get_period_snapshot(self.period_id)
+        self.assertEqual(len(snapshot["distributions"]), 2)
+        self.assertEqual(snapshot["declared"]["12"]["declared_cents"], 6400)
+        frozen = (
+            get_distributions_for_period(pay_period_id=self.period_id, status="CONFIRMED"),
+            employee_totals_for_period(pay_period_id=self.period_id),
+        )
+        self.service.mark_payed(self.period_id)
+        self.assertIsNotNone(get_period_snapshot(self.period_id))
+
+        # The raw rows cannot change while the period is closed.
+        with self.assertRaisesRegex(ValueError, "payée"):
+            set_distribution_status(draft, "CONFIRMED")
+        with self.assertRaisesRegex(ValueError, "payée"):
+            delete_distribution(draft)
+        self.assertEqual(frozen, self._live())
+
+    def test_tampered_or_unlocked_snapshot_falls_back_to_rows(self):
+        dist_id = self._create(6)
+        self.service.lock_period(self.period_id)
+        with db_session() as conn:
+            conn.execute("UPDATE period_snapshots SET checksum = 'x'")
+        with self.assertLogs("tipsplit.distributions", "WARNING"):
+            self.assertIsNone(get_period_snapshot(self.period_id))
+        self.assertEqual(
+            [d["id"] for d in get_distributions_for_period(pay_period_id=self.period_id, status="CONFIRMED")],
+            [dist_id],
+        )
+
+        self.service.unlock_period(self.period_id)
+        with db_session() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM period_snapshots").fetchone()[0], 0)
+        set_distribution_status(dist_id, "UNCONFIRMED")
+        self.assertEqual(employee_totals_for_period(pay_period_id=self.period_id), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
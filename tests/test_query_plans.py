@@ -0,0 +1,222 @@
+import os
+import re
+import sqlite3
+import tempfile
+import unittest
+from datetime import date, datetime, timezone
+from unittest import mock
+
+import db.db_manager as db_manager
+from db import analytics_export, audit_log, distributions_repo, employees_repo
+from db.db_manager import db_session
+from db.synthetic_data import generate_dataset
+from payroll.context import PayrollContext
+from payroll.pay_calendar import PayCalendarService
+
+# Tables that grow with every shift; a full scan of any of them is a regression.
+LARGE_TABLES = {
+    "distributions",
+    "distribution_inputs",
+    "distribution_declaration_inputs",
+    "distribution_employees",
+    "distribution_audit",
+    "shifts",
+}
+
+# Foreign-key children probed by ON DELETE CASCADE / foreign key checks.
+FK_LOOKUPS = [
+    ("distributions", "period_pk"),
+    ("distribution_inputs", "distribution_id"),
+    ("distribution_declaration_inputs", "distribution_id"),
+    ("distribution_employees", "distribution_id"),
+    ("distribution_employees", "employee_id"),
+    ("distribution_audit", "distribution_id"),
+    ("shifts", "period_pk"),
+    ("pay_period_overrides", "period_pk"),
+    ("pay_periods", "schedule_pk"),
+]
+
+_ALIAS_RE = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+_PLANNED_RE = re.compile(r"^\s*(SELECT|UPDATE|DELETE|WITH|INSERT\s+INTO\s+\w+\s*(?:\([^)]*\))?\s*SELECT)\b", re.IGNORECASE)
+
+
+def _aliases(sql):
+    mapping = {}
+    for table, alias in _ALIAS_RE.findall(sql):
+        mapping[table] = table
+        if alias and alias.upper() not in {"WHERE", "ON", "ORDER", "GROUP", "LIMIT", "JOIN", "LEFT", "INNER"}:
+            mapping[alias] = table
+    return mapping
+
+
+def _full_scans(conn, sql):
+    aliases = _aliases(sql)
+    scans = []
+    for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}"):
+        detail = row[3]
+        match = re.match(r"SCAN (\w+)", detail)
+        if match and aliases.get(match.group(1), match.group(1)) in LARGE_TABLES:
+            scans.append(detail)
+    return scans
+
+
+class QueryPlanTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["TIPSPLIT_DB_PATH"] = os.path.join(cls.tmpdir.name, "plans.db")
+        cls.summary = generate_dataset(years=0.5, employees=60, seed=11, end_date=date(2025, 6, 30))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+        os.environ.pop("TIPSPLIT_DB_PATH", None)
+
+    def _capture_statements(self, exercise):
+        statements = []
+        real_connect = db_manager.connect
+
+        def tracing_connect():
+            conn = real_connect()
+            conn.set_trace_callback(statements.append)
+            return conn
+
+        with mock.patch.object(db_manager, "connect", tracing_connect):
+            exercise()
+        return statements
+
+    def _exercise_repositories(self):
+        service = PayCalendarService()
+        context = PayrollContext(service)
+        schedule = context.get_schedule()
+        service.list_schedules()
+        service.get_schedule(schedule["id"])
+        service.ensure_periods(schedule["id"], date(2025, 1, 1), date(2025, 6, 30))
+        periods = context.list_periods(limit=50)
+        period = context.period_for_local_date(date(2025, 3, 12))
+        service.get_period_for_timestamp(schedule["id"], datetime(2025, 3, 12, 18, tzinfo=timezone.utc))
+
+        distributions_repo.list_period_ids_with_distributions()
+        distributions_repo.list_period_ids_with_distributions(status="CONFIRMED")
+        distributions_repo.list_period_ids_with_distributions_for_periods([p["id"] for p in periods])
+        distributions_repo.list_distributions(pay_period_id=period["id"])
+        distributions_repo.list_distributions(pay_period_id=period["id"], status="UNCONFIRMED")
+        distributions_repo.list_period_status_counts()
+        for search in ("", "2025-03 soir", "12-03-2025", "DIST-2025", "2025", "42"):
+            parts = distributions_repo.list_distributions_by_status(pay_period_id=period["id"], search=search, limit=3)
+        parts = distributions_repo.list_distributions_by_status(pay_period_id=period["id"], limit=3)
+        distributions_repo.list_distributions_page(
+            pay_period_id=period["id"], status="CONFIRMED", cursor=parts["CONFIRMED"]["next_cursor"], search="s", limit=3
+        )
+        for query in ("mardi soir", "12-03-2025", "DIST-2025-0000", "gestion"):
+            distributions_repo.search_distributions(query, limit=5)
+        audit_log.list_audit_entries(pay_period_id=period["id"], limit=5)
+        audit_log.list_audit_entries(action="status:CONFIRMED", since="2025-03-01", limit=5)
+        audit_log.list_audit_entries(actor="gestion", include_archived=True, limit=5)
+        audit_log.archive_audit(older_than_days=60, batch_size=100, now=datetime(2025, 4, 1, tzinfo=timezone.utc))
+        full = distributions_repo.get_distributions_for_period(pay_period_id=period["id"], status="CONFIRMED")
+        distributions_repo.employee_totals_for_period(pay_period_id=period["id"])
+        with db_session() as conn:
+            employee_id = conn.execute("SELECT id FROM employees ORDER BY id LIMIT 1").fetchone()["id"]
+        page = distributions_repo.employee_history(employee_id=employee_id, start_date="2025-01-01", limit=5)
+        distributions_repo.employee_history(employee_id=employee_id, cursor=page["next_cursor"], limit=5)
+        distributions_repo.employee_history_totals(employee_id=employee_id, end_date=date(2025, 6, 30))
+        list(distributions_repo.annual_declaration_rows(2025))
+        list(distributions_repo.iter_payroll_summary(start_date="2025-01-01", end_date="2025-03-31"))
+        list(distributions_repo.iter_payroll_summary(period_ids=[p["id"] for p in periods[:3]]))
+        analytics_export.export_fact_tables(os.path.join(self.tmpdir.name, "bi"), fmt="csv", chunk_size=50)
+        first = full[0]
+        distributions_repo.find_distribution_by_key(
+            pay_period_id=period["id"],
+            date_local=first["date_local"],
+            shift=first["shift"],
+            shift_instance=first["shift_instance"],
+        )
+        distributions_repo.list_distributions_by_date_shift(
+            pay_period_id=period["id"], date_local=first["date_local"], shift=first["shift"]
+        )
+        distributions_repo.next_shift_instance(
+            pay_period_id=period["id"], date_local=first["date_local"], shift=first["shift"]
+        )
+        created = distributions_repo.create_distribution(
+            pay_period_id=period["id"],
+            date_local=first["date_local"],
+            shift="TEST",
+            inputs=first["inputs"],
+            declaration_inputs=first["declaration_inputs"],
+            employees=[{**emp, "employee_id": emp["employee_number"], "name": emp["employee_name"]} for emp in first["employees"]],
+        )
+        bulk = distributions_repo.create_distributions_bulk(
+            [
+                {
+                    "pay_period_id": period["id"],
+                    "date_local": first["date_local"],
+                    "shift": "BULK",
+                    "shift_instance": instance,
+                    "inputs": first["inputs"],
+                    "declaration_inputs": first["declaration_inputs"],
+                    "employees": [{**emp, "employee_id": emp["employee_number"], "name": emp["employee_name"]} for emp in first["employees"]],
+                }
+                for instance in (1, 1, 2)
+            ]
+        )
+        self.assertEqual(len(bulk["errors"]), 1)
+        distributions_repo.set_distribution_status(created["id"], "CONFIRMED", actor="plan")
+        distributions_repo.set_distribution_status(created["id"], "UNCONFIRMED", actor="plan")
+        distributions_repo.delete_distribution(created["id"], actor="plan")
+        distributions_repo.set_distribution_status_bulk(
+            "CONFIRMED", ids=[item["id"] for item in bulk["created"]], actor="plan"
+        )
+        distributions_repo.set_distribution_status_bulk("CONFIRMED", pay_period_id=period["id"], actor="plan")
+
+        service.lock_period(period["id"])
+        distributions_repo.get_distributions_for_period(pay_period_id=period["id"], status="CONFIRMED")
+        distributions_repo.employee_totals_for_period(pay_period_id=period["id"])
+        service.mark_payed(period["id"])
+        service.revert_payed(period["id"])
+        service.unlock_period(period["id"])
+        service.admin_override_period(period["id"], {"pay_date_local": "2025-03-27"}, reason="plan")
+
+        employees_repo.list_employees()
+        employees_repo.list_employees(role="service")
+        emp_id = employees_repo.add_employee("Plan Test", "service", 4, employee_number="999")
+        employees_repo.update_employee(emp_id, points=5)
+        roster = [
+            {"id": e["id"], "number": e["employee_number"], "name": e["name"], "points": e["points"], "email": e["email"]}
+            for e in employees_repo.list_employees(role="busboy", active_only=False)
+        ]
+        employees_repo.upsert_many("busboy", roster)
+        employees_repo.delete_employee(emp_id)
+
+    def test_repository_statements_avoid_full_scans_of_large_tables(self):
+        statements = self._capture_statements(self._exercise_repositories)
+        planned = {sql.strip() for sql in statements if _PLANNED_RE.match(sql)}
+        self.assertGreater(len(planned), 20)
+
+        offenders = {}
+        with db_session() as conn:
+            for sql in sorted(planned):
+                scans = _full_scans(conn, sql)
+                if scans:
+                    offenders[" ".join(sql.split())] = scans
+        self.assertEqual(offenders, {})
+
+    def test_foreign_key_children_are_indexed(self):
+        with db_session() as conn:
+            for table, column in FK_LOOKUPS:
+                plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN SELECT 1 FROM {table} WHERE {column} = 1")]
+                self.assertTrue(any(detail.startswith("SEARCH") for detail in plan), f"{table}.{column}: {plan}")
+
+    def test_employee_number_lookup_uses_index(self):
+        with db_session() as conn:
+            plan = [
+                row[3]
+                for row in conn.execute(
+                    "EXPLAIN QUERY PLAN SELECT distribution_id FROM distribution_employees WHERE employee_number = '12'"
+                )
+            ]
+        self.assertTrue(any("idx_distribution_employees_number" in detail for detail in plan), plan)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from db.db_manager import db_session, init_db
+from db.employees_repo import add_employee
+from db.shifts_repo import ShiftJournal, hours_by_employee, list_punches, save_punches
+from payroll.pay_calendar import PayCalendarService
+
+
+class ShiftsRepoTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["TIPSPLIT_DB_PATH"] = os.path.join(self.tmpdir.name, "shifts.db")
+        init_db()
+        service = PayCalendarService()
+        schedule = service.create_schedule_version(
+            name="Test",
+            timezone_name="America/Montreal",
+            period_length_days=14,
+            pay_date_offset_days=4,
+            anchor_start_local="2025-01-05T06:00:00",
+            effective_from=date(2025, 1, 5),
+        )
+        service.ensure_periods(schedule["id"], date(2025, 1, 5), date(2025, 1, 18))
+        self.period_id = service.list_periods(schedule["id"])[0]["id"]
+        self.alice = add_employee("Alice", "service", 10)
+        self.bruno = add_employee("Bruno", "busboy", 5)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        os.environ.pop("TIPSPLIT_DB_PATH", None)
+
+    def _punch(self, employee_id, day, punch_in, punch_out):
+        return {
+            "employee_id": employee_id,
+            "work_date": day,
+            "pay_period_id": self.period_id,
+            "punch_in": punch_in,
+            "punch_out": punch_out,
+        }
+
+    def test_punches_round_trip_and_hours_are_summed_in_sql(self):
+        save_punches(
+            [
+                self._punch(self.alice, "2025-01-06", "16:00", "23:30"),
+                self._punch(self.bruno, "2025-01-06", "22:00", "02:00"),  # ends after midnight
+                self._punch(self.alice, "2025-01-13", "10:00", "14:15"),
+            ]
+        )
+        with db_session() as conn:
+            row = conn.execute(
+                "SELECT shift_start_at_utc, shift_end_at_utc FROM shifts WHERE employee_id = ?", (self.bruno,)
+            ).fetchone()
+        self.assertEqual(tuple(row), ("2025-01-07T03:00:00+00:00", "2025-01-07T07:00:00+00:00"))
+        self.assertEqual(
+            list_punches("2025-01-06"),
+            {
+                self.alice: {"in": "16:00", "out": "23:30", "hours": 7.5},
+                self.bruno: {"in": "22:00", "out": "02:00", "hours": 4.0},
+            },
+        )
+
+        # Saving the day again replaces it; empty times clear it.
+        save_punches([self._punch(self.alice, "2025-01-06", "17:00", "23:00"), self._punch(self.bruno, "2025-01-06", "", "")])
+        self.assertEqual(list_punches("2025-01-06"), {self.alice: {"in": "17:00", "out": "23:00", "hours": 6.0}})
+
+        totals = {row["name"]: (row["shifts"], row["hours"]) for row in hours_by_employee(pay_period_id=self.period_id)}
+        self.assertEqual(totals, {"Alice": (2, 10.25)})
+        weekly = hours_by_employee(start_date="2025-01-05", end_date="2025-01-18", by_week=True)
+        self.assertEqual([(row["week_start"], row["hours"]) for row in weekly], [("2025-01-05", 6.0), ("2025-01-12", 4.25)])
+        with self.assertRaises(ValueError):
+            save_punches([self._punch(self.alice, "2025-01-06", "17:00", "")])
+
+    def test_journal_writes_behind_and_shows_queued_punches(self):
+        journal = ShiftJournal(flush_seconds=60)
+        journal.record(self.alice, date(2025, 1, 6), "16:00", "20:00", pay_period_id=self.period_id)
+        journal.record(self.alice, date(2025, 1, 6), "16:00", "22:00", pay_period_id=self.period_id)
+        journal.record(self.bruno, date(2025, 1, 6), "18:00", "23:00", pay_period_id="missing-period")
+
+        self.assertEqual(list_punches("2025-01-06"), {})
+        self.assertEqual(journal.punches_for_day("2025-01-06")[self.alice]["hours"], 6.0)
+        self.assertEqual(journal.pending_count(), 2)
+
+        # The punch whose period cannot be found is dropped, the other is written.
+        journal.close()
+        self.assertEqual(journal.pending_count(), 0)
+        self.assertEqual(list_punches("2025-01-06"), {self.alice: {"in": "16:00", "out": "22:00", "hours": 6.0}})
+
+        journal = ShiftJournal(flush_seconds=60)
+        journal.record(self.alice, "2025-01-06", "", "", pay_period_id=None)
+        self.assertEqual(journal.punches_for_day("2025-01-06"), {})
+        self.assertEqual(journal.flush(), 1)
+        self.assertEqual(list_punches("2025-01-06"), {})
+        journal.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import csv
+import gzip
+import os
+import tempfile
+import tracemalloc
+import unittest
+from datetime import date
+
+from db.synthetic_data import generate_dataset
+from payroll.context import PayrollContext
+from payroll.pay_calendar import PayCalendarService
+from payroll.summary_export import export_payroll_summary_stream
+
+
+class SummaryExportTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["TIPSPLIT_DB_PATH"] = os.path.join(cls.tmpdir.name, "summary.db")
+        cls.summary = generate_dataset(years=0.5, employees=40, seed=5, end_date=date(2025, 6, 30))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+        os.environ.pop("TIPSPLIT_DB_PATH", None)
+
+    def _read(self, path, opener=open):
+        with opener(path, "rt", newline="", encoding="utf-8") as fh:
+            return list(csv.DictReader(fh))
+
+    def test_single_period_matches_pay_tab_export(self):
+        from Export import export_payroll_summary_csv
+        from Pay import PayTab
+        from db.distributions_repo import get_distributions_for_period
+
+        context = PayrollContext(PayCalendarService())
+        period = context.period_for_local_date(date(2025, 3, 12))
+        tab = PayTab.__new__(PayTab)
+        tab.employees_index, tab.employee_keys_sorted = {}, []
+        tab._index_employees_with_shifts(get_distributions_for_period(pay_period_id=period["id"], status="CONFIRMED"))
+        legacy_path = os.path.join(self.tmpdir.name, "legacy.csv")
+        export_payroll_summary_csv(
+            period["range_label"], period, tab.employees_index, tab.employee_keys_sorted, legacy_path
+        )
+
+        stream_path = os.path.join(self.tmpdir.name, "stream.csv")
+        result = export_payroll_summary_stream(stream_path, period_ids=[period["id"]])
+        self.assertEqual(result["periods"], 1)
+
+        def by_employee(rows):
+            return {row["employee_id"]: row for row in rows}
+
+        legacy = by_employee(self._read(legacy_path))
+        streamed = by_employee(self._read(stream_path))
+        self.assertEqual(set(legacy), set(streamed))
+        for key, row in legacy.items():
+            for column in ("pay_period_id", "pay_period_label", "period_start_iso", "period_end_iso", "shift_count",
+                           "hours_total", "cash_total", "A_total", "F_total", "D_total", "declared_source"):
+                self.assertEqual(streamed[key][column], row[column], (key, column))
+            self.assertAlmostEqual(float(streamed[key]["declared_amount"]), float(row["declared_amount"]), places=2)
+
+    def test_date_range_is_grouped_by_period_and_gzipped(self):
+        path = os.path.join(self.tmpdir.name, "q1.csv.gz")
+        tracemalloc.start()
+        result = export_payroll_summary_stream(path, start_date="2025-01-01", end_date=date(2025, 3, 31))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rows = self._read(path, opener=gzip.open)
+        self.assertEqual(len(rows), result["rows"])
+        self.assertGreater(result["periods"], 5)
+        starts = [row["period_start_iso"] for row in rows]
+        self.assertEqual(starts, sorted(starts))
+        self.assertTrue(all(row["period_end_iso"] >= "2025-01-01" for row in rows))
+        self.assertLess(peak, 2_000_000)
+
+        missing = os.path.join(self.tmpdir.name, "none.csv")
+        with self.assertRaises(ValueError):
+            export_payroll_summary_stream(missing)
+        self.assertFalse(os.path.exists(missing))
+
+
+if __name__ == "__main__":
+    unittest.main()
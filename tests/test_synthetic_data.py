@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from db.db_manager import db_session
+from db.synthetic_data import generate_dataset
+
+
+def _snapshot():
+    with db_session() as conn:
+        employees = conn.execute(
+            "SELECT name, role, points, employee_number, is_active FROM employees ORDER BY id"
+        ).fetchall()
+        rows = conn.execute(
+            """
+            SELECT d.dist_ref, d.date_local, d.shift, d.shift_instance, d.status,
+                   de.employee_number, de.section, de.hours, de.cash_cents, de.A_cents, de.D_cents, de.F_cents
+            FROM distributions d
+            JOIN distribution_employees de ON de.distribution_id = d.id
+            ORDER BY d.id, de.id
+            """
+        ).fetchall()
+    return [tuple(r) for r in employees], [tuple(r) for r in rows]
+
+
+class SyntheticDatasetTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        os.environ.pop("TIPSPLIT_DB_PATH", None)
+
+    def _generate(self, name, **kwargs):
+        os.environ["TIPSPLIT_DB_PATH"] = os.path.join(self.tmpdir.name, name)
+        params = dict(years=0.25, employees=40, seed=7, end_date=date(2025, 3, 31))
+        params.update(kwargs)
+        return generate_dataset(**params)
+
+    def test_same_seed_produces_identical_rows(self):
+        first = self._generate("a.db")
+        snap_a = _snapshot()
+        second = self._generate("b.db")
+        snap_b = _snapshot()
+        self.assertEqual(snap_a, snap_b)
+        self.assertEqual(first["distributions"], second["distributions"])
+
+    def test_dataset_shape(self):
+        summary = self._generate("shape.db", extra_instance_ratio=0.5)
+        self.assertGreaterEqual(summary["distributions"], 2 * 91)
+        with db_session() as conn:
+            roles = {r["role"] for r in conn.execute("SELECT DISTINCT role FROM employees")}
+            statuses = {r["status"] for r in conn.execute("SELECT DISTINCT status FROM distributions")}
+            max_instance = conn.execute("SELECT MAX(shift_instance) AS m FROM distributions").fetchone()["m"]
+            audit = conn.execute("SELECT COUNT(*) AS c FROM distribution_audit").fetchone()["c"]
+            orphan = conn.execute(
+                """
+                SELECT COUNT(*) AS c FROM distributions d
+                LEFT JOIN pay_periods p ON p.pk = d.period_pk
+                WHERE p.pk IS NULL
+                """
+            ).fetchone()["c"]
+        self.assertEqual(roles, {"service", "busboy"})
+        self.assertEqual(statuses, {"CONFIRMED", "UNCONFIRMED"})
+        self.assertEqual(max_instance, 2)
+        self.assertEqual(audit, summary["audit_rows"])
+        self.assertEqual(orphan, 0)
+
+    def test_refuses_non_empty_database(self):
+        self._generate("dup.db")
+        with self.assertRaises(ValueError):
+            generate_dataset(years=0.1, employees=10, seed=1)
+
+
+if __name__ == "__main__":
+    unittest.main()